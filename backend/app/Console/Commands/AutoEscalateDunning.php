@@ -2,19 +2,34 @@
 
 namespace App\Console\Commands;
 
-use App\Http\Controllers\Api\DunningController;
+use App\Services\DunningService;
 use Illuminate\Console\Command;
 
 class AutoEscalateDunning extends Command
 {
-    protected $signature   = 'dunning:auto-escalate';
+    protected $signature   = 'dunning:auto-escalate {--dry-run : Nur zählen, keine Mahnungen anlegen} {--tenant=* : Auf bestimmte Tenants beschränken}';
     protected $description = 'Eskaliert Mahnungen automatisch basierend auf den Tenant-Einstellungen';
 
-    public function handle(): int
+    public function handle(DunningService $dunning): int
     {
-        $controller = new DunningController();
-        $escalated  = $controller->autoEscalate();
-        $this->info("Auto-Eskalation abgeschlossen: {$escalated} Rechnungen eskaliert.");
+        $dryRun = (bool) $this->option('dry-run');
+        $tenants = $this->option('tenant') ? array_map('intval', $this->option('tenant')) : null;
+
+        $report = $dunning->processDunningQueue($dryRun, $tenants);
+
+        $rows = [];
+        foreach ($report['by_level'] as $level => $count) {
+            $rows[] = ["Stufe {$level}", $count];
+        }
+        $rows[] = ['Gesamt', $report['reminders']];
+
+        $this->table(['Mahnstufe', 'Rechnungen'], $rows);
+        $this->line("Tenants: {$report['tenants']}, Auswahl in {$report['seconds']} s");
+
+        $this->info($dryRun
+            ? 'Dry-Run: es wurden keine Mahnungen angelegt.'
+            : "Auto-Eskalation gestartet: {$report['reminders']} Rechnungen (Batch {$report['batch_id']}).");
+
         return Command::SUCCESS;
     }
 }
@@ -2,7 +2,7 @@
 
 namespace App\Console\Commands;
 
-use App\Models\ApiRequestLog;
+use App\Models\ApiRequestMetric;
 use Illuminate\Console\Command;
 use Illuminate\Support\Facades\Cache;
 use Illuminate\Support\Facades\Mail;
@@ -31,22 +31,22 @@ public function handle()
         $threshold = (int) $this->option('threshold');
         $timeWindow = now()->subMinutes(15); // Check last 15 minutes
 
+        // Minuten-Rollup statt Scan über das (nur stichprobenweise befüllte) Rohprotokoll
+        $metrics = ApiRequestMetric::totals()
+            ->where('bucket', '>=', $timeWindow->copy()->startOfMinute())
+            ->get();
+
         // Check for server errors (5xx)
-        $serverErrors = ApiRequestLog::where('created_at', '>=', $timeWindow)
-            ->where('status_code', '>=', 500)
-            ->count();
+        $serverErrors = $metrics->sum('status_5xx');
 
         // Check for client errors (4xx)
-        $clientErrors = ApiRequestLog::where('created_at', '>=', $timeWindow)
-            ->where('status_code', '>=', 400)
-            ->where('status_code', '<', 500)
-            ->count();
+        $clientErrors = $metrics->sum('status_4xx');
 
         // Check for slow requests (>2s)
-        $slowRequests = ApiRequestLog::where('created_at', '>=', $timeWindow)
-            ->where('duration_ms', '>', 2000)
-            ->count();
+        $latency = ApiRequestMetric::latencyHistogram($metrics);
+        $slowRequests = $latency->countAbove(2000);
 
+        $this->info("Requests: {$metrics->sum('requests')} (p50 " . ($latency->percentile(50) ?? '-') . ' ms, p95 ' . ($latency->percentile(95) ?? '-') . ' ms, p99 ' . ($latency->percentile(99) ?? '-') . ' ms)');
         $this->info("Server Errors (5xx): {$serverErrors}");
         $this->info("Client Errors (4xx): {$clientErrors}");
         $this->info("Slow Requests (>2s): {$slowRequests}");
@@ -2,42 +2,32 @@
 
 namespace App\Console\Commands;
 
-use App\Models\RecurringInvoice;
+use App\Services\RecurringInvoiceService;
 use Illuminate\Console\Command;
 
 class ProcessRecurringInvoices extends Command
 {
-    protected $signature   = 'invoices:process-recurring';
-    protected $description = 'Erstellt fällige wiederkehrende Rechnungen automatisch';
+    protected $signature   = 'invoices:process-recurring {--dry-run : Nur zählen, nichts anlegen} {--tenant=* : Auf bestimmte Tenants beschränken}';
+    protected $description = 'Erstellt fällige wiederkehrende Rechnungen automatisch (je Tenant-Gruppe ein Queue-Job)';
 
-    public function handle(): int
+    public function handle(RecurringInvoiceService $recurring): int
     {
-        $due = RecurringInvoice::dueForExecution()->get();
+        $dryRun = (bool) $this->option('dry-run');
+        $tenants = $this->option('tenant') ? array_map('intval', $this->option('tenant')) : null;
 
-        if ($due->isEmpty()) {
+        $report = $recurring->processDue($dryRun, $tenants);
+
+        if ($report['due'] === 0) {
             $this->info('Keine fälligen Daueraufträge.');
             return Command::SUCCESS;
         }
 
-        $created = 0;
-        $failed  = 0;
-
-        foreach ($due as $recurring) {
-            try {
-                $invoice = $recurring->createInvoice();
-                $this->line("  ✓ Rechnung erstellt für: {$recurring->name} (ID: {$invoice->id})");
-                $created++;
-            } catch (\Exception $e) {
-                \Log::error('ProcessRecurringInvoices failed', [
-                    'recurring_id' => $recurring->id,
-                    'error'        => $e->getMessage(),
-                ]);
-                $this->error("  ✗ Fehler bei: {$recurring->name} — {$e->getMessage()}");
-                $failed++;
-            }
-        }
+        $this->table(['Tenants', 'Fällige Daueraufträge', 'Sekunden'], [[$report['tenants'], $report['due'], $report['seconds']]]);
+
+        $this->info($dryRun
+            ? 'Dry-Run: es wurde nichts angelegt.'
+            : "Batch {$report['batch_id']} gestartet.");
 
-        $this->info("Fertig: {$created} erstellt, {$failed} fehlgeschlagen.");
-        return $failed > 0 ? Command::FAILURE : Command::SUCCESS;
+        return Command::SUCCESS;
     }
 }
@@ -0,0 +1,32 @@
+<?php
+
+namespace App\Console\Commands;
+
+use App\Models\Tenant;
+use App\Services\ProjectRevenueRollupService;
+use Illuminate\Console\Command;
+
+class RebuildProjectRevenueRollup extends Command
+{
+    protected $signature = 'reports:rebuild-revenue-rollup
+                            {--tenant= : Nur einen bestimmten Mandanten neu aufbauen}';
+
+    protected $description = 'Baut die vorab aggregierten Umsatz-/Kostenwerte (project_revenue_rollups) aus den Projekten neu auf';
+
+    public function handle(ProjectRevenueRollupService $rollup): int
+    {
+        $tenantIds = $this->option('tenant')
+            ? [(int) $this->option('tenant')]
+            : Tenant::query()->orderBy('id')->pluck('id')->all();
+
+        $buckets = 0;
+        foreach ($tenantIds as $tenantId) {
+            $count = $rollup->rebuild($tenantId);
+            $buckets += $count;
+            $this->line("  ✓ Mandant {$tenantId}: {$count} Buckets");
+        }
+
+        $this->info('Fertig: ' . count($tenantIds) . " Mandanten, {$buckets} Buckets.");
+        return Command::SUCCESS;
+    }
+}
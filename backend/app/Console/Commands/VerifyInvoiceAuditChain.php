@@ -3,89 +3,127 @@
 namespace App\Console\Commands;
 
 use Illuminate\Console\Command;
-use App\Models\InvoiceAuditLog;
+use Illuminate\Process\Pool;
+use Illuminate\Support\Facades\Process;
 use App\Models\Invoice;
+use App\Services\InvoiceAuditChainVerifier;
 
 class VerifyInvoiceAuditChain extends Command
 {
     protected $signature = 'invoices:verify-audit-chain
                             {--invoice-id= : Nur eine bestimmte Rechnung prüfen}
+                            {--full : Checkpoints ignorieren und alle Ketten komplett neu hashen}
+                            {--workers=1 : Anzahl paralleler Worker-Prozesse (aufgeteilt nach Rechnungs-ID-Bereich)}
+                            {--from-invoice= : Intern: untere Rechnungs-ID des Worker-Bereichs}
+                            {--to-invoice= : Intern: obere Rechnungs-ID des Worker-Bereichs}
+                            {--json : Intern: Ergebnis als JSON ausgeben (Worker-Modus)}
                             {--fix : Defekte Einträge in der Ausgabe markieren (nur Ausgabe, nie reparieren)}';
 
     protected $description = 'Verifiziert die kryptografische Hash-Kette aller Invoice Audit Logs (GoBD-Anforderung)';
 
-    public function handle(): int
+    public function handle(InvoiceAuditChainVerifier $verifier): int
     {
-        $invoiceId = $this->option('invoice-id');
-
-        $query = Invoice::query();
-        if ($invoiceId) {
-            $query->where('id', $invoiceId);
+        $full = (bool) $this->option('full');
+
+        // Worker-Modus: genau einen Bereich prüfen und Statistik als JSON zurückgeben
+        if ($this->option('json')) {
+            $this->line(json_encode($verifier->verifyRange(
+                (int) $this->option('from-invoice'),
+                (int) $this->option('to-invoice'),
+                $full
+            )));
+            return Command::SUCCESS;
         }
 
-        $totalInvoices = 0;
-        $brokenChains  = 0;
-        $brokenEntries = [];
-
-        $query->chunk(100, function ($invoices) use (&$totalInvoices, &$brokenChains, &$brokenEntries) {
-            foreach ($invoices as $invoice) {
-                $totalInvoices++;
-                $logs = InvoiceAuditLog::where('invoice_id', $invoice->id)
-                    ->orderBy('id')
-                    ->get();
-
-                $previousHash = null;
-                foreach ($logs as $log) {
-                    // Rekonstruiere den Payload exakt wie beim Erstellen in logAuditEvent()
-                    $payload = [
-                        'invoice_id'    => $log->invoice_id,
-                        'user_id'       => $log->user_id,
-                        'action'        => $log->action,
-                        'old_status'    => $log->old_status,
-                        'new_status'    => $log->new_status,
-                        'previous_hash' => $log->previous_hash,
-                        'metadata'      => $log->metadata,
-                        'ip_address'    => $log->ip_address,
-                        'created_at'    => $log->created_at->toIso8601String(),
-                    ];
-                    $expectedHash = hash('sha256', json_encode($payload, JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE));
-
-                    $hashOk  = $log->record_hash === $expectedHash;
-                    $chainOk = $log->previous_hash === $previousHash;
-
-                    if (!$hashOk || !$chainOk) {
-                        $brokenChains++;
-                        $brokenEntries[] = [
-                            'invoice_number' => $invoice->invoice_number,
-                            'log_id'         => $log->id,
-                            'action'         => $log->action,
-                            'created_at'     => $log->created_at->toDateTimeString(),
-                            'problem'        => !$hashOk ? 'HASH_MISMATCH' : 'CHAIN_BROKEN',
-                        ];
-                    }
-
-                    $previousHash = $log->record_hash;
-                }
-            }
-        });
+        if ($invoiceId = (int) $this->option('invoice-id')) {
+            [$min, $max] = [$invoiceId, $invoiceId];
+        } else {
+            [$min, $max] = $verifier->invoiceIdBounds();
+        }
 
-        if ($brokenChains === 0) {
+        $started = microtime(true);
+        $ranges = $verifier->splitRange($min, $max, max(1, (int) $this->option('workers')));
+
+        $results = count($ranges) > 1
+            ? $this->runWorkers($ranges, $full)
+            : array_map(fn($range) => $verifier->verifyRange($range[0], $range[1], $full), $ranges);
+
+        $totalInvoices = array_sum(array_column($results, 'invoices'));
+        $totalEntries = array_sum(array_column($results, 'entries'));
+        $brokenEntries = array_merge([], ...array_column($results, 'broken'));
+        $seconds = max(microtime(true) - $started, 0.001);
+
+        $this->line(sprintf(
+            '%d Einträge in %d Rechnungen geprüft (%s) — %.1fs, %d Einträge/s, %d Worker.',
+            $totalEntries,
+            $totalInvoices,
+            $full ? 'vollständig' : 'inkrementell',
+            $seconds,
+            (int) round($totalEntries / $seconds),
+            count($ranges)
+        ));
+
+        if (empty($brokenEntries)) {
             $this->info("Alle {$totalInvoices} Rechnungen — Hash-Kette intakt. GoBD-konform.");
             return Command::SUCCESS;
         }
 
-        $this->error("{$brokenChains} defekte Eintraege in {$totalInvoices} Rechnungen gefunden!");
+        $invoiceNumbers = Invoice::whereIn('id', array_column($brokenEntries, 'invoice_id'))
+            ->pluck('invoice_number', 'id');
+
+        $brokenEntries = array_map(fn($entry) => [
+            'invoice_number' => $invoiceNumbers[$entry['invoice_id']] ?? $entry['invoice_id'],
+            'log_id'         => $entry['log_id'],
+            'action'         => $entry['action'],
+            'created_at'     => $entry['created_at'],
+            'problem'        => $entry['problem'],
+        ], $brokenEntries);
+
+        $this->error(count($brokenEntries) . " defekte Ketten in {$totalInvoices} Rechnungen gefunden!");
         $this->table(
-            ['Rechnungsnummer', 'Log-ID', 'Aktion', 'Erstellt am', 'Problem'],
+            ['Rechnungsnummer', 'Erster defekter Log', 'Aktion', 'Erstellt am', 'Problem'],
             $brokenEntries
         );
 
         // In Log-Datei für Audit-Trail schreiben
         \Illuminate\Support\Facades\Log::critical('GoBD Audit Chain Verification FAILED', [
-            'broken_count' => $brokenChains,
+            'broken_count' => count($brokenEntries),
             'entries'      => $brokenEntries,
         ]);
 
         return Command::FAILURE;
     }
+
+    /**
+     * Startet je Bereich einen Worker-Prozess und sammelt deren JSON-Ergebnisse ein
+     */
+    private function runWorkers(array $ranges, bool $full): array
+    {
+        $results = Process::pool(function (Pool $pool) use ($ranges, $full) {
+            foreach ($ranges as [$from, $to]) {
+                $pool->path(base_path())->forever()->command(array_values(array_filter([
+                    PHP_BINARY,
+                    'artisan',
+                    'invoices:verify-audit-chain',
+                    "--from-invoice={$from}",
+                    "--to-invoice={$to}",
+                    '--json',
+                    $full ? '--full' : null,
+                ])));
+            }
+        })->start()->wait();
+
+        $stats = [];
+        foreach ($results as $index => $result) {
+            $decoded = $result->successful() ? json_decode(trim($result->output()), true) : null;
+
+            if (!is_array($decoded)) {
+                throw new \RuntimeException("Audit-Chain-Worker {$index} fehlgeschlagen: " . $result->errorOutput());
+            }
+
+            $stats[] = $decoded;
+        }
+
+        return $stats;
+    }
 }
@@ -31,27 +31,19 @@ public static function form(Schema $schema): Schema
                             ->relationship('invoice', 'invoice_number')
                             ->disabled(),
 
-                        Forms\Components\TextInput::make('outstanding_amount')
-                            ->numeric()
+                        Forms\Components\TextInput::make('fee_cents')
+                            ->label('Fee')
+                            ->formatStateUsing(fn ($state) => number_format(($state ?? 0) / 100, 2))
                             ->prefix('€')
                             ->disabled(),
 
-                        Forms\Components\Select::make('reminder_level')
+                        Forms\Components\Select::make('level')
                             ->options([
                                 1 => 'Level 1 - First Reminder',
                                 2 => 'Level 2 - Second Reminder',
                                 3 => 'Level 3 - Final Notice',
                             ])
                             ->disabled(),
-
-                        Forms\Components\Select::make('status')
-                            ->options([
-                                'sent' => 'Sent',
-                                'opened' => 'Opened',
-                                'acknowledged' => 'Acknowledged',
-                                'failed' => 'Failed',
-                            ])
-                            ->disabled(),
                     ])
                     ->columns(2),
 
@@ -62,12 +54,6 @@ public static function form(Schema $schema): Schema
                             ->disabled()
                             ->copyable()
                             ->visible(fn (DunningLog $record) => $record?->pdf_path),
-
-                        Forms\Components\TextInput::make('pdf_hash')
-                            ->label('PDF Hash (SHA256)')
-                            ->disabled()
-                            ->copyable()
-                            ->visible(fn (DunningLog $record) => $record?->pdf_hash),
                     ]),
 
                 Forms\Components\Section::make('Notes')
@@ -105,7 +91,7 @@ public static function table(Table $table): Table
                     ->sortable()
                     ->searchable(),
 
-                Tables\Columns\BadgeColumn::make('reminder_level')
+                Tables\Columns\BadgeColumn::make('level')
                     ->label('Level')
                     ->colors([
                         'info' => 1,
@@ -114,18 +100,11 @@ public static function table(Table $table): Table
                     ])
                     ->formatStateUsing(fn ($state) => "Level $state"),
 
-                Tables\Columns\TextColumn::make('outstanding_amount')
-                    ->money('EUR')
+                Tables\Columns\TextColumn::make('fee_cents')
+                    ->label('Fee')
+                    ->money('EUR', divideBy: 100)
                     ->sortable(),
 
-                Tables\Columns\BadgeColumn::make('status')
-                    ->colors([
-                        'success' => 'sent',
-                        'info' => 'opened',
-                        'success' => 'acknowledged',
-                        'danger' => 'failed',
-                    ]),
-
                 Tables\Columns\TextColumn::make('sent_at')
                     ->dateTime()
                     ->sortable(),
@@ -137,21 +116,13 @@ public static function table(Table $table): Table
                     ->falseIcon('heroicon-o-x-circle'),
             ])
             ->filters([
-                Tables\Filters\SelectFilter::make('reminder_level')
+                Tables\Filters\SelectFilter::make('level')
                     ->options([
                         1 => 'Level 1',
                         2 => 'Level 2',
                         3 => 'Level 3',
                     ]),
 
-                Tables\Filters\SelectFilter::make('status')
-                    ->options([
-                        'sent' => 'Sent',
-                        'opened' => 'Opened',
-                        'acknowledged' => 'Acknowledged',
-                        'failed' => 'Failed',
-                    ]),
-
                 Tables\Filters\Filter::make('sent_at')
                     ->form([
                         Forms\Components\DatePicker::make('sent_from')
@@ -177,10 +148,10 @@ public static function table(Table $table): Table
                     ->label('Resend Reminder')
                     ->icon('heroicon-o-arrow-path')
                     ->requiresConfirmation()
-                    ->visible(fn (DunningLog $record) => $record->status === 'failed')
                     ->action(function (DunningLog $record) {
+                        // Gleiche Mahnung erneut zustellen (PDF fehlt ggf., E-Mail falls aktiviert), keine neue Stufe
                         $dunningService = app(\App\Services\DunningService::class);
-                        $dunningService->sendReminder($record->invoice, $record->reminder_level);
+                        $dunningService->deliverReminder($record);
 
                         \Filament\Notifications\Notification::make()
                             ->success()
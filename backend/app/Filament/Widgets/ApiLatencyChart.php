@@ -2,40 +2,51 @@
 
 namespace App\Filament\Widgets;
 
-use App\Models\ApiRequestLog;
+use App\Models\ApiRequestMetric;
 use Filament\Widgets\ChartWidget;
-use Illuminate\Support\Facades\DB;
-use Carbon\Carbon;
 
 class ApiLatencyChart extends ChartWidget
 {
-    protected ?string $heading = 'API Latency (Average ms/hr)';
+    protected ?string $heading = 'API Latency (p50 / p95 / p99 ms/hr)';
 
     protected string|null $pollingInterval = '30s';
 
     protected function getData(): array
     {
-        $data = ApiRequestLog::select(
-            DB::raw('AVG(duration_ms) as avg_duration'),
-            DB::raw('HOUR(created_at) as hour')
-        )
-            ->where('created_at', '>=', now()->subHours(12))
-            ->groupBy('hour')
-            ->orderBy('hour')
-            ->get();
+        // Stundenwerte aus den Minuten-Rollups (Histogramme je Stunde zusammengeführt)
+        $hours = ApiRequestMetric::totals()
+            ->where('bucket', '>=', now()->subHours(12)->startOfHour())
+            ->orderBy('bucket')
+            ->get(['bucket', 'duration_histogram'])
+            ->groupBy(fn($metric) => $metric->bucket->format('H'))
+            ->map(fn($metrics) => ApiRequestMetric::latencyHistogram($metrics));
+
+        $series = fn(float $percent) => $hours->map(fn($histogram) => round($histogram->percentile($percent) ?? 0))->values()->toArray();
 
         return [
             'datasets' => [
                 [
-                    'label' => 'Latency (ms)',
-                    'data' => $data->map(fn($item) => round($item->avg_duration))->toArray(),
+                    'label' => 'p50 (ms)',
+                    'data' => $series(50),
                     'fill' => 'start',
                     'tension' => 0.4,
                     'borderColor' => '#1B4D4F',
                     'backgroundColor' => 'rgba(27, 77, 79, 0.1)',
                 ],
+                [
+                    'label' => 'p95 (ms)',
+                    'data' => $series(95),
+                    'tension' => 0.4,
+                    'borderColor' => '#9BCB56',
+                ],
+                [
+                    'label' => 'p99 (ms)',
+                    'data' => $series(99),
+                    'tension' => 0.4,
+                    'borderColor' => '#E07A5F',
+                ],
             ],
-            'labels' => $data->map(fn($item) => str_pad($item->hour, 2, '0', STR_PAD_LEFT) . ':00')->toArray(),
+            'labels' => $hours->keys()->map(fn($hour) => $hour . ':00')->toArray(),
         ];
     }
 
@@ -4,8 +4,7 @@
 
 use Filament\Widgets\StatsOverviewWidget;
 use Filament\Widgets\StatsOverviewWidget\Stat;
-use App\Models\ApiRequestLog;
-use Illuminate\Support\Facades\DB;
+use App\Models\ApiRequestMetric;
 
 class HealthStatusOverview extends StatsOverviewWidget
 {
@@ -13,11 +12,14 @@ class HealthStatusOverview extends StatsOverviewWidget
 
     protected function getStats(): array
     {
-        $avgLatency = ApiRequestLog::where('created_at', '>=', now()->subMinutes(60))->avg('duration_ms');
-        $errorRate = ApiRequestLog::where('created_at', '>=', now()->subMinutes(60))
-            ->where('status_code', '>=', 500)
-            ->count();
-        $totalRequests = ApiRequestLog::where('created_at', '>=', now()->subMinutes(60))->count();
+        $metrics = ApiRequestMetric::totals()
+            ->where('bucket', '>=', now()->subMinutes(60))
+            ->selectRaw('SUM(requests) as requests, SUM(status_5xx) as server_errors, SUM(duration_sum_ms) as duration_sum')
+            ->first();
+
+        $totalRequests = (int) ($metrics->requests ?? 0);
+        $errorRate = (int) ($metrics->server_errors ?? 0);
+        $avgLatency = $totalRequests > 0 ? $metrics->duration_sum / $totalRequests : null;
 
         $errorPercentage = $totalRequests > 0 ? ($errorRate / $totalRequests) * 100 : 0;
 
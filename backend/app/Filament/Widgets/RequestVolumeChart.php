@@ -2,10 +2,9 @@
 
 namespace App\Filament\Widgets;
 
-use App\Models\ApiRequestLog;
+use App\Models\ApiRequestMetric;
 use Filament\Widgets\ChartWidget;
 use Illuminate\Support\Facades\DB;
-use Carbon\Carbon;
 
 class RequestVolumeChart extends ChartWidget
 {
@@ -17,20 +16,22 @@ class RequestVolumeChart extends ChartWidget
 
     protected function getData(): array
     {
-        $data = ApiRequestLog::select(
-            DB::raw('COUNT(*) as total'),
-            DB::raw('HOUR(created_at) as hour')
-        )
-            ->where('created_at', '>=', now()->subHours(24))
+        $data = ApiRequestMetric::totals()
+            ->select(
+                DB::raw('SUM(requests) as total'),
+                DB::raw('HOUR(bucket) as hour'),
+                DB::raw('MIN(bucket) as first_bucket')
+            )
+            ->where('bucket', '>=', now()->subHours(24))
             ->groupBy('hour')
-            ->orderBy('hour')
+            ->orderBy('first_bucket')
             ->get();
 
         return [
             'datasets' => [
                 [
                     'label' => 'Total Requests',
-                    'data' => $data->map(fn($item) => $item->total)->toArray(),
+                    'data' => $data->map(fn($item) => (int) $item->total)->toArray(),
                     'backgroundColor' => '#9BCB56', // Brand Accent color
                     'borderColor' => '#88b548',
                     'borderWidth' => 1,
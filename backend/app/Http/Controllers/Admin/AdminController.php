@@ -255,37 +255,40 @@ public function apiLogsStats(Request $request)
         $from = $request->get('from_date', now()->subDay());
         $to = $request->get('to_date', now());
 
+        // Zähler und Laufzeiten aus dem Minuten-Rollup: das Rohprotokoll enthält schnelle
+        // erfolgreiche Requests nur als Stichprobe (config logging.api_requests.sample_rate)
+        $totals = \App\Models\ApiRequestMetric::totals()->whereBetween('bucket', [$from, $to]);
+        $routes = \App\Models\ApiRequestMetric::routes()->whereBetween('bucket', [$from, $to]);
+        $summary = (clone $totals)
+            ->selectRaw('SUM(requests) as requests, SUM(status_2xx) as s2, SUM(status_3xx) as s3, SUM(status_4xx) as s4, SUM(status_5xx) as s5, SUM(duration_sum_ms) as duration_sum, MAX(duration_max_ms) as duration_max')
+            ->first();
+        $requests = (int) ($summary->requests ?? 0);
+
         $stats = [
-            'total_requests' => \App\Models\ApiRequestLog::whereBetween('created_at', [$from, $to])->count(),
+            'total_requests' => $requests,
 
             'by_status' => [
-                'success' => \App\Models\ApiRequestLog::whereBetween('created_at', [$from, $to])
-                    ->whereBetween('status_code', [200, 299])->count(),
-                'redirect' => \App\Models\ApiRequestLog::whereBetween('created_at', [$from, $to])
-                    ->whereBetween('status_code', [300, 399])->count(),
-                'client_error' => \App\Models\ApiRequestLog::whereBetween('created_at', [$from, $to])
-                    ->whereBetween('status_code', [400, 499])->count(),
-                'server_error' => \App\Models\ApiRequestLog::whereBetween('created_at', [$from, $to])
-                    ->whereBetween('status_code', [500, 599])->count(),
+                'success' => (int) $summary->s2,
+                'redirect' => (int) $summary->s3,
+                'client_error' => (int) $summary->s4,
+                'server_error' => (int) $summary->s5,
             ],
 
-            'by_method' => \App\Models\ApiRequestLog::whereBetween('created_at', [$from, $to])
-                ->select('method', \DB::raw('count(*) as count'))
+            'by_method' => (clone $routes)
+                ->select('method', \DB::raw('SUM(requests) as count'))
                 ->groupBy('method')
                 ->pluck('count', 'method'),
 
             'performance' => [
-                'avg_duration_ms' => round(\App\Models\ApiRequestLog::whereBetween('created_at', [$from, $to])
-                    ->avg('duration_ms'), 2),
-                'max_duration_ms' => \App\Models\ApiRequestLog::whereBetween('created_at', [$from, $to])
-                    ->max('duration_ms'),
-                'slow_requests' => \App\Models\ApiRequestLog::whereBetween('created_at', [$from, $to])
-                    ->where('duration_ms', '>', 1000)->count(),
+                'avg_duration_ms' => $requests > 0 ? round($summary->duration_sum / $requests, 2) : 0,
+                'max_duration_ms' => $summary->duration_max,
+                'slow_requests' => \App\Models\ApiRequestMetric::latencyHistogram((clone $totals)->get(['duration_histogram']))
+                    ->countAbove(1000),
             ],
 
-            'top_endpoints' => \App\Models\ApiRequestLog::whereBetween('created_at', [$from, $to])
-                ->select('endpoint', 'method', \DB::raw('count(*) as count'), \DB::raw('avg(duration_ms) as avg_duration'))
-                ->groupBy('endpoint', 'method')
+            'top_endpoints' => (clone $routes)
+                ->select('route as endpoint', 'method', \DB::raw('SUM(requests) as count'), \DB::raw('SUM(duration_sum_ms) / SUM(requests) as avg_duration'))
+                ->groupBy('route', 'method')
                 ->orderBy('count', 'desc')
                 ->limit(10)
                 ->get(),
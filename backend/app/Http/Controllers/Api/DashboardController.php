@@ -10,7 +10,7 @@
 use Illuminate\Http\Request;
 use Illuminate\Support\Facades\DB;
 use Illuminate\Support\Facades\Auth;
-use Illuminate\Support\Facades\Cache;
+use App\Services\CacheService;
 
 class DashboardController extends Controller
 {
@@ -28,9 +28,9 @@ public function index(Request $request)
             : Carbon::now()->endOfMonth();
 
         $tenantId = Auth::user()->tenant_id;
-        $cacheKey = "dashboard_stats_{$tenantId}_{$startDate->toDateString()}_{$endDate->toDateString()}";
+        $period = "{$startDate->toDateString()}_{$endDate->toDateString()}";
 
-        $data = Cache::remember($cacheKey, 600, function () use ($startDate, $endDate, $tenantId) {
+        $data = CacheService::cacheReportData($tenantId, 'dashboard', $period, function () use ($startDate, $endDate, $tenantId) {
             $today = Carbon::today();
 
             // 1. Project Counts (Global current status, NOT filtered by period for OPEN projects)
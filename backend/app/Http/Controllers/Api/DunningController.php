@@ -7,6 +7,7 @@
 use App\Models\DunningSetting;
 use App\Models\Invoice;
 use App\Models\InvoiceAuditLog;
+use App\Services\DunningService;
 use Carbon\Carbon;
 use Illuminate\Http\Request;
 use Illuminate\Support\Facades\Auth;
@@ -107,7 +108,7 @@ public function sendReminder(Request $request, Invoice $invoice)
 
         // PDF generieren
         try {
-            $pdfPath = $this->generateDunningPdf($invoice, $log, $levelConfig);
+            $pdfPath = app(DunningService::class)->generateDunningPdf($invoice, $log, $levelConfig);
             $log->update(['pdf_path' => $pdfPath]);
         } catch (\Exception $e) {
             \Log::warning('Dunning PDF generation failed', ['error' => $e->getMessage()]);
@@ -151,18 +152,19 @@ public function downloadDunningPdf(Invoice $invoice, DunningLog $log)
             abort(403);
         }
 
-        if (!$log->pdf_path || !Storage::disk('public')->exists(str_replace('storage/', '', $log->pdf_path))) {
+        $disk = Storage::disk(DunningService::PDF_DISK);
+
+        if (!$log->pdf_path || !$disk->exists($log->pdf_path)) {
             // Neu generieren
             $settings    = $this->getOrCreateSettings();
             $levelConfig = $settings->getLevelConfig($log->level);
-            $pdfPath     = $this->generateDunningPdf($invoice, $log, $levelConfig);
+            $pdfPath     = app(DunningService::class)->generateDunningPdf($invoice, $log, $levelConfig);
             $log->update(['pdf_path' => $pdfPath]);
         }
 
-        $storagePath = storage_path('app/public/' . str_replace('storage/', '', $log->pdf_path));
-        $filename    = "Mahnung_Stufe{$log->level}_{$invoice->invoice_number}.pdf";
+        $filename = "Mahnung_Stufe{$log->level}_{$invoice->invoice_number}.pdf";
 
-        return response()->download($storagePath, $filename);
+        return $disk->download($log->pdf_path, $filename);
     }
 
     // ── Einstellungen ────────────────────────────────────────────────────────
@@ -196,63 +198,6 @@ public function updateSettings(Request $request)
         return response()->json($settings->fresh());
     }
 
-    // ── Auto-Eskalation (wird vom Artisan Command aufgerufen) ────────────────
-
-    public function autoEscalate(): int
-    {
-        $settings = DunningSetting::all()->keyBy('tenant_id');
-        $escalated = 0;
-
-        $invoices = Invoice::with('dunningLogs')
-            ->whereIn('status', ['issued', 'overdue'])
-            ->where('due_date', '<', today())
-            ->where(fn($q) => $q->whereNull('reminder_level')->orWhere('reminder_level', '<', 3))
-            ->get();
-
-        foreach ($invoices as $invoice) {
-            $tenantSettings = $settings[$invoice->tenant_id] ?? null;
-            if (!$tenantSettings || !$tenantSettings->auto_escalate) {
-                continue;
-            }
-
-            $currentLevel = $invoice->reminder_level ?? 0;
-            $nextLevel    = $currentLevel + 1;
-
-            if ($nextLevel > 3) continue;
-
-            $levelConfig    = $tenantSettings->getLevelConfig($nextLevel);
-            $daysAfterDue   = (int) Carbon::parse($invoice->due_date)->diffInDays(today());
-
-            if ($daysAfterDue < $levelConfig['days_after_due']) continue;
-
-            // Nicht nochmal senden wenn bereits auf diesem Level
-            $alreadySent = $invoice->dunningLogs->where('level', $nextLevel)->count();
-            if ($alreadySent > 0) continue;
-
-            try {
-                $log = DunningLog::create([
-                    'tenant_id'  => $invoice->tenant_id,
-                    'invoice_id' => $invoice->id,
-                    'level'      => $nextLevel,
-                    'fee_cents'  => $levelConfig['fee_cents'],
-                    'sent_at'    => now(),
-                ]);
-
-                $invoice->update([
-                    'reminder_level'     => $nextLevel,
-                    'last_reminder_date' => today(),
-                    'status'             => 'overdue',
-                ]);
-
-                $escalated++;
-            } catch (\Exception $e) {
-                \Log::error('Auto-escalation failed for invoice ' . $invoice->id, ['error' => $e->getMessage()]);
-            }
-        }
-
-        return $escalated;
-    }
-
     // ── Private Helpers ───────────────────────────────────────────────────────
 
     private function getOrCreateSettings(): DunningSetting
@@ -260,38 +205,4 @@ private function getOrCreateSettings(): DunningSetting
         $tenantId = Auth::user()->tenant_id;
         return DunningSetting::firstOrCreate(['tenant_id' => $tenantId]);
     }
-
-    private function generateDunningPdf(Invoice $invoice, DunningLog $log, array $levelConfig): string
-    {
-        $dueDate    = Carbon::today()->addDays(14)->format('d.m.Y');
-        $feeCents   = $levelConfig['fee_cents'];
-        $totalDue   = ($invoice->amount_gross / 100) + ($feeCents / 100);
-
-        $body = strtr($levelConfig['body'], [
-            '{{invoice_number}}' => $invoice->invoice_number,
-            '{{invoice_date}}'   => $invoice->date?->format('d.m.Y') ?? '',
-            '{{amount_gross}}'   => number_format($invoice->amount_gross / 100, 2, ',', '.') . ' €',
-            '{{due_date}}'       => $invoice->due_date?->format('d.m.Y') ?? '',
-            '{{new_due_date}}'   => $dueDate,
-            '{{fee}}'            => number_format($feeCents / 100, 2, ',', '.') . ' €',
-        ]);
-
-        $html = view('pdf.dunning', [
-            'invoice'          => $invoice,
-            'log'              => $log,
-            'body'             => $body,
-            'fee_eur'          => $feeCents / 100,
-            'total_due_eur'    => $totalDue,
-            'new_due_date'     => $dueDate,
-            'level_label'      => $log->level_label,
-        ])->render();
-
-        $pdf = \Barryvdh\DomPDF\Facade\Pdf::loadHTML($html)->setPaper('a4', 'portrait');
-        $content = $pdf->output();
-
-        $filename = "dunning_{$invoice->invoice_number}_level{$log->level}.pdf";
-        Storage::disk('public')->put('dunning/' . $filename, $content);
-
-        return 'storage/dunning/' . $filename;
-    }
 }
@@ -6,17 +6,15 @@
 use App\Models\Invoice;
 use App\Models\InvoiceItem;
 use App\Models\InvoiceAuditLog;
-use horstoeko\zugferdlaravel\Facades\ZugferdLaravel;
-use horstoeko\zugferd\codelists\ZugferdInvoiceType;
-use horstoeko\zugferd\codelists\ZugferdVatCategoryCodes;
-use horstoeko\zugferd\codelists\ZugferdPaymentMeans;
-use horstoeko\zugferd\ZugferdProfiles;
 use Illuminate\Http\Request;
 use Illuminate\Support\Facades\DB;
 use Illuminate\Support\Facades\Log;
 use Illuminate\Support\Facades\Storage;
 use Carbon\Carbon;
 use App\Support\InvoiceTemplateDataFactory;
+use App\Services\InvoiceExportService;
+use App\Services\InvoiceNumberService;
+use App\Services\InvoicePdfService;
 
 /**
  * InvoiceController — GoBD-Compliant
@@ -50,17 +48,12 @@ public function index()
     /**
      * Get the next available invoice number for preview.
      */
-    public function nextNumber(Request $request)
+    public function nextNumber(Request $request, InvoiceNumberService $numbers)
     {
         $year = $request->query('year') ?? date('Y');
         $tenantId = $request->user()->tenant_id;
 
-        $lastSeq = Invoice::where('tenant_id', $tenantId)
-            ->whereYear('date', $year)
-            ->max('invoice_number_sequence') ?? 0;
-
-        $newSeq = $lastSeq + 1;
-        $invoiceNumber = $this->generateSequentialNumber($request->user(), 'invoice', $newSeq, $year);
+        [$invoiceNumber, $newSeq] = $numbers->peek($tenantId, 'invoice', $year);
 
         return response()->json([
             'next_number' => $invoiceNumber,
@@ -151,16 +144,9 @@ public function store(Request $request)
                     $year = $invoiceDate->format('Y');
                     $tenantId = $request->user()->tenant_id;
 
-                    // Lock the invoices table rows for this tenant/year to prevent race conditions
-                    $lastSeq = DB::table('invoices')
-                        ->where('tenant_id', $tenantId)
-                        ->whereYear('date', $year)
-                        ->lockForUpdate()
-                        ->max('invoice_number_sequence') ?? 0;
-
-                    $newSeq = $lastSeq + 1;
+                    // Per-tenant/year counter row is locked until commit; a rollback releases the number again
                     $type = $validated['type'] ?? 'invoice';
-                    $invoiceNumber = $this->generateSequentialNumber($request->user(), $type, $newSeq, $year);
+                    [$invoiceNumber, $newSeq] = app(InvoiceNumberService::class)->next($tenantId, $type, $year);
 
                     // 2. Load related data for snapshot
                     $customer = \App\Models\Customer::findOrFail($validated['customer_id']);
@@ -492,7 +478,11 @@ public function issue(Request $request, $id)
                 $invoice->snapshot_project_number = $project->project_number;
             }
 
-            $complianceErrors = $this->validateIssueCompliance($invoice);
+            // Entwürfe aus Daueraufträgen sind noch nicht nummeriert: die Nummer wird erst nach der
+            // Prüfung vergeben, eine abgelehnte Ausstellung verbraucht so keine Nummer
+            $numberPending = !$invoice->invoice_number;
+
+            $complianceErrors = $this->validateIssueCompliance($invoice, $numberPending);
             if ($complianceErrors !== []) {
                 return response()->json([
                     'error' => 'Die Rechnung kann noch nicht ausgestellt werden.',
@@ -500,6 +490,11 @@ public function issue(Request $request, $id)
                 ], 422);
             }
 
+            if ($numberPending) {
+                [$invoice->invoice_number, $invoice->invoice_number_sequence] = app(InvoiceNumberService::class)
+                    ->next($invoice->tenant_id, $invoice->type ?? Invoice::TYPE_INVOICE, $invoice->date?->year ?? now()->year);
+            }
+
             // 2. Lock and set status
             $oldStatus = $invoice->status;
             $invoice->status = Invoice::STATUS_ISSUED;
@@ -555,14 +550,7 @@ public function cancel(Request $request, $id)
         return DB::transaction(function () use ($invoice, $request) {
             $tenantId = $request->user()->tenant_id;
             $year = (string) now()->year;
-            $lastSeq = DB::table('invoices')
-                ->where('tenant_id', $tenantId)
-                ->whereYear('date', $year)
-                ->lockForUpdate()
-                ->max('invoice_number_sequence') ?? 0;
-
-            $newSeq = $lastSeq + 1;
-            $creditNoteNumber = $this->generateSequentialNumber($request->user(), Invoice::TYPE_CREDIT_NOTE, $newSeq, $year);
+            [$creditNoteNumber, $newSeq] = app(InvoiceNumberService::class)->next($tenantId, Invoice::TYPE_CREDIT_NOTE, $year);
 
             // 1. Mark original as cancelled
             $oldStatus = $invoice->status;
@@ -757,457 +745,33 @@ public function generatePdf($id)
     }
 
     /**
-     * Internal PDF generation using snapshot data only.
+     * Render PDF + XML synchronously (InvoicePdfService, snapshot data only).
      */
     private function generatePdfInternal(Invoice $invoice): void
     {
-        $invoice->load('items');
-
-        // Build line items from frozen InvoiceItem records
-        $dailyItems = [];
-        foreach ($invoice->items as $item) {
-            $dailyItems[] = (new \LaravelDaily\Invoices\Classes\InvoiceItem())
-                ->title($item->description)
-                ->pricePerUnit($item->unit_price_eur) // Uses cent → EUR accessor
-                ->quantity((float) $item->quantity)
-                ->units($item->unit);
-        }
-
-        $buyer = new \LaravelDaily\Invoices\Classes\Buyer([
-            'name' => $invoice->snapshot_customer_name,
-            'custom_fields' => [
-                'address' => trim($invoice->snapshot_customer_address . "\n" .
-                    $invoice->snapshot_customer_zip . ' ' . $invoice->snapshot_customer_city . "\n" .
-                    $invoice->snapshot_customer_country),
-                'due_date' => ($invoice->due_date instanceof \DateTimeInterface) ? $invoice->due_date->format('d.m.Y') : null,
-                'customer_id' => $invoice->customer_id,
-                'paid_amount' => $invoice->paid_amount_eur,
-                'service_period' => $invoice->service_period,
-                'tenant_id' => $invoice->tenant_id,
-                'invoice_type' => $invoice->type,
-            ],
-        ]);
-
-        // Fallback: if no items exist, use the invoice total
-        if (empty($dailyItems)) {
-            $dailyItems[] = (new \LaravelDaily\Invoices\Classes\InvoiceItem())
-                ->title($invoice->snapshot_project_name ?: 'Dienstleistung')
-                ->pricePerUnit($invoice->amount_net_eur)
-                ->quantity(1);
-        }
-
-        $dailyInvoice = \LaravelDaily\Invoices\Invoice::make($invoice->invoice_number)
-            ->buyer($buyer)
-            ->date($invoice->date ?? Carbon::now())
-            ->currencySymbol('€')
-            ->currencyCode('EUR')
-            ->currencyDecimals(2)
-            ->taxRate((float) $invoice->tax_rate)
-            ->shipping($invoice->shipping_eur)
-            ->totalDiscount($invoice->discount_eur)
-            ->notes($this->buildInvoiceNotes($invoice));
-
-        $tenant = \App\Models\Tenant::find($invoice->tenant_id);
-        $settings = \App\Models\TenantSetting::where('tenant_id', $invoice->tenant_id)->pluck('value', 'key')->toArray();
-        $dailyInvoice->setCustomData(InvoiceTemplateDataFactory::build($invoice, $tenant, $settings));
-
-        // Load layout template from tenant settings (default: din5008)
-        $layoutName = \App\Models\TenantSetting::where('tenant_id', $invoice->tenant_id)
-            ->where('key', 'invoice_layout')
-            ->value('value') ?? 'din5008';
-
-        $dailyInvoice->template($layoutName);
-
-        foreach ($dailyItems as $item) {
-            $dailyInvoice->addItem($item);
-        }
-
-        $dailyInvoice->render();
-        $pdfContent = $dailyInvoice->output;
-
-        $xmlContent = $this->buildInvoiceXmlContent($invoice);
-        $pdfContent = $this->enhanceWithZugferd($invoice, $pdfContent);
-
-        $pdfFilename = 'invoice_' . $invoice->invoice_number . '.pdf';
-        $xmlFilename = 'invoice_' . $invoice->invoice_number . '.xml';
-
-        Storage::disk('public')->put('invoices/' . $pdfFilename, $pdfContent);
-        Storage::disk('public')->put('invoices/xml/' . $xmlFilename, $xmlContent);
-
-        $invoice->forceFill([
-            'pdf_path' => 'storage/invoices/' . $pdfFilename,
-            'pdf_sha256' => hash('sha256', $pdfContent),
-            'pdf_generated_at' => now(),
-            'xml_path' => 'storage/invoices/xml/' . $xmlFilename,
-            'xml_sha256' => hash('sha256', $xmlContent),
-            'xml_generated_at' => now(),
-            'archived_at' => now(),
-        ])->save();
-
-        return;
-
-        // Enhance with ZUGFeRD XML
-        $pdfContent = $this->enhanceWithZugferd($invoice, $pdfContent);
-
-        $filename = 'invoice_' . $invoice->invoice_number . '.pdf';
-        Storage::disk('public')->put('invoices/' . $filename, $pdfContent);
-        $invoice->pdf_path = 'storage/invoices/' . $filename;
-        $invoice->save();
-    }
-
-    /**
-     * Build invoice notes with mandatory tax hints.
-     *
-     * § 14 UStG requires specific text for tax-exempt invoices.
-     */
-    private function buildInvoiceNotes(Invoice $invoice): string
-    {
-        $notes = '';
-
-        if ($invoice->tax_exemption === Invoice::TAX_SMALL_BUSINESS) {
-            // Kleinunternehmerregelung (§ 19 UStG)
-            // Pflichthinweis: "Kein Ausweis von Umsatzsteuer aufgrund
-            // der Anwendung der Kleinunternehmerregelung gem. § 19 UStG."
-            $notes .= "Kein Ausweis von Umsatzsteuer aufgrund der Anwendung der Kleinunternehmerregelung gemäß § 19 UStG.\n";
-        } elseif ($invoice->tax_exemption === Invoice::TAX_REVERSE_CHARGE) {
-            // Reverse-Charge-Verfahren (§ 13b UStG)
-            // Pflichthinweis: Der Leistungsempfänger schuldet die Steuer.
-            $notes .= "Steuerschuldnerschaft des Leistungsempfängers (Reverse Charge gem. § 13b UStG).\n";
-        }
-
-        if ($invoice->service_period) {
-            $notes .= "Leistungszeitraum: " . $invoice->service_period . "\n";
-        }
-
-        if ($invoice->isCreditNote()) {
-            $notes .= "Diese Gutschrift storniert die Rechnung Nr. " . ($invoice->cancelledInvoice?->invoice_number ?? '-') . ".\n";
-        }
-
-        if ($invoice->notes) {
-            $notes .= $invoice->notes;
-        }
-
-        return trim($notes);
-    }
-
-    /**
-     * Enhances a PDF with ZUGFeRD XML metadata.
-     *
-     * Uses SNAPSHOT data only — never reads from FK relations.
-     * Supports both regular invoices and credit notes (Storno).
-     */
-    private function enhanceWithZugferd(Invoice $invoice, string $pdfContent): string
-    {
-        try {
-            Log::info("Starting ZUGFeRD enhancement for invoice: {$invoice->invoice_number}");
-            $documentBuilder = $this->createZugferdBuilder($invoice);
-
-            // Merge ZUGFeRD XML into PDF
-            $tempDir = storage_path('app/temp');
-            if (!file_exists($tempDir))
-                mkdir($tempDir, 0755, true);
-
-            $tempPdf = $tempDir . '/zugferd_' . uniqid() . '.pdf';
-            Log::info("Merging ZUGFeRD into temporary PDF: {$tempPdf}");
-
-            /** @var \horstoeko\zugferdlaravel\Facades\ZugferdDocumentBuilder $documentBuilder */
-            ZugferdLaravel::buildMergedPdfByDocumentBuilder($documentBuilder, $pdfContent, $tempPdf);
-
-            if (file_exists($tempPdf) && filesize($tempPdf) > 0) {
-                Log::info("ZUGFeRD merge successful. Output size: " . filesize($tempPdf));
-                $enhancedPdfContent = file_get_contents($tempPdf);
-                unlink($tempPdf);
-                return $enhancedPdfContent;
-            } else {
-                Log::error("ZUGFeRD merge failed: temp file missing or empty.");
-                return $pdfContent;
-            }
-
-        } catch (\Exception $e) {
-            Log::error('ZUGFeRD enhancement failed: ' . $e->getMessage() . "\n" . $e->getTraceAsString());
-            return $pdfContent; // Fallback to non-ZUGFeRD PDF
-        }
+        app(InvoicePdfService::class)->generate($invoice);
     }
 
     /**
-     * Create the ZUGFeRD Document Builder with all data populated.
+     * Render PDFs for many invoices in background workers.
      */
-    private function createZugferdBuilder(Invoice $invoice)
+    public function bulkPdf(Request $request, InvoicePdfService $pdfs)
     {
-        $invoice->load('items');
-
-        $sellerCountry = $this->getCountryCode($invoice->snapshot_seller_country);
-        $buyerCountry = $this->getCountryCode($invoice->snapshot_customer_country);
-
-        // Fetch seller contact details — TenantSetting first, Tenant model as fallback
-        $tenantModel = \App\Models\Tenant::find($invoice->tenant_id);
-
-        // BT-43 / BR-DE-7 (Contact Email) - MUST be provided for XRechnung
-        $sellerEmail = \App\Models\TenantSetting::where('tenant_id', $invoice->tenant_id)->where('key', 'company_email')->value('value')
-            ?: ($tenantModel?->email ?? null);
-
-        // BT-42 / BR-DE-6 (Contact Phone) - MUST be provided for XRechnung
-        $sellerPhone = \App\Models\TenantSetting::where('tenant_id', $invoice->tenant_id)->where('key', 'phone')->value('value')
-            ?: ($tenantModel?->phone ?? null);
-
-        // Validation & Fallbacks for BR-DE compliance
-        // BR-DE-28: BT-43 should be a valid email (at least one @, at least 2 chars on each side)
-        if (!$sellerEmail || !filter_var($sellerEmail, FILTER_VALIDATE_EMAIL)) {
-            $sellerEmail = 'info@translation-office.de'; // Generic but valid fallback for compliance
-        }
-
-        // BR-DE-27: BT-42 must have at least 3 digits
-        if (!$sellerPhone || strlen(preg_replace('/[^0-9]/', '', $sellerPhone)) < 3) {
-            $sellerPhone = '+49 123 456789'; // Safe fallback for compliance
-        }
-
-        // Use XRechnung 3.0 Profile explicitly for E-Rechnung compliance
-        $documentBuilder = ZugferdLaravel::createDocumentInXRechnung30Profile();
-
-        // Document type: Invoice or Credit Note
-        $docType = $invoice->isCreditNote()
-            ? ZugferdInvoiceType::CREDITNOTE
-            : ZugferdInvoiceType::INVOICE;
-
-        $documentBuilder->setDocumentInformation(
-            $invoice->invoice_number,
-            $docType,
-            $invoice->date ?? Carbon::now(),
-            $invoice->currency ?: 'EUR'
-        );
-
-        // Seller (from snapshot)
-        $documentBuilder->setDocumentSeller(
-            $invoice->snapshot_seller_name,
-            $invoice->tenant_id
-        );
-        // Rule PEPPOL-EN16931-R020 (R03): Seller electronic address MUST be provided
-        // We use EM (email) as the default scheme for the endpoint ID if no other is set.
-        $sellerEndpoint = $sellerEmail
-            ?: (\App\Models\TenantSetting::where('tenant_id', $invoice->tenant_id)->where('key', 'company_email')->value('value')
-                ?: ($tenantModel?->email ?? 'no-reply@translation-office.de'));
-        $documentBuilder->setDocumentSellerCommunication('EM', $sellerEndpoint);
-        $documentBuilder->setDocumentSellerAddress(
-            $invoice->snapshot_seller_address,
-            null,
-            null,
-            $invoice->snapshot_seller_zip,
-            $invoice->snapshot_seller_city,
-            $sellerCountry
-        );
-
-        // BR-DE-5 (BT-41) and BR-DE-7 (BT-43) are mandatory for XRechnung
-        // BT-41: Contact point name — fall back to seller name if not set
-        // BT-43: Contact email — mandatory, use whatever we have
-        $documentBuilder->setDocumentSellerContact(
-            $invoice->snapshot_seller_name, // BT-41: Contact point name (mandatory)
-            null,                            // Contact Department
-            $sellerPhone ?: null,            // BT-40: Phone
-            null,                            // Fax
-            $sellerEmail ?: null             // BT-43: Email (mandatory)
-        );
-
-        if ($invoice->snapshot_seller_vat_id) {
-            $documentBuilder->addDocumentSellerVATRegistrationNumber($invoice->snapshot_seller_vat_id);
-        }
-        if ($invoice->snapshot_seller_tax_number) {
-            $documentBuilder->addDocumentSellerTaxNumber($invoice->snapshot_seller_tax_number);
-        }
-
-        // Buyer (from snapshot)
-        $documentBuilder->setDocumentBuyer(
-            $invoice->snapshot_customer_name,
-            $invoice->customer_id
-        );
-        // BR-11: postcode (BT-53), city (BT-52), country (BT-55) are mandatory
-        $documentBuilder->setDocumentBuyerAddress(
-            $invoice->snapshot_customer_address,
-            null,
-            null,
-            $invoice->snapshot_customer_zip,
-            $invoice->snapshot_customer_city,
-            $buyerCountry
-        );
-
-        if ($invoice->snapshot_customer_vat_id) {
-            $documentBuilder->addDocumentBuyerVATRegistrationNumber($invoice->snapshot_customer_vat_id);
-        }
-
-        // BT-13: Order Reference (Bestellnummer)
-        if ($invoice->order_reference) {
-            if (method_exists($documentBuilder, 'setDocumentOrderReferencedDocument')) {
-                $documentBuilder->setDocumentOrderReferencedDocument($invoice->order_reference);
-            }
-        }
-
-        // BT-10: Buyer Reference (Käuferreferenz)
-        if ($invoice->buyer_reference) {
-            if (method_exists($documentBuilder, 'setDocumentBuyerReference')) {
-                $documentBuilder->setDocumentBuyerReference($invoice->buyer_reference);
-            }
-        }
-
-        // BT-83: Payment Reference
-        if ($invoice->payment_reference) {
-            if (method_exists($documentBuilder, 'setDocumentPaymentReference')) {
-                $documentBuilder->setDocumentPaymentReference($invoice->payment_reference);
-            }
-        }
-
-        // Rule PEPPOL-EN16931-R010 (R02): Buyer electronic address MUST be provided
-        if ($invoice->snapshot_customer_leitweg_id) {
-            $documentBuilder->setDocumentBuyerCommunication('0183', $invoice->snapshot_customer_leitweg_id);
-        } else {
-            $buyerEmail = $invoice->snapshot_customer_email ?: ($invoice->customer?->email ?? null);
-            if ($buyerEmail) {
-                $documentBuilder->setDocumentBuyerCommunication('EM', $buyerEmail);
-            } else {
-                // Fallback: If absolutely no email/leitweg-id is available, 
-                // we provide a placeholder to ensure the XML passes PEPPOL validation 
-                // (better than failing the whole export/save process).
-                $documentBuilder->setDocumentBuyerCommunication('EM', 'billing@' . (\Illuminate\Support\Str::slug($invoice->snapshot_customer_name ?: 'customer')) . '.de');
-            }
-        }
-
-        // BT-10: Buyer Reference (Mandatory for XRechnung, especially B2G)
-        // BT-10 is used by public authorities to route the invoice to the correct department (Leitweg-ID)
-        // If not present, we fall back to customer ID as per EN16931 rules, but Leitweg-ID is preferred.
-        $buyerRef = $invoice->snapshot_customer_leitweg_id ?: (string) $invoice->customer_id;
-        $documentBuilder->setDocumentBuyerReference($buyerRef);
-
-        // Payment Terms
-        if ($invoice->due_date instanceof \DateTimeInterface) {
-            $documentBuilder->addDocumentPaymentTerm(
-                'Zahlbar bis ' . $invoice->due_date->format('d.m.Y'),
-                $invoice->due_date
-            );
-        }
-
-        // Payment Means (Bank Transfer - SEPA Credit Transfer is code 58)
-        if ($invoice->snapshot_seller_bank_iban) {
-            $documentBuilder->addDocumentPaymentMean(
-                '58', // SEPA Credit Transfer
-                'Banküberweisung',
-                null,
-                null,
-                null,
-                null,
-                $invoice->snapshot_seller_bank_iban,
-                null,
-                null,
-                $invoice->snapshot_seller_bank_bic
-            );
-        }
-
-        // Delivery date (Mandatory SupplyChainEvent)
-        // Fallback to Service Period End or Invoice Date if no explicit delivery date
-        $deliveryDate = $invoice->delivery_date ?: ($invoice->service_period_end ?: $invoice->date);
-        $documentBuilder->setDocumentSupplyChainEvent($deliveryDate ?? Carbon::now());
-
-        // Credit note reference
-        if ($invoice->isCreditNote() && $invoice->cancelledInvoice) {
-            $documentBuilder->addDocumentInvoiceReferencedDocument(
-                $invoice->cancelledInvoice->invoice_number,
-                $invoice->cancelledInvoice->date
-            );
-        }
-
-        // Determine tax category based on exemption type
-        $taxCategory = ZugferdVatCategoryCodes::STAN_RATE;
-        if ($invoice->tax_exemption === Invoice::TAX_REVERSE_CHARGE) {
-            $taxCategory = ZugferdVatCategoryCodes::VAT_REVE_CHAR;
-        } elseif ($invoice->tax_exemption === Invoice::TAX_SMALL_BUSINESS) {
-            $taxCategory = ZugferdVatCategoryCodes::EXEM_FROM_TAX;
-        }
-
-        // Line Items (from frozen InvoiceItem records)
-        if ($invoice->items->isNotEmpty()) {
-            foreach ($invoice->items as $item) {
-                $unitCode = $item->unit_code ?: $this->mapUnitToUNECE($item->unit);
-
-                // BR-24: BT-131 (line net amount) is mandatory
-                // BT-146 (net price) is mandatory
-                $documentBuilder->addNewPosition((string) $item->position)
-                    ->setDocumentPositionProductDetails($item->description)
-                    ->setDocumentPositionNetPrice(round(abs($item->unit_price_eur), 4))
-                    ->setDocumentPositionQuantity(abs((float) $item->quantity), $unitCode)
-                    ->setDocumentPositionLineSummation(round(abs($item->total_eur), 2));
-
-                $documentBuilder->addDocumentPositionTax(
-                    $taxCategory,
-                    'VAT',
-                    (float) $item->tax_rate
-                );
-            }
-        } else {
-            // Fallback
-            $documentBuilder->addNewPosition("1")
-                ->setDocumentPositionProductDetails($invoice->snapshot_project_name ?: 'Dienstleistung')
-                ->setDocumentPositionNetPrice(round(abs($invoice->amount_net_eur), 4))
-                ->setDocumentPositionQuantity(1, 'C62')
-                ->setDocumentPositionLineSummation(round(abs($invoice->amount_net_eur), 2)); // BR-24: BT-131
-
-            $documentBuilder->addDocumentPositionTax(
-                $taxCategory,
-                'VAT',
-                (float) ($invoice->tax_rate ?? 19)
-            );
-        }
-
-        // Totals & Tax Calculation (Ensuring XRechnung mathematical compliance BR-S-09 / BR-CO-17)
-        // BT-110 (TaxTotal) = sum of all BT-117 (VAT breakdown tax amounts)
-        // BT-117 (Breakdown tax) = BT-116 (Breakdown basis) * (BT-119 (Rate) / 100)
-
-        $totalNetEur = round(abs($invoice->amount_net_eur), 2);
-        $taxRate = (float) ($invoice->tax_rate ?? 19.00);
-        $discountEur = round(abs($invoice->discount_eur), 2);
-        $shippingEur = round(abs($invoice->shipping_eur), 2);
-
-        // Handle exemptions (Rate must be 0 for Small Business / EXEM_FROM_TAX)
-        if ($taxCategory === ZugferdVatCategoryCodes::EXEM_FROM_TAX) {
-            $taxRate = 0;
-            $totalTaxEur = 0;
-        } else {
-            // Recalculate tax for the breakdown basis to ensure perfect consistency
-            // BT-116 (Taxable Amount) is usually the LineTotal minus allowances
-            $taxBasisEur = round($totalNetEur - $discountEur + $shippingEur, 2);
-            $totalTaxEur = round($taxBasisEur * ($taxRate / 100), 2);
-        }
-
-        $paidAmountEur = round(abs($invoice->paid_amount_eur), 2);
-
-        // BT-112 (Grand Total) = BT-109 (Tax Basis) + BT-110 (Tax Total)
-        $totalGrossEur = round(($totalNetEur - $discountEur + $shippingEur) + $totalTaxEur, 2);
-        $duePayableAmount = round($totalGrossEur - $paidAmountEur, 2);
-
-        $documentBuilder->setDocumentSummation(
-            $totalGrossEur,            // BT-112: grandTotalAmount
-            $duePayableAmount,         // BT-115: duePayableAmount
-            $totalNetEur,              // BT-106: lineTotalAmount
-            $shippingEur,              // BT-108: chargeTotalAmount
-            $discountEur,              // BT-107: allowanceTotalAmount
-            round($totalNetEur - $discountEur + $shippingEur, 2), // BT-109: taxBasisTotalAmount
-            $totalTaxEur               // BT-110: taxTotalAmount
-        );
-
-        // Add tax breakdown (§ 14 UStG / EN16931 compliance)
-        $exemptionReason = null;
-        if ($taxCategory === ZugferdVatCategoryCodes::VAT_REVE_CHAR) {
-            $exemptionReason = 'Steuerschuldnerschaft des Leistungsempfängers (Reverse Charge gem. § 13b UStG)';
-        } elseif ($taxCategory === ZugferdVatCategoryCodes::EXEM_FROM_TAX) {
-            $exemptionReason = 'Kleinunternehmerregelung gemäß § 19 UStG';
-        }
+        $validated = $request->validate([
+            'ids' => 'required|array|max:5000',
+            'ids.*' => 'integer',
+            'workers' => 'nullable|integer|min:1|max:16',
+        ]);
 
-        $documentBuilder->addDocumentTax(
-            $taxCategory,
-            'VAT',
-            round($totalNetEur - $discountEur + $shippingEur, 2), // BT-116: Basis Amount
-            $totalTaxEur,              // BT-117: Tax Amount (MATCHES BT-110)
-            $taxRate,                  // BT-119: Rate
-            $exemptionReason
-        );
+        // Tenant scope: only ids visible to the current user
+        $ids = Invoice::whereIn('id', $validated['ids'])->pluck('id')->all();
+        $batch = $pdfs->dispatchBulk($ids, $validated['workers'] ?? null);
 
-        return $documentBuilder;
+        return response()->json([
+            'message' => count($ids) . ' PDFs werden im Hintergrund erzeugt.',
+            'batch_id' => $batch?->id,
+            'count' => count($ids),
+        ], 202);
     }
 
     /**
@@ -1238,7 +802,7 @@ public function downloadXml(Request $request, Invoice $invoice)
                 'Content-Type' => 'application/xml',
             ]);
 
-            $documentBuilder = $this->createZugferdBuilder($invoice);
+            $documentBuilder = app(InvoicePdfService::class)->createZugferdBuilder($invoice);
             $xmlContent = $documentBuilder->getContent();
 
             return response($xmlContent, 200, [
@@ -1251,62 +815,7 @@ public function downloadXml(Request $request, Invoice $invoice)
         }
     }
 
-    /**
-     * Map translation-industry unit types to UN/ECE Recommendation 20 codes.
-     * Required for ZUGFeRD/XRechnung compliance.
-     */
-    private function mapUnitToUNECE(string $unit): string
-    {
-        $u = mb_strtolower($unit);
-
-        // Standard UN/ECE Rec20 unit codes
-        // HUR = Hour, C62 = Unit/Piece, LBR = Pound, MTQ = Cubic Meter, MTR = Meter, PK = Package
-        // For translation: 
-        // NAR = Number of articles (Alternative to C62)
-        // HUR = Hours
-        // SEC = Seconds
-        // DAY = Days
-        // 74 = Million words (actually used often in industry is just NR for Number)
-        // Decided to stick with C62 (One) for most industry units and HUR for hours
-
-        return match ($u) {
-            'hours', 'stunden', 'std', 'h', 'stunde' => 'HUR',
-            'minuten', 'min', 'm' => 'MIN',
-            'tag', 'tage', 'day', 'days' => 'DAY',
-            'wörter', 'words', 'worte', 'wort', 'word' => 'C62', // NR is also common
-            'zeilen', 'lines', 'zeile', 'line' => 'C62',
-            'seiten', 'pages', 'seite', 'page' => 'C62',
-            'pauschal', 'flat', 'stk', 'stück', 'unit', 'units' => 'C62',
-            default => 'C62',
-        };
-    }
 
-    private function getCountryCode(?string $countryName): string
-    {
-        if (!$countryName)
-            return 'DE';
-        if (strlen($countryName) === 2)
-            return strtoupper($countryName);
-
-        $map = [
-            'Deutschland' => 'DE',
-            'Österreich' => 'AT',
-            'Schweiz' => 'CH',
-            'Frankreich' => 'FR',
-            'Spanien' => 'ES',
-            'Italien' => 'IT',
-            'Vereinigtes Königreich' => 'GB',
-            'USA' => 'US',
-            'Belgien' => 'BE',
-            'Niederlande' => 'NL',
-            'Polen' => 'PL',
-            'Dänemark' => 'DK',
-            'Schweden' => 'SE',
-            'Norwegen' => 'NO',
-            'Finnland' => 'FI',
-        ];
-        return $map[$countryName] ?? 'DE';
-    }
 
     // ─────────────────────────────────────────────────────────────────
     // DOWNLOAD, PRINT, PREVIEW
@@ -1415,275 +924,56 @@ public function print(Request $request, Invoice $invoice)
      *
      * Entspricht den Anforderungen des GoBD-Datenzugriffsrechts (Z1/Z2/Z3)
      * und dem Beschreibungsstandard gemäß BMF-Schreiben.
+     *
+     * Das ZIP wird während der Auslieferung erzeugt (InvoiceExportService),
+     * der Speicherbedarf ist unabhängig von der Anzahl der Rechnungen.
      */
-    public function gobdExport(Request $request): \Symfony\Component\HttpFoundation\BinaryFileResponse|\Illuminate\Http\JsonResponse
+    public function gobdExport(Request $request, InvoiceExportService $exports): \Symfony\Component\HttpFoundation\StreamedResponse|\Illuminate\Http\JsonResponse
     {
         $validated = $request->validate([
             'date_from' => 'nullable|date',
             'date_to' => 'nullable|date|after_or_equal:date_from',
             'ids' => 'nullable|array',
-            'ids.*' => 'integer|exists:invoices,id',
+            'ids.*' => 'integer', // Mandantenfilter in gobdQuery(); kein exists-Query pro ID
         ]);
 
         $tenantId = $request->user()->tenant_id;
+        $query = $exports->gobdQuery($tenantId, $validated);
+        $summary = $exports->summarize($query);
 
-        $query = Invoice::with(['items', 'auditLogs.user'])
-            ->where('tenant_id', $tenantId)
-            ->where('status', '!=', Invoice::STATUS_DRAFT); // Nur festgeschriebene Rechnungen
-
-        if (!empty($validated['ids'])) {
-            $query->whereIn('id', $validated['ids']);
-        }
-        if (!empty($validated['date_from'])) {
-            $query->whereDate('date', '>=', $validated['date_from']);
-        }
-        if (!empty($validated['date_to'])) {
-            $query->whereDate('date', '<=', $validated['date_to']);
-        }
-
-        $invoices = $query->orderBy('invoice_number_sequence')->get();
-
-        if ($invoices->isEmpty()) {
+        if ((int) $summary->invoice_count === 0) {
             return response()->json(['error' => 'Keine Rechnungen im gewählten Zeitraum gefunden.'], 404);
         }
 
-        // ── Temporäres Verzeichnis ───────────────────────────────────────
-        $tmpDir = sys_get_temp_dir() . '/gobd_export_' . uniqid();
-        $zipPath = $tmpDir . '.zip';
-        mkdir($tmpDir, 0700, true);
-
-        // ── 1. invoices.csv ─────────────────────────────────────────────
-        $invoicesCsvPath = $tmpDir . '/invoices.csv';
-        $invoicesCsvHandle = fopen($invoicesCsvPath, 'w');
-        fprintf($invoicesCsvHandle, "\xEF\xBB\xBF"); // UTF-8 BOM für Excel
-
-        $invoiceHeaders = [
-            'Rechnungsnummer',
-            'Typ',
-            'Status',
-            'Rechnungsdatum',
-            'Fälligkeitsdatum',
-            'Leistungsdatum',
-            'Ausgestellt am',
-            'Kunde ID',
-            'Kundenname',
-            'Kundenadresse',
-            'Kunden PLZ',
-            'Kunden Ort',
-            'Kunden Land',
-            'Kunden USt-IdNr.',
-            'Verkäufer Name',
-            'Verkäufer Steuernummer',
-            'Verkäufer USt-IdNr.',
-            'Nettobetrag (EUR)',
-            'MwSt-Betrag (EUR)',
-            'Bruttobetrag (EUR)',
-            'MwSt-Satz (%)',
-            'Steuerbefreiung',
-            'Projektname',
-            'Projektnummer',
-            'Storno-Rechnungsnummer',
-            'PDF SHA256',
-            'XML SHA256',
+        $meta = [
+            'tenant_name' => \App\Models\Tenant::find($tenantId)?->company_name ?? 'Unbekannt',
+            'date_from' => $validated['date_from'] ?? $summary->date_from,
+            'date_to' => $validated['date_to'] ?? $summary->date_to,
+            'invoice_count' => (int) $summary->invoice_count,
         ];
-        fputcsv($invoicesCsvHandle, $invoiceHeaders, ';');
-
-        foreach ($invoices as $inv) {
-            fputcsv($invoicesCsvHandle, [
-                $inv->invoice_number,
-                $inv->type === 'credit_note' ? 'Gutschrift' : 'Rechnung',
-                $inv->status,
-                $inv->date ? Carbon::parse($inv->date)->format('d.m.Y') : '',
-                $inv->due_date ? Carbon::parse($inv->due_date)->format('d.m.Y') : '',
-                $inv->delivery_date ? Carbon::parse($inv->delivery_date)->format('d.m.Y') : '',
-                $inv->issued_at ? Carbon::parse($inv->issued_at)->format('d.m.Y H:i:s') : '',
-                $inv->customer_id ?? '',
-                $inv->snapshot_customer_name ?? '',
-                $inv->snapshot_customer_address ?? '',
-                $inv->snapshot_customer_zip ?? '',
-                $inv->snapshot_customer_city ?? '',
-                $inv->snapshot_customer_country ?? '',
-                $inv->snapshot_customer_vat_id ?? '',
-                $inv->snapshot_seller_name ?? '',
-                $inv->snapshot_seller_tax_number ?? '',
-                $inv->snapshot_seller_vat_id ?? '',
-                number_format(($inv->amount_net ?? 0) / 100, 2, ',', ''),
-                number_format(($inv->amount_tax ?? 0) / 100, 2, ',', ''),
-                number_format(($inv->amount_gross ?? 0) / 100, 2, ',', ''),
-                $inv->tax_rate ?? '',
-                $inv->tax_exemption_type ?? '',
-                $inv->snapshot_project_name ?? '',
-                $inv->snapshot_project_number ?? '',
-                $inv->cancelledInvoice?->invoice_number ?? '',
-                $inv->pdf_sha256 ?? '',
-                $inv->xml_sha256 ?? '',
-            ], ';');
-        }
-        fclose($invoicesCsvHandle);
-
-        // ── 2. audit_log.csv ────────────────────────────────────────────
-        $auditCsvPath = $tmpDir . '/audit_log.csv';
-        $auditCsvHandle = fopen($auditCsvPath, 'w');
-        fprintf($auditCsvHandle, "\xEF\xBB\xBF");
-
-        fputcsv($auditCsvHandle, [
-            'Log ID',
-            'Rechnungsnummer',
-            'Aktion',
-            'Alter Status',
-            'Neuer Status',
-            'Benutzer',
-            'IP-Adresse',
-            'Zeitstempel',
-            'Record Hash',
-            'Vorheriger Hash',
-        ], ';');
-
-        $invoiceIds = $invoices->pluck('id');
-        $auditLogs = InvoiceAuditLog::with('user:id,first_name,last_name')
-            ->whereIn('invoice_id', $invoiceIds)
-            ->orderBy('id')
-            ->get();
-
-        $invoiceNumberMap = $invoices->pluck('invoice_number', 'id');
-
-        foreach ($auditLogs as $log) {
-            $userName = $log->user
-                ? trim(($log->user->first_name ?? '') . ' ' . ($log->user->last_name ?? ''))
-                : 'System';
-
-            fputcsv($auditCsvHandle, [
-                $log->id,
-                $invoiceNumberMap[$log->invoice_id] ?? $log->invoice_id,
-                $log->action,
-                $log->old_status ?? '',
-                $log->new_status ?? '',
-                $userName,
-                $log->ip_address ?? '',
-                $log->created_at->format('d.m.Y H:i:s'),
-                $log->record_hash ?? '',
-                $log->previous_hash ?? '',
-            ], ';');
-        }
-        fclose($auditCsvHandle);
-
-        // ── 3. index.xml (IDEA-Beschreibungsstandard) ────────────────────
-        $exportDate = now()->format('Y-m-d\TH:i:s');
-        $dateFrom = $validated['date_from'] ?? $invoices->min('date');
-        $dateTo = $validated['date_to'] ?? $invoices->max('date');
-        $tenantName = \App\Models\Tenant::find($tenantId)?->company_name ?? 'Unbekannt';
-        $invoiceCount = $invoices->count();
-
-        $indexXml = <<<XML
-<?xml version="1.0" encoding="UTF-8"?>
-<DataDescription xmlns="http://www.gdpdu-ev.de/schema/gdpdu/0.1/">
-  <Exportinformation>
-    <ExportDate>{$exportDate}</ExportDate>
-    <ExportingApplication>Translation Office TMS</ExportingApplication>
-    <Company>{$tenantName}</Company>
-    <Period>
-      <DateFrom>{$dateFrom}</DateFrom>
-      <DateTo>{$dateTo}</DateTo>
-    </Period>
-    <RecordCount>{$invoiceCount}</RecordCount>
-    <Remark>GoBD-konformer Datenexport gemäß BMF-Schreiben vom 28.11.2019</Remark>
-  </Exportinformation>
-
-  <DataSet name="Rechnungen" filename="invoices.csv">
-    <FieldDelimiter>;</FieldDelimiter>
-    <RecordDelimiter>CRLF</RecordDelimiter>
-    <TextEncapsulator>&quot;</TextEncapsulator>
-    <Encoding>UTF-8</Encoding>
-    <FieldDescription>
-      <Field name="Rechnungsnummer" type="Text" maxLength="50"/>
-      <Field name="Typ" type="Text" maxLength="20"/>
-      <Field name="Status" type="Text" maxLength="20"/>
-      <Field name="Rechnungsdatum" type="Date" format="DD.MM.YYYY"/>
-      <Field name="Fälligkeitsdatum" type="Date" format="DD.MM.YYYY"/>
-      <Field name="Leistungsdatum" type="Date" format="DD.MM.YYYY"/>
-      <Field name="Ausgestellt am" type="DateTime" format="DD.MM.YYYY HH:MM:SS"/>
-      <Field name="Kunde ID" type="Numeric"/>
-      <Field name="Kundenname" type="Text" maxLength="255"/>
-      <Field name="Kundenadresse" type="Text" maxLength="255"/>
-      <Field name="Kunden PLZ" type="Text" maxLength="10"/>
-      <Field name="Kunden Ort" type="Text" maxLength="100"/>
-      <Field name="Kunden Land" type="Text" maxLength="2"/>
-      <Field name="Kunden USt-IdNr." type="Text" maxLength="20"/>
-      <Field name="Verkäufer Name" type="Text" maxLength="255"/>
-      <Field name="Verkäufer Steuernummer" type="Text" maxLength="30"/>
-      <Field name="Verkäufer USt-IdNr." type="Text" maxLength="20"/>
-      <Field name="Nettobetrag (EUR)" type="Amount" accuracy="2"/>
-      <Field name="MwSt-Betrag (EUR)" type="Amount" accuracy="2"/>
-      <Field name="Bruttobetrag (EUR)" type="Amount" accuracy="2"/>
-      <Field name="MwSt-Satz (%)" type="Amount" accuracy="2"/>
-      <Field name="Steuerbefreiung" type="Text" maxLength="30"/>
-      <Field name="Projektname" type="Text" maxLength="255"/>
-      <Field name="Projektnummer" type="Text" maxLength="50"/>
-      <Field name="Storno-Rechnungsnummer" type="Text" maxLength="50"/>
-      <Field name="PDF SHA256" type="Text" maxLength="64"/>
-      <Field name="XML SHA256" type="Text" maxLength="64"/>
-    </FieldDescription>
-  </DataSet>
-
-  <DataSet name="Audit-Trail" filename="audit_log.csv">
-    <FieldDelimiter>;</FieldDelimiter>
-    <RecordDelimiter>CRLF</RecordDelimiter>
-    <TextEncapsulator>&quot;</TextEncapsulator>
-    <Encoding>UTF-8</Encoding>
-    <FieldDescription>
-      <Field name="Log ID" type="Numeric"/>
-      <Field name="Rechnungsnummer" type="Text" maxLength="50"/>
-      <Field name="Aktion" type="Text" maxLength="30"/>
-      <Field name="Alter Status" type="Text" maxLength="20"/>
-      <Field name="Neuer Status" type="Text" maxLength="20"/>
-      <Field name="Benutzer" type="Text" maxLength="100"/>
-      <Field name="IP-Adresse" type="Text" maxLength="45"/>
-      <Field name="Zeitstempel" type="DateTime" format="DD.MM.YYYY HH:MM:SS"/>
-      <Field name="Record Hash" type="Text" maxLength="64"/>
-      <Field name="Vorheriger Hash" type="Text" maxLength="64"/>
-    </FieldDescription>
-  </DataSet>
-</DataDescription>
-XML;
-
-        file_put_contents($tmpDir . '/index.xml', $indexXml);
-
-        // ── ZIP erzeugen ─────────────────────────────────────────────────
-        $zip = new \ZipArchive();
-        $zip->open($zipPath, \ZipArchive::CREATE | \ZipArchive::OVERWRITE);
-        $zip->addFile($invoicesCsvPath, 'invoices.csv');
-        $zip->addFile($auditCsvPath, 'audit_log.csv');
-        $zip->addFile($tmpDir . '/index.xml', 'index.xml');
-        $zip->close();
-
-        // Cleanup tmp files (nicht ZIP selbst)
-        @unlink($invoicesCsvPath);
-        @unlink($auditCsvPath);
-        @unlink($tmpDir . '/index.xml');
-        @rmdir($tmpDir);
 
         // Audit-Log für den Export selbst (Sammelaktion — erste Rechnung als Anker)
-        if ($invoices->isNotEmpty()) {
-            $this->logAuditEvent(
-                $invoices->first(),
-                $request,
-                InvoiceAuditLog::ACTION_EXPORTED,
-                null,
-                null,
-                [
-                    'export_format' => 'gobd_zip',
-                    'invoice_count' => $invoiceCount,
-                    'date_from' => $dateFrom,
-                    'date_to' => $dateTo,
-                ]
-            );
-        }
+        $this->logAuditEvent(
+            (clone $query)->orderBy('invoice_number_sequence')->first(),
+            $request,
+            InvoiceAuditLog::ACTION_EXPORTED,
+            null,
+            null,
+            [
+                'export_format' => 'gobd_zip',
+                'invoice_count' => $meta['invoice_count'],
+                'date_from' => $meta['date_from'],
+                'date_to' => $meta['date_to'],
+            ]
+        );
 
         $filename = 'GoBD_Export_' . now()->format('Ymd_His') . '.zip';
 
-        return response()->download($zipPath, $filename, [
+        return response()->streamDownload(function () use ($exports, $query, $meta) {
+            $exports->streamGobdArchive(fopen('php://output', 'wb'), $query, $meta);
+        }, $filename, [
             'Content-Type' => 'application/zip',
-        ])->deleteFileAfterSend(true);
+        ]);
     }
 
     // ─────────────────────────────────────────────────────────────────
@@ -1693,85 +983,31 @@ public function gobdExport(Request $request): \Symfony\Component\HttpFoundation\
     /**
      * DATEV export using snapshot data and cent-based amounts.
      */
-    public function datevExport(Request $request)
+    public function datevExport(Request $request, InvoiceExportService $exports)
     {
         $validated = $request->validate([
             'ids' => 'required|array',
-            'ids.*' => 'exists:invoices,id',
+            'ids.*' => 'integer',
         ]);
 
-        $invoices = Invoice::whereIn('id', $validated['ids'])->get();
+        $query = Invoice::whereIn('id', $validated['ids']);
 
         $headers = [
             'Content-Type' => 'text/csv',
             'Content-Disposition' => 'attachment; filename="datev_export_' . date('Ymd_His') . '.csv"',
         ];
 
-        $callback = function () use ($invoices) {
-            $file = fopen('php://output', 'w');
-
-            // DATEV header
-            fputcsv($file, ['DTVF', '700', '21', 'Buchungsstapel', '1', '', '', '', '', '', 'EXTF', '', '', '', '', ''], ';');
-
-            fputcsv($file, [
-                'Umsatz (ohne Komma)',
-                'Soll/Haben-Kennzeichen',
-                'WKZ',
-                'Kurs',
-                'Basis-Umsatz',
-                'WKZ Basis-Umsatz',
-                'Konto',
-                'Gegenkonto',
-                'BU-Schlüssel',
-                'Belegdatum',
-                'Belegfeld 1',
-                'Buchungstext'
-            ], ';');
-
-            foreach ($invoices as $inv) {
-                /** @var Invoice $inv */
-                $date = ($inv->date instanceof \DateTimeInterface) ? $inv->date->format('dm') : Carbon::now()->format('dm');
-                // Cents → EUR formatted for DATEV
-                $amount = number_format($inv->amount_gross_eur, 2, ',', '');
-                $customerName = substr($inv->snapshot_customer_name ?? 'Unbekannt', 0, 30);
-
-                $konto = ($inv->tax_exemption === Invoice::TAX_REVERSE_CHARGE) ? '8336' : '8400';
-                $gegenkonto = '10000';
-
-                // Credit notes: swap S/H
-                $sollHaben = $inv->isCreditNote() ? 'H' : 'S';
-
-                fputcsv($file, [
-                    $amount,
-                    $sollHaben,
-                    'EUR',
-                    '',
-                    '',
-                    '',
-                    $gegenkonto,
-                    $konto,
-                    '',
-                    $date,
-                    $inv->invoice_number,
-                    $customerName
-                ], ';');
-            }
+        // GoBD: Audit-Log für jeden exportierten Datensatz (Bulk-Insert pro Chunk)
+        $exports->logExport($query, $request->user()?->id, $request->ip(), [
+            'export_format' => 'datev_csv',
+            'invoice_count' => (clone $query)->count(),
+        ]);
 
+        return response()->stream(function () use ($exports, $query) {
+            $file = fopen('php://output', 'w');
+            $exports->streamDatevCsv($file, $query);
             fclose($file);
-        };
-
-        $response = response()->stream($callback, 200, $headers);
-
-        // GoBD: Audit-Log für jeden exportierten Datensatz
-        $invoiceCount = $invoices->count();
-        foreach ($invoices as $inv) {
-            $this->logAuditEvent($inv, $request, InvoiceAuditLog::ACTION_EXPORTED, null, null, [
-                'export_format' => 'datev_csv',
-                'invoice_count' => $invoiceCount,
-            ]);
-        }
-
-        return $response;
+        }, 200, $headers);
     }
 
     // ─────────────────────────────────────────────────────────────────
@@ -1850,7 +1086,7 @@ private function buildDailyInvoiceFromSnapshot(Invoice $invoice)
             ->taxRate((float) ($invoice->tax_rate ?? 19))
             ->shipping($invoice->shipping_eur)
             ->totalDiscount($invoice->discount_eur)
-            ->notes($this->buildInvoiceNotes($invoice))
+            ->notes(app(InvoicePdfService::class)->buildInvoiceNotes($invoice))
             ->template('din5008');
 
         $tenant = \App\Models\Tenant::find($invoice->tenant_id);
@@ -1867,11 +1103,11 @@ private function buildDailyInvoiceFromSnapshot(Invoice $invoice)
         return $dailyInvoice;
     }
 
-    private function validateIssueCompliance(Invoice $invoice): array
+    private function validateIssueCompliance(Invoice $invoice, bool $numberPending = false): array
     {
         $errors = [];
 
-        if (!$invoice->invoice_number) {
+        if (!$invoice->invoice_number && !$numberPending) {
             $errors[] = 'Rechnungsnummer fehlt.';
         }
 
@@ -1928,10 +1164,6 @@ private function validateIssueCompliance(Invoice $invoice): array
         return $errors;
     }
 
-    private function buildInvoiceXmlContent(Invoice $invoice): string
-    {
-        return $this->createZugferdBuilder($invoice)->getContent();
-    }
 
     /**
      * Log an audit event for a given invoice.
@@ -1968,55 +1200,10 @@ private function logAuditEvent(
             'old_status' => $payload['old_status'],
             'new_status' => $payload['new_status'],
             'previous_hash' => $payload['previous_hash'],
-            'record_hash' => hash('sha256', json_encode($payload, JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE)),
+            'record_hash' => InvoiceAuditLog::hashPayload($payload),
             'metadata' => $payload['metadata'],
             'ip_address' => $payload['ip_address'],
             'created_at' => $createdAt,
         ]);
     }
-
-    /**
-     * Generate a sequential document number based on tenant settings.
-     */
-    private function generateSequentialNumber($user, string $type, int $sequence, $year)
-    {
-        $tenantId = $user->tenant_id ?? 1;
-        $settings = \App\Models\TenantSetting::where('tenant_id', $tenantId)
-            ->where('key', 'like', $type . '_%')
-            ->pluck('value', 'key');
-
-        $prefix = $settings[$type . '_prefix'] ?? ($type === 'credit_note' ? 'G' : 'RE');
-        $sep = ($settings[$type . '_separator'] ?? '-') === 'none' ? '' : ($settings[$type . '_separator'] ?? '-');
-        $padding = (int) ($settings[$type . '_padding'] ?? 4);
-        $date = Carbon::now();
-
-        $yearPart = '';
-        $yearFormat = $settings[$type . '_year_format'] ?? 'YY';
-        if ($yearFormat === 'YYYY')
-            $yearPart = $year;
-        elseif ($yearFormat === 'YY')
-            $yearPart = substr($year, -2);
-        elseif ($yearFormat === 'none')
-            $yearPart = '';
-
-        $monthPart = '';
-        $monthFormat = $settings[$type . '_month_format'] ?? 'none';
-        if ($monthFormat === 'MM')
-            $monthPart = $date->format('m');
-        elseif ($monthFormat === 'M')
-            $monthPart = $date->format('n');
-
-        $dayPart = '';
-        $dayFormat = $settings[$type . '_day_format'] ?? 'none';
-        if ($dayFormat === 'DD')
-            $dayPart = $date->format('d');
-        elseif ($dayFormat === 'D')
-            $dayPart = $date->format('j');
-
-        $nrPart = str_pad($sequence, $padding, '0', STR_PAD_LEFT);
-
-        return implode($sep, array_filter([$prefix, $yearPart, $monthPart, $dayPart, $nrPart], function ($p) {
-            return $p !== '';
-        }));
-    }
 }
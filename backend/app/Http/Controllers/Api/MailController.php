@@ -5,8 +5,12 @@
 use App\Http\Controllers\Controller;
 use Illuminate\Http\Request;
 
+use App\Jobs\SyncMailbox;
 use App\Models\Mail;
+use App\Services\MailSyncService;
 use Carbon\Carbon;
+use Illuminate\Support\Facades\Bus;
+use Illuminate\Support\Facades\Cache;
 
 class MailController extends Controller
 {
@@ -110,15 +114,7 @@ public function send(Request $request)
 
             // Send the email
             try {
-                $scheme = ((int) $account->smtp_port === 465 || ($account->smtp_encryption ?? 'ssl') === 'ssl') ? 'smtps' : 'smtp';
-                $transport = \Symfony\Component\Mailer\Transport::fromDsn(sprintf(
-                    '%s://%s:%s@%s:%s',
-                    $scheme,
-                    urlencode($account->username),
-                    urlencode($account->password),
-                    $account->smtp_host,
-                    $account->smtp_port
-                ));
+                $transport = \Symfony\Component\Mailer\Transport::fromDsn($account->smtpDsn());
 
                 $mailer = new \Symfony\Component\Mailer\Mailer($transport);
                 $mailer->send($email);
@@ -220,6 +216,10 @@ public function bulkUnarchive(Request $request)
 
         return response()->json(['message' => 'Mails restored from archive']);
     }
+    /**
+     * Startet den IMAP-Sync aller aktiven Konten als Job-Batch (ein Job pro Konto,
+     * parallel auf den Queue-Workern). Fortschritt über syncStatus().
+     */
     public function sync(Request $request)
     {
         $tenantId = $request->user()->tenant_id ?? 1;
@@ -233,123 +233,49 @@ public function sync(Request $request)
             return response()->json(['message' => 'Bitte konfigurieren Sie zuerst mindestens ein E-Mail-Konto.'], 400);
         }
 
-        $totalCreated = 0;
-        $errors = [];
+        $batch = Bus::batch($accounts->map(fn($account) => new SyncMailbox($account))->all())
+            ->name("mail-sync:{$tenantId}")
+            ->allowFailures()
+            ->dispatch();
 
-        foreach ($accounts as $account) {
-            $protocol = $account->incoming_protocol ?? 'imap';
-            $encryption = $account->imap_encryption ?? 'ssl';
-            $defaultPort = $protocol === 'pop3' ? ($encryption === 'ssl' ? 995 : 110) : ($encryption === 'ssl' ? 993 : 143);
-            $port = $account->imap_port ?? $defaultPort;
-
-            try {
-                // Configure IMAP/POP3 Client on the fly
-                $client = \Webklex\IMAP\Facades\Client::make([
-                    'host' => $account->imap_host,
-                    'port' => $port,
-                    'encryption' => $encryption,
-                    'validate_cert' => false,
-                    'username' => $account->username,
-                    'password' => $account->password,
-                    'protocol' => $protocol
-                ]);
-
-                // Connect to the server
-                $client->connect();
-                \Log::info("IMAP connected for {$account->email}");
-
-                // Get INBOX folder
-                $folder = $client->getFolder('INBOX');
-
-                // Fetch only messages newer than the last synced mail for this account
-                $lastMailDate = Mail::withTrashed()
-                    ->where('tenant_id', $tenantId)
-                    ->where('mail_account_id', $account->id)
-                    ->where('folder', 'inbox')
-                    ->max('date');
-
-                if ($lastMailDate) {
-                    // Subsequent sync: only fetch emails since last known mail (minus 5 min buffer)
-                    $since = \Carbon\Carbon::parse($lastMailDate)->subMinutes(5);
-                    $messages = $folder->query()->since($since)->get();
-                } else {
-                    // First sync: fetch up to 500 messages
-                    $messages = $folder->query()->all()->limit(500)->get();
-                }
+        return response()->json([
+            'message' => 'Synchronisierung gestartet.',
+            'batch_id' => $batch->id,
+            'accounts' => $accounts->count(),
+            'new_count' => 0,
+            'errors' => [],
+        ], 202);
+    }
 
-                foreach ($messages as $message) {
-                    $messageId = (string) ($message->getMessageId()->first() ?? $message->getUid());
-
-                    if (Mail::withTrashed()->where('tenant_id', $tenantId)->where('mail_account_id', $account->id)->where('message_id', $messageId)->exists()) {
-                        continue;
-                    }
-
-                    // For backward compatibility: if mail exists without mail_account_id, update and skip
-                    if (Mail::withTrashed()->where('tenant_id', $tenantId)->whereNull('mail_account_id')->where('message_id', $messageId)->exists()) {
-                        Mail::withTrashed()->where('tenant_id', $tenantId)->whereNull('mail_account_id')->where('message_id', $messageId)->update(['mail_account_id' => $account->id]);
-                        continue;
-                    }
-
-                    $attachmentsInfo = [];
-                    if ($message->getAttachments()->count() > 0) {
-                        foreach ($message->getAttachments() as $attachment) {
-                            try {
-                                $safeName = preg_replace('/[^A-Za-z0-9._-]/', '_', $attachment->getName());
-                                $path = 'mail_attachments/' . uniqid() . '_' . $safeName;
-                                \Storage::put($path, $attachment->getContent());
-                                
-                                $attachmentsInfo[] = [
-                                    'name' => $attachment->getName(),
-                                    'size' => $attachment->getSize(),
-                                    'extension' => $attachment->getExtension(),
-                                    'path' => $path,
-                                    'mime' => $attachment->getMimeType()
-                                ];
-                            } catch (\Exception $atEx) {
-                                \Log::warning("Could not save attachment for mail: " . $atEx->getMessage());
-                            }
-                        }
-                    }
-
-                    Mail::create([
-                        'tenant_id' => $tenantId,
-                        'mail_account_id' => $account->id,
-                        'message_id' => $messageId,
-                        'folder' => 'inbox',
-                        'from_email' => $message->getFrom()[0]->mail,
-                        'to_emails' => array_map(fn($to) => $to->mail, $message->getTo()->toArray()),
-                        'subject' => $message->getSubject()->get()[0] ?? '(Kein Betreff)',
-                        'body' => $message->hasHTMLBody() ? $message->getHTMLBody() : $message->getTextBody(),
-                        'is_read' => $message->getFlags()->has('seen'),
-                        'date' => $message->getDate()->first(),
-                        'attachments' => $attachmentsInfo
-                    ]);
-                    $totalCreated++;
-                }
+    public function syncStatus(Request $request, string $batchId)
+    {
+        $tenantId = $request->user()->tenant_id ?? 1;
+        $batch = Bus::findBatch($batchId);
 
-            } catch (\Exception $e) {
-                \Log::error("IMAP Sync Failed for account {$account->email}: " . $e->getMessage());
-                $errors[] = "Fehler bei {$account->email}: " . $e->getMessage();
-            }
+        if (!$batch || $batch->name !== "mail-sync:{$tenantId}") {
+            return response()->json(['message' => 'Synchronisierung nicht gefunden.'], 404);
         }
 
-        if (count($errors) > 0 && $totalCreated === 0) {
-            return response()->json([
-                'message' => 'Synchronisierung fehlgeschlagen.',
-                'errors' => $errors
-            ], 500);
-        }
+        $newCount = (int) Cache::get(SyncMailbox::countKey($batch->id), 0);
+        $errors = \App\Models\MailAccount::where('tenant_id', $tenantId)->pluck('id')
+            ->map(fn($accountId) => Cache::get(SyncMailbox::errorsKey($batch->id, $accountId)))
+            ->filter()
+            ->values();
 
         return response()->json([
-            'message' => $totalCreated > 0
-                ? "$totalCreated neue E-Mails empfangen."
-                : (count($errors) > 0 ? "Teilweise erfolgreich." : "Postfach ist auf dem neuesten Stand."),
-            'new_count' => $totalCreated,
-            'errors' => $errors
+            'finished' => $batch->finished(),
+            'progress' => $batch->progress(),
+            'message' => !$batch->finished()
+                ? 'Synchronisierung läuft...'
+                : ($newCount > 0
+                    ? "$newCount neue E-Mails empfangen."
+                    : ($errors->isNotEmpty() ? 'Teilweise erfolgreich.' : 'Postfach ist auf dem neuesten Stand.')),
+            'new_count' => $newCount,
+            'errors' => $errors,
         ]);
     }
 
-    public function downloadAttachment(Request $request, $id, $index)
+    public function downloadAttachment(Request $request, MailSyncService $mailSync, $id, $index)
     {
         $tenantId = $request->user()->tenant_id ?? 1;
         $mail = Mail::where('tenant_id', $tenantId)->findOrFail($id);
@@ -361,7 +287,12 @@ public function downloadAttachment(Request $request, $id, $index)
         
         $attachment = $attachments[$index];
         $path = $attachment['path'] ?? null;
-        
+
+        // Anhänge werden beim Sync nur als Metadaten gespeichert und beim ersten Download geholt
+        if (!$path && isset($attachment['uid'])) {
+            $path = $mailSync->fetchAttachment($mail, (int) $index);
+        }
+
         if (!$path || !\Storage::exists($path)) {
             return response()->json(['message' => 'Datei nicht auf dem Server gefunden.'], 404);
         }
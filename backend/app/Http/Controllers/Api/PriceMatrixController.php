@@ -3,13 +3,18 @@
 namespace App\Http\Controllers\Api;
 
 use App\Http\Controllers\Controller;
+use App\Services\CacheService;
 use Illuminate\Http\Request;
 
 class PriceMatrixController extends Controller
 {
-    public function index()
+    public function index(Request $request)
     {
-        return response()->json(\App\Models\PriceMatrix::with(['sourceLanguage', 'targetLanguage'])->get());
+        $matrices = CacheService::cachePriceMatrices($request->user()->tenant_id, function () {
+            return \App\Models\PriceMatrix::with(['sourceLanguage', 'targetLanguage'])->get();
+        });
+
+        return response()->json($matrices);
     }
 
     public function store(Request $request)
@@ -25,6 +30,7 @@ public function store(Request $request)
         ]);
 
         $priceMatrix = \App\Models\PriceMatrix::create($validated);
+        CacheService::invalidatePriceMatrixCaches($request->user()->tenant_id);
         return response()->json($priceMatrix, 201);
     }
 
@@ -48,12 +54,14 @@ public function update(Request $request, $id)
         ]);
 
         $priceMatrix->update($validated);
+        CacheService::invalidatePriceMatrixCaches($request->user()->tenant_id);
         return response()->json($priceMatrix);
     }
 
-    public function destroy($id)
+    public function destroy(Request $request, $id)
     {
         \App\Models\PriceMatrix::findOrFail($id)->delete();
+        CacheService::invalidatePriceMatrixCaches($request->user()->tenant_id);
         return response()->json(['message' => 'Price matrix deleted']);
     }
 }
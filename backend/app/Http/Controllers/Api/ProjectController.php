@@ -14,24 +14,61 @@ class ProjectController extends Controller
     public function analyze(Request $request, \App\Services\WordCountService $wordCounter)
     {
         $request->validate([
-            'file' => 'required|file|mimes:txt,docx,pdf|max:10240', // 10MB
+            // Zählung läuft synchron im Request: Grenze bleibt bei 10MB, größere Dateien über den Projekt-Upload (Queue)
+            'file' => 'required|file|extensions:txt,docx,xlsx,pptx,odt,rtf,idml,pdf|max:10240', // 10MB
         ]);
 
         $file = $request->file('file');
-        $wordCount = $wordCounter->countWords($file);
+        $analysis = $wordCounter->analyze($file->getRealPath(), $file->getClientOriginalExtension());
+        $wordCount = $analysis->word_count ?? 0;
         // Calculate norm lines (standard page = 55 chars approx, but usually based on chars)
         // Here we just use a dummy calculation if line count needed, or assume word count is primary.
         // For simplicity, let's just return word count and a suggested connection to price matrix later.
 
         return response()->json([
             'word_count' => $wordCount,
+            'char_count' => $analysis->char_count ?? 0,
+            'repeated_words' => $analysis->repeated_words ?? 0,
             'filename' => $file->getClientOriginalName(),
         ]);
     }
 
+    /**
+     * Projektliste.
+     *
+     * - view:     Ladeprofil (default | list | select), siehe Project::loadingProfiles()
+     * - fields:   kommagetrennte Projektspalten (Schlüssel/Cursor-Spalten werden immer geladen)
+     * - include:  kommagetrennte Relations, ersetzt die Relations des Profils
+     * - per_page / cursor: Keyset-Pagination über (created_at, id); ohne beide Parameter
+     *   wird wie bisher die komplette (optional per limit begrenzte) Liste geliefert.
+     */
     public function index(Request $request)
     {
-        $query = \App\Models\Project::with(['customer', 'partner', 'sourceLanguage', 'targetLanguage', 'documentType', 'positions', 'files.uploader', 'payments']);
+        $request->validate([
+            'view' => 'nullable|in:default,list,select',
+            'fields' => 'nullable|string',
+            'include' => 'nullable|string',
+            'per_page' => 'nullable|integer|min:1|max:200',
+            'cursor' => 'nullable|string',
+        ]);
+
+        $query = \App\Models\Project::query();
+
+        if ($request->filled('fields')) {
+            $selectable = array_merge(['id', 'tenant_id', 'created_at', 'updated_at'], (new \App\Models\Project)->getFillable());
+            $fields = array_intersect(explode(',', $request->fields), $selectable);
+
+            $query->select($query->qualifyColumns(array_values(array_unique(
+                array_merge(\App\Models\Project::REQUIRED_COLUMNS, $fields)
+            ))));
+        }
+
+        $query->optimized($request->query('view'));
+
+        if ($request->filled('include')) {
+            $include = array_intersect(explode(',', $request->include), \App\Models\Project::INCLUDABLE);
+            $query->setEagerLoads([])->with(array_values($include));
+        }
 
         if ($request->has('customer_id')) {
             $query->where('customer_id', $request->customer_id);
@@ -45,11 +82,17 @@ public function index(Request $request)
             $query->where('status', $request->status);
         }
 
+        $query->orderByDesc('projects.created_at')->orderByDesc('projects.id');
+
+        if ($request->filled('per_page') || $request->filled('cursor')) {
+            return response()->json($query->cursorPaginate((int) $request->input('per_page', 50)));
+        }
+
         if ($request->has('limit')) {
             $query->limit($request->limit);
         }
 
-        return response()->json($query->latest()->get());
+        return response()->json($query->get());
     }
 
     public function store(Request $request)
@@ -359,7 +402,20 @@ public function bulkDelete(Request $request)
             'ids.*' => 'exists:projects,id',
         ]);
 
-        \App\Models\Project::whereIn('id', $validated['ids'])->delete();
+        // Massenlöschung löst keine Model-Events aus: Rollup und Report-Caches hier nachziehen
+        $projects = \Illuminate\Support\Facades\DB::transaction(function () use ($validated) {
+            $projects = \App\Models\Project::whereIn('id', $validated['ids'])
+                ->get(array_merge(['id'], \App\Services\ProjectRevenueRollupService::TRACKED_FIELDS));
+
+            \App\Models\Project::whereIn('id', $projects->modelKeys())->delete();
+            app(\App\Services\ProjectRevenueRollupService::class)->recordDeletedMany($projects);
+
+            return $projects;
+        });
+
+        foreach ($projects->pluck('tenant_id')->unique() as $tenantId) {
+            \App\Services\CacheService::invalidateReportCaches($tenantId);
+        }
 
         return response()->json(['message' => 'Projects deleted successfully']);
     }
@@ -4,7 +4,10 @@
 
 use App\Http\Controllers\Controller;
 use App\Models\Project;
+use App\Jobs\AnalyzeProjectFile;
+use App\Models\FileAnalysis;
 use App\Models\ProjectFile;
+use App\Services\WordCountService;
 use Illuminate\Http\Request;
 use Illuminate\Support\Facades\Storage;
 
@@ -30,7 +33,7 @@ public function index(Request $request)
 
         return response()->json($files);
     }
-    public function store(\App\Http\Requests\StoreProjectFileRequest $request, Project $project)
+    public function store(\App\Http\Requests\StoreProjectFileRequest $request, Project $project, WordCountService $wordCounter)
     {
         try {
             $file = $request->file('file');
@@ -55,25 +58,9 @@ public function store(\App\Http\Requests\StoreProjectFileRequest $request, Proje
             // Store in storage/app/public/projects/{project_id}/files
             $path = $file->storeAs("projects/{$project->id}/files", $filename, 'public');
 
-            // Estimate word count (simplified, real implementation would use a service)
-            $wordCount = 0;
-            $charCount = 0;
-
-            // For text-based files, try to count words/chars
-            if (in_array($mimeType, ['text/plain', 'application/pdf', 'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'])) {
-                try {
-                    if ($mimeType === 'text/plain') {
-                        $content = file_get_contents($file->getRealPath());
-                        // Security: Limit content size for processing
-                        if (strlen($content) < 10 * 1024 * 1024) { // 10MB limit for text processing
-                            $wordCount = str_word_count($content);
-                            $charCount = mb_strlen($content);
-                        }
-                    }
-                } catch (\Exception $e) {
-                    \Log::warning('Word count failed for file: ' . $originalName, ['error' => $e->getMessage()]);
-                }
-            }
+            // Word count: bekannte Inhalte sofort aus dem Cache, sonst per Queue-Job nach dem Upload
+            $sha256 = hash_file('sha256', $file->getRealPath());
+            $analysis = $wordCounter->supports($extension) ? $wordCounter->cached($sha256) : null;
 
             // Check for existing file with same name and type to handle versioning
             $existingFile = ProjectFile::where('project_id', $project->id)
@@ -95,14 +82,23 @@ public function store(\App\Http\Requests\StoreProjectFileRequest $request, Proje
                 'mime_type' => $mimeType,
                 'extension' => $extension,
                 'file_size' => $fileSize,
+                'sha256' => $sha256,
                 'type' => $request->type,
-                'word_count' => $wordCount,
-                'char_count' => $charCount,
+                'word_count' => $analysis->word_count ?? 0,
+                'char_count' => $analysis->char_count ?? 0,
+                'analyzed_at' => $analysis ? now() : null,
+                // Nicht zählbare Formate gleich als fehlgeschlagen markieren, sonst bleiben sie "ausstehend"
+                'analysis_failed_at' => $wordCounter->supports($extension) ? null : now(),
+                'analysis_error' => $wordCounter->supports($extension) ? null : 'Format wird nicht gezählt.',
                 'version' => $version,
                 'status' => 'ready',
                 'uploaded_by' => $request->user()->id,
             ]);
 
+            if (!$analysis && $wordCounter->supports($extension)) {
+                AnalyzeProjectFile::dispatch($projectFile);
+            }
+
             return response()->json($projectFile->load('uploader'), 201);
         } catch (\Exception $e) {
             \Log::error('File upload failed', [
@@ -117,6 +113,47 @@ public function store(\App\Http\Requests\StoreProjectFileRequest $request, Proje
         }
     }
 
+    /**
+     * Wort-/Zeichenzahlen und Wiederholungsanalyse über die Ausgangsdateien des Projekts
+     * (je Dateiname nur die neueste Version, in Upload-Reihenfolge)
+     */
+    public function analysis(Project $project, WordCountService $wordCounter)
+    {
+        $files = $project->files()
+            ->where('type', 'source')
+            ->orderBy('created_at')
+            ->orderBy('id')
+            ->get(['id', 'original_name', 'version', 'sha256', 'word_count', 'char_count', 'analyzed_at', 'analysis_failed_at', 'analysis_error', 'created_at'])
+            ->groupBy('original_name')
+            ->map(fn($versions) => $versions->last())
+            ->sortBy('id')
+            ->values();
+
+        $analyses = FileAnalysis::whereIn('sha256', $files->pluck('sha256')->filter()->unique())
+            ->where('engine_version', WordCountService::ENGINE_VERSION)
+            ->get()
+            ->keyBy('sha256');
+
+        $ordered = $files->map(fn($file) => $analyses[$file->sha256] ?? null)->filter();
+
+        return response()->json([
+            'files' => $files->map(fn($file) => [
+                'id' => $file->id,
+                'name' => $file->original_name,
+                'word_count' => $file->word_count,
+                'char_count' => $file->char_count,
+                'analyzed' => isset($analyses[$file->sha256]),
+                'failed' => !isset($analyses[$file->sha256]) && $file->analysis_failed_at !== null,
+                'error' => isset($analyses[$file->sha256]) ? null : $file->analysis_error,
+                'scripts' => $analyses[$file->sha256]->scripts ?? null,
+            ]),
+            // Fehlgeschlagene Dateien zählen nicht als ausstehend, die Oberfläche muss nicht weiter abfragen
+            'pending' => $files->filter(fn($file) => !isset($analyses[$file->sha256]) && $file->analysis_failed_at === null)->count(),
+            'failed' => $files->filter(fn($file) => !isset($analyses[$file->sha256]) && $file->analysis_failed_at !== null)->count(),
+            'repetitions' => $wordCounter->repetitionStats($ordered),
+        ]);
+    }
+
     public function destroy(Project $project, ProjectFile $file)
     {
         // Ensure file belongs to project
@@ -4,10 +4,11 @@
 
 use App\Http\Controllers\Controller;
 use App\Models\Project;
+use App\Models\ProjectRevenueRollup;
+use App\Services\CacheService;
 use Carbon\Carbon;
 use Illuminate\Http\Request;
 use Illuminate\Support\Facades\DB;
-use Illuminate\Support\Facades\Cache;
 use Illuminate\Support\Facades\Auth;
 
 class ReportController extends Controller
@@ -28,19 +29,28 @@ private function getDateRange(Request $request)
         return [$start, $end];
     }
 
+    /**
+     * Monatssummen aus dem Rollup, nach Monat (YYYY-MM) indiziert
+     */
+    private function monthlyTotals(Carbon $startDate, Carbon $endDate)
+    {
+        return ProjectRevenueRollup::betweenDays($startDate, $endDate)
+            ->select(
+                'month',
+                DB::raw('SUM(revenue) as revenue'),
+                DB::raw('SUM(partner_cost) as cost')
+            )
+            ->groupBy('month')
+            ->get()
+            ->keyBy('month');
+    }
+
     public function revenue(Request $request)
     {
         Carbon::setLocale('de');
         [$startDate, $endDate] = $this->getDateRange($request);
 
-        $data = Project::select(
-            DB::raw('DATE_FORMAT(created_at, "%Y-%m") as month'),
-            DB::raw('SUM(price_total) as total')
-        )
-            ->whereBetween('created_at', [$startDate, $endDate])
-            ->groupBy(DB::raw('DATE_FORMAT(created_at, "%Y-%m")'))
-            ->orderBy('month')
-            ->get();
+        $data = $this->monthlyTotals($startDate, $endDate);
 
         $labels = [];
         $values = [];
@@ -48,13 +58,9 @@ public function revenue(Request $request)
         // Fill gaps if range is small enough, otherwise just show months
         $current = $startDate->copy();
         while ($current <= $endDate) {
-            $m = $current->format('Y-m');
+            $match = $data->get($current->format('Y-m'));
             $labels[] = $current->translatedFormat('M Y');
-
-            $match = $data->first(function ($item) use ($m) {
-                return str_starts_with($item->month, $m);
-            });
-            $values[] = $match ? (float) $match->total : 0;
+            $values[] = $match ? (float) $match->revenue : 0;
 
             $current->addMonth();
         }
@@ -70,27 +76,16 @@ public function profitMargin(Request $request)
         Carbon::setLocale('de');
         [$startDate, $endDate] = $this->getDateRange($request);
 
-        $data = Project::select(
-            DB::raw('DATE_FORMAT(created_at, "%Y-%m") as month'),
-            DB::raw('SUM(price_total) as revenue'),
-            DB::raw('SUM(partner_cost_net) as cost')
-        )
-            ->whereBetween('created_at', [$startDate, $endDate])
-            ->groupBy(DB::raw('DATE_FORMAT(created_at, "%Y-%m")'))
-            ->get();
+        $data = $this->monthlyTotals($startDate, $endDate);
 
         $labels = [];
         $margins = [];
 
         $current = $startDate->copy();
         while ($current <= $endDate) {
-            $m = $current->format('Y-m');
+            $match = $data->get($current->format('Y-m'));
             $labels[] = $current->translatedFormat('M Y');
 
-            $match = $data->first(function ($item) use ($m) {
-                return str_starts_with($item->month, $m);
-            });
-
             if ($match && $match->revenue > 0) {
                 $profit = $match->revenue - $match->cost;
                 $margin = ($profit / $match->revenue) * 100;
@@ -112,13 +107,13 @@ public function languageDistribution(Request $request)
     {
         [$startDate, $endDate] = $this->getDateRange($request);
 
-        $data = Project::join('languages', 'projects.target_lang_id', '=', 'languages.id')
+        $data = ProjectRevenueRollup::join('languages', 'project_revenue_rollups.target_lang_id', '=', 'languages.id')
             ->select(
                 'languages.name_internal',
-                DB::raw('count(*) as count'),
-                DB::raw('SUM(projects.price_total) as revenue')
+                DB::raw('SUM(project_revenue_rollups.job_count) as count'),
+                DB::raw('SUM(project_revenue_rollups.revenue) as revenue')
             )
-            ->whereBetween('projects.created_at', [$startDate, $endDate])
+            ->betweenDays($startDate, $endDate)
             ->groupBy('languages.name_internal')
             ->orderByDesc('revenue')
             ->limit(10)
@@ -134,7 +129,7 @@ public function languageDistribution(Request $request)
             'labels' => $labels,
             'data' => $percentages,
             'revenue' => $revenues,
-            'count' => $data->pluck('count')->toArray()
+            'count' => $data->pluck('count')->map(fn($v) => (int) $v)->toArray()
         ]);
     }
 
@@ -142,11 +137,13 @@ public function kpis(Request $request)
     {
         [$startDate, $endDate] = $this->getDateRange($request);
 
-        $query = Project::whereBetween('created_at', [$startDate, $endDate]);
+        $totals = ProjectRevenueRollup::betweenDays($startDate, $endDate)
+            ->selectRaw('COALESCE(SUM(revenue), 0) as revenue, COALESCE(SUM(partner_cost), 0) as cost, COALESCE(SUM(job_count), 0) as jobs')
+            ->first();
 
-        $totalRevenue = (float) $query->sum('price_total');
-        $totalCost = (float) $query->sum('partner_cost_net');
-        $totalJobs = $query->count();
+        $totalRevenue = (float) $totals->revenue;
+        $totalCost = (float) $totals->cost;
+        $totalJobs = (int) $totals->jobs;
 
         $margin = 0;
         if ($totalRevenue > 0) {
@@ -158,7 +155,7 @@ public function kpis(Request $request)
         $prevStartDate = $startDate->copy()->subDays($diffInDays);
         $prevEndDate = $endDate->copy()->subDays($diffInDays);
 
-        $prevRevenue = Project::whereBetween('created_at', [$prevStartDate, $prevEndDate])->sum('price_total');
+        $prevRevenue = (float) ProjectRevenueRollup::betweenDays($prevStartDate, $prevEndDate)->sum('revenue');
 
         $growth = 0;
         if ($prevRevenue > 0) {
@@ -179,12 +176,12 @@ public function customers(Request $request)
     {
         [$startDate, $endDate] = $this->getDateRange($request);
 
-        $data = Project::join('customers', 'projects.customer_id', '=', 'customers.id')
+        $data = ProjectRevenueRollup::join('customers', 'project_revenue_rollups.customer_id', '=', 'customers.id')
             ->select(
                 DB::raw('COALESCE(customers.company_name, CONCAT(customers.first_name, " ", customers.last_name)) as name'),
-                DB::raw('SUM(projects.price_total) as revenue')
+                DB::raw('SUM(project_revenue_rollups.revenue) as revenue')
             )
-            ->whereBetween('projects.created_at', [$startDate, $endDate])
+            ->betweenDays($startDate, $endDate)
             ->groupBy('name')
             ->orderByDesc('revenue')
             ->limit(10)
@@ -200,9 +197,8 @@ public function summary(Request $request)
     {
         $tenantId = Auth::user()->tenant_id;
         $params = json_encode($request->all());
-        $cacheKey = "report_summary_{$tenantId}_" . md5($params);
 
-        return Cache::remember($cacheKey, 1800, function () use ($request) {
+        return CacheService::cacheReportData($tenantId, 'summary', md5($params), function () use ($request) {
             return [
                 'kpis' => $this->kpis($request)->original,
                 'revenue' => $this->revenue($request)->original,
@@ -266,13 +262,11 @@ public function taxReport(Request $request)
             ->get();
 
         // Also get partner costs for estimated input tax (Vorsteuer)
-        $partnerCosts = \App\Models\Project::whereBetween('created_at', [$startDate, $endDate])
-            ->select(
-                DB::raw('DATE_FORMAT(created_at, "%Y-%m") as month'),
-                DB::raw('SUM(partner_cost_net) as cost')
-            )
-            ->groupBy(DB::raw('DATE_FORMAT(created_at, "%Y-%m")'))
-            ->get();
+        $partnerCosts = ProjectRevenueRollup::betweenDays($startDate, $endDate)
+            ->select('month', DB::raw('SUM(partner_cost) as cost'))
+            ->groupBy('month')
+            ->get()
+            ->keyBy('month');
 
         $report = [];
         $current = $startDate->copy()->startOfMonth();
@@ -282,7 +276,7 @@ public function taxReport(Request $request)
             $month = $current->format('Y-m');
             
             $monthData = $data->where('month', $month);
-            $monthCost = $partnerCosts->where('month', $month)->first();
+            $monthCost = $partnerCosts->get($month);
 
             $standard = $monthData->where('tax_exemption', 'none')->first();
             $reverse = $monthData->where('tax_exemption', 'reverse_charge')->sum('net');
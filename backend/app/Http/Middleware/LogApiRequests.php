@@ -2,8 +2,7 @@
 
 namespace App\Http\Middleware;
 
-use App\Jobs\LogApiRequest;
-use App\Models\ApiRequestLog;
+use App\Services\RequestLogBuffer;
 use Closure;
 use Illuminate\Http\Request;
 use Illuminate\Support\Str;
@@ -11,6 +10,15 @@
 
 class LogApiRequests
 {
+    /**
+     * Request-Daten, die nie ins Protokoll gelangen
+     */
+    const SENSITIVE_KEYS = [
+        'password', 'password_confirmation', 'current_password',
+        'code', 'two_factor_code', 'token', 'api_token', 'api_key', 'api_secret', 'secret',
+        'credit_card', 'cvv', 'iban', 'bic',
+    ];
+
     /**
      * Handle an incoming request.
      *
@@ -33,21 +41,10 @@ public function handle(Request $request, Closure $next): Response
         // Process the request
         $response = $next($request);
 
-        // Debug authentication
-        if (!$this->shouldSkip($request)) {
-            \Illuminate\Support\Facades\Log::debug('Request Auth Status', [
-                'user_id' => $request->user()?->id,
-                'path' => $request->path(),
-                'status' => $response->getStatusCode(),
-                'has_auth_header' => $request->hasHeader('Authorization'),
-            ]);
-        }
-
         // Calculate duration and memory
         $duration = (microtime(true) - $startTime) * 1000; // Convert to milliseconds
-        $memoryUsage = memory_get_usage() - $startMemory;
+        $memoryUsage = max(0, memory_get_usage() - $startMemory);
 
-        // Log the request asynchronously (in real app, use queue)
         try {
             $this->logRequest($request, $response, $duration, $memoryUsage, $requestId);
         } catch (\Exception $e) {
@@ -59,33 +56,76 @@ public function handle(Request $request, Closure $next): Response
     }
 
     /**
-     * Dispatch async job to log the request to database (non-blocking)
+     * Buffer the request log (written in bulk after the response, see RequestLogBuffer)
      */
     protected function logRequest(Request $request, Response $response, float $duration, int $memoryUsage, string $requestId): void
     {
-        $user = $request->user();
+        $status = $response->getStatusCode();
+        $logged = RequestLogBuffer::shouldLog($status, $duration);
+
+        // Rollup zählt jeden Request, auch wenn das Rohprotokoll nur eine Stichprobe enthält
+        RequestLogBuffer::metric(
+            $request->method(),
+            $request->route()?->uri() ?? 'unmatched',
+            $status,
+            $duration,
+            intdiv($memoryUsage, 1024),
+            $logged,
+        );
+
+        if (!$logged) {
+            return;
+        }
 
-        // Prepare request body (exclude sensitive data)
-        $requestData = $request->except([
-            'password', 'password_confirmation', 'current_password',
-            'code', 'token', 'api_token', 'api_key', 'api_secret',
-            'credit_card', 'cvv', 'iban', 'bic'
+        $user = $request->user();
+        $now = now()->toDateTimeString();
+
+        RequestLogBuffer::push('api', [
+            'method' => $request->method(),
+            'url' => Str::limit($request->fullUrl(), 2040, ''),
+            'endpoint' => Str::limit($request->path(), 510, ''),
+            'status_code' => $status,
+            'query_params' => $request->query() ? json_encode($this->redact($request->query())) : null,
+            'request_body' => $request->isMethod('GET') ? null : json_encode($this->redact($request->post())),
+            'duration_ms' => round($duration, 2),
+            'memory_usage' => $memoryUsage,
+            'ip_address' => $request->ip(),
+            'user_agent' => $request->userAgent(),
+            'referer' => Str::limit((string) $request->headers->get('referer'), 190, '') ?: null,
+            'user_id' => $user?->id,
+            'tenant_id' => $user?->tenant_id,
+            'user_email' => $user?->email,
+            'error_message' => $status >= 400 ? $this->errorMessage($response) : null,
+            'request_id' => $requestId,
+            'created_at' => $now,
+            'updated_at' => $now,
         ]);
+    }
 
-        // ✅ Dispatch async job (non-blocking)
-        LogApiRequest::dispatch(
-            method: $request->method(),
-            path: $request->path(),
-            statusCode: $response->getStatusCode(),
-            duration: $duration / 1000, // Convert ms to seconds
-            memory: $memoryUsage,
-            userId: $user?->id,
-            ip: $request->ip(),
-            requestData: $requestData,
-            userAgent: $request->userAgent(),
-        );
+    /**
+     * Entferne sensitive Daten aus Request-Logging
+     */
+    protected function redact(array $data): array
+    {
+        foreach ($data as $key => $value) {
+            if (in_array(strtolower((string) $key), self::SENSITIVE_KEYS, true)) {
+                $data[$key] = '[REDACTED]';
+            } elseif (is_array($value)) {
+                $data[$key] = $this->redact($value);
+            }
+        }
+
+        return $data;
+    }
+
+    /**
+     * Fehlermeldung aus einer JSON-Fehlerantwort
+     */
+    protected function errorMessage(Response $response): ?string
+    {
+        $content = json_decode((string) $response->getContent(), true);
 
-        // Log wird in LogApiRequest Job erstellt
+        return is_array($content) && isset($content['message']) ? Str::limit((string) $content['message'], 1000) : null;
     }
 
     /**
@@ -2,44 +2,60 @@
 
 namespace App\Http\Middleware;
 
+use App\Services\RequestLogBuffer;
 use Closure;
+use Illuminate\Database\Eloquent\Model;
 use Illuminate\Http\Request;
-use Spatie\Activitylog\Models\Activity;
 
 class LogDataAccess
 {
     /**
      * Handle an incoming request.
      * Logs access to sensitive personal data for GDPR/DSGVO compliance.
+     *
+     * Der Eintrag im activity_log wird gepuffert und gesammelt geschrieben (RequestLogBuffer);
+     * DSGVO-Zugriffe werden nie per Stichprobe ausgelassen.
      */
     public function handle(Request $request, Closure $next, string $resourceType)
     {
         $response = $next($request);
 
         // Only log successful reads (GET)
-        if ($request->isMethod('GET') && $response->getStatusCode() === 200) {
+        if ($request->isMethod('GET') && $response->getStatusCode() === 200 && config('activitylog.enabled', true)) {
             $user = $request->user();
+            $subject = $this->getSubject($request, $resourceType);
+            $now = now()->toDateTimeString();
 
-            activity()
-                ->performedOn($this->getSubject($request, $resourceType))
-                ->causedBy($user)
-                ->withProperties([
+            RequestLogBuffer::push('activity', [
+                'log_name' => config('activitylog.default_log_name', 'default'),
+                'description' => "DSGVO: Zugriff auf personenbezogene Daten ({$resourceType})",
+                'subject_type' => $subject?->getMorphClass(),
+                'subject_id' => $subject?->getKey(),
+                'event' => null,
+                'causer_type' => $user?->getMorphClass(),
+                'causer_id' => $user?->getKey(),
+                'properties' => json_encode([
                     'ip' => $request->ip(),
                     'user_agent' => $request->userAgent(),
                     'url' => $request->fullUrl(),
                     'resource' => $resourceType,
                     'action' => 'view_detail'
-                ])
-                ->log("DSGVO: Zugriff auf personenbezogene Daten ({$resourceType})");
+                ]),
+                'batch_uuid' => null,
+                'created_at' => $now,
+                'updated_at' => $now,
+            ]);
         }
 
         return $response;
     }
 
-    private function getSubject(Request $request, string $resourceType)
+    private function getSubject(Request $request, string $resourceType): ?Model
     {
         // Try to find the model instance from the route
-        $parameters = $request->route()->parameters();
-        return reset($parameters) ?: null;
+        $parameters = $request->route()?->parameters() ?? [];
+        $subject = reset($parameters);
+
+        return $subject instanceof Model ? $subject : null;
     }
 }
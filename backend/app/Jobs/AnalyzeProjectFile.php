@@ -0,0 +1,78 @@
+<?php
+
+namespace App\Jobs;
+
+use App\Models\ProjectFile;
+use App\Services\WordCountService;
+use Illuminate\Bus\Queueable;
+use Illuminate\Contracts\Queue\ShouldQueue;
+use Illuminate\Foundation\Bus\Dispatchable;
+use Illuminate\Queue\InteractsWithQueue;
+use Illuminate\Queue\SerializesModels;
+use Illuminate\Support\Facades\Log;
+use Illuminate\Support\Facades\Storage;
+
+/**
+ * Async job für die Wort-/Zeichenzählung einer hochgeladenen Projektdatei
+ * Blockiert nicht den Upload-Request; gleiche Inhalte werden per SHA-256 nur einmal gezählt
+ */
+class AnalyzeProjectFile implements ShouldQueue
+{
+    use Dispatchable, InteractsWithQueue, Queueable, SerializesModels;
+
+    public int $timeout = 600; // 10 minutes
+    public int $tries = 2;
+    public int $backoff = 60;
+
+    public function __construct(public ProjectFile $projectFile) {}
+
+    public function handle(WordCountService $wordCounter): void
+    {
+        $path = Storage::disk('public')->path($this->projectFile->path);
+
+        $started = microtime(true);
+        $analysis = $wordCounter->analyze($path, $this->projectFile->extension, $this->projectFile->sha256);
+
+        if (!$analysis) {
+            // Datei nicht lesbar (beschädigt, kein unterstütztes Format): ein Wiederholen hilft nicht
+            $this->markFailed('Datei konnte nicht gelesen werden.');
+            return;
+        }
+
+        $this->projectFile->forceFill([
+            'sha256' => $analysis->sha256,
+            'word_count' => $analysis->word_count,
+            'char_count' => $analysis->char_count,
+            'analyzed_at' => now(),
+            'analysis_failed_at' => null,
+            'analysis_error' => null,
+        ])->save();
+
+        Log::info('Project file analyzed', [
+            'project_file_id' => $this->projectFile->id,
+            'word_count' => $analysis->word_count,
+            'seconds' => round(microtime(true) - $started, 2),
+        ]);
+    }
+
+    /**
+     * Alle Versuche fehlgeschlagen (Ausnahme, Timeout)
+     */
+    public function failed(\Throwable $e): void
+    {
+        $this->markFailed($e->getMessage());
+    }
+
+    protected function markFailed(string $error): void
+    {
+        $this->projectFile->forceFill([
+            'analysis_failed_at' => now(),
+            'analysis_error' => mb_substr($error, 0, 255),
+        ])->save();
+
+        Log::warning('Project file analysis failed', [
+            'project_file_id' => $this->projectFile->id,
+            'error' => $error,
+        ]);
+    }
+}
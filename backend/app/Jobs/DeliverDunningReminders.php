@@ -0,0 +1,52 @@
+<?php
+
+namespace App\Jobs;
+
+use App\Models\DunningLog;
+use App\Services\DunningService;
+use Illuminate\Bus\Batchable;
+use Illuminate\Bus\Queueable;
+use Illuminate\Contracts\Queue\ShouldQueue;
+use Illuminate\Foundation\Bus\Dispatchable;
+use Illuminate\Queue\InteractsWithQueue;
+use Illuminate\Queue\SerializesModels;
+use Illuminate\Support\Facades\Log;
+
+/**
+ * Mahnungs-PDFs erzeugen und (falls aktiviert) per E-Mail versenden
+ */
+class DeliverDunningReminders implements ShouldQueue
+{
+    use Batchable, Dispatchable, InteractsWithQueue, Queueable, SerializesModels;
+
+    public int $timeout = 900;
+    public int $tries = 1;
+
+    public function __construct(public array $logIds) {}
+
+    public function handle(DunningService $dunning): void
+    {
+        $failed = [];
+
+        DunningLog::withoutGlobalScopes()
+            ->whereIn('id', $this->logIds)
+            ->chunkById(50, function ($logs) use ($dunning, &$failed) {
+                foreach ($logs as $log) {
+                    if ($this->batch()?->cancelled()) {
+                        return false;
+                    }
+
+                    try {
+                        $dunning->deliverReminder($log);
+                    } catch (\Throwable $e) {
+                        $failed[] = $log->id;
+                        Log::error("Dunning delivery failed for log {$log->id}: " . $e->getMessage());
+                    }
+                }
+            });
+
+        if ($failed) {
+            Log::warning('Dunning reminders not delivered', ['batch_id' => $this->batch()?->id, 'log_ids' => $failed]);
+        }
+    }
+}
@@ -3,14 +3,13 @@
 namespace App\Jobs;
 
 use App\Models\Invoice;
-use Barryvdh\DomPDF\Facade\Pdf;
+use App\Services\InvoicePdfService;
 use Illuminate\Bus\Queueable;
 use Illuminate\Contracts\Queue\ShouldQueue;
 use Illuminate\Foundation\Bus\Dispatchable;
 use Illuminate\Queue\InteractsWithQueue;
 use Illuminate\Queue\SerializesModels;
 use Illuminate\Support\Facades\Log;
-use Illuminate\Support\Facades\Storage;
 
 /**
  * Async job für PDF-Generierung von Invoices
@@ -26,43 +25,16 @@ class GenerateInvoicePdf implements ShouldQueue
 
     public function __construct(public Invoice $invoice) {}
 
-    public function handle()
+    public function handle(InvoicePdfService $pdfs)
     {
         try {
-            // Generate HTML from template
-            $html = \view('invoices.pdf', [
-                'invoice' => $this->invoice->load(['items', 'customer', 'tenant']),
-            ])->render();
-
-            // Generate PDF
-            $pdf = Pdf::loadHTML($html)
-                ->setOption('defaultFont', 'Helvetica')
-                ->setOption('margin-top', 15)
-                ->setOption('margin-bottom', 15)
-                ->setOption('margin-left', 15)
-                ->setOption('margin-right', 15)
-                ->setOption('page-size', 'A4')
-                ->setOption('encoding', 'UTF-8');
-
-            // Create file path with date
-            $fileName = sprintf(
-                'invoices/inv_%s_%s.pdf',
-                $this->invoice->invoice_number,
-                now()->format('Ymd')
-            );
-
-            // Store PDF file
-            Storage::disk('local')->put($fileName, $pdf->output());
-
-            // Update invoice with PDF path
-            $this->invoice->update([
-                'pdf_path' => $fileName,
-                'pdf_generated_at' => now(),
-            ]);
+            // Gleicher Weg wie InvoiceController (Layout, ZUGFeRD, Inhalts-Hash-Cache)
+            $changed = $pdfs->generate($this->invoice);
 
             Log::info('Invoice PDF generated', [
                 'invoice_id' => $this->invoice->id,
-                'file_path' => $fileName,
+                'file_path' => $this->invoice->pdf_path,
+                'unchanged' => !$changed,
             ]);
 
             // Trigger event for real-time notification
@@ -0,0 +1,72 @@
+<?php
+
+namespace App\Jobs;
+
+use App\Services\DunningService;
+use Illuminate\Bus\Batchable;
+use Illuminate\Bus\Queueable;
+use Illuminate\Contracts\Queue\ShouldQueue;
+use Illuminate\Foundation\Bus\Dispatchable;
+use Illuminate\Queue\InteractsWithQueue;
+use Illuminate\Queue\SerializesModels;
+use Illuminate\Support\Facades\Log;
+
+/**
+ * Mahnlauf für eine Gruppe von Tenants (Teil des Batches aus DunningService::processDunningQueue).
+ * PDFs und E-Mails der neuen Mahnungen werden als weitere Jobs an denselben Batch angehängt.
+ */
+class ProcessDunningTenants implements ShouldQueue
+{
+    use Batchable, Dispatchable, InteractsWithQueue, Queueable, SerializesModels;
+
+    // Mahnungen je Zustell-Job
+    const DELIVERY_CHUNK = 50;
+
+    public int $timeout = 900;
+    public int $tries = 1;
+
+    public function __construct(public array $tenantIds) {}
+
+    public function handle(DunningService $dunning): void
+    {
+        $logIds = [];
+        $skipped = [];
+
+        foreach ($this->tenantIds as $tenantId) {
+            if ($this->batch()?->cancelled()) {
+                return;
+            }
+
+            try {
+                $result = $dunning->processTenant($tenantId);
+            } catch (\Throwable $e) {
+                // Ein fehlerhafter Tenant darf die übrigen der Gruppe nicht aufhalten
+                Log::error("Dunning run failed for tenant {$tenantId}: " . $e->getMessage());
+                continue;
+            }
+
+            if ($result['skipped']) {
+                $skipped[] = $tenantId;
+            }
+            array_push($logIds, ...$result['log_ids']);
+        }
+
+        if ($logIds) {
+            $jobs = array_map(fn($ids) => new DeliverDunningReminders($ids), array_chunk($logIds, self::DELIVERY_CHUNK));
+            if ($this->batch()) {
+                $this->batch()->add($jobs);
+            } else {
+                foreach ($jobs as $job) {
+                    dispatch($job);
+                }
+            }
+        }
+
+        Log::info('Dunning tenants processed', [
+            'batch_id' => $this->batch()?->id,
+            'tenants' => count($this->tenantIds),
+            'reminders' => count($logIds),
+            'skipped_locked' => $skipped,
+        ]);
+    }
+}
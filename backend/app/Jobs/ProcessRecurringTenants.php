@@ -0,0 +1,72 @@
+<?php
+
+namespace App\Jobs;
+
+use App\Services\RecurringInvoiceService;
+use Illuminate\Bus\Batchable;
+use Illuminate\Bus\Queueable;
+use Illuminate\Contracts\Queue\ShouldQueue;
+use Illuminate\Foundation\Bus\Dispatchable;
+use Illuminate\Queue\InteractsWithQueue;
+use Illuminate\Queue\SerializesModels;
+use Illuminate\Support\Facades\Log;
+
+/**
+ * Daueraufträge für eine Gruppe von Tenants (Teil des Batches aus RecurringInvoiceService::processDue).
+ * PDFs der automatisch ausgestellten Rechnungen folgen als RenderInvoicePdfs-Jobs im selben Batch.
+ */
+class ProcessRecurringTenants implements ShouldQueue
+{
+    use Batchable, Dispatchable, InteractsWithQueue, Queueable, SerializesModels;
+
+    // Rechnungen je PDF-Job
+    const PDF_CHUNK = 100;
+
+    public int $timeout = 900;
+    public int $tries = 1;
+
+    public function __construct(public array $tenantIds) {}
+
+    public function handle(RecurringInvoiceService $recurring): void
+    {
+        $created = 0;
+        $failed = 0;
+        $issuedIds = [];
+        $skipped = [];
+
+        foreach ($this->tenantIds as $tenantId) {
+            if ($this->batch()?->cancelled()) {
+                return;
+            }
+
+            $result = $recurring->processTenant($tenantId);
+
+            if ($result['skipped']) {
+                $skipped[] = $tenantId;
+            }
+            $created += $result['created'];
+            $failed += $result['failed'];
+            array_push($issuedIds, ...$result['issued_ids']);
+        }
+
+        if ($issuedIds) {
+            $jobs = array_map(fn($ids) => new RenderInvoicePdfs($ids), array_chunk($issuedIds, self::PDF_CHUNK));
+
+            if ($this->batch()) {
+                $this->batch()->add($jobs);
+            } else {
+                foreach ($jobs as $job) {
+                    dispatch($job);
+                }
+            }
+        }
+
+        Log::info('Recurring invoice tenants processed', [
+            'batch_id' => $this->batch()?->id,
+            'tenants' => count($this->tenantIds),
+            'created' => $created,
+            'failed' => $failed,
+            'skipped_locked' => $skipped,
+        ]);
+    }
+}
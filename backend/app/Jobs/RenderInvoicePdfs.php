@@ -0,0 +1,60 @@
+<?php
+
+namespace App\Jobs;
+
+use App\Models\Invoice;
+use App\Services\InvoicePdfService;
+use Illuminate\Bus\Batchable;
+use Illuminate\Bus\Queueable;
+use Illuminate\Contracts\Queue\ShouldQueue;
+use Illuminate\Foundation\Bus\Dispatchable;
+use Illuminate\Queue\InteractsWithQueue;
+use Illuminate\Queue\SerializesModels;
+use Illuminate\Support\Facades\Log;
+
+/**
+ * Sammel-Erzeugung von Rechnungs-PDFs (ein Teil eines Batches aus InvoicePdfService::dispatchBulk)
+ * Ein Worker rendert seine Rechnungen nacheinander im selben, warmen Prozess
+ */
+class RenderInvoicePdfs implements ShouldQueue
+{
+    use Batchable, Dispatchable, InteractsWithQueue, Queueable, SerializesModels;
+
+    public int $timeout = 1800;
+    public int $tries = 1;
+
+    public function __construct(public array $invoiceIds) {}
+
+    public function handle(InvoicePdfService $pdfs): void
+    {
+        $rendered = 0;
+        $unchanged = 0;
+        $failed = [];
+
+        Invoice::withoutGlobalScopes()
+            ->with('items')
+            ->whereIn('id', $this->invoiceIds)
+            ->chunkById(100, function ($invoices) use ($pdfs, &$rendered, &$unchanged, &$failed) {
+                foreach ($invoices as $invoice) {
+                    if ($this->batch()?->cancelled()) {
+                        return false;
+                    }
+
+                    try {
+                        $pdfs->generate($invoice) ? $rendered++ : $unchanged++;
+                    } catch (\Throwable $e) {
+                        // Einzelne Rechnung darf den restlichen Teil nicht abbrechen
+                        $failed[] = $invoice->id;
+                        Log::error("Bulk PDF generation failed for invoice {$invoice->id}: " . $e->getMessage());
+                    }
+                }
+            });
+
+        Log::info('Bulk invoice PDFs rendered', [
+            'batch_id' => $this->batch()?->id,
+            'rendered' => $rendered,
+            'unchanged' => $unchanged,
+            'failed' => $failed,
+        ]);
+    }
+}
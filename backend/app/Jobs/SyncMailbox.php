@@ -3,124 +3,88 @@
 namespace App\Jobs;
 
 use App\Models\MailAccount;
+use App\Services\MailSyncService;
+use Illuminate\Bus\Batchable;
 use Illuminate\Bus\Queueable;
 use Illuminate\Contracts\Queue\ShouldQueue;
 use Illuminate\Foundation\Bus\Dispatchable;
 use Illuminate\Queue\InteractsWithQueue;
+use Illuminate\Queue\Middleware\WithoutOverlapping;
 use Illuminate\Queue\SerializesModels;
+use Illuminate\Support\Facades\Cache;
 use Illuminate\Support\Facades\Log;
 
 /**
- * Async job für Mailbox-Sync via IMAP
- * Blockiert nicht den UI-Request
+ * Async job für Mailbox-Sync via IMAP (ein Job pro Konto)
+ * Blockiert nicht den UI-Request; mehrere Konten laufen parallel auf den Queue-Workern
  */
 class SyncMailbox implements ShouldQueue
 {
-    use Dispatchable, InteractsWithQueue, Queueable, SerializesModels;
+    use Batchable, Dispatchable, InteractsWithQueue, Queueable, SerializesModels;
 
     public int $timeout = 300; // 5 minutes
     public int $tries = 3;
     public int $backoff = 60;
 
-    public function __construct(public MailAccount $mailAccount) {}
+    public function __construct(public MailAccount $mailAccount, public string $folder = 'INBOX') {}
 
-    public function handle()
+    /**
+     * Kein zweiter Sync desselben Ordners, solange einer läuft (überzählige Jobs entfallen)
+     */
+    public function middleware(): array
     {
-        try {
-            $this->mailAccount->update([
-                'is_syncing' => true,
-                'last_sync_started_at' => now(),
-            ]);
-
-            Log::info('Starting mailbox sync', [
-                'mail_account_id' => $this->mailAccount->id,
-                'email' => $this->mailAccount->email,
-            ]);
-
-            // Sync unread messages from IMAP
-            $messageCount = $this->syncMessages();
-
-            $this->mailAccount->update([
-                'last_synced_at' => now(),
-                'is_syncing' => false,
-                'sync_error' => null,
-            ]);
+        return [
+            (new WithoutOverlapping("mail-sync:{$this->mailAccount->id}:{$this->folder}"))
+                ->dontRelease()
+                ->expireAfter($this->timeout),
+        ];
+    }
 
-            Log::info('Mailbox sync completed', [
-                'mail_account_id' => $this->mailAccount->id,
-                'message_count' => $messageCount,
-            ]);
+    public function handle(MailSyncService $sync): void
+    {
+        if ($this->batch()?->cancelled()) {
+            return;
+        }
 
-            // Dispatch event for real-time update
-            \event(new \App\Events\MailboxSynced($this->mailAccount, $messageCount));
+        $started = microtime(true);
 
+        try {
+            $created = $sync->syncAccount($this->mailAccount, $this->folder);
         } catch (\Exception $e) {
-            Log::error('Mailbox sync failed', [
-                'mail_account_id' => $this->mailAccount->id,
-                'error' => $e->getMessage(),
-            ]);
+            Log::error("IMAP Sync Failed for account {$this->mailAccount->email}: " . $e->getMessage());
 
-            $this->mailAccount->update([
-                'is_syncing' => false,
-                'sync_error' => $e->getMessage(),
-            ]);
+            if ($this->batch()) {
+                Cache::put(static::errorsKey($this->batch()->id, $this->mailAccount->id), "Fehler bei {$this->mailAccount->email}: " . $e->getMessage(), 3600);
+            }
 
             throw $e;
         }
+
+        Log::info('Mailbox sync completed', [
+            'mail_account_id' => $this->mailAccount->id,
+            'new_count' => $created,
+            'seconds' => round(microtime(true) - $started, 2),
+        ]);
+
+        if ($this->batch()) {
+            Cache::add(static::countKey($this->batch()->id), 0, 3600);
+            Cache::increment(static::countKey($this->batch()->id), $created);
+        }
     }
 
     /**
-     * Sync messages from IMAP server
+     * Cache-Key der neuen E-Mails eines Sync-Batches
      */
-    private function syncMessages(): int
+    public static function countKey(string $batchId): string
     {
-        // Implement IMAP sync logic here
-        // This is a placeholder - actual implementation depends on your IMAP client
-
-        try {
-            // Example using webklex/laravel-imap
-            $client = \App\Services\ImapService::connect($this->mailAccount);
-
-            $messageCount = 0;
-            $folder = $client->getFolder('INBOX');
-
-            // Get unread messages
-            $messages = $folder->search(['UNSEEN'])->get();
-
-            foreach ($messages as $message) {
-                $messageCount++;
-
-                // Store message (if not already exists)
-                \App\Models\Mail::firstOrCreate(
-                    [
-                        'mail_account_id' => $this->mailAccount->id,
-                        'message_id' => $message->getMessageId(),
-                    ],
-                    [
-                        'from' => $message->getFrom()[0]->mail ?? null,
-                        'to' => $message->getTo()[0]->mail ?? null,
-                        'cc' => json_encode($message->getCc()),
-                        'subject' => $message->getSubject(),
-                        'body' => $message->getTextBody() ?? $message->getHTMLBody(),
-                        'received_at' => $message->getDate(),
-                        'is_read' => false,
-                        'raw_message' => $message->getRaw(),
-                    ]
-                );
-
-                // Mark as read in IMAP
-                $message->setFlag(['Seen']);
-            }
-
-            $client->close();
-            return $messageCount;
+        return "mail_sync:{$batchId}:new_count";
+    }
 
-        } catch (\Exception $e) {
-            Log::error('IMAP sync error', [
-                'account_id' => $this->mailAccount->id,
-                'error' => $e->getMessage(),
-            ]);
-            throw $e;
-        }
+    /**
+     * Cache-Key der Fehlermeldung eines Kontos innerhalb eines Sync-Batches
+     */
+    public static function errorsKey(string $batchId, int $accountId): string
+    {
+        return "mail_sync:{$batchId}:error:{$accountId}";
     }
 }
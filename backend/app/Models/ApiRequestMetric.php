@@ -0,0 +1,94 @@
+<?php
+
+namespace App\Models;
+
+use App\Support\Histogram;
+use Illuminate\Database\Eloquent\Collection;
+use Illuminate\Database\Eloquent\MassPrunable;
+use Illuminate\Database\Eloquent\Model;
+
+/**
+ * Minuten-Rollup der API-Requests (Latenz-/Speicher-Perzentile je Route).
+ * Wird beim Leeren des Request-Log-Puffers fortgeschrieben, nicht direkt.
+ */
+class ApiRequestMetric extends Model
+{
+    use MassPrunable;
+
+    // route/method dieses Werts = Summe aller Requests der Minute
+    const ALL = '*';
+
+    protected $fillable = [
+        'bucket',
+        'method',
+        'route',
+        'requests',
+        'logged',
+        'status_2xx',
+        'status_3xx',
+        'status_4xx',
+        'status_5xx',
+        'duration_sum_ms',
+        'duration_max_ms',
+        'p50_ms',
+        'p95_ms',
+        'p99_ms',
+        'memory_max_kb',
+        'memory_p50_kb',
+        'memory_p95_kb',
+        'memory_p99_kb',
+        'duration_histogram',
+        'memory_histogram',
+    ];
+
+    protected $casts = [
+        'bucket' => 'datetime',
+        'requests' => 'integer',
+        'logged' => 'integer',
+        'status_2xx' => 'integer',
+        'status_3xx' => 'integer',
+        'status_4xx' => 'integer',
+        'status_5xx' => 'integer',
+        'duration_sum_ms' => 'float',
+        'duration_max_ms' => 'float',
+        'p50_ms' => 'float',
+        'p95_ms' => 'float',
+        'p99_ms' => 'float',
+        'duration_histogram' => 'array',
+        'memory_histogram' => 'array',
+    ];
+
+    /**
+     * Nur die Gesamtzeilen (alle Routen einer Minute)
+     */
+    public function scopeTotals($query)
+    {
+        return $query->where('route', self::ALL);
+    }
+
+    /**
+     * Nur die Zeilen je Route
+     */
+    public function scopeRoutes($query)
+    {
+        return $query->where('route', '!=', self::ALL);
+    }
+
+    /**
+     * Latenz-Histogramme mehrerer Zeilen zusammengeführt (z. B. für Perzentile über eine Stunde)
+     */
+    public static function latencyHistogram(Collection $metrics): Histogram
+    {
+        $histogram = Histogram::latency();
+        foreach ($metrics as $metric) {
+            $histogram->merge($metric->duration_histogram ?? []);
+        }
+
+        return $histogram;
+    }
+
+    public function prunable()
+    {
+        return static::where('bucket', '<', now()->subDays((int) config('logging.api_requests.metrics_days', 30)));
+    }
+}
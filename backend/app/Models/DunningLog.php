@@ -9,20 +9,26 @@ class DunningLog extends Model
 {
     use BelongsToTenant;
 
+    const LEVEL_LABELS = [
+        1 => 'Zahlungserinnerung',
+        2 => '1. Mahnung',
+        3 => '2. Mahnung',
+    ];
+
     protected $fillable = [
         'invoice_id',
         'tenant_id',
-        'reminder_level',
-        'outstanding_amount',
+        'level',
+        'fee_cents',
         'sent_at',
-        'status',
+        'sent_by_user_id',
         'pdf_path',
-        'pdf_hash',
         'notes',
     ];
 
     protected $casts = [
-        'outstanding_amount' => 'decimal:2',
+        'level' => 'integer',
+        'fee_cents' => 'integer',
         'sent_at' => 'datetime',
     ];
 
@@ -31,12 +37,17 @@ public function invoice()
         return $this->belongsTo(Invoice::class);
     }
 
+    public function getLevelLabelAttribute(): string
+    {
+        return self::LEVEL_LABELS[$this->level] ?? 'Mahnung';
+    }
+
     /**
      * Scope: nur versendete Mahnungen
      */
     public function scopeSent($query)
     {
-        return $query->where('status', 'sent');
+        return $query->whereNotNull('sent_at');
     }
 
     /**
@@ -44,6 +55,6 @@ public function scopeSent($query)
      */
     public function scopeLevel($query, int $level)
     {
-        return $query->where('reminder_level', $level);
+        return $query->where('level', $level);
     }
 }
@@ -0,0 +1,73 @@
+<?php
+
+namespace App\Models;
+
+use App\Support\TextStatistics;
+use Illuminate\Database\Eloquent\Model;
+use Illuminate\Support\Facades\Storage;
+use Illuminate\Support\Str;
+
+/**
+ * Zählergebnis eines Dateiinhalts, mandantenübergreifend per SHA-256 wiederverwendet.
+ * Die Fingerabdrücke [Segment-Hash, Wörter, SimHash|null] liegen in Dokumentreihenfolge
+ * als Binärdatei auf der lokalen Disk (fingerprintPath), nicht in der Tabelle.
+ */
+class FileAnalysis extends Model
+{
+    const FINGERPRINT_DIR = 'file_analyses';
+
+    protected $fillable = [
+        'sha256',
+        'engine_version',
+        'format',
+        'word_count',
+        'char_count',
+        'char_count_no_spaces',
+        'segment_count',
+        'repeated_words',
+        'scripts',
+    ];
+
+    protected $casts = [
+        'scripts' => 'array',
+    ];
+
+    public static function fingerprintPath(string $sha256, int $engineVersion): string
+    {
+        return self::FINGERPRINT_DIR . '/' . substr($sha256, 0, 2) . "/{$sha256}-v{$engineVersion}.bin";
+    }
+
+    /**
+     * Fingerabdrücke ablegen (über eine temporäre Datei, parallele Jobs überschreiben sich atomar)
+     *
+     * @param resource $stream
+     */
+    public static function storeFingerprints(string $sha256, int $engineVersion, $stream): void
+    {
+        $disk = Storage::disk('local');
+        $path = static::fingerprintPath($sha256, $engineVersion);
+        $temporary = $path . '.' . Str::random(8) . '.tmp';
+
+        $disk->writeStream($temporary, $stream);
+        $disk->move($temporary, $path);
+    }
+
+    /**
+     * Fingerabdrücke blockweise lesen (leer, wenn die Datei fehlt)
+     *
+     * @return \Generator<array{0: string, 1: int, 2: ?int}>
+     */
+    public function fingerprints(): \Generator
+    {
+        $stream = Storage::disk('local')->readStream(static::fingerprintPath($this->sha256, $this->engine_version));
+        if (!$stream) {
+            return;
+        }
+
+        try {
+            yield from TextStatistics::readFingerprints($stream);
+        } finally {
+            fclose($stream);
+        }
+    }
+}
@@ -174,6 +174,13 @@ protected static function booted(): void
             $invoice->syncStatus();
         });
 
+        // Report- und Kundenlisten-Caches nur bei tatsächlichen Änderungen invalidieren
+        static::saved(function (Invoice $invoice) {
+            if ($invoice->wasRecentlyCreated || $invoice->wasChanged()) {
+                \App\Services\CacheService::invalidateInvoiceCaches($invoice->tenant_id, $invoice->customer_id);
+            }
+        });
+
         // Prevent hard deletion of any invoice (GoBD: Aufbewahrungspflicht)
         static::deleting(function (Invoice $invoice) {
             if ($invoice->is_locked) {
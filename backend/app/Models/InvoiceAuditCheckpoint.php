@@ -0,0 +1,33 @@
+<?php
+
+namespace App\Models;
+
+use Illuminate\Database\Eloquent\Model;
+
+/**
+ * Letzter verifizierter Eintrag der Audit-Hash-Kette einer Rechnung.
+ * Folgeläufe von invoices:verify-audit-chain prüfen nur neuere Einträge.
+ */
+class InvoiceAuditCheckpoint extends Model
+{
+    public $timestamps = false;
+    public $incrementing = false;
+
+    protected $primaryKey = 'invoice_id';
+
+    protected $fillable = [
+        'invoice_id',
+        'last_log_id',
+        'last_hash',
+        'verified_at',
+    ];
+
+    protected $casts = [
+        'verified_at' => 'datetime',
+    ];
+
+    public function invoice()
+    {
+        return $this->belongsTo(Invoice::class);
+    }
+}
@@ -60,6 +60,15 @@ protected static function booted(): void
     public const ACTION_ARCHIVED      = 'archived';
     public const ACTION_MODIFIED      = 'status_change'; // bulk-update / status changes
 
+    /**
+     * SHA-256 over the canonical payload (invoice_id … created_at as ISO-8601).
+     * Used when writing entries and when verifying the chain.
+     */
+    public static function hashPayload(array $payload): string
+    {
+        return hash('sha256', json_encode($payload, JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE));
+    }
+
     // ─── Relationships ───────────────────────────────────────────────
 
     public function invoice()
@@ -33,6 +33,28 @@ class MailAccount extends Model
         'password' => 'encrypted',
     ];
 
+    public function folderStates()
+    {
+        return $this->hasMany(MailFolderState::class);
+    }
+
+    /**
+     * Symfony-Mailer-DSN für den Versand über dieses Konto
+     */
+    public function smtpDsn(): string
+    {
+        $scheme = ((int) $this->smtp_port === 465 || ($this->smtp_encryption ?? 'ssl') === 'ssl') ? 'smtps' : 'smtp';
+
+        return sprintf(
+            '%s://%s:%s@%s:%s',
+            $scheme,
+            urlencode($this->username),
+            urlencode($this->password),
+            $this->smtp_host,
+            $this->smtp_port
+        );
+    }
+
     public function signatures()
     {
         return $this->hasMany(MailSignature::class);
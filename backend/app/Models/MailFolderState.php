@@ -0,0 +1,32 @@
+<?php
+
+namespace App\Models;
+
+use Illuminate\Database\Eloquent\Model;
+use App\Traits\BelongsToTenant;
+
+class MailFolderState extends Model
+{
+    use BelongsToTenant;
+
+    protected $fillable = [
+        'tenant_id',
+        'mail_account_id',
+        'folder',
+        'uid_validity',
+        'last_uid',
+        'last_synced_at',
+        'sync_error',
+    ];
+
+    protected $casts = [
+        'uid_validity' => 'integer',
+        'last_uid' => 'integer',
+        'last_synced_at' => 'datetime',
+    ];
+
+    public function account()
+    {
+        return $this->belongsTo(MailAccount::class, 'mail_account_id');
+    }
+}
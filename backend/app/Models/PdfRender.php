@@ -0,0 +1,36 @@
+<?php
+
+namespace App\Models;
+
+use Illuminate\Database\Eloquent\MassPrunable;
+use Illuminate\Database\Eloquent\Model;
+
+class PdfRender extends Model
+{
+    use MassPrunable;
+
+    const UPDATED_AT = null;
+
+    protected $fillable = [
+        'tenant_id',
+        'template',
+        'source_hash',
+        'bytes',
+        'render_ms',
+        'reused',
+    ];
+
+    protected $casts = [
+        'bytes' => 'integer',
+        'render_ms' => 'integer',
+        'reused' => 'boolean',
+    ];
+
+    /**
+     * Messwerte älter als 90 Tage entfernen (model:prune)
+     */
+    public function prunable()
+    {
+        return static::where('created_at', '<', now()->subDays(90));
+    }
+}
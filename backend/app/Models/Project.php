@@ -6,10 +6,11 @@
 use Illuminate\Database\Eloquent\Factories\HasFactory;
 use App\Traits\BelongsToTenant;
 use App\Traits\LogsAllActivity;
+use App\Traits\OptimizedQueries;
 
 class Project extends Model
 {
-    use HasFactory, BelongsToTenant, LogsAllActivity, \App\Traits\HasDisplayId;
+    use HasFactory, BelongsToTenant, LogsAllActivity, OptimizedQueries, \App\Traits\HasDisplayId;
 
     protected $appends = ['display_id'];
 
@@ -99,6 +100,60 @@ public function tenant()
         'customer_date' => 'datetime',
     ];
 
+    /**
+     * Relations, die per ?include= angefordert werden dürfen
+     */
+    public const INCLUDABLE = [
+        'customer',
+        'partner',
+        'sourceLanguage',
+        'targetLanguage',
+        'documentType',
+        'positions',
+        'files',
+        'files.uploader',
+        'payments',
+    ];
+
+    /**
+     * Spalten, die immer selektiert werden (Cursor, display_id, Fremdschlüssel der Relations)
+     */
+    public const REQUIRED_COLUMNS = [
+        'id',
+        'tenant_id',
+        'project_number',
+        'created_at',
+        'customer_id',
+        'partner_id',
+        'source_lang_id',
+        'target_lang_id',
+        'document_type_id',
+    ];
+
+    protected function loadingProfiles(): array
+    {
+        $customer = 'customer:id,tenant_id,custom_id,type,company_name,first_name,last_name,email,created_at';
+        $partner = 'partner:id,tenant_id,custom_id,type,company,first_name,last_name,email,created_at';
+
+        return [
+            // Vollständiges Projekt inkl. aller Unterlisten (bisheriges Verhalten von index)
+            'default' => [
+                'with' => ['customer', 'partner', 'sourceLanguage', 'targetLanguage', 'documentType', 'positions', 'files.uploader', 'payments'],
+            ],
+            // Tabellenansicht: Stammdaten der Relations + Aggregate statt verschachtelter Listen
+            'list' => [
+                'with' => [$customer, $partner, 'sourceLanguage', 'targetLanguage', 'documentType'],
+                'count' => ['files'],
+                'sum' => ['payments' => 'amount'],
+            ],
+            // Auswahllisten (Modals, Verknüpfungen)
+            'select' => [
+                'columns' => array_merge(self::REQUIRED_COLUMNS, ['project_name', 'status', 'deadline', 'price_total']),
+                'with' => [$customer],
+            ],
+        ];
+    }
+
     public function documentType()
     {
         return $this->belongsTo(DocumentType::class, 'document_type_id');
@@ -17,8 +17,12 @@ class ProjectFile extends Model
         'mime_type',
         'extension',
         'file_size',
+        'sha256',
         'word_count',
         'char_count',
+        'analyzed_at',
+        'analysis_failed_at',
+        'analysis_error',
         'version',
         'status',
         'uploaded_by',
@@ -27,6 +31,8 @@ class ProjectFile extends Model
     ];
 
     protected $casts = [
+        'analyzed_at' => 'datetime',
+        'analysis_failed_at' => 'datetime',
         'is_shared_with_customer' => 'boolean',
         'is_shared_with_partner' => 'boolean',
     ];
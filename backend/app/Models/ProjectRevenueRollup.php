@@ -0,0 +1,41 @@
+<?php
+
+namespace App\Models;
+
+use App\Traits\BelongsToTenant;
+use Illuminate\Database\Eloquent\Model;
+
+/**
+ * Vorab aggregierte Umsatz-/Kostenwerte pro Tag, Zielsprache und Kunde.
+ * Wird von ProjectObserver inkrementell gepflegt und von ReportController gelesen.
+ */
+class ProjectRevenueRollup extends Model
+{
+    use BelongsToTenant;
+
+    protected $fillable = [
+        'tenant_id',
+        'day',
+        'month',
+        'target_lang_id',
+        'customer_id',
+        'revenue',
+        'partner_cost',
+        'job_count',
+    ];
+
+    protected $casts = [
+        'day' => 'date',
+        'revenue' => 'decimal:2',
+        'partner_cost' => 'decimal:2',
+        'job_count' => 'integer',
+    ];
+
+    /**
+     * Scope: Buckets innerhalb eines Datumsbereichs (inklusive)
+     */
+    public function scopeBetweenDays($query, $startDate, $endDate)
+    {
+        return $query->whereBetween($query->qualifyColumn('day'), [$startDate->toDateString(), $endDate->toDateString()]);
+    }
+}
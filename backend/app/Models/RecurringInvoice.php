@@ -2,11 +2,13 @@
 
 namespace App\Models;
 
+use App\Services\InvoiceNumberService;
 use App\Traits\BelongsToTenant;
 use Carbon\Carbon;
 use Illuminate\Database\Eloquent\Model;
 use Illuminate\Database\Eloquent\SoftDeletes;
 use Illuminate\Support\Facades\Auth;
+use Illuminate\Support\Facades\DB;
 use Illuminate\Support\Str;
 
 class RecurringInvoice extends Model
@@ -85,40 +87,52 @@ public function calculateNextRunDate(Carbon $from = null): Carbon
         };
     }
 
-    public function createInvoice(): Invoice
+    /**
+     * Rechnung aus der Vorlage anlegen und den Lauf fortschreiben. Eine fortlaufende Nummer erhält
+     * nur die direkt ausgestellte Rechnung; Entwürfe werden beim Ausstellen nummeriert (ein
+     * gelöschter Entwurf hinterlässt so keine Lücke). Alles in einer Transaktion: schlägt etwas
+     * fehl, bleiben Nummer und Ausführung unverbraucht.
+     */
+    public function createInvoice(?Customer $customer = null): Invoice
     {
-        $dueDate = Carbon::today()->addDays($this->due_days);
-
-        // Snapshot customer for new invoice
-        $customer = Customer::withoutGlobalScopes()->find($this->template_customer_id);
-
-        $invoice = Invoice::withoutGlobalScopes()->create([
-            'tenant_id'              => $this->tenant_id,
-            'customer_id'            => $this->template_customer_id,
-            'status'                 => $this->auto_issue ? 'issued' : 'draft',
-            'date'                   => today(),
-            'due_date'               => $dueDate,
-            'currency'               => $this->template_currency,
-            'amount_net'             => $this->template_amount_net_cents,
-            'tax_rate'               => $this->template_tax_rate,
-            'amount_tax'             => $this->template_amount_tax_cents,
-            'amount_gross'           => $this->template_amount_gross_cents,
-            'intro_text'             => $this->template_intro_text,
-            'footer_text'            => $this->template_footer_text,
-            'notes'                  => $this->template_notes,
-            'snapshot_customer_name'         => $customer?->company_name ?? trim(($customer?->first_name ?? '') . ' ' . ($customer?->last_name ?? '')),
-            'snapshot_customer_email'        => $customer?->email,
-            'snapshot_customer_address'      => $customer?->address_street,
-            'snapshot_customer_zip'          => $customer?->address_zip,
-            'snapshot_customer_city'         => $customer?->address_city,
-            'snapshot_customer_country'      => $customer?->address_country,
-            'snapshot_customer_tax_id'       => $customer?->tax_id,
-            'recurring_invoice_id'           => $this->id,
-        ]);
-
-        // Create invoice items from template
-        foreach ($this->template_items as $item) {
-            $invoice->items()->create([
+        return DB::transaction(function () use ($customer) {
+            $dueDate = Carbon::today()->addDays($this->due_days);
+
+            // Snapshot customer for new invoice
+            $customer ??= Customer::withoutGlobalScopes()->find($this->template_customer_id);
+
+            [$invoiceNumber, $sequence] = $this->auto_issue
+                ? app(InvoiceNumberService::class)->next($this->tenant_id, Invoice::TYPE_INVOICE, Carbon::today()->year)
+                : [null, null];
+
+            $invoice = Invoice::withoutGlobalScopes()->create([
+                'tenant_id'              => $this->tenant_id,
+                'invoice_number'         => $invoiceNumber,
+                'invoice_number_sequence' => $sequence,
+                'customer_id'            => $this->template_customer_id,
+                'status'                 => $this->auto_issue ? 'issued' : 'draft',
+                'date'                   => today(),
+                'due_date'               => $dueDate,
+                'currency'               => $this->template_currency,
+                'amount_net'             => $this->template_amount_net_cents,
+                'tax_rate'               => $this->template_tax_rate,
+                'amount_tax'             => $this->template_amount_tax_cents,
+                'amount_gross'           => $this->template_amount_gross_cents,
+                'intro_text'             => $this->template_intro_text,
+                'footer_text'            => $this->template_footer_text,
+                'notes'                  => $this->template_notes,
+                'snapshot_customer_name'         => $customer?->company_name ?? trim(($customer?->first_name ?? '') . ' ' . ($customer?->last_name ?? '')),
+                'snapshot_customer_email'        => $customer?->email,
+                'snapshot_customer_address'      => $customer?->address_street,
+                'snapshot_customer_zip'          => $customer?->address_zip,
+                'snapshot_customer_city'         => $customer?->address_city,
+                'snapshot_customer_country'      => $customer?->address_country,
+                'snapshot_customer_tax_id'       => $customer?->tax_id,
+                'recurring_invoice_id'           => $this->id,
+            ]);
+
+            // Create invoice items from template
+            $invoice->items()->createMany(array_map(fn($item) => [
                 'tenant_id'   => $this->tenant_id,
                 'description' => $item['description'] ?? '',
                 'quantity'    => $item['quantity'] ?? 1,
@@ -128,19 +142,19 @@ public function createInvoice(): Invoice
                 'amount_net'  => $item['amount_net'] ?? 0,
                 'amount_tax'  => $item['amount_tax'] ?? 0,
                 'amount_gross' => $item['amount_gross'] ?? 0,
+            ], $this->template_items ?? []));
+
+            // Update tracking fields
+            $this->update([
+                'last_run_at'        => today(),
+                'next_run_at'        => $this->calculateNextRunDate(),
+                'occurrences_count'  => $this->occurrences_count + 1,
+                'status'             => $this->occurrences_limit && ($this->occurrences_count + 1) >= $this->occurrences_limit
+                                        ? 'paused'
+                                        : 'active',
             ]);
-        }
-
-        // Update tracking fields
-        $this->update([
-            'last_run_at'        => today(),
-            'next_run_at'        => $this->calculateNextRunDate(),
-            'occurrences_count'  => $this->occurrences_count + 1,
-            'status'             => $this->occurrences_limit && ($this->occurrences_count + 1) >= $this->occurrences_limit
-                                    ? 'paused'
-                                    : 'active',
-        ]);
-
-        return $invoice;
+
+            return $invoice;
+        });
     }
 }
@@ -0,0 +1,79 @@
+<?php
+
+namespace App\Models;
+
+use Closure;
+use Illuminate\Database\Eloquent\Model;
+use Illuminate\Support\Facades\DB;
+
+/**
+ * Atomarer Zähler je Tenant und Bereich (ersetzt MAX()/ORDER BY-Scans über die Belegtabellen).
+ *
+ * next() sperrt nur die eine Zählerzeile (SELECT … FOR UPDATE). Läuft der Aufruf innerhalb
+ * einer umgebenden Transaktion, wird die Erhöhung bei einem Rollback mit zurückgenommen –
+ * Rechnungsnummern bleiben so lückenlos (GoBD).
+ */
+class SequenceCounter extends Model
+{
+    protected $fillable = [
+        'tenant_id',
+        'scope',
+        'value',
+    ];
+
+    protected $casts = [
+        'value' => 'integer',
+    ];
+
+    /**
+     * Nächsten Wert vergeben. $seed liefert beim ersten Zugriff den höchsten vorhandenen Wert.
+     */
+    public static function next(int $tenantId, string $scope, ?Closure $seed = null): int
+    {
+        return DB::transaction(function () use ($tenantId, $scope, $seed) {
+            $counter = static::locked($tenantId, $scope);
+
+            if (!$counter) {
+                // Parallele Erstzugriffe: nur ein Insert gewinnt, der andere liest dessen Zeile
+                static::createOrFirst(
+                    ['tenant_id' => $tenantId, 'scope' => $scope],
+                    ['value' => $seed ? (int) $seed() : 0]
+                );
+                $counter = static::locked($tenantId, $scope);
+            }
+
+            $counter->increment('value');
+
+            return $counter->value;
+        });
+    }
+
+    /**
+     * Nächsten Wert nur anzeigen, ohne ihn zu vergeben
+     */
+    public static function peek(int $tenantId, string $scope, ?Closure $seed = null): int
+    {
+        $value = static::where('tenant_id', $tenantId)->where('scope', $scope)->value('value');
+
+        return (int) ($value ?? ($seed ? $seed() : 0)) + 1;
+    }
+
+    /**
+     * Zähler auf mindestens $value anheben (z. B. nach manuell vergebenem Code)
+     */
+    public static function raise(int $tenantId, string $scope, int $value): void
+    {
+        static::where('tenant_id', $tenantId)
+            ->where('scope', $scope)
+            ->where('value', '<', $value)
+            ->update(['value' => $value]);
+    }
+
+    protected static function locked(int $tenantId, string $scope): ?self
+    {
+        return static::where('tenant_id', $tenantId)
+            ->where('scope', $scope)
+            ->lockForUpdate()
+            ->first();
+    }
+}
@@ -4,6 +4,7 @@
 
 use App\Models\Customer;
 use App\Models\TenantSetting;
+use App\Services\CacheService;
 
 class CustomerObserver
 {
@@ -52,4 +53,14 @@ public function creating(Customer $customer): void
             $customer->custom_id = $searchBase . $nrPart;
         }
     }
+
+    public function saved(Customer $customer): void
+    {
+        CacheService::invalidateCustomerCaches($customer->tenant_id);
+    }
+
+    public function deleted(Customer $customer): void
+    {
+        CacheService::invalidateCustomerCaches($customer->tenant_id);
+    }
 }
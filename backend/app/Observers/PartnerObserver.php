@@ -4,6 +4,7 @@
 
 use App\Models\Partner;
 use App\Models\TenantSetting;
+use App\Services\CacheService;
 
 class PartnerObserver
 {
@@ -52,4 +53,14 @@ public function creating(Partner $partner): void
             $partner->custom_id = $searchBase . $nrPart;
         }
     }
+
+    public function saved(Partner $partner): void
+    {
+        CacheService::invalidatePartnerCaches($partner->tenant_id);
+    }
+
+    public function deleted(Partner $partner): void
+    {
+        CacheService::invalidatePartnerCaches($partner->tenant_id);
+    }
 }
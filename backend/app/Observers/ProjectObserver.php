@@ -5,6 +5,8 @@
 use App\Models\Project;
 use App\Models\TenantSetting;
 use App\Events\ProjectUpdated;
+use App\Services\CacheService;
+use App\Services\ProjectRevenueRollupService;
 
 class ProjectObserver
 {
@@ -70,6 +72,9 @@ public function creating(Project $project): void
 
     public function saved(Project $project): void
     {
+        app(ProjectRevenueRollupService::class)->recordSaved($project);
+        CacheService::invalidateReportCaches($project->tenant_id);
+
         try {
             broadcast(new ProjectUpdated('saved'));
         } catch (\Exception $e) {
@@ -79,6 +84,9 @@ public function saved(Project $project): void
 
     public function deleted(Project $project): void
     {
+        app(ProjectRevenueRollupService::class)->recordDeleted($project);
+        CacheService::invalidateReportCaches($project->tenant_id);
+
         try {
             broadcast(new ProjectUpdated('deleted'));
         } catch (\Exception $e) {
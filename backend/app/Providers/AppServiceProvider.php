@@ -32,6 +32,14 @@ public function boot(): void
         \App\Models\Customer::observe(\App\Observers\CustomerObserver::class);
         \App\Models\Partner::observe(\App\Observers\PartnerObserver::class);
 
+        // Cache-Statistiken (hit/miss/stale/evict) einmal pro Request bzw. Job persistieren
+        $this->app->terminating(fn() => \App\Services\CacheService::flushStats());
+        \Illuminate\Support\Facades\Queue::after(fn() => \App\Services\CacheService::flushStats());
+
+        // Gepufferte Request-/DSGVO-Protokolle nach dem Senden der Antwort in den Spool schreiben
+        $this->app->terminating(fn() => \App\Services\RequestLogBuffer::flush());
+        \Illuminate\Support\Facades\Queue::after(fn() => \App\Services\RequestLogBuffer::flush());
+
         Gate::define('viewPulse', function (User $user) {
             return $user->isPlatformAdmin();
         });
@@ -2,37 +2,68 @@
 
 namespace App\Services;
 
+use Illuminate\Contracts\Cache\LockTimeoutException;
 use Illuminate\Support\Facades\Cache;
+use Illuminate\Support\Str;
 use Closure;
 
 /**
  * Centralized caching service for TMS
- * Handles all application caching with consistent key prefixes
+ *
+ * Keys live in per-tenant, per-family versioned namespaces:
+ *   "{family}:{tenantId}:{version}:{suffix}"
+ * Invalidating a family replaces its version token, so all old keys become
+ * unreachable at once and expire via TTL. Works on every driver (file,
+ * database, redis, array) because no wildcard deletion or tags are needed.
  */
 class CacheService
 {
-    // Cache TTLs (in minutes)
-    const TTL_SHORT = 5;      // 5 minutes - frequently changing data
-    const TTL_MEDIUM = 30;    // 30 minutes - semi-static data
-    const TTL_LONG = 1440;    // 24 hours - static reference data
-    const TTL_FOREVER = null; // No expiration
+    // Cache TTLs (in seconds)
+    const TTL_SHORT = 600;      // 10 minutes - frequently changing data
+    const TTL_MEDIUM = 3600;    // 1 hour - semi-static data
+    const TTL_LONG = 86400;     // 24 hours - static reference data
+    const TTL_FOREVER = null;   // No expiration
+
+    // Key families
+    const FAMILY_REPORT = 'report';
+    const FAMILY_CUSTOMERS = 'customers';
+    const FAMILY_PARTNERS = 'partners';
+    const FAMILY_PRICE_MATRICES = 'price_matrices';
+    const FAMILY_MASTER_DATA = 'master_data';
+
+    const FAMILIES = [
+        self::FAMILY_REPORT,
+        self::FAMILY_CUSTOMERS,
+        self::FAMILY_PARTNERS,
+        self::FAMILY_PRICE_MATRICES,
+        self::FAMILY_MASTER_DATA,
+    ];
+
+    const STATS_EVENTS = ['hit', 'miss', 'stale', 'evict'];
+
+    // Seconds to wait for another process computing the same key
+    const LOCK_WAIT = 10;
+
+    /**
+     * Per-process counters, flushed to the cache store once per request/job
+     */
+    protected static array $stats = [];
 
     /**
      * Cache report data (revenue, profit, taxes)
+     * Stampede-protected: expired values are served stale while one process recomputes.
      */
     public static function cacheReportData(int $tenantId, string $reportType, string $period, Closure $callback): mixed
     {
-        $key = "report:{$reportType}:{$tenantId}:{$period}";
-        return Cache::remember($key, self::TTL_SHORT, $callback);
+        return static::rememberFresh(self::FAMILY_REPORT, $tenantId, "{$reportType}:{$period}", self::TTL_SHORT, $callback);
     }
 
     /**
      * Cache customer list for tenant
      */
-    public static function cacheCustomerList(int $tenantId, ?string $filters = null, Closure $callback): mixed
+    public static function cacheCustomerList(int $tenantId, ?string $filters, Closure $callback): mixed
     {
-        $key = "customers:{$tenantId}:" . md5($filters ?? '');
-        return Cache::remember($key, self::TTL_MEDIUM, $callback);
+        return static::remember(self::FAMILY_CUSTOMERS, $tenantId, md5($filters ?? ''), self::TTL_MEDIUM, $callback);
     }
 
     /**
@@ -40,17 +71,15 @@ public static function cacheCustomerList(int $tenantId, ?string $filters = null,
      */
     public static function cachePartnerList(int $tenantId, Closure $callback): mixed
     {
-        $key = "partners:{$tenantId}";
-        return Cache::remember($key, self::TTL_MEDIUM, $callback);
+        return static::remember(self::FAMILY_PARTNERS, $tenantId, 'list', self::TTL_MEDIUM, $callback);
     }
 
     /**
-     * Cache price matrices for tenant
+     * Cache price matrices for tenant (stampede-protected)
      */
     public static function cachePriceMatrices(int $tenantId, Closure $callback): mixed
     {
-        $key = "price_matrices:{$tenantId}";
-        return Cache::remember($key, self::TTL_LONG, $callback);
+        return static::rememberFresh(self::FAMILY_PRICE_MATRICES, $tenantId, 'all', self::TTL_LONG, $callback);
     }
 
     /**
@@ -58,8 +87,7 @@ public static function cachePriceMatrices(int $tenantId, Closure $callback): mix
      */
     public static function cacheMasterData(string $type, int $tenantId, Closure $callback): mixed
     {
-        $key = "master_data:{$type}:{$tenantId}";
-        return Cache::remember($key, self::TTL_LONG, $callback);
+        return static::remember(self::FAMILY_MASTER_DATA, $tenantId, $type, self::TTL_LONG, $callback);
     }
 
     /**
@@ -67,36 +95,30 @@ public static function cacheMasterData(string $type, int $tenantId, Closure $cal
      */
     public static function invalidateTenantCache(int $tenantId): void
     {
-        // Invalidate all caches with this tenant ID
-        $keys = [
-            "report:*:{$tenantId}:*",
-            "customers:{$tenantId}:*",
-            "partners:{$tenantId}",
-            "price_matrices:{$tenantId}",
-            "master_data:*:{$tenantId}",
-            "tenant:{$tenantId}:*",
-        ];
-
-        foreach ($keys as $pattern) {
-            // Note: Redis Wildcard deletion might not work with all drivers
-            // For database cache, consider storing keys separately
-            Cache::forget($pattern);
+        foreach (self::FAMILIES as $family) {
+            static::invalidate($family, $tenantId);
         }
     }
 
+    /**
+     * Invalidate report caches (projects, invoices, payments changed)
+     */
+    public static function invalidateReportCaches(int $tenantId): void
+    {
+        static::invalidate(self::FAMILY_REPORT, $tenantId);
+    }
+
     /**
      * Invalidate invoice-related caches
      */
     public static function invalidateInvoiceCaches(int $tenantId, ?int $customerId = null): void
     {
-        // Invalidate report caches
-        Cache::forget("report:revenue:{$tenantId}:" . date('Y-m'));
-        Cache::forget("report:profit:{$tenantId}:" . date('Y-m'));
-        Cache::forget("report:tax:{$tenantId}:" . date('Y-m'));
+        // All report periods, not only the current month
+        static::invalidate(self::FAMILY_REPORT, $tenantId);
 
-        // Invalidate customer list if specific customer affected
+        // Customer lists carry invoice totals
         if ($customerId) {
-            Cache::forget("customers:{$tenantId}:*");
+            static::invalidate(self::FAMILY_CUSTOMERS, $tenantId);
         }
     }
 
@@ -105,8 +127,9 @@ public static function invalidateInvoiceCaches(int $tenantId, ?int $customerId =
      */
     public static function invalidateCustomerCaches(int $tenantId): void
     {
-        Cache::forget("customers:{$tenantId}:*");
-        static::invalidateTenantCache($tenantId);
+        static::invalidate(self::FAMILY_CUSTOMERS, $tenantId);
+        // Customer names appear in report rankings
+        static::invalidate(self::FAMILY_REPORT, $tenantId);
     }
 
     /**
@@ -114,14 +137,137 @@ public static function invalidateCustomerCaches(int $tenantId): void
      */
     public static function invalidatePartnerCaches(int $tenantId): void
     {
-        Cache::forget("partners:{$tenantId}");
-        static::invalidateTenantCache($tenantId);
+        static::invalidate(self::FAMILY_PARTNERS, $tenantId);
+    }
+
+    /**
+     * Invalidate price matrix caches
+     */
+    public static function invalidatePriceMatrixCaches(int $tenantId): void
+    {
+        static::invalidate(self::FAMILY_PRICE_MATRICES, $tenantId);
+    }
+
+    /**
+     * Replace the version token of a family; all its keys become unreachable
+     */
+    public static function invalidate(string $family, int $tenantId): void
+    {
+        Cache::forever(static::versionKey($family, $tenantId), Str::random(12));
+        static::count($family, 'evict');
+    }
+
+    /**
+     * Plain remember inside the versioned namespace
+     */
+    public static function remember(string $family, int $tenantId, string $suffix, ?int $ttl, Closure $callback): mixed
+    {
+        $key = static::key($family, $tenantId, $suffix);
+
+        $value = Cache::get($key);
+        if ($value !== null) {
+            static::count($family, 'hit');
+            return $value;
+        }
+
+        static::count($family, 'miss');
+        $value = $callback();
+        $ttl === null ? Cache::forever($key, $value) : Cache::put($key, $value, $ttl);
+
+        return $value;
+    }
+
+    /**
+     * Remember with stampede protection.
+     *
+     * Values are stored for 2 × TTL together with a "fresh until" timestamp.
+     * After TTL one process takes a lock and recomputes while all others keep
+     * serving the stale value; on a cold miss, concurrent callers wait for the
+     * lock holder instead of all running the callback.
+     */
+    public static function rememberFresh(string $family, int $tenantId, string $suffix, int $ttl, Closure $callback): mixed
+    {
+        $key = static::key($family, $tenantId, $suffix);
+        $entry = Cache::get($key);
+
+        if (is_array($entry) && array_key_exists('fresh_until', $entry)) {
+            if ($entry['fresh_until'] > time()) {
+                static::count($family, 'hit');
+                return $entry['value'];
+            }
+
+            $lock = Cache::lock("{$key}:lock", self::LOCK_WAIT * 3);
+            if ($lock->get()) {
+                try {
+                    static::count($family, 'miss');
+                    return static::storeFresh($key, $ttl, $callback);
+                } finally {
+                    $lock->release();
+                }
+            }
+
+            static::count($family, 'stale');
+            return $entry['value'];
+        }
+
+        static::count($family, 'miss');
+
+        try {
+            return Cache::lock("{$key}:lock", self::LOCK_WAIT * 3)->block(self::LOCK_WAIT, function () use ($key, $ttl, $callback) {
+                // Another process may have filled the key while we waited
+                $entry = Cache::get($key);
+                if (is_array($entry) && array_key_exists('fresh_until', $entry)) {
+                    return $entry['value'];
+                }
+
+                return static::storeFresh($key, $ttl, $callback);
+            });
+        } catch (LockTimeoutException $e) {
+            return $callback();
+        }
+    }
+
+    /**
+     * Counters per family since last reset: ['report' => ['hit' => 12, ...], ...]
+     */
+    public static function stats(): array
+    {
+        static::flushStats();
+
+        $stats = [];
+        foreach (self::FAMILIES as $family) {
+            foreach (self::STATS_EVENTS as $event) {
+                $stats[$family][$event] = (int) Cache::get(static::statsKey($family, $event), 0);
+            }
+        }
+
+        return $stats;
+    }
+
+    /**
+     * Persist in-process counters (called once per request/job from AppServiceProvider).
+     * Only counters touched by this process are written, with one increment each.
+     */
+    public static function flushStats(): void
+    {
+        foreach (static::$stats as $family => $events) {
+            foreach ($events as $event => $count) {
+                $key = static::statsKey($family, $event);
+
+                // Database/file stores cannot increment a missing key: seed it on first use
+                if (Cache::increment($key, $count) === false && !Cache::add($key, $count)) {
+                    Cache::increment($key, $count);
+                }
+            }
+        }
+
+        static::$stats = [];
     }
 
     /**
      * Get cache key for debugging
      */
-    public static function debugCacheKey(string $key): ?string
+    public static function debugCacheKey(string $key): mixed
     {
         return Cache::get($key);
     }
@@ -133,4 +279,50 @@ public static function flushAll(): void
     {
         Cache::flush();
     }
+
+    /**
+     * Fully qualified key inside the current namespace version
+     */
+    public static function key(string $family, int $tenantId, string $suffix): string
+    {
+        return "{$family}:{$tenantId}:" . static::version($family, $tenantId) . ":{$suffix}";
+    }
+
+    protected static function version(string $family, int $tenantId): string
+    {
+        $versionKey = static::versionKey($family, $tenantId);
+
+        $version = Cache::get($versionKey);
+        if ($version === null) {
+            // Random initial token: an evicted version key can never resurrect old entries
+            Cache::add($versionKey, Str::random(12));
+            $version = Cache::get($versionKey);
+        }
+
+        return (string) $version;
+    }
+
+    protected static function versionKey(string $family, int $tenantId): string
+    {
+        return "cache_version:{$family}:{$tenantId}";
+    }
+
+    protected static function statsKey(string $family, string $event): string
+    {
+        return "cache_stats:{$family}:{$event}";
+    }
+
+    protected static function storeFresh(string $key, int $ttl, Closure $callback): mixed
+    {
+        $value = $callback();
+
+        Cache::put($key, ['value' => $value, 'fresh_until' => time() + $ttl], $ttl * 2);
+
+        return $value;
+    }
+
+    protected static function count(string $family, string $event): void
+    {
+        static::$stats[$family][$event] = (static::$stats[$family][$event] ?? 0) + 1;
+    }
 }
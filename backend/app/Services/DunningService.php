@@ -2,10 +2,19 @@
 
 namespace App\Services;
 
+use App\Jobs\ProcessDunningTenants;
 use App\Models\Invoice;
 use App\Models\DunningLog;
+use App\Models\DunningSetting;
+use App\Models\MailAccount;
+use Carbon\Carbon;
+use Illuminate\Database\Query\Builder;
+use Illuminate\Support\Facades\Bus;
+use Illuminate\Support\Facades\Cache;
+use Illuminate\Support\Facades\DB;
 use Illuminate\Support\Facades\Mail;
 use Illuminate\Support\Facades\Log;
+use Illuminate\Support\Facades\Storage;
 
 /**
  * Service für Mahnwesen (Dunning Management)
@@ -13,8 +22,14 @@
  */
 class DunningService
 {
+    // Mindestabstand zwischen zwei automatischen Mahnungen derselben Rechnung
+    const MIN_DAYS_BETWEEN_REMINDERS = 7;
+
+    // Mahnungs-PDFs liegen nicht öffentlich, Download nur über den Controller
+    const PDF_DISK = 'local';
+
     /**
-     * Sende Mahnung für überfällige Rechnung
+     * Sende Mahnung für überfällige Rechnung (einzeln, z. B. aus dem Admin-Panel)
      */
     public function sendReminder(Invoice $invoice, int $reminderLevel = 1): DunningLog
     {
@@ -23,24 +38,26 @@ public function sendReminder(Invoice $invoice, int $reminderLevel = 1): DunningL
             throw new \Exception('Invoice is not overdue');
         }
 
+        $levelConfig = $this->levelConfig($invoice->tenant_id, $reminderLevel);
+
         // Erstelle DunningLog-Eintrag
         $dunningLog = DunningLog::create([
             'invoice_id' => $invoice->id,
             'tenant_id' => $invoice->tenant_id,
-            'reminder_level' => $reminderLevel,
-            'outstanding_amount' => $this->getOutstandingAmount($invoice),
+            'level' => $reminderLevel,
+            'fee_cents' => (int) $levelConfig['fee_cents'],
             'sent_at' => now(),
-            'status' => 'sent',
+            'sent_by_user_id' => auth()->id(),
         ]);
 
         // Aktualisiere Invoice Reminder-Tracking
         $invoice->update([
             'reminder_level' => max($invoice->reminder_level ?? 0, $reminderLevel),
-            'last_reminder_date' => now(),
+            'last_reminder_date' => today(),
         ]);
 
-        // Sende Email (async)
-        $this->sendDunningEmail($invoice, $reminderLevel, $dunningLog);
+        // PDF und (falls aktiviert) E-Mail wie im Mahnlauf
+        $this->deliverReminder($dunningLog);
 
         // Trigger Webhook
         event(new \App\Events\DunningReminderSent($invoice, $reminderLevel));
@@ -48,78 +65,240 @@ public function sendReminder(Invoice $invoice, int $reminderLevel = 1): DunningL
         Log::info('Dunning reminder sent', [
             'invoice_id' => $invoice->id,
             'reminder_level' => $reminderLevel,
-            'outstanding' => $dunningLog->outstanding_amount,
+            'fee_cents' => $dunningLog->fee_cents,
         ]);
 
         return $dunningLog;
     }
 
     /**
-     * Sende Mahnung asynchron
+     * Nächtlicher Mahnlauf für alle Tenants mit aktivierter Auto-Eskalation.
+     *
+     * Eine Abfrage ermittelt für jede Rechnung die Zielstufe (siehe dueReminders); die Tenants
+     * werden in Gruppen als Queue-Batch parallel verarbeitet, PDFs/E-Mails folgen als eigene
+     * Jobs im selben Batch. Im Dry-Run wird nur gezählt.
+     *
+     * @return array{tenants: int, reminders: int, by_level: array, seconds: float, batch_id: ?string}
      */
-    private function sendDunningEmail(Invoice $invoice, int $level, DunningLog $log): void
+    public function processDunningQueue(bool $dryRun = false, ?array $tenantIds = null): array
     {
-        $settings = $this->getDunningSettings($invoice->tenant_id);
-        $template = $settings['templates'][$level - 1] ?? null;
+        $started = microtime(true);
+
+        $counts = DB::query()
+            ->fromSub($this->dueReminders($tenantIds), 'due')
+            ->select('tenant_id', 'target_level', DB::raw('COUNT(*) as reminders'))
+            ->groupBy('tenant_id', 'target_level')
+            ->get();
+
+        $report = [
+            'tenants' => $counts->pluck('tenant_id')->unique()->count(),
+            'reminders' => (int) $counts->sum('reminders'),
+            'by_level' => $counts->groupBy('target_level')->map(fn($rows) => (int) $rows->sum('reminders'))->sortKeys()->all(),
+            'seconds' => 0.0,
+            'batch_id' => null,
+        ];
 
-        if (!$template) {
-            return;
+        if (!$dryRun && $report['tenants'] > 0) {
+            $chunks = $counts->pluck('tenant_id')->unique()->values()
+                ->chunk(max(1, (int) config('invoices.batch.tenants_per_job', 25)));
+
+            $batch = Bus::batch($chunks->map(fn($ids) => new ProcessDunningTenants($ids->values()->all()))->all())
+                ->name('dunning-run:' . today()->toDateString())
+                ->onQueue(config('invoices.batch.queue', 'default'))
+                ->allowFailures()
+                ->dispatch();
+
+            $report['batch_id'] = $batch->id;
         }
 
-        \App\Jobs\SendDunningEmail::dispatch($invoice, $level, $template, $log);
+        $report['seconds'] = round(microtime(true) - $started, 3);
+
+        Log::info('Dunning queue ' . ($dryRun ? 'dry run' : 'dispatched'), $report);
+
+        return $report;
     }
 
     /**
-     * Automatische Dunning-Prüfung für alle überfälligen Rechnungen
-     * Sollte als Scheduled Command ausgeführt werden
+     * Fällige Mahnungen (eine Zeile je Rechnung) über alle bzw. die angegebenen Tenants.
+     *
+     * Aktuelle Stufe = höchste Stufe aus dunning_logs bzw. invoices.reminder_level; Zielstufe ist
+     * die nächste, sobald die Tage seit Fälligkeit deren Schwelle aus dunning_settings erreichen
+     * und die letzte Mahnung mindestens MIN_DAYS_BETWEEN_REMINDERS Tage zurückliegt.
      */
-    public function processDunningQueue(): int
+    public function dueReminders(?array $tenantIds = null): Builder
     {
-        $daysOverdue = config('dunning.days_overdue', [3, 10, 20]);
-        $processedCount = 0;
+        $latest = DB::table('dunning_logs')
+            ->select('invoice_id', DB::raw('MAX(level) as last_level'), DB::raw('MAX(sent_at) as last_sent_at'))
+            ->groupBy('invoice_id');
+
+        // Größere der beiden Stufen (CASE statt GREATEST, läuft auch unter SQLite)
+        $current = 'CASE WHEN COALESCE(latest.last_level, 0) > COALESCE(invoices.reminder_level, 0)'
+            . ' THEN COALESCE(latest.last_level, 0) ELSE COALESCE(invoices.reminder_level, 0) END';
+        $byLevel = fn(string $field) => "CASE ({$current}) WHEN 0 THEN ds.level1_{$field} WHEN 1 THEN ds.level2_{$field} ELSE ds.level3_{$field} END";
+        $daysThreshold = $byLevel('days_after_due');
+        $fee = $byLevel('fee_cents');
+
+        $query = DB::table('invoices');
+        $today = today()->toDateString();
+
+        return $query
+            ->join('dunning_settings as ds', function ($join) {
+                $join->on('ds.tenant_id', '=', 'invoices.tenant_id')->where('ds.auto_escalate', true);
+            })
+            ->leftJoinSub($latest, 'latest', 'latest.invoice_id', '=', 'invoices.id')
+            ->whereIn('invoices.status', [Invoice::STATUS_ISSUED, Invoice::STATUS_OVERDUE])
+            ->where('invoices.due_date', '<', $today)
+            ->when($tenantIds !== null, fn($query) => $query->whereIn('invoices.tenant_id', $tenantIds))
+            ->whereRaw("({$current}) < 3")
+            ->whereRaw(static::daysSinceSql($query->getConnection()->getDriverName(), 'invoices.due_date') . " >= {$daysThreshold}", [$today])
+            ->where(function ($query) {
+                $query->whereNull('latest.last_sent_at')
+                    ->orWhere('latest.last_sent_at', '<=', now()->subDays(self::MIN_DAYS_BETWEEN_REMINDERS));
+            })
+            ->select(
+                'invoices.id',
+                'invoices.tenant_id',
+                DB::raw("({$current}) + 1 as target_level"),
+                DB::raw("{$fee} as fee_cents")
+            );
+    }
 
-        foreach ($daysOverdue as $index => $days) {
-            $reminderLevel = $index + 1;
+    /**
+     * Ganze Tage vom Datum in $column bis zum gebundenen Stichtag (?) je Datenbank-Treiber
+     */
+    public static function daysSinceSql(string $driver, string $column): string
+    {
+        return match ($driver) {
+            'sqlite' => "CAST(julianday(?) - julianday({$column}) AS INTEGER)",
+            'pgsql' => "(CAST(? AS DATE) - CAST({$column} AS DATE))",
+            default => "DATEDIFF(?, {$column})",
+        };
+    }
 
-            // Finde Rechnungen die diese Stufe erreicht haben
-            $invoices = Invoice::query()
-                ->where('status', '!=', 'paid')
-                ->where('status', '!=', 'cancelled')
-                ->whereNotNull('due_date')
-                ->where('due_date', '<=', now()->subDays($days))
-                ->where(function ($q) use ($reminderLevel) {
-                    // Hat Mahnung auf dieser Stufe noch nicht erhalten
-                    $q->whereNull('reminder_level')
-                        ->orWhere('reminder_level', '<', $reminderLevel);
-                })
-                ->get();
+    /**
+     * Mahnlauf eines Tenants: Mahnungen gesammelt anlegen, Rechnungen je Stufe in einem Update eskalieren.
+     * Pro Tenant läuft höchstens ein Lauf gleichzeitig (Cache-Lock), ein gesperrter Tenant wird übersprungen.
+     *
+     * @return array{tenant_id: int, skipped: bool, reminders: int, by_level: array, log_ids: array}
+     */
+    public function processTenant(int $tenantId, bool $dryRun = false): array
+    {
+        $result = ['tenant_id' => $tenantId, 'skipped' => false, 'reminders' => 0, 'by_level' => [], 'log_ids' => []];
 
-            foreach ($invoices as $invoice) {
-                try {
-                    // Prüfe ob bereits auf dieser Stufe gemahnt wurde
-                    $existingLog = DunningLog::where('invoice_id', $invoice->id)
-                        ->where('reminder_level', $reminderLevel)
-                        ->latest()
-                        ->first();
+        $lock = Cache::lock("dunning-run:{$tenantId}", (int) config('invoices.batch.lock_seconds', 900));
+        if (!$lock->get()) {
+            return ['skipped' => true] + $result;
+        }
 
-                    // Sende nur wenn min. X Tage vergangen seit letzter Mahnung
-                    if ($existingLog && $existingLog->sent_at->diffInDays(now()) < 7) {
-                        continue;
-                    }
+        try {
+            $due = $this->dueReminders([$tenantId])->get();
 
-                    $this->sendReminder($invoice, $reminderLevel);
-                    $processedCount++;
-                } catch (\Exception $e) {
-                    Log::error('Dunning process failed', [
-                        'invoice_id' => $invoice->id,
-                        'error' => $e->getMessage(),
-                    ]);
-                }
+            $result['reminders'] = $due->count();
+            $result['by_level'] = $due->countBy('target_level')->sortKeys()->all();
+
+            if ($dryRun || $due->isEmpty()) {
+                return $result;
             }
+
+            $now = now();
+
+            $result['log_ids'] = DB::transaction(function () use ($due, $tenantId, $now) {
+                foreach ($due->chunk(500) as $chunk) {
+                    DunningLog::insert($chunk->map(fn($row) => [
+                        'tenant_id' => $tenantId,
+                        'invoice_id' => $row->id,
+                        'level' => (int) $row->target_level,
+                        'fee_cents' => (int) $row->fee_cents,
+                        'sent_at' => $now,
+                        'created_at' => $now,
+                        'updated_at' => $now,
+                    ])->values()->all());
+                }
+
+                // Nur Mahn-Felder ändern sich – auch bei gesperrten (ausgestellten) Rechnungen zulässig
+                foreach ($due->groupBy('target_level') as $level => $rows) {
+                    foreach ($rows->pluck('id')->chunk(1000) as $ids) {
+                        DB::table('invoices')->whereIn('id', $ids->values()->all())->update([
+                            'reminder_level' => (int) $level,
+                            'last_reminder_date' => today()->toDateString(),
+                            'status' => Invoice::STATUS_OVERDUE,
+                            'updated_at' => $now,
+                        ]);
+                    }
+                }
+
+                return DunningLog::withoutGlobalScopes()
+                    ->where('tenant_id', $tenantId)
+                    ->where('sent_at', $now)
+                    ->whereIn('invoice_id', $due->pluck('id')->all())
+                    ->pluck('id')
+                    ->all();
+            });
+
+            CacheService::invalidateInvoiceCaches($tenantId);
+        } finally {
+            $lock->release();
+        }
+
+        return $result;
+    }
+
+    /**
+     * PDF zur Mahnung erzeugen und – falls aktiviert – per Standard-Mailkonto des Tenants versenden
+     */
+    public function deliverReminder(DunningLog $log): void
+    {
+        $invoice = Invoice::withoutGlobalScopes()->findOrFail($log->invoice_id);
+        $levelConfig = $this->levelConfig($log->tenant_id, $log->level);
+
+        // Gespeichertes PDF dieses Logs, sonst neu erzeugen; angehängt werden genau diese Bytes
+        $pdf = $log->pdf_path ? Storage::disk(self::PDF_DISK)->get($log->pdf_path) : null;
+        if ($pdf === null) {
+            $pdf = $this->renderDunningPdf($invoice, $log, $levelConfig);
+            $log->update(['pdf_path' => $this->storeDunningPdf($log, $pdf)]);
         }
 
-        Log::info("Dunning queue processed: $processedCount reminders sent");
-        return $processedCount;
+        if (!config('invoices.batch.dunning_mail', false) || !$invoice->snapshot_customer_email) {
+            return;
+        }
+
+        $account = MailAccount::withoutGlobalScopes()
+            ->where('tenant_id', $log->tenant_id)
+            ->where('is_active', true)
+            ->whereNotNull('smtp_host')
+            ->orderByDesc('is_default')
+            ->first();
+
+        if (!$account) {
+            return;
+        }
+
+        $placeholders = $this->placeholders($invoice, $levelConfig['fee_cents']);
+        $subject = strtr($levelConfig['subject'] ?: "Zahlungserinnerung zu Rechnung {$invoice->invoice_number}", $placeholders);
+        $body = strtr($levelConfig['body'] ?? '', $placeholders);
+
+        $email = (new \Symfony\Component\Mime\Email())
+            ->from($account->email)
+            ->to($invoice->snapshot_customer_email)
+            ->subject($subject)
+            ->html(nl2br(htmlspecialchars($body, ENT_QUOTES | ENT_SUBSTITUTE, 'UTF-8')))
+            ->attach($pdf, "Mahnung_Stufe{$log->level}_{$invoice->invoice_number}.pdf", 'application/pdf');
+
+        (new \Symfony\Component\Mailer\Mailer(\Symfony\Component\Mailer\Transport::fromDsn($account->smtpDsn())))->send($email);
+
+        \App\Models\Mail::create([
+            'tenant_id' => $log->tenant_id,
+            'mail_account_id' => $account->id,
+            'folder' => 'sent',
+            'from_email' => $account->email,
+            'to_emails' => [$invoice->snapshot_customer_email],
+            'cc_emails' => [],
+            'subject' => $subject,
+            'body' => $body,
+            'is_read' => true,
+            'date' => now(),
+            'attachments' => [],
+        ]);
     }
 
     /**
@@ -162,37 +341,77 @@ public function getOutstandingAmount(Invoice $invoice): float
     }
 
     /**
-     * Generiere Dunning-PDF
+     * Generiere Dunning-PDF und speichere es (Pfad auf PDF_DISK, siehe pdfPath)
      */
-    public function generateDunningPdf(Invoice $invoice, DunningLog $log): string
+    public function generateDunningPdf(Invoice $invoice, DunningLog $log, ?array $levelConfig = null): string
     {
-        $settings = $this->getDunningSettings($invoice->tenant_id);
-        $reminderLevel = $log->reminder_level;
+        return $this->storeDunningPdf($log, $this->renderDunningPdf($invoice, $log, $levelConfig));
+    }
 
-        $html = view('dunning.reminder-pdf', [
-            'invoice' => $invoice,
-            'dunningLog' => $log,
-            'reminderLevel' => $reminderLevel,
-            'outstandingAmount' => $log->outstanding_amount,
-            'settings' => $settings,
+    /**
+     * PDF-Inhalt der Mahnung rendern
+     */
+    public function renderDunningPdf(Invoice $invoice, DunningLog $log, ?array $levelConfig = null): string
+    {
+        $levelConfig ??= $this->levelConfig($invoice->tenant_id, $log->level);
+        $placeholders = $this->placeholders($invoice, $levelConfig['fee_cents']);
+
+        $html = view('pdf.dunning', [
+            'invoice'          => $invoice,
+            'log'              => $log,
+            'body'             => strtr($levelConfig['body'] ?? '', $placeholders),
+            'fee_eur'          => $levelConfig['fee_cents'] / 100,
+            'total_due_eur'    => ($invoice->amount_gross / 100) + ($levelConfig['fee_cents'] / 100),
+            'new_due_date'     => $placeholders['{{new_due_date}}'],
+            'level_label'      => $log->level_label,
         ])->render();
 
-        $pdf = \Barryvdh\DomPDF\Facade\Pdf::loadHTML($html)
-            ->setBasePath(public_path())
-            ->setOption('isPhpEnabled', true);
+        // Unveränderte Mahnung (gleiches HTML) wird aus dem PDF-Cache übernommen
+        return app(PdfRenderService::class)->render("dunning.level{$log->level}", $html, $invoice->tenant_id);
+    }
 
-        $filename = "dunning_{$invoice->invoice_number}_level{$reminderLevel}_" . now()->format('YmdHis') . '.pdf';
-        $path = "dunning/" . $invoice->tenant_id . "/" . $filename;
+    /**
+     * PDF unter dem Pfad des Logs ablegen
+     */
+    public function storeDunningPdf(DunningLog $log, string $content): string
+    {
+        $path = static::pdfPath($log);
+        Storage::disk(self::PDF_DISK)->put($path, $content);
 
-        \Illuminate\Support\Facades\Storage::put($path, $pdf->output());
+        return $path;
+    }
 
-        // Update DunningLog
-        $log->update([
-            'pdf_path' => $path,
-            'pdf_hash' => hash_file('sha256', storage_path("app/$path")),
-        ]);
+    /**
+     * Ablagepfad je Tenant und Log – Rechnungsnummern sind nur je Tenant eindeutig
+     */
+    public static function pdfPath(DunningLog $log): string
+    {
+        return "dunning/{$log->tenant_id}/{$log->id}_level{$log->level}.pdf";
+    }
 
-        return $path;
+    /**
+     * Stufen-Konfiguration (Tage, Gebühr, Betreff, Text) aus dunning_settings
+     */
+    public function levelConfig(int $tenantId, int $level): array
+    {
+        $settings = DunningSetting::withoutGlobalScopes()->firstOrCreate(['tenant_id' => $tenantId]);
+
+        return $settings->getLevelConfig($level);
+    }
+
+    /**
+     * Platzhalter für Mahntext und Betreff
+     */
+    protected function placeholders(Invoice $invoice, int $feeCents): array
+    {
+        return [
+            '{{invoice_number}}' => $invoice->invoice_number,
+            '{{invoice_date}}'   => $invoice->date?->format('d.m.Y') ?? '',
+            '{{amount_gross}}'   => number_format($invoice->amount_gross / 100, 2, ',', '.') . ' €',
+            '{{due_date}}'       => $invoice->due_date?->format('d.m.Y') ?? '',
+            '{{new_due_date}}'   => Carbon::today()->addDays(14)->format('d.m.Y'),
+            '{{fee}}'            => number_format($feeCents / 100, 2, ',', '.') . ' €',
+        ];
     }
 
     /**
@@ -0,0 +1,157 @@
+<?php
+
+namespace App\Services;
+
+use App\Models\InvoiceAuditCheckpoint;
+use App\Models\InvoiceAuditLog;
+
+/**
+ * Verifiziert die GoBD-Hash-Kette der Invoice Audit Logs.
+ *
+ * Die Logs werden in einem geordneten Durchlauf (invoice_id, id) über Fenster von
+ * Rechnungs-IDs gelesen. Pro Rechnung wird ein Checkpoint (letzte geprüfte Log-ID + Hash)
+ * gespeichert, sodass Folgeläufe nur neue Einträge hashen müssen.
+ */
+class InvoiceAuditChainVerifier
+{
+    const INVOICE_WINDOW = 500;
+
+    /**
+     * Kleinste/größte Rechnungs-ID mit Audit-Einträgen
+     */
+    public function invoiceIdBounds(): array
+    {
+        $bounds = InvoiceAuditLog::query()
+            ->selectRaw('MIN(invoice_id) as min_id, MAX(invoice_id) as max_id')
+            ->toBase()
+            ->first();
+
+        return [(int) $bounds->min_id, (int) $bounds->max_id];
+    }
+
+    /**
+     * Teilt [min, max] in bis zu $parts zusammenhängende Bereiche
+     */
+    public function splitRange(int $min, int $max, int $parts): array
+    {
+        if ($max < $min) {
+            return [];
+        }
+
+        $parts = max(1, min($parts, $max - $min + 1));
+        $size = (int) ceil(($max - $min + 1) / $parts);
+
+        $ranges = [];
+        for ($from = $min; $from <= $max; $from += $size) {
+            $ranges[] = [$from, min($max, $from + $size - 1)];
+        }
+
+        return $ranges;
+    }
+
+    /**
+     * Prüft alle Rechnungen im ID-Bereich [$fromId, $toId].
+     *
+     * @return array{invoices: int, entries: int, seconds: float, broken: array}
+     */
+    public function verifyRange(int $fromId, int $toId, bool $full = false): array
+    {
+        $started = microtime(true);
+        $stats = ['invoices' => 0, 'entries' => 0, 'seconds' => 0.0, 'broken' => []];
+
+        for ($windowStart = $fromId; $windowStart <= $toId; $windowStart += self::INVOICE_WINDOW) {
+            $windowEnd = min($toId, $windowStart + self::INVOICE_WINDOW - 1);
+
+            $query = InvoiceAuditLog::query()
+                ->whereBetween('invoice_audit_logs.invoice_id', [$windowStart, $windowEnd])
+                ->orderBy('invoice_audit_logs.invoice_id')
+                ->orderBy('invoice_audit_logs.id');
+
+            if ($full) {
+                $query->select('invoice_audit_logs.*');
+            } else {
+                $query->leftJoin('invoice_audit_checkpoints as c', 'c.invoice_id', '=', 'invoice_audit_logs.invoice_id')
+                    ->whereRaw('invoice_audit_logs.id > COALESCE(c.last_log_id, 0)')
+                    ->select('invoice_audit_logs.*', 'c.last_hash as checkpoint_hash');
+            }
+
+            $checkpoints = [];
+            foreach ($query->get()->groupBy('invoice_id') as $invoiceId => $logs) {
+                $stats['invoices']++;
+                $stats['entries'] += $logs->count();
+
+                $result = $this->verifyChain($logs, $full ? null : $logs->first()->checkpoint_hash);
+
+                if ($result['last_valid']) {
+                    $checkpoints[] = [
+                        'invoice_id' => $invoiceId,
+                        'last_log_id' => $result['last_valid']->id,
+                        'last_hash' => $result['last_valid']->record_hash,
+                        'verified_at' => now(),
+                    ];
+                }
+                if ($result['broken']) {
+                    $stats['broken'][] = $result['broken'];
+                }
+            }
+
+            if ($checkpoints) {
+                InvoiceAuditCheckpoint::upsert($checkpoints, ['invoice_id'], ['last_log_id', 'last_hash', 'verified_at']);
+            }
+        }
+
+        $stats['seconds'] = round(microtime(true) - $started, 3);
+
+        return $stats;
+    }
+
+    /**
+     * Prüft eine nach ID geordnete Kette einer Rechnung, beginnend beim Checkpoint-Hash.
+     * Liefert den letzten gültigen Eintrag vor dem ersten Bruch sowie den ersten Bruch.
+     */
+    public function verifyChain(iterable $logs, ?string $previousHash = null): array
+    {
+        $lastValid = null;
+
+        foreach ($logs as $log) {
+            $hashOk = $log->record_hash === InvoiceAuditLog::hashPayload($this->payloadFor($log));
+            $chainOk = $log->previous_hash === $previousHash;
+
+            if (!$hashOk || !$chainOk) {
+                return [
+                    'last_valid' => $lastValid,
+                    'broken' => [
+                        'invoice_id' => $log->invoice_id,
+                        'log_id' => $log->id,
+                        'action' => $log->action,
+                        'created_at' => $log->created_at->toDateTimeString(),
+                        'problem' => !$hashOk ? 'HASH_MISMATCH' : 'CHAIN_BROKEN',
+                    ],
+                ];
+            }
+
+            $lastValid = $log;
+            $previousHash = $log->record_hash;
+        }
+
+        return ['last_valid' => $lastValid, 'broken' => null];
+    }
+
+    /**
+     * Rekonstruiert den Payload exakt wie beim Erstellen in logAuditEvent()
+     */
+    private function payloadFor(InvoiceAuditLog $log): array
+    {
+        return [
+            'invoice_id'    => $log->invoice_id,
+            'user_id'       => $log->user_id,
+            'action'        => $log->action,
+            'old_status'    => $log->old_status,
+            'new_status'    => $log->new_status,
+            'previous_hash' => $log->previous_hash,
+            'metadata'      => $log->metadata,
+            'ip_address'    => $log->ip_address,
+            'created_at'    => $log->created_at->toIso8601String(),
+        ];
+    }
+}
@@ -0,0 +1,405 @@
+<?php
+
+namespace App\Services;
+
+use App\Models\Invoice;
+use App\Models\InvoiceAuditLog;
+use App\Support\StreamingZipWriter;
+use Carbon\Carbon;
+use Illuminate\Database\Eloquent\Builder;
+
+/**
+ * Streaming-Exporte für Betriebsprüfung (GoBD) und Steuerberater (DATEV).
+ *
+ * Rechnungen und Audit-Logs werden per chunkById gelesen und zeilenweise in den
+ * Ausgabestream geschrieben; der Speicherbedarf hängt nur von CHUNK_SIZE ab,
+ * nicht von der Anzahl exportierter Rechnungen.
+ */
+class InvoiceExportService
+{
+    const CHUNK_SIZE = 1000;
+
+    const GOBD_INVOICE_HEADERS = [
+        'Rechnungsnummer',
+        'Typ',
+        'Status',
+        'Rechnungsdatum',
+        'Fälligkeitsdatum',
+        'Leistungsdatum',
+        'Ausgestellt am',
+        'Kunde ID',
+        'Kundenname',
+        'Kundenadresse',
+        'Kunden PLZ',
+        'Kunden Ort',
+        'Kunden Land',
+        'Kunden USt-IdNr.',
+        'Verkäufer Name',
+        'Verkäufer Steuernummer',
+        'Verkäufer USt-IdNr.',
+        'Nettobetrag (EUR)',
+        'MwSt-Betrag (EUR)',
+        'Bruttobetrag (EUR)',
+        'MwSt-Satz (%)',
+        'Steuerbefreiung',
+        'Projektname',
+        'Projektnummer',
+        'Storno-Rechnungsnummer',
+        'PDF SHA256',
+        'XML SHA256',
+    ];
+
+    const GOBD_AUDIT_HEADERS = [
+        'Log ID',
+        'Rechnungsnummer',
+        'Aktion',
+        'Alter Status',
+        'Neuer Status',
+        'Benutzer',
+        'IP-Adresse',
+        'Zeitstempel',
+        'Record Hash',
+        'Vorheriger Hash',
+    ];
+
+    const DATEV_HEADERS = [
+        'Umsatz (ohne Komma)',
+        'Soll/Haben-Kennzeichen',
+        'WKZ',
+        'Kurs',
+        'Basis-Umsatz',
+        'WKZ Basis-Umsatz',
+        'Konto',
+        'Gegenkonto',
+        'BU-Schlüssel',
+        'Belegdatum',
+        'Belegfeld 1',
+        'Buchungstext',
+    ];
+
+    /** @var resource|null */
+    private $csvBuffer = null;
+
+    /**
+     * Festgeschriebene Rechnungen eines Mandanten für den GoBD-Export
+     */
+    public function gobdQuery(int $tenantId, array $filters): Builder
+    {
+        $query = Invoice::where('tenant_id', $tenantId)
+            ->where('status', '!=', Invoice::STATUS_DRAFT); // Nur festgeschriebene Rechnungen
+
+        if (!empty($filters['ids'])) {
+            $query->whereIn('id', $filters['ids']);
+        }
+        if (!empty($filters['date_from'])) {
+            $query->whereDate('date', '>=', $filters['date_from']);
+        }
+        if (!empty($filters['date_to'])) {
+            $query->whereDate('date', '<=', $filters['date_to']);
+        }
+
+        return $query;
+    }
+
+    /**
+     * Anzahl und Datumsbereich in einer Aggregat-Abfrage (ohne Rechnungen zu laden)
+     */
+    public function summarize(Builder $query): object
+    {
+        return (clone $query)->toBase()
+            ->selectRaw('COUNT(*) as invoice_count, MIN(date) as date_from, MAX(date) as date_to')
+            ->first();
+    }
+
+    /**
+     * Schreibt das GoBD-ZIP (invoices.csv, audit_log.csv, index.xml) direkt in $out
+     *
+     * @param resource $out
+     */
+    public function streamGobdArchive($out, Builder $query, array $meta): void
+    {
+        $zip = new StreamingZipWriter($out);
+
+        // ── 1. invoices.csv ─────────────────────────────────────────────
+        $zip->beginFile('invoices.csv');
+        $zip->write("\xEF\xBB\xBF"); // UTF-8 BOM für Excel
+        $zip->write($this->csvLine(self::GOBD_INVOICE_HEADERS));
+
+        (clone $query)
+            ->with('cancelledInvoice:id,invoice_number')
+            ->chunkById(self::CHUNK_SIZE, function ($invoices) use ($zip) {
+                foreach ($invoices as $inv) {
+                    $zip->write($this->csvLine($this->gobdInvoiceRow($inv)));
+                }
+                $this->flushOutput();
+            });
+
+        // ── 2. audit_log.csv ────────────────────────────────────────────
+        $zip->beginFile('audit_log.csv');
+        $zip->write("\xEF\xBB\xBF");
+        $zip->write($this->csvLine(self::GOBD_AUDIT_HEADERS));
+
+        InvoiceAuditLog::query()
+            ->join('invoices', 'invoices.id', '=', 'invoice_audit_logs.invoice_id')
+            ->leftJoin('users', 'users.id', '=', 'invoice_audit_logs.user_id')
+            ->whereIn('invoice_audit_logs.invoice_id', (clone $query)->select('invoices.id'))
+            ->select('invoice_audit_logs.*', 'invoices.invoice_number', 'users.name as user_name')
+            ->chunkById(self::CHUNK_SIZE, function ($logs) use ($zip) {
+                foreach ($logs as $log) {
+                    $zip->write($this->csvLine([
+                        $log->id,
+                        $log->invoice_number ?? $log->invoice_id,
+                        $log->action,
+                        $log->old_status ?? '',
+                        $log->new_status ?? '',
+                        $log->user_name ?: 'System',
+                        $log->ip_address ?? '',
+                        $log->created_at->format('d.m.Y H:i:s'),
+                        $log->record_hash ?? '',
+                        $log->previous_hash ?? '',
+                    ]));
+                }
+                $this->flushOutput();
+            }, 'invoice_audit_logs.id', 'id');
+
+        // ── 3. index.xml (IDEA-Beschreibungsstandard) ────────────────────
+        $zip->addFile('index.xml', $this->gobdIndexXml($meta));
+
+        $zip->finish();
+        $this->flushOutput();
+    }
+
+    /**
+     * Schreibt den DATEV-Buchungsstapel zeilenweise in $out
+     *
+     * @param resource $out
+     */
+    public function streamDatevCsv($out, Builder $query): void
+    {
+        // DATEV header
+        fwrite($out, $this->csvLine(['DTVF', '700', '21', 'Buchungsstapel', '1', '', '', '', '', '', 'EXTF', '', '', '', '', '']));
+        fwrite($out, $this->csvLine(self::DATEV_HEADERS));
+
+        (clone $query)
+            ->select(['id', 'type', 'date', 'amount_gross', 'invoice_number', 'snapshot_customer_name', 'tax_exemption'])
+            ->chunkById(self::CHUNK_SIZE, function ($invoices) use ($out) {
+                foreach ($invoices as $inv) {
+                    /** @var Invoice $inv */
+                    $date = ($inv->date instanceof \DateTimeInterface) ? $inv->date->format('dm') : Carbon::now()->format('dm');
+
+                    $konto = ($inv->tax_exemption === Invoice::TAX_REVERSE_CHARGE) ? '8336' : '8400';
+                    $gegenkonto = '10000';
+
+                    fwrite($out, $this->csvLine([
+                        // Cents → EUR formatted for DATEV
+                        number_format($inv->amount_gross_eur, 2, ',', ''),
+                        // Credit notes: swap S/H
+                        $inv->isCreditNote() ? 'H' : 'S',
+                        'EUR',
+                        '',
+                        '',
+                        '',
+                        $gegenkonto,
+                        $konto,
+                        '',
+                        $date,
+                        $inv->invoice_number,
+                        substr($inv->snapshot_customer_name ?? 'Unbekannt', 0, 30),
+                    ]));
+                }
+                $this->flushOutput();
+            });
+    }
+
+    /**
+     * GoBD: je exportierter Rechnung einen Audit-Eintrag, als Multi-Row-Insert pro Chunk.
+     * Die Hash-Kette wird pro Rechnung fortgeführt (previous_hash = letzter record_hash).
+     */
+    public function logExport(Builder $query, ?int $userId, ?string $ipAddress, array $metadata): int
+    {
+        $logged = 0;
+
+        (clone $query)->select('id')->chunkById(self::CHUNK_SIZE, function ($invoices) use ($userId, $ipAddress, $metadata, &$logged) {
+            $ids = $invoices->modelKeys();
+
+            $previousHashes = InvoiceAuditLog::whereIn('id', InvoiceAuditLog::selectRaw('MAX(id)')
+                ->whereIn('invoice_id', $ids)
+                ->groupBy('invoice_id'))
+                ->pluck('record_hash', 'invoice_id');
+
+            $createdAt = now();
+            $rows = [];
+            foreach ($ids as $invoiceId) {
+                $payload = [
+                    'invoice_id' => $invoiceId,
+                    'user_id' => $userId,
+                    'action' => InvoiceAuditLog::ACTION_EXPORTED,
+                    'old_status' => null,
+                    'new_status' => null,
+                    'previous_hash' => $previousHashes[$invoiceId] ?? null,
+                    'metadata' => $metadata,
+                    'ip_address' => $ipAddress,
+                    'created_at' => $createdAt->toIso8601String(),
+                ];
+
+                $rows[] = [
+                    'invoice_id' => $invoiceId,
+                    'user_id' => $userId,
+                    'action' => InvoiceAuditLog::ACTION_EXPORTED,
+                    'old_status' => null,
+                    'new_status' => null,
+                    'previous_hash' => $payload['previous_hash'],
+                    'record_hash' => InvoiceAuditLog::hashPayload($payload),
+                    'metadata' => json_encode($metadata),
+                    'ip_address' => $ipAddress,
+                    'created_at' => $createdAt,
+                ];
+            }
+
+            InvoiceAuditLog::insert($rows);
+            $logged += count($rows);
+        });
+
+        return $logged;
+    }
+
+    /**
+     * Maschinenlesbare Datenbeschreibung für IDEA-Prüfsoftware
+     */
+    private function gobdIndexXml(array $meta): string
+    {
+        $exportDate = now()->format('Y-m-d\TH:i:s');
+        $tenantName = htmlspecialchars($meta['tenant_name'], ENT_XML1);
+        $dateFrom = $meta['date_from'];
+        $dateTo = $meta['date_to'];
+        $invoiceCount = $meta['invoice_count'];
+
+        return <<<XML
+<?xml version="1.0" encoding="UTF-8"?>
+<DataDescription xmlns="http://www.gdpdu-ev.de/schema/gdpdu/0.1/">
+  <Exportinformation>
+    <ExportDate>{$exportDate}</ExportDate>
+    <ExportingApplication>Translation Office TMS</ExportingApplication>
+    <Company>{$tenantName}</Company>
+    <Period>
+      <DateFrom>{$dateFrom}</DateFrom>
+      <DateTo>{$dateTo}</DateTo>
+    </Period>
+    <RecordCount>{$invoiceCount}</RecordCount>
+    <Remark>GoBD-konformer Datenexport gemäß BMF-Schreiben vom 28.11.2019</Remark>
+  </Exportinformation>
+
+  <DataSet name="Rechnungen" filename="invoices.csv">
+    <FieldDelimiter>;</FieldDelimiter>
+    <RecordDelimiter>CRLF</RecordDelimiter>
+    <TextEncapsulator>&quot;</TextEncapsulator>
+    <Encoding>UTF-8</Encoding>
+    <FieldDescription>
+      <Field name="Rechnungsnummer" type="Text" maxLength="50"/>
+      <Field name="Typ" type="Text" maxLength="20"/>
+      <Field name="Status" type="Text" maxLength="20"/>
+      <Field name="Rechnungsdatum" type="Date" format="DD.MM.YYYY"/>
+      <Field name="Fälligkeitsdatum" type="Date" format="DD.MM.YYYY"/>
+      <Field name="Leistungsdatum" type="Date" format="DD.MM.YYYY"/>
+      <Field name="Ausgestellt am" type="DateTime" format="DD.MM.YYYY HH:MM:SS"/>
+      <Field name="Kunde ID" type="Numeric"/>
+      <Field name="Kundenname" type="Text" maxLength="255"/>
+      <Field name="Kundenadresse" type="Text" maxLength="255"/>
+      <Field name="Kunden PLZ" type="Text" maxLength="10"/>
+      <Field name="Kunden Ort" type="Text" maxLength="100"/>
+      <Field name="Kunden Land" type="Text" maxLength="2"/>
+      <Field name="Kunden USt-IdNr." type="Text" maxLength="20"/>
+      <Field name="Verkäufer Name" type="Text" maxLength="255"/>
+      <Field name="Verkäufer Steuernummer" type="Text" maxLength="30"/>
+      <Field name="Verkäufer USt-IdNr." type="Text" maxLength="20"/>
+      <Field name="Nettobetrag (EUR)" type="Amount" accuracy="2"/>
+      <Field name="MwSt-Betrag (EUR)" type="Amount" accuracy="2"/>
+      <Field name="Bruttobetrag (EUR)" type="Amount" accuracy="2"/>
+      <Field name="MwSt-Satz (%)" type="Amount" accuracy="2"/>
+      <Field name="Steuerbefreiung" type="Text" maxLength="30"/>
+      <Field name="Projektname" type="Text" maxLength="255"/>
+      <Field name="Projektnummer" type="Text" maxLength="50"/>
+      <Field name="Storno-Rechnungsnummer" type="Text" maxLength="50"/>
+      <Field name="PDF SHA256" type="Text" maxLength="64"/>
+      <Field name="XML SHA256" type="Text" maxLength="64"/>
+    </FieldDescription>
+  </DataSet>
+
+  <DataSet name="Audit-Trail" filename="audit_log.csv">
+    <FieldDelimiter>;</FieldDelimiter>
+    <RecordDelimiter>CRLF</RecordDelimiter>
+    <TextEncapsulator>&quot;</TextEncapsulator>
+    <Encoding>UTF-8</Encoding>
+    <FieldDescription>
+      <Field name="Log ID" type="Numeric"/>
+      <Field name="Rechnungsnummer" type="Text" maxLength="50"/>
+      <Field name="Aktion" type="Text" maxLength="30"/>
+      <Field name="Alter Status" type="Text" maxLength="20"/>
+      <Field name="Neuer Status" type="Text" maxLength="20"/>
+      <Field name="Benutzer" type="Text" maxLength="100"/>
+      <Field name="IP-Adresse" type="Text" maxLength="45"/>
+      <Field name="Zeitstempel" type="DateTime" format="DD.MM.YYYY HH:MM:SS"/>
+      <Field name="Record Hash" type="Text" maxLength="64"/>
+      <Field name="Vorheriger Hash" type="Text" maxLength="64"/>
+    </FieldDescription>
+  </DataSet>
+</DataDescription>
+XML;
+    }
+
+    private function gobdInvoiceRow(Invoice $inv): array
+    {
+        return [
+            $inv->invoice_number,
+            $inv->type === 'credit_note' ? 'Gutschrift' : 'Rechnung',
+            $inv->status,
+            $inv->date ? Carbon::parse($inv->date)->format('d.m.Y') : '',
+            $inv->due_date ? Carbon::parse($inv->due_date)->format('d.m.Y') : '',
+            $inv->delivery_date ? Carbon::parse($inv->delivery_date)->format('d.m.Y') : '',
+            $inv->issued_at ? Carbon::parse($inv->issued_at)->format('d.m.Y H:i:s') : '',
+            $inv->customer_id ?? '',
+            $inv->snapshot_customer_name ?? '',
+            $inv->snapshot_customer_address ?? '',
+            $inv->snapshot_customer_zip ?? '',
+            $inv->snapshot_customer_city ?? '',
+            $inv->snapshot_customer_country ?? '',
+            $inv->snapshot_customer_vat_id ?? '',
+            $inv->snapshot_seller_name ?? '',
+            $inv->snapshot_seller_tax_number ?? '',
+            $inv->snapshot_seller_vat_id ?? '',
+            number_format(($inv->amount_net ?? 0) / 100, 2, ',', ''),
+            number_format(($inv->amount_tax ?? 0) / 100, 2, ',', ''),
+            number_format(($inv->amount_gross ?? 0) / 100, 2, ',', ''),
+            $inv->tax_rate ?? '',
+            $inv->tax_exemption ?? '',
+            $inv->snapshot_project_name ?? '',
+            $inv->snapshot_project_number ?? '',
+            $inv->cancelledInvoice?->invoice_number ?? '',
+            $inv->pdf_sha256 ?? '',
+            $inv->xml_sha256 ?? '',
+        ];
+    }
+
+    /**
+     * Eine CSV-Zeile (Semikolon-getrennt) über einen wiederverwendeten Speicher-Stream formatieren
+     */
+    private function csvLine(array $fields): string
+    {
+        $this->csvBuffer ??= fopen('php://memory', 'w+');
+
+        rewind($this->csvBuffer);
+        ftruncate($this->csvBuffer, 0);
+        fputcsv($this->csvBuffer, $fields, ';');
+        rewind($this->csvBuffer);
+
+        return stream_get_contents($this->csvBuffer);
+    }
+
+    private function flushOutput(): void
+    {
+        if (ob_get_level() > 0) {
+            ob_flush();
+        }
+        flush();
+    }
+}
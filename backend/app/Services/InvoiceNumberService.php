@@ -0,0 +1,96 @@
+<?php
+
+namespace App\Services;
+
+use App\Models\SequenceCounter;
+use Carbon\Carbon;
+use Illuminate\Support\Facades\DB;
+
+/**
+ * Rechnungs-/Gutschriftnummern: fortlaufend je Tenant und Jahr (GoBD), Format aus den Tenant-Settings.
+ * Rechnungen und Gutschriften teilen sich einen Nummernkreis.
+ */
+class InvoiceNumberService
+{
+    /**
+     * Nächste Nummer vergeben – innerhalb der Transaktion aufrufen, die den Beleg anlegt
+     *
+     * @return array{0: string, 1: int} [Nummer, Laufnummer]
+     */
+    public function next(int $tenantId, string $type, string|int $year): array
+    {
+        $sequence = SequenceCounter::next($tenantId, $this->scope($year), fn() => $this->lastSequence($tenantId, $year));
+
+        return [$this->format($tenantId, $type, $sequence, $year), $sequence];
+    }
+
+    /**
+     * Vorschau der nächsten Nummer (vergibt nichts)
+     *
+     * @return array{0: string, 1: int}
+     */
+    public function peek(int $tenantId, string $type, string|int $year): array
+    {
+        $sequence = SequenceCounter::peek($tenantId, $this->scope($year), fn() => $this->lastSequence($tenantId, $year));
+
+        return [$this->format($tenantId, $type, $sequence, $year), $sequence];
+    }
+
+    public function format(int $tenantId, string $type, int $sequence, string|int $year): string
+    {
+        $year = (string) $year;
+        $settings = \App\Models\TenantSetting::where('tenant_id', $tenantId)
+            ->where('key', 'like', $type . '_%')
+            ->pluck('value', 'key');
+
+        $prefix = $settings[$type . '_prefix'] ?? ($type === 'credit_note' ? 'G' : 'RE');
+        $sep = ($settings[$type . '_separator'] ?? '-') === 'none' ? '' : ($settings[$type . '_separator'] ?? '-');
+        $padding = (int) ($settings[$type . '_padding'] ?? 4);
+        $date = Carbon::now();
+
+        $yearPart = '';
+        $yearFormat = $settings[$type . '_year_format'] ?? 'YY';
+        if ($yearFormat === 'YYYY')
+            $yearPart = $year;
+        elseif ($yearFormat === 'YY')
+            $yearPart = substr($year, -2);
+        elseif ($yearFormat === 'none')
+            $yearPart = '';
+
+        $monthPart = '';
+        $monthFormat = $settings[$type . '_month_format'] ?? 'none';
+        if ($monthFormat === 'MM')
+            $monthPart = $date->format('m');
+        elseif ($monthFormat === 'M')
+            $monthPart = $date->format('n');
+
+        $dayPart = '';
+        $dayFormat = $settings[$type . '_day_format'] ?? 'none';
+        if ($dayFormat === 'DD')
+            $dayPart = $date->format('d');
+        elseif ($dayFormat === 'D')
+            $dayPart = $date->format('j');
+
+        $nrPart = str_pad($sequence, $padding, '0', STR_PAD_LEFT);
+
+        return implode($sep, array_filter([$prefix, $yearPart, $monthPart, $dayPart, $nrPart], function ($p) {
+            return $p !== '';
+        }));
+    }
+
+    protected function scope(string|int $year): string
+    {
+        return 'invoice:' . $year;
+    }
+
+    /**
+     * Startwert für den Zähler: höchste bisher vergebene Laufnummer des Jahres (einmalig je Tenant/Jahr)
+     */
+    protected function lastSequence(int $tenantId, string|int $year): int
+    {
+        return (int) DB::table('invoices')
+            ->where('tenant_id', $tenantId)
+            ->whereBetween('date', [$year . '-01-01', $year . '-12-31'])
+            ->max('invoice_number_sequence');
+    }
+}
@@ -0,0 +1,350 @@
+<?php
+
+namespace App\Services;
+
+use App\Models\Mail;
+use App\Models\MailAccount;
+use App\Models\MailFolderState;
+use App\Support\MimeStructure;
+use Illuminate\Support\Facades\DB;
+use Illuminate\Support\Facades\Log;
+use Illuminate\Support\Facades\Storage;
+use Webklex\IMAP\Facades\Client;
+use Webklex\PHPIMAP\IMAP;
+
+/**
+ * IMAP-Synchronisierung eines Postfachs.
+ *
+ * Pro Konto und Ordner werden UIDVALIDITY und die letzte abgeholte UID gespeichert,
+ * sodass Folgeläufe nur neue UIDs abrufen. Nachrichten werden in Batches verarbeitet:
+ * ein whereIn auf message_id pro Batch, danach ein Bulk-Insert. Abgerufen werden nur
+ * Kopfzeilen und BODYSTRUCTURE, für neue Nachrichten dann allein der Textteil; Anhänge
+ * werden nur als Metadaten (Abschnittsnummer) abgelegt und beim ersten Download geholt.
+ *
+ * POP3 kennt weder UIDVALIDITY noch UID-Suche und keine stabilen Nachrichtennummern:
+ * dort wird wie bisher das ganze Postfach abgerufen (neu ist nur, was per message_id
+ * noch nicht existiert) und Anhänge neuer Nachrichten werden sofort gespeichert.
+ */
+class MailSyncService
+{
+    const BATCH_SIZE = 100;
+
+    // Erstsync eines Ordners: nur Nachrichten der letzten N Tage
+    const INITIAL_DAYS = 90;
+
+    /**
+     * Synchronisiert einen IMAP-Ordner eines Kontos; liefert die Anzahl neuer E-Mails
+     */
+    public function syncAccount(MailAccount $account, string $remoteFolder = 'INBOX', string $localFolder = 'inbox'): int
+    {
+        $state = MailFolderState::withoutGlobalScopes()->firstOrCreate(
+            ['mail_account_id' => $account->id, 'folder' => $remoteFolder],
+            ['tenant_id' => $account->tenant_id]
+        );
+
+        $client = $this->clientFor($account);
+
+        try {
+            $client->connect();
+            $folder = $client->getFolder($remoteFolder);
+            $pop3 = $this->isPop3($account);
+
+            if ($pop3) {
+                $created = 0;
+                $folder->query()->leaveUnread()->all()->chunked(function ($messages) use ($account, $state, $remoteFolder, $localFolder, &$created) {
+                    $created += $this->storeBatch($account, $state, $messages, $remoteFolder, $localFolder);
+                }, self::BATCH_SIZE);
+
+                $state->forceFill(['last_synced_at' => now(), 'sync_error' => null])->save();
+
+                return $created;
+            }
+
+            // Neue UIDVALIDITY: alte UIDs sind ungültig, Ordner neu einlesen
+            // (Duplikate verhindert der message_id-Abgleich)
+            $uidValidity = (int) ($folder->examine()['uidvalidity'] ?? 0);
+            if ($state->uid_validity !== $uidValidity) {
+                $state->forceFill(['uid_validity' => $uidValidity, 'last_uid' => 0]);
+            }
+
+            // Nur Kopfzeilen und Flags; Text und Anhänge holt storeBatch gezielt nach
+            $query = $folder->query()->leaveUnread()->setFetchBody(false)->setFetchOrder('asc');
+            $query = $state->last_uid > 0
+                ? $query->where('UID', ($state->last_uid + 1) . ':*')
+                : $query->since(now()->subDays(self::INITIAL_DAYS));
+
+            $created = 0;
+            $query->chunked(function ($messages) use ($account, $state, $client, $remoteFolder, $localFolder, &$created) {
+                $created += $this->storeBatch($account, $state, $messages, $remoteFolder, $localFolder, $client);
+            }, self::BATCH_SIZE);
+
+            $state->forceFill(['last_synced_at' => now(), 'sync_error' => null])->save();
+
+            return $created;
+        } catch (\Exception $e) {
+            $state->forceFill(['sync_error' => $e->getMessage()])->save();
+            throw $e;
+        } finally {
+            $client->disconnect();
+        }
+    }
+
+    /**
+     * Holt einen Anhang beim ersten Download vom IMAP-Server (nur dessen Abschnitt) und legt ihn im Storage ab.
+     * Liefert den Storage-Pfad oder null, wenn der Anhang nicht (mehr) verfügbar ist.
+     */
+    public function fetchAttachment(Mail $mail, int $index): ?string
+    {
+        $attachments = $mail->attachments ?? [];
+        $info = $attachments[$index] ?? null;
+
+        if (!$info || !isset($info['uid'], $info['section']) || !$mail->account) {
+            return null;
+        }
+
+        $client = $this->clientFor($mail->account);
+
+        try {
+            $client->connect();
+            $client->openFolder($info['remote_folder'] ?? 'INBOX');
+
+            $uid = (int) $info['uid'];
+            $data = $client->getConnection()
+                ->fetch(['UID', "BODY.PEEK[{$info['section']}]"], [$uid], null, IMAP::ST_UID)
+                ->validatedData();
+
+            $content = $data[$uid]["BODY[{$info['section']}]"] ?? null;
+            if (!is_string($content)) {
+                return null;
+            }
+
+            $path = 'mail_attachments/' . uniqid() . '_' . preg_replace('/[^A-Za-z0-9._-]/', '_', $info['name'] ?? 'attachment');
+            Storage::put($path, MimeStructure::decode($content, $info['encoding'] ?? '7bit'));
+        } catch (\Exception $e) {
+            Log::warning("Could not fetch attachment {$index} of mail {$mail->id}: " . $e->getMessage());
+            return null;
+        } finally {
+            $client->disconnect();
+        }
+
+        $attachments[$index]['path'] = $path;
+        $mail->update(['attachments' => $attachments]);
+
+        return $path;
+    }
+
+    public function isPop3(MailAccount $account): bool
+    {
+        return $this->connectionConfig($account)['protocol'] === 'pop3';
+    }
+
+    /**
+     * IMAP/POP3-Client für ein Konto
+     */
+    public function clientFor(MailAccount $account)
+    {
+        return Client::make($this->connectionConfig($account));
+    }
+
+    /**
+     * Verbindungsdaten eines Kontos (Port-Default je Protokoll und Verschlüsselung)
+     */
+    public function connectionConfig(MailAccount $account): array
+    {
+        $protocol = $account->incoming_protocol ?? 'imap';
+        $encryption = $account->imap_encryption ?? 'ssl';
+        $defaultPort = $protocol === 'pop3' ? ($encryption === 'ssl' ? 995 : 110) : ($encryption === 'ssl' ? 993 : 143);
+
+        return [
+            'host' => $account->imap_host,
+            'port' => $account->imap_port ?? $defaultPort,
+            'encryption' => $encryption,
+            'validate_cert' => false,
+            'username' => $account->username,
+            'password' => $account->password,
+            'protocol' => $protocol,
+        ];
+    }
+
+    /**
+     * Speichert einen Batch abgerufener Nachrichten und schreibt last_uid fort.
+     * Mit $client (IMAP) wurden nur Kopfzeilen geladen, Text/Anhänge kommen aus fetchContents;
+     * ohne (POP3) sind die Nachrichten vollständig geladen und haben keine stabilen UIDs.
+     */
+    protected function storeBatch(MailAccount $account, MailFolderState $state, iterable $messages, string $remoteFolder, string $localFolder, $client = null): int
+    {
+        $candidates = [];
+        $maxUid = $state->last_uid;
+
+        foreach ($messages as $message) {
+            $uid = (int) $message->getUid();
+            if ($client) {
+                // "UID n:*" liefert immer mindestens die letzte Nachricht
+                if ($uid <= $state->last_uid) {
+                    continue;
+                }
+                $maxUid = max($maxUid, $uid);
+            }
+
+            $messageId = (string) $message->getMessageId()->first()
+                ?: $this->fallbackMessageId($account, $message, $remoteFolder, $client ? $state->uid_validity : null, $uid);
+            $candidates[$messageId] ??= [$message, $uid];
+        }
+
+        $created = 0;
+
+        if ($candidates) {
+            $existing = Mail::withTrashed()
+                ->withoutGlobalScopes()
+                ->where('tenant_id', $account->tenant_id)
+                ->whereIn('message_id', array_keys($candidates))
+                ->where(fn($q) => $q->where('mail_account_id', $account->id)->orWhereNull('mail_account_id'))
+                ->get(['id', 'mail_account_id', 'message_id']);
+
+            // Inhalte nur für neue Nachrichten laden
+            $new = array_diff_key($candidates, array_flip($existing->pluck('message_id')->all()));
+            $contents = $client ? $this->fetchContents($client, $remoteFolder, array_column($new, 1)) : [];
+
+            $rows = [];
+            foreach ($new as $messageId => [$message, $uid]) {
+                [$body, $attachments] = $client ? ($contents[$uid] ?? ['', []]) : $this->loadedContent($message, (string) $messageId);
+                $rows[] = $this->rowFor($account, $message, (string) $messageId, $body, $attachments, $localFolder);
+            }
+
+            DB::transaction(function () use ($account, $existing, $rows, &$created) {
+                // Abwärtskompatibilität: Mails ohne Konto diesem Konto zuordnen statt neu anzulegen
+                $legacyIds = $existing->whereNull('mail_account_id')->pluck('id');
+                if ($legacyIds->isNotEmpty()) {
+                    Mail::withTrashed()->withoutGlobalScopes()->whereIn('id', $legacyIds)->update(['mail_account_id' => $account->id]);
+                }
+
+                if ($rows) {
+                    Mail::insert($rows);
+                    $created = count($rows);
+                }
+            });
+        }
+
+        if ($maxUid > $state->last_uid) {
+            $state->forceFill(['last_uid' => $maxUid])->save();
+        }
+
+        return $created;
+    }
+
+    /**
+     * Ersatz-ID für Nachrichten ohne Message-ID, eindeutig je Konto und Ordner: IMAP über
+     * UIDVALIDITY und UID, POP3 (keine stabilen Nummern) über einen Hash der Kopfzeilen
+     */
+    protected function fallbackMessageId(MailAccount $account, $message, string $remoteFolder, ?int $uidValidity, int $uid): string
+    {
+        $key = $uidValidity !== null ? "{$uidValidity}.{$uid}" : sha1((string) $message->getHeader()->raw);
+
+        return "account:{$account->id}:" . md5($remoteFolder) . ":{$key}";
+    }
+
+    /**
+     * IMAP: BODYSTRUCTURE aller neuen Nachrichten mit einem FETCH, danach nur die Textteile
+     * (ein FETCH je Abschnittsnummer über alle Nachrichten). Anhänge werden nur beschrieben.
+     *
+     * @return array<int, array{0: string, 1: array}> [uid => [Text, Anhänge]]
+     */
+    protected function fetchContents($client, string $remoteFolder, array $uids): array
+    {
+        if ($uids === []) {
+            return [];
+        }
+
+        $connection = $client->getConnection();
+        $structures = $connection->fetch(['UID', 'BODYSTRUCTURE'], array_values($uids), null, IMAP::ST_UID)->validatedData();
+
+        $contents = [];
+        $textParts = [];
+
+        foreach ($structures as $uid => $data) {
+            $parts = is_array($data['BODYSTRUCTURE'] ?? null) ? MimeStructure::parts($data['BODYSTRUCTURE']) : [];
+
+            if ($body = MimeStructure::bodyPart($parts)) {
+                $textParts[$body['section']][$uid] = $body;
+            }
+
+            $contents[$uid] = ['', array_map(fn($part) => [
+                'name' => $part['name'] ?? 'attachment',
+                // Größe laut BODYSTRUCTURE ist die kodierte Größe
+                'size' => $part['encoding'] === 'base64' ? intdiv($part['size'] * 3, 4) : $part['size'],
+                'extension' => pathinfo((string) $part['name'], PATHINFO_EXTENSION) ?: null,
+                'mime' => $part['mime'],
+                'path' => null,
+                'uid' => (int) $uid,
+                'remote_folder' => $remoteFolder,
+                'section' => $part['section'],
+                'encoding' => $part['encoding'],
+            ], MimeStructure::attachments($parts))];
+        }
+
+        foreach ($textParts as $section => $parts) {
+            $texts = $connection->fetch(['UID', "BODY.PEEK[{$section}]"], array_keys($parts), null, IMAP::ST_UID)->validatedData();
+
+            foreach ($texts as $uid => $data) {
+                if (isset($parts[$uid]) && is_string($data["BODY[{$section}]"] ?? null)) {
+                    $contents[$uid][0] = MimeStructure::text($data["BODY[{$section}]"], $parts[$uid]['encoding'], $parts[$uid]['charset']);
+                }
+            }
+        }
+
+        return $contents;
+    }
+
+    /**
+     * POP3: Nachricht ist vollständig geladen; Anhänge sofort speichern, ein späterer Abruf ist nicht möglich
+     */
+    protected function loadedContent($message, string $messageId): array
+    {
+        $attachments = [];
+        foreach ($message->getAttachments()->values() as $attachment) {
+            $info = [
+                'name' => $attachment->getName(),
+                'size' => $attachment->getSize(),
+                'extension' => $attachment->getExtension(),
+                'mime' => $attachment->getMimeType(),
+                'path' => null,
+            ];
+
+            try {
+                $info['path'] = 'mail_attachments/' . uniqid() . '_' . preg_replace('/[^A-Za-z0-9._-]/', '_', $attachment->getName());
+                Storage::put($info['path'], $attachment->getContent());
+            } catch (\Exception $e) {
+                Log::warning("Could not save attachment for mail {$messageId}: " . $e->getMessage());
+                $info['path'] = null;
+            }
+
+            $attachments[] = $info;
+        }
+
+        return [$message->hasHTMLBody() ? $message->getHTMLBody() : $message->getTextBody(), $attachments];
+    }
+
+    /**
+     * Tabellenzeile für den Bulk-Insert (Casts greifen bei insert() nicht, daher JSON manuell)
+     */
+    protected function rowFor(MailAccount $account, $message, string $messageId, string $body, array $attachments, string $localFolder): array
+    {
+        $now = now();
+
+        return [
+            'tenant_id' => $account->tenant_id,
+            'mail_account_id' => $account->id,
+            'message_id' => $messageId,
+            'folder' => $localFolder,
+            'from_email' => $message->getFrom()[0]->mail ?? null,
+            'to_emails' => json_encode(array_map(fn($to) => $to->mail, $message->getTo()->toArray())),
+            'subject' => $message->getSubject()->get()[0] ?? '(Kein Betreff)',
+            'body' => $body,
+            'is_read' => $message->getFlags()->has('seen'),
+            'date' => $message->getDate()->first(),
+            'attachments' => json_encode($attachments),
+            'created_at' => $now,
+            'updated_at' => $now,
+        ];
+    }
+}
@@ -0,0 +1,152 @@
+<?php
+
+namespace App\Services;
+
+use App\Models\PdfRender;
+use Barryvdh\DomPDF\Facade\Pdf;
+use Illuminate\Support\Facades\Log;
+use Illuminate\Support\Facades\Storage;
+
+/**
+ * Zentrale PDF-Erzeugung (DomPDF) für Rechnungen, Mahnungen und Sammel-Läufe.
+ *
+ * - Inhalts-Hash: das gerenderte HTML (plus Papier/Optionen) wird gehasht; existiert
+ *   für den Hash bereits ein PDF, wird es wiederverwendet statt neu gerendert.
+ * - Warme Worker: Queue-Worker sind langlebige Prozesse; Tenant-Assets (Logo als
+ *   Data-URI) werden pro Prozess einmal geladen, Font-Metriken liegen im
+ *   persistenten font_cache (config/dompdf.php).
+ * - Messung: jede Erzeugung wird mit Dauer je Template in pdf_renders protokolliert.
+ */
+class PdfRenderService
+{
+    const CACHE_DIR = 'pdf_cache';
+
+    /**
+     * Prozess-Memo für Assets: "path:mtime" => data URI
+     */
+    protected static array $assets = [];
+
+    /**
+     * Rendert HTML zu PDF oder liefert das gespeicherte PDF bei identischem Inhalt
+     */
+    public function render(string $template, string $html, ?int $tenantId = null, array $options = [], string $paper = 'a4', string $orientation = 'portrait', ?string $basePath = null): string
+    {
+        $hash = $this->contentHash($html, $options + ['basePath' => $basePath], $paper, $orientation);
+        $cachePath = $this->cachePath($hash);
+        $disk = Storage::disk('local');
+
+        if ($disk->exists($cachePath)) {
+            $content = $disk->get($cachePath);
+            $this->record($template, $tenantId, $hash, strlen($content), 0, true);
+
+            return $content;
+        }
+
+        $started = hrtime(true);
+
+        $pdf = Pdf::setOption($options)->setPaper($paper, $orientation);
+        if ($basePath) {
+            $pdf->setBasePath($basePath);
+        }
+        $content = $pdf->loadHTML($html)->output();
+
+        $renderMs = (int) round((hrtime(true) - $started) / 1e6);
+
+        $disk->put($cachePath, $content);
+        $this->record($template, $tenantId, $hash, strlen($content), $renderMs, false);
+
+        return $content;
+    }
+
+    /**
+     * Hash über alles, was das PDF beeinflusst
+     */
+    public function contentHash(string $html, array $options = [], string $paper = 'a4', string $orientation = 'portrait'): string
+    {
+        ksort($options);
+
+        return hash('sha256', $paper . '|' . $orientation . '|' . json_encode($options) . '|' . $html);
+    }
+
+    public function cachePath(string $hash): string
+    {
+        return self::CACHE_DIR . '/' . substr($hash, 0, 2) . '/' . $hash . '.pdf';
+    }
+
+    /**
+     * Bilddatei als Data-URI, pro Worker-Prozess einmal gelesen (Logo in Kopf-/Fußzeile).
+     * Der Schlüssel enthält die mtime, ein neu hochgeladenes Logo greift sofort.
+     */
+    public static function assetDataUri(?string $fullPath): ?string
+    {
+        if (!$fullPath || !is_file($fullPath)) {
+            return null;
+        }
+
+        $key = $fullPath . ':' . filemtime($fullPath);
+
+        return static::$assets[$key] ??= 'data:image/' . pathinfo($fullPath, PATHINFO_EXTENSION)
+            . ';base64,' . base64_encode(file_get_contents($fullPath));
+    }
+
+    /**
+     * Anzahl, Wiederverwendungsquote und Renderzeiten (Ø, p95) je Template
+     */
+    public function stats(int $days = 7): array
+    {
+        $stats = [];
+
+        PdfRender::where('created_at', '>=', now()->subDays($days))
+            ->orderBy('template')
+            ->get(['template', 'render_ms', 'reused'])
+            ->groupBy('template')
+            ->each(function ($renders, $template) use (&$stats) {
+                $timings = $renders->where('reused', false)->pluck('render_ms')->sort()->values();
+
+                $stats[$template] = [
+                    'total' => $renders->count(),
+                    'reused' => $renders->where('reused', true)->count(),
+                    'avg_ms' => $timings->isNotEmpty() ? (int) round($timings->avg()) : null,
+                    'p95_ms' => $timings->isNotEmpty() ? $timings[(int) ceil($timings->count() * 0.95) - 1] : null,
+                ];
+            });
+
+        return $stats;
+    }
+
+    /**
+     * Gespeicherte PDFs löschen, die älter als $days Tage sind
+     */
+    public function pruneCache(int $days = 30): int
+    {
+        $disk = Storage::disk('local');
+        $threshold = now()->subDays($days)->getTimestamp();
+        $deleted = 0;
+
+        foreach ($disk->allFiles(self::CACHE_DIR) as $file) {
+            if ($disk->lastModified($file) < $threshold) {
+                $disk->delete($file);
+                $deleted++;
+            }
+        }
+
+        return $deleted;
+    }
+
+    protected function record(string $template, ?int $tenantId, string $hash, int $bytes, int $renderMs, bool $reused): void
+    {
+        try {
+            PdfRender::create([
+                'tenant_id' => $tenantId,
+                'template' => $template,
+                'source_hash' => $hash,
+                'bytes' => $bytes,
+                'render_ms' => $renderMs,
+                'reused' => $reused,
+            ]);
+        } catch (\Exception $e) {
+            // Messung darf die Erzeugung nie verhindern
+            Log::warning('PDF render metric could not be stored: ' . $e->getMessage());
+        }
+    }
+}
@@ -0,0 +1,206 @@
+<?php
+
+namespace App\Services;
+
+use App\Models\Project;
+use Carbon\Carbon;
+use Illuminate\Support\Facades\DB;
+
+/**
+ * Pflegt die Tabelle project_revenue_rollups.
+ * Projekt-Speicherungen/-Löschungen werden inkrementell verbucht, rebuild() baut die
+ * Aggregate eines Mandanten komplett aus der projects-Tabelle neu auf.
+ */
+class ProjectRevenueRollupService
+{
+    const TABLE = 'project_revenue_rollups';
+
+    /**
+     * Felder, deren Änderung das Rollup betrifft
+     */
+    const TRACKED_FIELDS = [
+        'tenant_id',
+        'created_at',
+        'target_lang_id',
+        'customer_id',
+        'price_total',
+        'partner_cost_net',
+    ];
+
+    /**
+     * Verbucht ein gespeichertes Projekt (Aufruf aus dem "saved"-Event, Original noch nicht synchronisiert)
+     */
+    public function recordSaved(Project $project): void
+    {
+        $isNew = $project->getRawOriginal('id') === null;
+
+        if (!$isNew && !$project->isDirty(self::TRACKED_FIELDS)) {
+            return;
+        }
+
+        $old = $isNew ? null : $this->bucketFor($project->getRawOriginal());
+        $new = $this->bucketFor($project->getAttributes());
+
+        if ($old && $new && $old['keys'] === $new['keys']) {
+            // Gleicher Bucket: nur die Differenz verbuchen
+            $this->apply($new['keys'], $new['month'], [
+                'revenue' => $new['revenue'] - $old['revenue'],
+                'partner_cost' => $new['partner_cost'] - $old['partner_cost'],
+                'job_count' => 0,
+            ]);
+            return;
+        }
+
+        if ($old) {
+            $this->apply($old['keys'], $old['month'], $this->deltas($old, -1));
+        }
+        if ($new) {
+            $this->apply($new['keys'], $new['month'], $this->deltas($new, 1));
+        }
+    }
+
+    /**
+     * Nimmt ein gelöschtes Projekt aus dem Rollup heraus
+     */
+    public function recordDeleted(Project $project): void
+    {
+        $bucket = $this->bucketFor($project->getRawOriginal() ?: $project->getAttributes());
+
+        if ($bucket) {
+            $this->apply($bucket['keys'], $bucket['month'], $this->deltas($bucket, -1));
+        }
+    }
+
+    /**
+     * Nimmt mehrere gelöschte Projekte heraus (Massenlöschung ohne Model-Events).
+     * Deltas werden je Bucket summiert und mit einem Update verbucht; Aufruf in derselben
+     * Transaktion wie das Löschen.
+     */
+    public function recordDeletedMany(iterable $projects): void
+    {
+        $buckets = [];
+
+        foreach ($projects as $project) {
+            $bucket = $this->bucketFor($project->getRawOriginal() ?: $project->getAttributes());
+            if (!$bucket) {
+                continue;
+            }
+
+            $key = implode('|', $bucket['keys']);
+            if (isset($buckets[$key])) {
+                $buckets[$key]['revenue'] += $bucket['revenue'];
+                $buckets[$key]['partner_cost'] += $bucket['partner_cost'];
+                $buckets[$key]['job_count']++;
+            } else {
+                $buckets[$key] = $bucket + ['job_count' => 1];
+            }
+        }
+
+        foreach ($buckets as $bucket) {
+            $this->apply($bucket['keys'], $bucket['month'], [
+                'revenue' => -round($bucket['revenue'], 2),
+                'partner_cost' => -round($bucket['partner_cost'], 2),
+                'job_count' => -$bucket['job_count'],
+            ]);
+        }
+    }
+
+    /**
+     * Baut das Rollup eines Mandanten aus der projects-Tabelle neu auf.
+     * Gibt die Anzahl geschriebener Buckets zurück.
+     */
+    public function rebuild(int $tenantId): int
+    {
+        return DB::transaction(function () use ($tenantId) {
+            DB::table(self::TABLE)->where('tenant_id', $tenantId)->delete();
+
+            $month = static::monthSql(DB::connection()->getDriverName(), 'created_at');
+            $now = now()->toDateTimeString();
+
+            $select = DB::table('projects')
+                ->where('tenant_id', $tenantId)
+                ->whereNotNull('created_at')
+                ->selectRaw("tenant_id, DATE(created_at) as day, {$month} as month")
+                ->selectRaw('COALESCE(target_lang_id, 0) as target_lang_id, COALESCE(customer_id, 0) as customer_id')
+                ->selectRaw('SUM(price_total) as revenue, SUM(partner_cost_net) as partner_cost, COUNT(*) as job_count')
+                ->selectRaw('? as created_at, ? as updated_at', [$now, $now])
+                ->groupByRaw("tenant_id, DATE(created_at), {$month}, COALESCE(target_lang_id, 0), COALESCE(customer_id, 0)");
+
+            DB::table(self::TABLE)->insertUsing([
+                'tenant_id', 'day', 'month', 'target_lang_id', 'customer_id',
+                'revenue', 'partner_cost', 'job_count', 'created_at', 'updated_at',
+            ], $select);
+
+            return DB::table(self::TABLE)->where('tenant_id', $tenantId)->count();
+        });
+    }
+
+    /**
+     * Monat (YYYY-MM) aus der Spalte $column je Datenbank-Treiber
+     */
+    public static function monthSql(string $driver, string $column): string
+    {
+        return match ($driver) {
+            'sqlite' => "strftime('%Y-%m', {$column})",
+            'pgsql' => "to_char({$column}, 'YYYY-MM')",
+            default => "DATE_FORMAT({$column}, '%Y-%m')",
+        };
+    }
+
+    /**
+     * Ermittelt Bucket-Schlüssel und Beträge aus rohen Projekt-Attributen
+     */
+    public function bucketFor(array $attributes): ?array
+    {
+        if (empty($attributes['tenant_id']) || empty($attributes['created_at'])) {
+            return null;
+        }
+
+        $createdAt = Carbon::parse($attributes['created_at']);
+
+        return [
+            'keys' => [
+                'tenant_id' => (int) $attributes['tenant_id'],
+                'day' => $createdAt->toDateString(),
+                'target_lang_id' => (int) ($attributes['target_lang_id'] ?? 0),
+                'customer_id' => (int) ($attributes['customer_id'] ?? 0),
+            ],
+            'month' => $createdAt->format('Y-m'),
+            'revenue' => round((float) ($attributes['price_total'] ?? 0), 2),
+            'partner_cost' => round((float) ($attributes['partner_cost_net'] ?? 0), 2),
+        ];
+    }
+
+    private function deltas(array $bucket, int $sign): array
+    {
+        return [
+            'revenue' => $sign * $bucket['revenue'],
+            'partner_cost' => $sign * $bucket['partner_cost'],
+            'job_count' => $sign,
+        ];
+    }
+
+    /**
+     * Addiert Deltas auf einen Bucket. Existiert der Bucket noch nicht, wird er
+     * mit Nullwerten angelegt (insertOrIgnore ist sicher bei parallelen Speicherungen).
+     */
+    private function apply(array $keys, string $month, array $deltas): void
+    {
+        $now = now();
+
+        $updated = DB::table(self::TABLE)->where($keys)->incrementEach($deltas, ['updated_at' => $now]);
+
+        if ($updated === 0) {
+            DB::table(self::TABLE)->insertOrIgnore($keys + [
+                'month' => $month,
+                'revenue' => 0,
+                'partner_cost' => 0,
+                'job_count' => 0,
+                'created_at' => $now,
+                'updated_at' => $now,
+            ]);
+
+            DB::table(self::TABLE)->where($keys)->incrementEach($deltas, ['updated_at' => $now]);
+        }
+    }
+}
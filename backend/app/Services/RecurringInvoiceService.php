@@ -0,0 +1,113 @@
+<?php
+
+namespace App\Services;
+
+use App\Jobs\ProcessRecurringTenants;
+use App\Models\Customer;
+use App\Models\RecurringInvoice;
+use App\Scopes\TenantScope;
+use Illuminate\Support\Facades\Bus;
+use Illuminate\Support\Facades\Cache;
+use Illuminate\Support\Facades\DB;
+use Illuminate\Support\Facades\Log;
+
+/**
+ * Sammel-Lauf für Daueraufträge: fällige Ausführungen je Tenant gruppiert, Tenants parallel als
+ * Queue-Batch, PDFs automatisch ausgestellter Rechnungen als weitere Jobs im selben Batch.
+ */
+class RecurringInvoiceService
+{
+    /**
+     * @return array{tenants: int, due: int, seconds: float, batch_id: ?string}
+     */
+    public function processDue(bool $dryRun = false, ?array $tenantIds = null): array
+    {
+        $started = microtime(true);
+
+        $counts = RecurringInvoice::withoutGlobalScope(TenantScope::class)
+            ->dueForExecution()
+            ->when($tenantIds !== null, fn($query) => $query->whereIn('tenant_id', $tenantIds))
+            ->select('tenant_id', DB::raw('COUNT(*) as due'))
+            ->groupBy('tenant_id')
+            ->toBase()
+            ->pluck('due', 'tenant_id');
+
+        $report = [
+            'tenants' => $counts->count(),
+            'due' => (int) $counts->sum(),
+            'seconds' => 0.0,
+            'batch_id' => null,
+        ];
+
+        if (!$dryRun && $counts->isNotEmpty()) {
+            $chunks = $counts->keys()->chunk(max(1, (int) config('invoices.batch.tenants_per_job', 25)));
+
+            $batch = Bus::batch($chunks->map(fn($ids) => new ProcessRecurringTenants($ids->values()->all()))->all())
+                ->name('recurring-run:' . today()->toDateString())
+                ->onQueue(config('invoices.batch.queue', 'default'))
+                ->allowFailures()
+                ->dispatch();
+
+            $report['batch_id'] = $batch->id;
+        }
+
+        $report['seconds'] = round(microtime(true) - $started, 3);
+
+        Log::info('Recurring invoices ' . ($dryRun ? 'dry run' : 'dispatched'), $report);
+
+        return $report;
+    }
+
+    /**
+     * Fällige Daueraufträge eines Tenants ausführen (höchstens ein Lauf je Tenant gleichzeitig)
+     *
+     * @return array{tenant_id: int, skipped: bool, created: int, failed: int, issued_ids: array}
+     */
+    public function processTenant(int $tenantId): array
+    {
+        $result = ['tenant_id' => $tenantId, 'skipped' => false, 'created' => 0, 'failed' => 0, 'issued_ids' => []];
+
+        $lock = Cache::lock("recurring-run:{$tenantId}", (int) config('invoices.batch.lock_seconds', 900));
+        if (!$lock->get()) {
+            return ['skipped' => true] + $result;
+        }
+
+        try {
+            $due = RecurringInvoice::withoutGlobalScope(TenantScope::class)
+                ->where('tenant_id', $tenantId)
+                ->dueForExecution()
+                ->get();
+
+            // Kunden-Snapshots für alle Ausführungen mit einer Abfrage
+            $customers = Customer::withoutGlobalScopes()
+                ->whereIn('id', $due->pluck('template_customer_id')->filter()->unique())
+                ->get()
+                ->keyBy('id');
+
+            foreach ($due as $recurring) {
+                try {
+                    $invoice = $recurring->createInvoice($customers->get($recurring->template_customer_id));
+                    $result['created']++;
+
+                    if ($recurring->auto_issue) {
+                        $result['issued_ids'][] = $invoice->id;
+                    }
+                } catch (\Exception $e) {
+                    Log::error('ProcessRecurringInvoices failed', [
+                        'recurring_id' => $recurring->id,
+                        'error'        => $e->getMessage(),
+                    ]);
+                    $result['failed']++;
+                }
+            }
+
+            if ($result['created'] > 0) {
+                CacheService::invalidateInvoiceCaches($tenantId);
+            }
+        } finally {
+            $lock->release();
+        }
+
+        return $result;
+    }
+}
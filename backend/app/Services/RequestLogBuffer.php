@@ -0,0 +1,454 @@
+<?php
+
+namespace App\Services;
+
+use App\Models\ApiRequestMetric;
+use App\Support\Histogram;
+use Illuminate\Support\Facades\Cache;
+use Illuminate\Support\Facades\DB;
+use Illuminate\Support\Facades\Log;
+
+/**
+ * Gepuffertes Schreiben von API-Request-Logs, DSGVO-Zugriffsprotokollen und Latenz-Rollups.
+ *
+ * - Während des Requests sammeln die Middlewares Datensätze nur im Prozess (push/metric).
+ * - Nach dem Senden der Antwort (terminating) wird der Puffer mit einem Schreibvorgang an
+ *   eine Spool-Datei je Prozess und Zeitfenster angehängt (storage/framework/request-log).
+ * - Abgeschlossene Zeitfenster bzw. Spool-Dateien ab flush_bytes werden gesammelt in die
+ *   Datenbank übernommen: zuerst die DSGVO-Zugriffsprotokolle, dann die (gesampelten)
+ *   Request-Logs, je Tabelle als Multi-Row-Insert, dazu das Minuten-Rollup in api_request_metrics.
+ * - Lehnt die Datenbank einen Block ab, werden dessen Zeilen einzeln nachversucht; abgelehnte
+ *   Zeilen kommen in eine Wiederholungsdatei und nach MAX_ATTEMPTS Übernahmen in dead-letter/.
+ *   Ist die Datenbank nicht erreichbar, bleibt alles ohne Zählung für den nächsten Versuch liegen.
+ *
+ * Ein Request kostet damit keinen Datenbankzugriff mehr; der Scheduler leert liegen
+ * gebliebene Spool-Dateien jede Minute.
+ */
+class RequestLogBuffer
+{
+    const TABLES = [
+        'api' => 'api_request_logs',
+        'activity' => 'activity_log',
+    ];
+
+    // Verwaiste Arbeits- und Wiederholungsdateien nach dieser Zeit erneut übernehmen
+    const STALE_CLAIM_SECONDS = 600;
+
+    // Von der Datenbank abgelehnte Datensätze nach so vielen Übernahmen nach dead-letter/ verschieben
+    const MAX_ATTEMPTS = 5;
+
+    const DEAD_LETTER_DIRECTORY = 'dead-letter';
+
+    /**
+     * Noch nicht gespoolte Datensätze dieses Prozesses: [typ, daten]
+     */
+    protected static array $pending = [];
+
+    /**
+     * Zeile für TABLES[$type]; Zeitstempel als 'Y-m-d H:i:s'-String, die Spool-Datei ist JSON
+     * und die Zeile wird unverändert eingefügt
+     */
+    public static function push(string $type, array $row): void
+    {
+        static::$pending[] = [$type, $row];
+    }
+
+    /**
+     * Messwert für das Rollup: [minute (Unix), method, route, status, duration_ms, memory_kb, logged]
+     */
+    public static function metric(string $method, string $route, int $status, float $durationMs, int $memoryKb, bool $logged): void
+    {
+        static::$pending[] = ['metric', [
+            intdiv(time(), 60) * 60,
+            $method,
+            mb_substr($route, 0, 191),
+            $status,
+            round($durationMs, 2),
+            $memoryKb,
+            $logged,
+        ]];
+    }
+
+    /**
+     * Stichprobe: Fehler und langsame Requests immer, schnelle erfolgreiche nur anteilig
+     */
+    public static function shouldLog(int $status, float $durationMs): bool
+    {
+        if ($status >= 400 || $durationMs >= config('logging.api_requests.sample_below_ms', 1000)) {
+            return true;
+        }
+
+        $rate = (float) config('logging.api_requests.sample_rate', 1.0);
+
+        return $rate >= 1.0 || ($rate > 0 && mt_rand() / mt_getrandmax() < $rate);
+    }
+
+    /**
+     * Puffer an die Spool-Datei anhängen und fällige Dateien übernehmen (einmal pro Request/Job)
+     */
+    public static function flush(): void
+    {
+        if (static::$pending === []) {
+            return;
+        }
+
+        $lines = '';
+        foreach (static::$pending as $record) {
+            $lines .= json_encode($record, JSON_UNESCAPED_UNICODE | JSON_INVALID_UTF8_SUBSTITUTE) . "\n";
+        }
+        static::$pending = [];
+
+        try {
+            $directory = static::spoolPath();
+            if (!is_dir($directory)) {
+                @mkdir($directory, 0775, true);
+            }
+
+            $file = $directory . '/' . static::window() . '-' . getmypid() . '.ndjson';
+            file_put_contents($file, $lines, FILE_APPEND | LOCK_EX);
+
+            clearstatcache(true, $file);
+            $due = filesize($file) >= config('logging.api_requests.flush_bytes', 1048576)
+                || count(static::dueFiles()) > 0;
+
+            if ($due) {
+                // Nur ein Prozess übernimmt; alle anderen schreiben einfach weiter in ihre Spool-Datei
+                Cache::lock('request-log-buffer:drain', 60)->get(fn() => static::drainFiles());
+            }
+        } catch (\Throwable $e) {
+            // Logging darf den Request nie stören
+            Log::error('Failed to buffer API request log: ' . $e->getMessage());
+        }
+    }
+
+    /**
+     * Alle fälligen Spool-Dateien in die Datenbank übernehmen (Scheduler)
+     */
+    public static function drain(): int
+    {
+        return Cache::lock('request-log-buffer:drain', 60)->block(30, fn() => static::drainFiles());
+    }
+
+    /**
+     * Fällige Dateien: abgeschlossenes Zeitfenster, ab flush_bytes, oder verwaiste Arbeitsdateien
+     */
+    protected static function dueFiles(): array
+    {
+        $current = static::window();
+        $maxBytes = config('logging.api_requests.flush_bytes', 1048576);
+        $due = [];
+
+        foreach (glob(static::spoolPath() . '/*.ndjson') ?: [] as $file) {
+            if ((int) strtok(basename($file), '-') < $current || @filesize($file) >= $maxBytes) {
+                $due[] = $file;
+            }
+        }
+
+        foreach (glob(static::spoolPath() . '/*.draining') ?: [] as $file) {
+            if (@filemtime($file) < time() - self::STALE_CLAIM_SECONDS) {
+                $due[] = $file;
+            }
+        }
+
+        return $due;
+    }
+
+    protected static function drainFiles(): int
+    {
+        $records = [];
+        $claimed = [];
+        $stored = 0;
+
+        foreach (static::dueFiles() as $file) {
+            // Umbenennen ist atomar: schreibende Prozesse legen ab jetzt eine neue Datei an
+            $claim = preg_replace('/\.(ndjson|\d+\.draining)$/', '', $file) . '.' . getmypid() . '.draining';
+            if (!@rename($file, $claim)) {
+                continue;
+            }
+
+            $handle = fopen($claim, 'rb');
+            flock($handle, LOCK_SH); // laufenden Schreibvorgang abwarten
+            while (($line = fgets($handle)) !== false) {
+                // [typ, daten] bzw. [typ, daten, versuche] aus einer Wiederholungsdatei
+                $record = json_decode($line, true);
+                if (is_array($record) && in_array(count($record), [2, 3], true)) {
+                    $records[] = $record;
+                }
+            }
+            fclose($handle);
+            $claimed[] = $claim;
+
+            if (count($records) >= config('logging.api_requests.batch_size', 500) * 10) {
+                $stored += static::store($records, $claimed);
+                $records = $claimed = [];
+            }
+        }
+
+        if ($claimed !== []) {
+            $stored += static::store($records, $claimed);
+        }
+
+        return $stored;
+    }
+
+    /**
+     * Datensätze gesammelt schreiben. Die Spool-Dateien werden danach gelöscht; nicht übernommene
+     * Datensätze stehen dann in einer neuen Wiederholungsdatei bzw. in dead-letter/.
+     */
+    protected static function store(array $records, array $files): int
+    {
+        $parts = ['activity' => [], 'api' => [], 'metric' => []];
+
+        foreach ($records as $record) {
+            if (isset($parts[$record[0]])) {
+                $parts[$record[0]][] = $record;
+            }
+        }
+
+        $retry = [];
+        $unreachable = false;
+
+        // DSGVO-Zugriffsprotokolle zuerst und unabhängig von den best-effort Request-Logs
+        foreach ($parts as $type => $part) {
+            if ($unreachable || $part === []) {
+                array_push($retry, ...$part);
+                continue;
+            }
+
+            try {
+                array_push($retry, ...($type === 'metric' ? static::storeMetrics($part) : static::insertRows($type, $part)));
+            } catch (\Throwable $e) {
+                // Datenbank nicht erreichbar: Rest unverändert für den nächsten Versuch zurücklegen
+                Log::error('Failed to store buffered API request logs: ' . $e->getMessage(), ['files' => count($files)]);
+                $unreachable = true;
+                array_push($retry, ...$part);
+            }
+        }
+
+        try {
+            static::writeRetry($retry);
+        } catch (\Throwable $e) {
+            // Arbeitsdateien bleiben liegen und werden nach STALE_CLAIM_SECONDS vollständig wiederholt
+            Log::error('Failed to write request log retry file: ' . $e->getMessage(), ['files' => count($files)]);
+            return 0;
+        }
+
+        foreach ($files as $file) {
+            @unlink($file);
+        }
+
+        return count($records) - count($retry);
+    }
+
+    /**
+     * Zeilen blockweise einfügen, einen abgelehnten Block zeilenweise nachversuchen.
+     * Gibt die abgelehnten Datensätze mit erhöhtem Versuchszähler zurück.
+     */
+    protected static function insertRows(string $type, array $records): array
+    {
+        $batchSize = max(1, (int) config('logging.api_requests.batch_size', 500));
+        $failed = [];
+
+        foreach (array_chunk($records, $batchSize) as $chunk) {
+            try {
+                DB::table(self::TABLES[$type])->insert(array_column($chunk, 1));
+                continue;
+            } catch (\Throwable $e) {
+                static::ensureReachable($e);
+            }
+
+            foreach ($chunk as $record) {
+                try {
+                    DB::table(self::TABLES[$type])->insert($record[1]);
+                } catch (\Throwable $e) {
+                    static::ensureReachable($e);
+                    Log::warning("Buffered {$type} log row rejected: " . $e->getMessage());
+                    $failed[] = static::failed($record);
+                }
+            }
+        }
+
+        return $failed;
+    }
+
+    /**
+     * Rollup in einer Transaktion; bei Ablehnung alle Messwerte als fehlgeschlagen zurückgeben
+     */
+    protected static function storeMetrics(array $records): array
+    {
+        try {
+            DB::transaction(fn() => static::rollup(array_column($records, 1)));
+        } catch (\Throwable $e) {
+            static::ensureReachable($e);
+            Log::warning('Buffered request metrics rejected: ' . $e->getMessage());
+
+            return array_map(fn($record) => static::failed($record), $records);
+        }
+
+        return [];
+    }
+
+    /**
+     * Nur datenbezogene Fehler werden gezählt: ist die Datenbank selbst weg, den Fehler weiterreichen
+     */
+    protected static function ensureReachable(\Throwable $e): void
+    {
+        try {
+            DB::select('select 1');
+        } catch (\Throwable) {
+            throw $e;
+        }
+    }
+
+    protected static function failed(array $record): array
+    {
+        return [$record[0], $record[1], ($record[2] ?? 0) + 1];
+    }
+
+    /**
+     * Nicht übernommene Datensätze ablegen: als Wiederholungsdatei (wird wie eine verwaiste Arbeitsdatei
+     * nach STALE_CLAIM_SECONDS erneut übernommen) bzw. ab MAX_ATTEMPTS in dead-letter/ zur Prüfung
+     */
+    protected static function writeRetry(array $records): void
+    {
+        $files = [
+            static::spoolPath() . '/' . static::window() . '-retry-' . uniqid() . '.' . getmypid() . '.draining' => [],
+            static::spoolPath() . '/' . self::DEAD_LETTER_DIRECTORY . '/' . date('Ymd') . '-' . getmypid() . '.ndjson' => [],
+        ];
+        [$retryFile, $deadLetterFile] = array_keys($files);
+
+        foreach ($records as $record) {
+            $files[($record[2] ?? 0) >= self::MAX_ATTEMPTS ? $deadLetterFile : $retryFile][] = $record;
+        }
+
+        foreach ($files as $file => $fileRecords) {
+            if ($fileRecords === []) {
+                continue;
+            }
+
+            if (!is_dir(dirname($file))) {
+                mkdir(dirname($file), 0775, true);
+            }
+
+            $lines = '';
+            foreach ($fileRecords as $record) {
+                $lines .= json_encode($record, JSON_UNESCAPED_UNICODE | JSON_INVALID_UTF8_SUBSTITUTE) . "\n";
+            }
+
+            if (file_put_contents($file, $lines, FILE_APPEND | LOCK_EX) === false) {
+                throw new \RuntimeException("Cannot write {$file}");
+            }
+        }
+
+        if ($files[$deadLetterFile] !== []) {
+            Log::error('Request log records moved to dead letter after ' . self::MAX_ATTEMPTS . ' attempts', [
+                'records' => count($files[$deadLetterFile]),
+                'file' => $deadLetterFile,
+            ]);
+        }
+    }
+
+    /**
+     * Minuten-Rollup fortschreiben: Zähler addieren, Histogramme zusammenführen, Perzentile neu berechnen
+     */
+    public static function rollup(array $metrics): void
+    {
+        $groups = [];
+
+        foreach ($metrics as [$minute, $method, $route, $status, $durationMs, $memoryKb, $logged]) {
+            foreach ([[$method, $route], [ApiRequestMetric::ALL, ApiRequestMetric::ALL]] as [$groupMethod, $groupRoute]) {
+                $key = $minute . '|' . $groupMethod . '|' . $groupRoute;
+                $group = &$groups[$key];
+                $group ??= [
+                    'bucket' => date('Y-m-d H:i:00', $minute),
+                    'method' => $groupMethod,
+                    'route' => $groupRoute,
+                    'requests' => 0,
+                    'logged' => 0,
+                    'status_2xx' => 0,
+                    'status_3xx' => 0,
+                    'status_4xx' => 0,
+                    'status_5xx' => 0,
+                    'duration_sum_ms' => 0.0,
+                    'duration_max_ms' => 0.0,
+                    'memory_max_kb' => 0,
+                    'duration' => Histogram::latency(),
+                    'memory' => Histogram::memory(),
+                ];
+
+                $group['requests']++;
+                $group['logged'] += $logged ? 1 : 0;
+                $class = 'status_' . min(5, max(2, intdiv($status, 100))) . 'xx';
+                $group[$class]++;
+                $group['duration_sum_ms'] += $durationMs;
+                $group['duration_max_ms'] = max($group['duration_max_ms'], $durationMs);
+                $group['memory_max_kb'] = max($group['memory_max_kb'], $memoryKb);
+                $group['duration']->add($durationMs);
+                $group['memory']->add($memoryKb);
+                unset($group);
+            }
+        }
+
+        if ($groups === []) {
+            return;
+        }
+
+        // Bestehende Zeilen derselben Minuten zusammenführen (Drain läuft unter Lock, kein paralleles Schreiben)
+        $existing = ApiRequestMetric::whereIn('bucket', array_unique(array_column($groups, 'bucket')))
+            ->get()
+            ->keyBy(fn($metric) => $metric->bucket->getTimestamp() . '|' . $metric->method . '|' . $metric->route);
+
+        $now = now();
+        $upserts = [];
+
+        foreach ($groups as $key => $group) {
+            if ($current = $existing->get($key)) {
+                foreach (['requests', 'logged', 'status_2xx', 'status_3xx', 'status_4xx', 'status_5xx', 'duration_sum_ms'] as $column) {
+                    $group[$column] += $current->{$column};
+                }
+                $group['duration_max_ms'] = max($group['duration_max_ms'], $current->duration_max_ms);
+                $group['memory_max_kb'] = max($group['memory_max_kb'], (int) $current->memory_max_kb);
+                $group['duration']->merge($current->duration_histogram ?? []);
+                $group['memory']->merge($current->memory_histogram ?? []);
+            }
+
+            $duration = $group['duration'];
+            $memory = $group['memory'];
+            unset($group['duration'], $group['memory']);
+
+            $upserts[] = $group + [
+                'p50_ms' => $duration->percentile(50),
+                'p95_ms' => $duration->percentile(95),
+                'p99_ms' => $duration->percentile(99),
+                'memory_p50_kb' => static::roundedOrNull($memory->percentile(50)),
+                'memory_p95_kb' => static::roundedOrNull($memory->percentile(95)),
+                'memory_p99_kb' => static::roundedOrNull($memory->percentile(99)),
+                'duration_histogram' => json_encode((object) $duration->counts()),
+                'memory_histogram' => json_encode((object) $memory->counts()),
+                'created_at' => $now,
+                'updated_at' => $now,
+            ];
+        }
+
+        foreach (array_chunk($upserts, 500) as $chunk) {
+            ApiRequestMetric::upsert($chunk, ['bucket', 'method', 'route'], array_diff(array_keys($chunk[0]), ['bucket', 'method', 'route', 'created_at']));
+        }
+    }
+
+    protected static function window(): int
+    {
+        $interval = max(1, (int) config('logging.api_requests.interval', 10));
+
+        return intdiv(time(), $interval) * $interval;
+    }
+
+    protected static function spoolPath(): string
+    {
+        return rtrim(config('logging.api_requests.spool_path', storage_path('framework/request-log')), '/');
+    }
+
+    protected static function roundedOrNull(?float $value): ?int
+    {
+        return $value === null ? null : (int) round($value);
+    }
+}
@@ -2,73 +2,394 @@
 
 namespace App\Services;
 
+use App\Models\FileAnalysis;
+use App\Support\RepeatDetector;
+use App\Support\RtfTextStream;
+use App\Support\TextStatistics;
 use Illuminate\Http\UploadedFile;
+use Illuminate\Support\Facades\Log;
+use Illuminate\Support\Facades\Process;
 
+/**
+ * Wort-/Zeichenzählung für Projektdateien (Grundlage der Preisberechnung).
+ *
+ * Formate: txt, docx, xlsx, pptx, odt, rtf, idml und PDF-Text. Office-/IDML-Pakete werden
+ * per XMLReader direkt aus dem ZIP gestreamt, RTF und Text blockweise gelesen, PDF über
+ * pdftotext. Der Text läuft durch TextStatistics (Segmentierung nach Unicode-Schrift).
+ * Ergebnisse werden per SHA-256 des Dateiinhalts in file_analyses abgelegt, die
+ * Segment-Fingerabdrücke als Binärdatei daneben (FileAnalysis::fingerprintPath).
+ */
 class WordCountService
 {
+    // Erhöhen, wenn sich die Zählregeln ändern (alte Ergebnisse werden dann neu berechnet)
+    const ENGINE_VERSION = 2;
+
+    const CHUNK_BYTES = 65536;
+
+    const FORMATS = ['txt', 'docx', 'xlsx', 'pptx', 'odt', 'rtf', 'idml', 'pdf'];
+
+    /**
+     * ZIP-basierte Formate: Teil-Dateien (Regex), Textelemente, Absatzelemente, Umbrüche, übersprungene Elemente
+     * (lokale Elementnamen, unabhängig vom Namespace-Präfix)
+     */
+    const XML_FORMATS = [
+        'docx' => [
+            'parts' => '#^word/(document|footnotes|endnotes|header\d*|footer\d*)\.xml$#',
+            'text' => ['t'],
+            'paragraph' => ['p'],
+            'breaks' => ['tab' => ' ', 'br' => "\n", 'cr' => "\n"],
+            'skip' => ['delText', 'instrText'],
+        ],
+        'xlsx' => [
+            // Geteilte Zeichenketten einmal je Inhalt, dazu Inline-Strings der Blätter
+            'parts' => '#^xl/(sharedStrings|worksheets/sheet\d+)\.xml$#',
+            'text' => ['t'],
+            'paragraph' => ['si', 'is'],
+            'breaks' => [],
+            'skip' => ['rPh'],
+        ],
+        'pptx' => [
+            'parts' => '#^ppt/(slides/slide|notesSlides/notesSlide)\d+\.xml$#',
+            'text' => ['t'],
+            'paragraph' => ['p'],
+            'breaks' => ['br' => "\n"],
+            'skip' => [],
+        ],
+        'odt' => [
+            'parts' => '#^content\.xml$#',
+            'text' => ['p', 'h'],
+            'paragraph' => ['p', 'h'],
+            'breaks' => ['s' => ' ', 'tab' => ' ', 'line-break' => "\n"],
+            'skip' => ['note-citation', 'tracked-changes'],
+        ],
+        'idml' => [
+            'parts' => '#^Stories/Story_[^/]+\.xml$#',
+            'text' => ['Content'],
+            'paragraph' => ['ParagraphStyleRange'],
+            'breaks' => ['Br' => "\n"],
+            'skip' => [],
+        ],
+    ];
+
     /**
      * Count words in the uploaded file.
-     * 
+     *
      * @param UploadedFile $file
      * @return int
      */
     public function countWords(UploadedFile $file): int
     {
-        $extension = $file->getClientOriginalExtension();
-        $content = '';
+        $analysis = $this->analyze($file->getRealPath(), $file->getClientOriginalExtension());
+
+        return $analysis?->word_count ?? 0;
+    }
+
+    public function supports(?string $extension): bool
+    {
+        return in_array(strtolower((string) $extension), self::FORMATS, true);
+    }
+
+    /**
+     * Analyse einer Datei; bereits gezählte Inhalte (gleicher SHA-256) werden nur nachgeschlagen
+     */
+    public function analyze(string $path, ?string $extension, ?string $sha256 = null): ?FileAnalysis
+    {
+        $format = strtolower((string) $extension);
+        if (!$this->supports($format) || !is_file($path)) {
+            return null;
+        }
+
+        $sha256 ??= hash_file('sha256', $path);
+
+        $cached = $this->cached($sha256);
+        if ($cached) {
+            return $cached;
+        }
+
+        $statistics = new TextStatistics();
 
         try {
-            if ($extension === 'txt') {
-                $content = file_get_contents($file->getRealPath());
-            } elseif ($extension === 'docx') {
-                $content = $this->readDocx($file->getRealPath());
+            $this->streamText($path, $format, fn(string $text) => $statistics->feed($text));
+        } catch (\Exception $e) {
+            Log::warning("Word count failed for {$format} file: " . $e->getMessage(), ['sha256' => $sha256]);
+            return null;
+        }
+
+        $result = $statistics->finish();
+
+        try {
+            FileAnalysis::storeFingerprints($sha256, self::ENGINE_VERSION, $result['fingerprints']);
+        } finally {
+            if (is_resource($result['fingerprints'])) {
+                fclose($result['fingerprints']);
+            }
+        }
+
+        // Zwei Jobs mit demselben Inhalt: der zweite übernimmt die Zeile des ersten
+        return FileAnalysis::createOrFirst(
+            ['sha256' => $sha256, 'engine_version' => self::ENGINE_VERSION],
+            [
+                'format' => $format,
+                'word_count' => $result['words'],
+                'char_count' => $result['chars'],
+                'char_count_no_spaces' => $result['chars_no_spaces'],
+                'segment_count' => $result['segments'],
+                'repeated_words' => $result['repeated_words'],
+                'scripts' => $result['scripts'],
+            ]
+        );
+    }
+
+    public function cached(string $sha256): ?FileAnalysis
+    {
+        return FileAnalysis::where('sha256', $sha256)
+            ->where('engine_version', self::ENGINE_VERSION)
+            ->first();
+    }
+
+    /**
+     * Wiederholungen und Fuzzy-Matches über mehrere Dateien (in der übergebenen Reihenfolge).
+     *
+     * Exakte Wiederholung: gleiches normalisiertes Segment kam vorher schon vor.
+     * Fuzzy: Ähnlichkeit aus der Hamming-Distanz der SimHashes (Schätzung); Kandidaten
+     * über 8 Bänder à 8 Bit, je Band höchstens die letzten 20 Segmente. Fingerabdrücke
+     * werden zweimal gestreamt: "schon gesehen" entscheidet ein RepeatDetector exakt
+     * (der Preis hängt daran), der Speicher wächst nur mit den wiederholten Segmenten.
+     *
+     * @param iterable<FileAnalysis> $analyses
+     */
+    public function repetitionStats(iterable $analyses): array
+    {
+        $bands = ['repetition' => 0, '95-99' => 0, '85-94' => 0, '75-84' => 0, 'new' => 0];
+        $segments = ['repetition' => 0, '95-99' => 0, '85-94' => 0, '75-84' => 0, 'new' => 0];
+        $repeats = new RepeatDetector();
+        $buckets = [];
+        $total = 0;
+
+        $analyses = is_array($analyses) ? $analyses : iterator_to_array($analyses, false);
+        foreach ($analyses as $analysis) {
+            foreach ($analysis->fingerprints() as [$hash]) {
+                $repeats->note($hash);
             }
-            // Add more formats here (PDF requires external libs usually)
+        }
+
+        foreach ($analyses as $analysis) {
+            foreach ($analysis->fingerprints() as [$hash, $words, $simhash]) {
+                $total += $words;
+
+                if ($repeats->repeated($hash)) {
+                    $band = 'repetition';
+                } else {
+                    $band = 'new';
 
-            // Simple word count by splitting whitespace
-            $wordCount = str_word_count(strip_tags($content));
+                    if ($simhash !== null) {
+                        $band = $this->fuzzyBand($simhash, $buckets);
 
-            // Fallback if 0 (e.g. for non-latin scripts or failed parsing) - very basic approximation
-            if ($wordCount === 0 && strlen($content) > 0) {
-                $wordCount = (int) (strlen($content) / 6); // Avg word length
+                        for ($i = 0; $i < 8; $i++) {
+                            $key = $i . ':' . (($simhash >> ($i * 8)) & 0xFF);
+                            $buckets[$key][] = $simhash;
+                            if (count($buckets[$key]) > 20) {
+                                array_shift($buckets[$key]);
+                            }
+                        }
+                    }
+                }
+
+                $bands[$band] += $words;
+                $segments[$band]++;
             }
+        }
 
-            return $wordCount;
+        return [
+            'total_words' => $total,
+            'words' => $bands,
+            'segments' => $segments,
+        ];
+    }
 
-        } catch (\Exception $e) {
-            // Log error
-            return 0;
+    /**
+     * Liest den Text einer Datei formatgerecht und übergibt ihn stückweise an $sink
+     */
+    public function streamText(string $path, string $format, callable $sink): void
+    {
+        match (true) {
+            $format === 'txt' => $this->streamPlainText($path, $sink),
+            $format === 'rtf' => (new RtfTextStream())->read($path, $sink),
+            $format === 'pdf' => $this->streamPdfText($path, $sink),
+            isset(self::XML_FORMATS[$format]) => $this->streamPackage($path, self::XML_FORMATS[$format], $sink),
+        };
+    }
+
+    protected function fuzzyBand(int $simhash, array $buckets): string
+    {
+        $best = 64;
+
+        for ($i = 0; $i < 8; $i++) {
+            foreach ($buckets[$i . ':' . (($simhash >> ($i * 8)) & 0xFF)] ?? [] as $candidate) {
+                $best = min($best, TextStatistics::hammingDistance($simhash, $candidate));
+            }
         }
+
+        return match (true) {
+            $best <= 3 => '95-99',
+            $best <= 8 => '85-94',
+            $best <= 13 => '75-84',
+            default => 'new',
+        };
     }
 
-    private function readDocx($filename)
+    /**
+     * Text-Datei blockweise; UTF-16 per BOM, sonst UTF-8 bzw. Windows-1252
+     */
+    protected function streamPlainText(string $path, callable $sink): void
     {
-        $striped_content = '';
-        $content = '';
+        $handle = fopen($path, 'rb');
+        if (!$handle) {
+            return;
+        }
 
-        $zip = zip_open($filename);
+        try {
+            $head = fread($handle, 4);
+            $encoding = match (true) {
+                str_starts_with($head, "\xFF\xFE") => 'UTF-16LE',
+                str_starts_with($head, "\xFE\xFF") => 'UTF-16BE',
+                default => null,
+            };
+            $carry = match (true) {
+                $encoding !== null => substr($head, 2),
+                str_starts_with($head, "\xEF\xBB\xBF") => substr($head, 3),
+                default => $head,
+            };
 
-        if (!$zip || is_numeric($zip))
-            return false;
+            while (!feof($handle) || $carry !== '') {
+                $data = $carry . (feof($handle) ? '' : fread($handle, self::CHUNK_BYTES));
+                $carry = '';
 
-        while ($zip_entry = zip_read($zip)) {
+                if ($encoding !== null) {
+                    // Ungerade Byteanzahl (angeschnittenes Zeichen) in den nächsten Block
+                    if (strlen($data) % 2 === 1 && !feof($handle)) {
+                        $carry = substr($data, -1);
+                        $data = substr($data, 0, -1);
+                    }
+                    $sink(mb_convert_encoding($data, 'UTF-8', $encoding));
+                    continue;
+                }
 
-            if (zip_entry_open($zip, $zip_entry) == FALSE)
-                continue;
+                // Angeschnittene UTF-8-Sequenz am Blockende zurückhalten
+                if (!feof($handle) && preg_match('/[\xC0-\xFF][\x80-\xBF]*$/', $data, $match) && !mb_check_encoding($match[0], 'UTF-8')) {
+                    $carry = $match[0];
+                    $data = substr($data, 0, -strlen($carry));
+                }
 
-            if (zip_entry_name($zip_entry) != "word/document.xml")
-                continue;
+                $sink(mb_check_encoding($data, 'UTF-8') ? $data : mb_convert_encoding($data, 'UTF-8', 'Windows-1252'));
+            }
+        } finally {
+            fclose($handle);
+        }
+    }
 
-            $content .= zip_entry_read($zip_entry, zip_entry_filesize($zip_entry));
+    /**
+     * ZIP-Paket (docx/xlsx/pptx/odt/idml): XML-Teile einzeln per XMLReader streamen
+     */
+    protected function streamPackage(string $path, array $spec, callable $sink): void
+    {
+        $zip = new \ZipArchive();
+        if ($zip->open($path, \ZipArchive::RDONLY) !== true) {
+            throw new \RuntimeException('Datei ist kein gültiges ZIP-Paket.');
+        }
 
-            zip_entry_close($zip_entry);
+        $parts = [];
+        for ($i = 0; $i < $zip->numFiles; $i++) {
+            $name = $zip->getNameIndex($i);
+            if (preg_match($spec['parts'], $name)) {
+                $parts[] = $name;
+            }
         }
-        zip_close($zip);
+        $zip->close();
+
+        // Natürliche Reihenfolge: slide2 vor slide10
+        natsort($parts);
 
-        $content = str_replace('</w:r></w:p></w:tc><w:tc>', " ", $content);
-        $content = str_replace('</w:r></w:p>', "\r\n", $content);
-        $striped_content = strip_tags($content);
+        foreach ($parts as $part) {
+            $this->streamXml('zip://' . $path . '#' . $part, $spec, $sink);
+        }
+    }
 
-        return $striped_content;
+    protected function streamXml(string $uri, array $spec, callable $sink): void
+    {
+        $reader = new \XMLReader();
+        if (!$reader->open($uri, null, LIBXML_NONET | LIBXML_COMPACT | LIBXML_PARSEHUGE)) {
+            return;
+        }
+
+        $textDepth = 0;
+        $buffer = '';
+
+        try {
+            $moved = $reader->read();
+            while ($moved) {
+                $name = $reader->localName;
+
+                if ($reader->nodeType === \XMLReader::ELEMENT && in_array($name, $spec['skip'], true)) {
+                    // Teilbaum überspringen; next() steht danach schon auf dem Folgeknoten
+                    $moved = $reader->next();
+                    continue;
+                }
+
+                if ($reader->nodeType === \XMLReader::ELEMENT) {
+                    if (isset($spec['breaks'][$name])) {
+                        $buffer .= $spec['breaks'][$name];
+                    }
+                    if (in_array($name, $spec['text'], true) && !$reader->isEmptyElement) {
+                        $textDepth++;
+                    }
+                } elseif ($reader->nodeType === \XMLReader::END_ELEMENT) {
+                    if (in_array($name, $spec['text'], true)) {
+                        $textDepth = max(0, $textDepth - 1);
+                    }
+                    if (in_array($name, $spec['paragraph'], true)) {
+                        $buffer .= "\n";
+                    }
+                } elseif ($textDepth > 0 && in_array($reader->nodeType, [\XMLReader::TEXT, \XMLReader::CDATA, \XMLReader::SIGNIFICANT_WHITESPACE], true)) {
+                    $buffer .= $reader->value;
+                }
+
+                if (strlen($buffer) >= self::CHUNK_BYTES) {
+                    $sink($buffer);
+                    $buffer = '';
+                }
+
+                $moved = $reader->read();
+            }
+        } finally {
+            $reader->close();
+        }
+
+        if ($buffer !== '') {
+            $sink($buffer);
+        }
+    }
+
+    /**
+     * PDF-Textschicht über pdftotext (poppler-utils), Ausgabe wird blockweise verarbeitet.
+     * Gescannte PDFs ohne Textschicht ergeben 0 Wörter.
+     */
+    protected function streamPdfText(string $path, callable $sink): void
+    {
+        $binary = config('services.pdftotext.path', 'pdftotext');
+
+        $result = Process::timeout(300)->run(
+            [$binary, '-enc', 'UTF-8', '-q', $path, '-'],
+            function (string $type, string $output) use ($sink) {
+                if ($type === 'out') {
+                    // Seitenumbruch (Form Feed) als Absatzgrenze
+                    $sink(str_replace("\f", "\n", $output));
+                }
+            }
+        );
+
+        if ($result->failed()) {
+            throw new \RuntimeException('pdftotext fehlgeschlagen: ' . trim($result->errorOutput()));
+        }
     }
 }
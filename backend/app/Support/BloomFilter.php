@@ -0,0 +1,48 @@
+<?php
+
+namespace App\Support;
+
+/**
+ * Bloom-Filter mit fester Größe: "schon gesehen?" bei konstantem Speicherbedarf.
+ *
+ * Keine falschen Negative; falsche Positive steigen mit der Füllung
+ * (1 MiB, 4 Sonden: ~0,01 % bei 250.000 Einträgen, ~2 % bei 1 Mio.).
+ */
+class BloomFilter
+{
+    const DEFAULT_BYTES = 1048576;
+
+    const PROBES = 4;
+
+    protected string $bits;
+
+    protected int $size;
+
+    public function __construct(int $bytes = self::DEFAULT_BYTES)
+    {
+        $this->bits = str_repeat("\0", max(1, $bytes));
+        $this->size = strlen($this->bits) * 8;
+    }
+
+    /**
+     * Schlüssel eintragen; true, wenn er (wahrscheinlich) schon enthalten war
+     */
+    public function add(string $key): bool
+    {
+        $present = true;
+
+        foreach (unpack('N' . self::PROBES, hash('xxh128', $key, true)) as $probe) {
+            $bit = $probe % $this->size;
+            $byte = $bit >> 3;
+            $mask = 1 << ($bit & 7);
+
+            $current = ord($this->bits[$byte]);
+            if (!($current & $mask)) {
+                $present = false;
+                $this->bits[$byte] = chr($current | $mask);
+            }
+        }
+
+        return $present;
+    }
+}
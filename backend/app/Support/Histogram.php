@@ -0,0 +1,114 @@
+<?php
+
+namespace App\Support;
+
+/**
+ * Histogramm mit festen Bucket-Grenzen (Prometheus-Stil).
+ *
+ * Zähler lassen sich beliebig zusammenführen (Minute + Minute, Route + Route),
+ * Perzentile werden innerhalb des Buckets linear interpoliert. Gespeichert wird
+ * nur die dünn besetzte Liste "Bucket-Index => Anzahl".
+ */
+class Histogram
+{
+    // Obergrenzen in ms; letzter Bucket ist offen
+    const LATENCY_BOUNDS_MS = [5, 10, 25, 50, 75, 100, 150, 200, 300, 400, 500, 750, 1000, 1500, 2000, 3000, 5000, 7500, 10000, 20000, 30000, 60000];
+
+    // Obergrenzen in KB
+    const MEMORY_BOUNDS_KB = [64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072, 262144];
+
+    protected array $counts = [];
+
+    public function __construct(protected array $bounds, array $counts = [])
+    {
+        $this->merge($counts);
+    }
+
+    public static function latency(array $counts = []): static
+    {
+        return new static(self::LATENCY_BOUNDS_MS, $counts);
+    }
+
+    public static function memory(array $counts = []): static
+    {
+        return new static(self::MEMORY_BOUNDS_KB, $counts);
+    }
+
+    public function add(float $value, int $count = 1): void
+    {
+        $index = count($this->bounds);
+        foreach ($this->bounds as $i => $bound) {
+            if ($value <= $bound) {
+                $index = $i;
+                break;
+            }
+        }
+
+        $this->counts[$index] = ($this->counts[$index] ?? 0) + $count;
+    }
+
+    public function merge(array $counts): void
+    {
+        foreach ($counts as $index => $count) {
+            $this->counts[(int) $index] = ($this->counts[(int) $index] ?? 0) + (int) $count;
+        }
+    }
+
+    public function counts(): array
+    {
+        ksort($this->counts);
+
+        return $this->counts;
+    }
+
+    public function total(): int
+    {
+        return array_sum($this->counts);
+    }
+
+    /**
+     * Perzentil (0–100); im offenen letzten Bucket wird dessen Untergrenze geliefert
+     */
+    public function percentile(float $percent): ?float
+    {
+        $total = $this->total();
+        if ($total === 0) {
+            return null;
+        }
+
+        $rank = max(1, (int) ceil($percent / 100 * $total));
+        $seen = 0;
+
+        foreach ($this->counts() as $index => $count) {
+            if ($seen + $count >= $rank) {
+                $lower = $this->bounds[$index - 1] ?? 0;
+                $upper = $this->bounds[$index] ?? null;
+
+                if ($upper === null) {
+                    return (float) $lower;
+                }
+
+                return round($lower + ($upper - $lower) * ($rank - $seen) / $count, 2);
+            }
+            $seen += $count;
+        }
+
+        return null;
+    }
+
+    /**
+     * Anzahl der Werte oberhalb von $threshold (muss eine Bucket-Grenze sein, sonst ab der nächsthöheren)
+     */
+    public function countAbove(float $threshold): int
+    {
+        $above = 0;
+
+        foreach ($this->counts as $index => $count) {
+            if (($this->bounds[$index - 1] ?? 0) >= $threshold) {
+                $above += $count;
+            }
+        }
+
+        return $above;
+    }
+}
@@ -4,6 +4,7 @@
 
 use App\Models\Invoice as AppInvoice;
 use App\Models\Tenant;
+use App\Services\PdfRenderService;
 
 class InvoiceTemplateDataFactory
 {
@@ -19,11 +20,8 @@ public static function build(AppInvoice $invoice, ?Tenant $tenant, array $settin
         $tenantSettings = $tenant ? ($tenant->getAttribute('settings') ?? []) : [];
         $logoPath = $settings['company_logo'] ?? (($tenantSettings['company_logo'] ?? null));
         $logoFullPath = $logoPath ? storage_path('app/public/' . $logoPath) : null;
-        $logoBase64 = null;
-
-        if ($logoFullPath && file_exists($logoFullPath)) {
-            $logoBase64 = 'data:image/' . pathinfo($logoFullPath, PATHINFO_EXTENSION) . ';base64,' . base64_encode(file_get_contents($logoFullPath));
-        }
+        // Pro Worker-Prozess nur einmal gelesen und kodiert
+        $logoBase64 = PdfRenderService::assetDataUri($logoFullPath);
 
         $isCreditNote = $invoice->type === AppInvoice::TYPE_CREDIT_NOTE;
         $docTypeLabel = $isCreditNote ? 'Gutschrift' : 'Rechnung';
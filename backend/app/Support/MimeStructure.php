@@ -0,0 +1,157 @@
+<?php
+
+namespace App\Support;
+
+/**
+ * Auswertung einer IMAP-BODYSTRUCTURE (RFC 3501, 7.4.2) ohne den Nachrichteninhalt.
+ *
+ * Eingabe ist die geparste Klammerstruktur aus der FETCH-Antwort (verschachtelte Arrays,
+ * NIL als 'NIL'). parts() liefert die Blatt-Teile mit Abschnittsnummer ("1", "1.2", …),
+ * über die sich Text und Anhänge später einzeln per BODY.PEEK[abschnitt] abrufen lassen.
+ * Weitergeleitete Nachrichten (message/rfc822) gelten als ein Anhang.
+ */
+class MimeStructure
+{
+    /**
+     * @return array<int, array{section: string, mime: string, charset: ?string, encoding: string, size: int, name: ?string, attachment: bool}>
+     */
+    public static function parts(array $structure, string $section = ''): array
+    {
+        // Multipart: zuerst die Unterteile (Arrays), danach der Subtyp
+        if (is_array($structure[0] ?? null)) {
+            $parts = [];
+            foreach ($structure as $index => $child) {
+                if (!is_array($child)) {
+                    break;
+                }
+                array_push($parts, ...static::parts($child, ltrim($section . '.' . ($index + 1), '.')));
+            }
+
+            return $parts;
+        }
+
+        $type = strtolower((string) ($structure[0] ?? 'text'));
+        $subtype = strtolower((string) ($structure[1] ?? 'plain'));
+        $params = static::pairs($structure[2] ?? null);
+
+        // Erweiterungsfelder beginnen je Typ an anderer Stelle (Text: +Zeilen, message/rfc822: +Envelope/Body/Zeilen)
+        $extension = match (true) {
+            $type === 'text' => 8,
+            $type === 'message' && $subtype === 'rfc822' => 10,
+            default => 7,
+        };
+        $disposition = $structure[$extension + 1] ?? null;
+        $dispositionType = is_array($disposition) ? strtolower((string) $disposition[0]) : null;
+        $dispositionParams = is_array($disposition) ? static::pairs($disposition[1] ?? null) : [];
+
+        $name = static::filename($dispositionParams) ?? static::filename($params);
+
+        return [[
+            'section' => $section === '' ? '1' : $section,
+            'mime' => "{$type}/{$subtype}",
+            'charset' => $params['charset'] ?? null,
+            'encoding' => strtolower(static::value($structure[5] ?? null) ?? '7bit'),
+            'size' => (int) static::value($structure[6] ?? null),
+            'name' => $name,
+            'attachment' => $dispositionType === 'attachment' || $name !== null || !in_array("{$type}/{$subtype}", ['text/plain', 'text/html'], true),
+        ]];
+    }
+
+    /**
+     * Anzeigetext der Nachricht: HTML bevorzugt, sonst Klartext
+     */
+    public static function bodyPart(array $parts): ?array
+    {
+        $text = array_values(array_filter($parts, fn($part) => !$part['attachment']));
+
+        foreach (['text/html', 'text/plain'] as $mime) {
+            foreach ($text as $part) {
+                if ($part['mime'] === $mime) {
+                    return $part;
+                }
+            }
+        }
+
+        return null;
+    }
+
+    public static function attachments(array $parts): array
+    {
+        return array_values(array_filter($parts, fn($part) => $part['attachment']));
+    }
+
+    /**
+     * Transfer-Encoding eines Abschnitts auflösen (Anhänge: Binärinhalt)
+     */
+    public static function decode(string $content, string $encoding): string
+    {
+        return match (strtolower($encoding)) {
+            'base64' => base64_decode($content),
+            'quoted-printable' => quoted_printable_decode($content),
+            default => $content,
+        };
+    }
+
+    /**
+     * Textabschnitt dekodieren und nach UTF-8 wandeln
+     */
+    public static function text(string $content, string $encoding, ?string $charset = null): string
+    {
+        $content = static::decode($content, $encoding);
+
+        if ($charset !== null && !in_array(strtolower($charset), ['utf-8', 'us-ascii'], true)) {
+            try {
+                return mb_convert_encoding($content, 'UTF-8', $charset);
+            } catch (\ValueError) {
+                // Unbekannter Zeichensatz: wie unten ungültige Bytes ersetzen
+            }
+        }
+
+        return mb_check_encoding($content, 'UTF-8') ? $content : mb_convert_encoding($content, 'UTF-8', 'UTF-8');
+    }
+
+    /**
+     * Dateiname aus "filename"/"name", auch RFC 2231 (filename*=utf-8''…) und RFC 2047 (=?utf-8?B?…?=)
+     */
+    protected static function filename(array $params): ?string
+    {
+        foreach (['filename', 'name'] as $key) {
+            if (isset($params["{$key}*"]) && preg_match("/^([^']*)'[^']*'(.*)$/s", $params["{$key}*"], $match)) {
+                $name = rawurldecode($match[2]);
+                return $match[1] !== '' ? static::text($name, '7bit', $match[1]) : $name;
+            }
+
+            if (isset($params[$key]) && $params[$key] !== '') {
+                return mb_decode_mimeheader($params[$key]);
+            }
+        }
+
+        return null;
+    }
+
+    /**
+     * Parameterliste ("name" "wert" …) als Array mit kleingeschriebenen Schlüsseln
+     */
+    protected static function pairs(mixed $list): array
+    {
+        if (!is_array($list)) {
+            return [];
+        }
+
+        $pairs = [];
+        for ($i = 0; $i + 1 < count($list); $i += 2) {
+            $pairs[strtolower((string) $list[$i])] = static::value($list[$i + 1]);
+        }
+
+        return $pairs;
+    }
+
+    protected static function value(mixed $value): ?string
+    {
+        if (is_int($value)) {
+            return (string) $value;
+        }
+
+        return is_string($value) && strtoupper($value) !== 'NIL' ? $value : null;
+    }
+}
@@ -0,0 +1,24 @@
+<?php
+
+namespace App\Support;
+
+use Illuminate\Support\Facades\View;
+use LaravelDaily\Invoices\Invoice;
+
+/**
+ * LaravelDaily-Invoice, das nur das HTML erzeugt.
+ * Das PDF rendert PdfRenderService (Inhalts-Hash-Cache, Renderzeit-Messung).
+ */
+class RenderableInvoice extends Invoice
+{
+    public function renderHtml(): string
+    {
+        // Validierung und Summenberechnung wie in render()
+        $this->beforeRender();
+
+        $html = View::make(sprintf('invoices::templates.%s', $this->template), ['invoice' => $this])->render();
+
+        // Entspricht der HTML-ENTITIES-Kodierung des Pakets
+        return mb_encode_numericentity($html, [0x80, 0x10FFFF, 0, 0x1FFFFF], 'UTF-8');
+    }
+}
@@ -0,0 +1,63 @@
+<?php
+
+namespace App\Support;
+
+/**
+ * Exakte Wiederholungserkennung in zwei Durchläufen über dieselbe Schlüsselfolge.
+ *
+ * 1. Durchlauf (note): Bloom-Filter fester Größe; nur Schlüssel mit Treffer – Wiederholung
+ *    oder falsch positiv – werden als Kandidaten exakt gemerkt.
+ * 2. Durchlauf (repeated): Wiederholung ist nur ein Kandidat, der vorher schon vorkam.
+ *    Schlüssel ohne Filtertreffer kommen garantiert nur einmal vor.
+ *
+ * Das Ergebnis ist exakt; der Speicher wächst nur mit den wiederholten Schlüsseln.
+ */
+class RepeatDetector
+{
+    protected BloomFilter $filter;
+
+    protected array $candidates = [];
+
+    protected array $seen = [];
+
+    public function __construct(int $bloomBytes = BloomFilter::DEFAULT_BYTES)
+    {
+        $this->filter = new BloomFilter($bloomBytes);
+    }
+
+    /**
+     * Erster Durchlauf: Schlüssel vormerken
+     */
+    public function note(string $key): void
+    {
+        if ($this->filter->add($key)) {
+            $this->candidates[$key] = true;
+        }
+    }
+
+    /**
+     * Ohne Kandidaten gibt es keine Wiederholungen, der zweite Durchlauf kann entfallen
+     */
+    public function hasCandidates(): bool
+    {
+        return $this->candidates !== [];
+    }
+
+    /**
+     * Zweiter Durchlauf (gleiche Reihenfolge): true, wenn der Schlüssel vorher schon vorkam
+     */
+    public function repeated(string $key): bool
+    {
+        if (!isset($this->candidates[$key])) {
+            return false;
+        }
+
+        if (isset($this->seen[$key])) {
+            return true;
+        }
+
+        $this->seen[$key] = true;
+
+        return false;
+    }
+}
@@ -0,0 +1,169 @@
+<?php
+
+namespace App\Support;
+
+/**
+ * Extrahiert den Fließtext einer RTF-Datei blockweise (konstanter Speicherbedarf).
+ *
+ * Steuerwörter werden ausgewertet (\par, \line, \tab, \uN mit \ucN, \'hh in der
+ * Codepage aus \ansicpg); Ziel-Gruppen ohne Fließtext (Schrift-/Farbtabellen,
+ * Bilder, Felder-Anweisungen, \* …) werden übersprungen.
+ */
+class RtfTextStream
+{
+    const CHUNK_BYTES = 65536;
+
+    const TOKEN_PATTERN = '/\\\\([a-zA-Z]+)(-?\d+)? ?|\\\\\'([0-9a-fA-F]{2})|\\\\(.)|([{}])|([\r\n]+)|([^\\\\{}\r\n]+)/s';
+
+    const SKIP_DESTINATIONS = [
+        'fonttbl', 'colortbl', 'stylesheet', 'info', 'pict', 'object', 'objdata', 'fldinst',
+        'listtable', 'listoverridetable', 'revtbl', 'rsidtbl', 'generator', 'xmlnstbl',
+        'themedata', 'colorschememapping', 'latentstyles', 'datastore', 'filetbl',
+        'bkmkstart', 'bkmkend', 'footnote', 'annotation', 'atnid', 'atnauthor', 'nonshppict',
+    ];
+
+    const SYMBOLS = [
+        'par' => "\n", 'line' => "\n", 'sect' => "\n", 'page' => "\n", 'row' => "\n",
+        'tab' => ' ', 'cell' => ' ', 'emspace' => ' ', 'enspace' => ' ',
+        'emdash' => '—', 'endash' => '–', 'bullet' => '•',
+        'lquote' => '‘', 'rquote' => '’', 'ldblquote' => '“', 'rdblquote' => '”',
+    ];
+
+    protected string $codepage = 'CP1252';
+
+    /**
+     * Liest die Datei und übergibt den extrahierten Text stückweise an $sink
+     */
+    public function read(string $path, callable $sink): void
+    {
+        $handle = fopen($path, 'rb');
+        if (!$handle) {
+            return;
+        }
+
+        // Gruppen-Stack: [überspringen, \uc-Wert]
+        $stack = [];
+        $skip = false;
+        $uc = 1;
+        $pendingSkip = 0;
+        $groupStart = false;
+        $carry = '';
+
+        try {
+            while (!feof($handle)) {
+                $data = $carry . fread($handle, self::CHUNK_BYTES);
+                $carry = '';
+
+                // Ein am Blockende angeschnittenes Steuerwort in den nächsten Block übernehmen
+                if (!feof($handle)) {
+                    $tail = strrpos(substr($data, -40), '\\');
+                    if ($tail !== false) {
+                        $cut = strlen($data) - min(40, strlen($data)) + $tail;
+                        $carry = substr($data, $cut);
+                        $data = substr($data, 0, $cut);
+                    }
+                }
+
+                preg_match_all(self::TOKEN_PATTERN, $data, $tokens, PREG_SET_ORDER | PREG_UNMATCHED_AS_NULL);
+
+                $out = '';
+                foreach ($tokens as $token) {
+                    [, $word, $param, $hex, $escaped, $brace, $newline, $text] = $token + array_fill(0, 8, null);
+
+                    if ($brace === '{') {
+                        $stack[] = [$skip, $uc];
+                        $groupStart = true;
+                        continue;
+                    }
+                    if ($brace === '}') {
+                        [$skip, $uc] = array_pop($stack) ?? [false, 1];
+                        $groupStart = false;
+                        continue;
+                    }
+                    if ($newline !== null) {
+                        continue; // Zeilenumbrüche im RTF-Quelltext sind bedeutungslos
+                    }
+
+                    $isFirst = $groupStart;
+                    $groupStart = false;
+
+                    if ($word !== null) {
+                        if ($isFirst && in_array($word, self::SKIP_DESTINATIONS, true)) {
+                            $skip = true;
+                        } elseif ($word === 'ansicpg' && $param !== null) {
+                            $this->codepage = 'CP' . (int) $param;
+                        } elseif ($word === 'uc' && $param !== null) {
+                            $uc = (int) $param;
+                        } elseif ($word === 'u' && $param !== null && !$skip) {
+                            $code = (int) $param;
+                            $out .= mb_chr($code < 0 ? $code + 65536 : $code, 'UTF-8') ?: '';
+                            $pendingSkip = $uc;
+                        } elseif (!$skip && isset(self::SYMBOLS[$word])) {
+                            $out .= self::SYMBOLS[$word];
+                        }
+                        continue;
+                    }
+
+                    if ($escaped !== null) {
+                        if ($escaped === '*' && $isFirst) {
+                            $skip = true;
+                        } elseif (!$skip && in_array($escaped, ['\\', '{', '}'], true)) {
+                            $out .= $this->emit($escaped, $pendingSkip);
+                        } elseif (!$skip && $escaped === '~') {
+                            $out .= $this->emit(' ', $pendingSkip);
+                        }
+                        continue;
+                    }
+
+                    if ($skip) {
+                        continue;
+                    }
+
+                    if ($hex !== null) {
+                        $out .= $this->emit($this->decodeByte(hexdec($hex)), $pendingSkip);
+                    } elseif ($text !== null) {
+                        // Ersatzzeichen nach \uN überspringen
+                        if ($pendingSkip > 0) {
+                            $drop = min($pendingSkip, strlen($text));
+                            $text = substr($text, $drop);
+                            $pendingSkip -= $drop;
+                        }
+                        $out .= $this->decodeText($text);
+                    }
+                }
+
+                if ($out !== '') {
+                    $sink($out);
+                }
+            }
+        } finally {
+            fclose($handle);
+        }
+    }
+
+    protected function emit(string $char, int &$pendingSkip): string
+    {
+        if ($pendingSkip > 0) {
+            $pendingSkip--;
+            return '';
+        }
+
+        return $char;
+    }
+
+    protected function decodeByte(int $byte): string
+    {
+        return $this->decodeText(chr($byte));
+    }
+
+    protected function decodeText(string $text): string
+    {
+        if ($text === '' || !preg_match('/[\x80-\xFF]/', $text)) {
+            return $text;
+        }
+
+        $decoded = @iconv($this->codepage, 'UTF-8//IGNORE', $text);
+
+        return $decoded !== false ? $decoded : mb_convert_encoding($text, 'UTF-8', 'Windows-1252');
+    }
+}
@@ -0,0 +1,195 @@
+<?php
+
+namespace App\Support;
+
+/**
+ * Minimaler ZIP-Writer, der direkt in einen Stream schreibt (z. B. php://output).
+ *
+ * Einträge werden inkrementell deflate-komprimiert; CRC und Größen folgen im
+ * Data Descriptor, daher muss weder der Inhalt noch das Archiv im Speicher oder
+ * auf der Platte gepuffert werden. Kein ZIP64: max. 4 GB pro Eintrag / 65535 Einträge.
+ */
+class StreamingZipWriter
+{
+    private const FLAGS = 0x0808; // Bit 3: Data Descriptor, Bit 11: UTF-8-Dateinamen
+    private const METHOD_DEFLATE = 8;
+    private const VERSION = 20;
+
+    /** @var resource */
+    private $out;
+    private int $offset = 0;
+    private array $entries = [];
+    private ?array $current = null;
+
+    /**
+     * @param resource $out
+     */
+    public function __construct($out)
+    {
+        $this->out = $out;
+    }
+
+    /**
+     * Startet einen neuen Eintrag; Inhalt folgt über write()
+     */
+    public function beginFile(string $name, ?\DateTimeInterface $modifiedAt = null): void
+    {
+        if ($this->current !== null) {
+            $this->endFile();
+        }
+
+        [$dosTime, $dosDate] = $this->dosDateTime($modifiedAt ?? new \DateTimeImmutable());
+
+        $this->current = [
+            'name' => $name,
+            'time' => $dosTime,
+            'date' => $dosDate,
+            'offset' => $this->offset,
+            'crc' => hash_init('crc32b'),
+            'deflate' => deflate_init(ZLIB_ENCODING_RAW, ['level' => 6]),
+            'size' => 0,
+            'compressed' => 0,
+        ];
+
+        $this->emit(pack(
+            'VvvvvvVVVvv',
+            0x04034b50,
+            self::VERSION,
+            self::FLAGS,
+            self::METHOD_DEFLATE,
+            $dosTime,
+            $dosDate,
+            0, // CRC — folgt im Data Descriptor
+            0,
+            0,
+            strlen($name),
+            0
+        ) . $name);
+    }
+
+    /**
+     * Hängt Daten an den aktuellen Eintrag an
+     */
+    public function write(string $data): void
+    {
+        if ($this->current === null) {
+            throw new \LogicException('StreamingZipWriter::write() called without beginFile().');
+        }
+        if ($data === '') {
+            return;
+        }
+
+        hash_update($this->current['crc'], $data);
+        $this->current['size'] += strlen($data);
+
+        $compressed = deflate_add($this->current['deflate'], $data, ZLIB_NO_FLUSH);
+        $this->current['compressed'] += strlen($compressed);
+        $this->emit($compressed);
+    }
+
+    /**
+     * Schließt den aktuellen Eintrag ab und schreibt den Data Descriptor
+     */
+    public function endFile(): void
+    {
+        if ($this->current === null) {
+            return;
+        }
+
+        $compressed = deflate_add($this->current['deflate'], '', ZLIB_FINISH);
+        $this->current['compressed'] += strlen($compressed);
+        $this->emit($compressed);
+
+        $crc = (int) hexdec(hash_final($this->current['crc']));
+
+        $this->emit(pack('VVVV', 0x08074b50, $crc, $this->current['compressed'], $this->current['size']));
+
+        $this->entries[] = [
+            'name' => $this->current['name'],
+            'time' => $this->current['time'],
+            'date' => $this->current['date'],
+            'offset' => $this->current['offset'],
+            'crc' => $crc,
+            'size' => $this->current['size'],
+            'compressed' => $this->current['compressed'],
+        ];
+        $this->current = null;
+    }
+
+    /**
+     * Kompletten Eintrag in einem Schritt hinzufügen
+     */
+    public function addFile(string $name, string $contents): void
+    {
+        $this->beginFile($name);
+        $this->write($contents);
+        $this->endFile();
+    }
+
+    /**
+     * Schreibt Central Directory und End-of-Central-Directory-Record
+     */
+    public function finish(): void
+    {
+        $this->endFile();
+
+        $directoryOffset = $this->offset;
+        foreach ($this->entries as $entry) {
+            $this->emit(pack(
+                'VvvvvvvVVVvvvvvVV',
+                0x02014b50,
+                self::VERSION,
+                self::VERSION,
+                self::FLAGS,
+                self::METHOD_DEFLATE,
+                $entry['time'],
+                $entry['date'],
+                $entry['crc'],
+                $entry['compressed'],
+                $entry['size'],
+                strlen($entry['name']),
+                0,
+                0,
+                0,
+                0,
+                0,
+                $entry['offset']
+            ) . $entry['name']);
+        }
+        $directorySize = $this->offset - $directoryOffset;
+
+        $this->emit(pack(
+            'VvvvvVVv',
+            0x06054b50,
+            0,
+            0,
+            count($this->entries),
+            count($this->entries),
+            $directorySize,
+            $directoryOffset,
+            0
+        ));
+
+        fflush($this->out);
+    }
+
+    private function emit(string $bytes): void
+    {
+        if ($bytes === '') {
+            return;
+        }
+
+        fwrite($this->out, $bytes);
+        $this->offset += strlen($bytes);
+    }
+
+    private function dosDateTime(\DateTimeInterface $at): array
+    {
+        $year = max(1980, (int) $at->format('Y'));
+
+        return [
+            ((int) $at->format('G') << 11) | ((int) $at->format('i') << 5) | ((int) $at->format('s') >> 1),
+            (($year - 1980) << 9) | ((int) $at->format('n') << 5) | (int) $at->format('j'),
+        ];
+    }
+}
@@ -0,0 +1,268 @@
+<?php
+
+namespace App\Support;
+
+/**
+ * Inkrementelle Wort-/Zeichenzählung über einen Textstrom.
+ *
+ * Text wird stückweise per feed() übergeben und in Segmente (Sätze/Absätze) zerlegt;
+ * im Speicher liegt nur das aktuell unvollständige Segment. Gezählt wird nach Schrift:
+ * - Han/Hiragana/Katakana: jedes Zeichen ein Wort (Konvention der CAT-Tools)
+ * - Thai/Lao/Khmer/Myanmar (ohne Leerzeichen): Wörterbuch-Segmentierung über ext-intl,
+ *   ohne intl geschätzt (ein Wort je vier Zeichen)
+ * - alle übrigen Schriften: Buchstaben-/Ziffernfolgen, Apostroph, Bindestrich und
+ *   Zifferntrenner innerhalb eines Wortes zählen nicht als Grenze
+ *
+ * Pro Segment wird ein Fingerabdruck (Hash, Wörter, SimHash) für die
+ * Wiederholungs-/Fuzzy-Analyse über mehrere Dateien festgehalten. Die Fingerabdrücke
+ * werden als Binärsätze in einen temporären Strom geschrieben (ab FINGERPRINT_MEMORY_BYTES
+ * auf Platte); Wiederholungen zählt ein RepeatDetector exakt, beim Abschluss in einem
+ * zweiten Durchlauf über diesen Strom. Der Speicher wächst nur mit den wiederholten Segmenten.
+ */
+class TextStatistics
+{
+    const TOKEN_PATTERN = '/(?<ideo>[\p{Han}\p{Hiragana}\p{Katakana}])'
+        . '|(?<unspaced>[\p{Thai}\p{Lao}\p{Khmer}\p{Myanmar}]+)'
+        . '|(?<word>(?:(?![\p{Han}\p{Hiragana}\p{Katakana}\p{Thai}\p{Lao}\p{Khmer}\p{Myanmar}])[\p{L}\p{M}\p{N}])+'
+        . '(?:[\'’.,\-](?:(?![\p{Han}\p{Hiragana}\p{Katakana}\p{Thai}\p{Lao}\p{Khmer}\p{Myanmar}])[\p{L}\p{M}\p{N}])+)*)/u';
+
+    // Satzende: Terminator + Leerraum, CJK-Terminator, oder Zeilenumbruch
+    const SEGMENT_SPLIT = '/(?<=[.!?…])\s+|(?<=[。！？])|\s*\n\s*/u';
+
+    // Segment ohne Terminator wird spätestens ab dieser Länge (Bytes) abgeschlossen
+    const MAX_SEGMENT_BYTES = 65536;
+
+    // Fingerabdruck: 8 Byte Hash (xxh64), 4 Byte Wörter, 8 Byte SimHash (0 unter FUZZY_MIN_WORDS)
+    const FINGERPRINT_FORMAT = 'a8hash/Nwords/Jsimhash';
+    const FINGERPRINT_BYTES = 20;
+    const FINGERPRINT_MEMORY_BYTES = 1048576;
+
+    // Fuzzy-Vergleich nur für Segmente ab 3 Wörtern, SimHash über die ersten 512 Zeichen
+    const FUZZY_MIN_WORDS = 3;
+    const SIMHASH_CHARS = 512;
+
+    protected string $buffer = '';
+
+    protected array $stats = [
+        'words' => 0,
+        'chars' => 0,
+        'chars_no_spaces' => 0,
+        'segments' => 0,
+        'repeated_segments' => 0,
+        'repeated_words' => 0,
+        'scripts' => ['spaced' => 0, 'ideographic' => 0, 'unspaced' => 0],
+    ];
+
+    protected RepeatDetector $repeats;
+
+    /**
+     * @var resource
+     */
+    protected $fingerprints;
+
+    public function __construct()
+    {
+        $this->repeats = new RepeatDetector();
+        $this->fingerprints = fopen('php://temp/maxmemory:' . self::FINGERPRINT_MEMORY_BYTES, 'w+b');
+    }
+
+    public function feed(string $text): void
+    {
+        if ($text === '') {
+            return;
+        }
+
+        // Ungültige Bytefolgen ersetzen, sonst scheitern die /u-Ausdrücke
+        if (!mb_check_encoding($text, 'UTF-8')) {
+            $text = mb_convert_encoding($text, 'UTF-8', 'UTF-8');
+        }
+
+        $this->stats['chars'] += mb_strlen(str_replace(["\r", "\n"], '', $text));
+        $this->stats['chars_no_spaces'] += mb_strlen(preg_replace('/\s+/u', '', $text));
+
+        $this->buffer .= $text;
+        $parts = preg_split(self::SEGMENT_SPLIT, $this->buffer);
+
+        // Letzter Teil ist evtl. unvollständig und wartet auf weitere Daten
+        $this->buffer = array_pop($parts);
+        foreach ($parts as $segment) {
+            $this->addSegment($segment);
+        }
+
+        if (strlen($this->buffer) > self::MAX_SEGMENT_BYTES) {
+            $cut = strrpos($this->buffer, ' ') ?: strlen($this->buffer);
+            $this->addSegment(substr($this->buffer, 0, $cut));
+            $this->buffer = substr($this->buffer, $cut);
+        }
+    }
+
+    /**
+     * Schließt den Strom ab und liefert die Statistik; 'fingerprints' ist der an den Anfang
+     * zurückgespulte Strom der Fingerabdrücke (siehe readFingerprints)
+     */
+    public function finish(): array
+    {
+        $this->addSegment($this->buffer);
+        $this->buffer = '';
+
+        rewind($this->fingerprints);
+
+        if ($this->repeats->hasCandidates()) {
+            foreach (static::readFingerprints($this->fingerprints) as [$hash, $words]) {
+                if ($this->repeats->repeated($hash)) {
+                    $this->stats['repeated_segments']++;
+                    $this->stats['repeated_words'] += $words;
+                }
+            }
+
+            rewind($this->fingerprints);
+        }
+
+        return $this->stats + ['fingerprints' => $this->fingerprints];
+    }
+
+    /**
+     * Fingerabdrücke eines Stroms: [Hash (8 Byte binär), Wörter, SimHash|null]
+     *
+     * @param resource $stream
+     * @return \Generator<array{0: string, 1: int, 2: ?int}>
+     */
+    public static function readFingerprints($stream): \Generator
+    {
+        $carry = '';
+
+        while (!feof($stream)) {
+            $data = $carry . fread($stream, self::FINGERPRINT_BYTES * 4096);
+            $complete = strlen($data) - strlen($data) % self::FINGERPRINT_BYTES;
+            $carry = substr($data, $complete);
+
+            for ($offset = 0; $offset < $complete; $offset += self::FINGERPRINT_BYTES) {
+                $record = unpack(self::FINGERPRINT_FORMAT, $data, $offset);
+
+                yield [
+                    $record['hash'],
+                    $record['words'],
+                    $record['words'] >= self::FUZZY_MIN_WORDS ? $record['simhash'] : null,
+                ];
+            }
+        }
+    }
+
+    /**
+     * Wörter eines einzelnen Textstücks, aufgeschlüsselt nach Schrift
+     */
+    public static function countWords(string $text): array
+    {
+        $counts = ['spaced' => 0, 'ideographic' => 0, 'unspaced' => 0];
+
+        if (!preg_match_all(self::TOKEN_PATTERN, $text, $matches, PREG_SET_ORDER | PREG_UNMATCHED_AS_NULL)) {
+            return $counts;
+        }
+
+        foreach ($matches as $match) {
+            if ($match['ideo'] !== null) {
+                $counts['ideographic']++;
+            } elseif ($match['unspaced'] !== null) {
+                $counts['unspaced'] += static::countUnspaced($match['unspaced']);
+            } else {
+                $counts['spaced']++;
+            }
+        }
+
+        return $counts;
+    }
+
+    /**
+     * Normalisierte Segmentform für den Vergleich (Groß-/Kleinschreibung, Leerraum)
+     */
+    public static function normalize(string $segment): string
+    {
+        return mb_strtolower(trim(preg_replace('/\s+/u', ' ', $segment)));
+    }
+
+    /**
+     * 64-Bit-SimHash über Zeichen-Trigramme (ähnliche Segmente ⇒ geringe Hamming-Distanz)
+     */
+    public static function simhash(string $normalized): int
+    {
+        $chars = mb_str_split(mb_substr($normalized, 0, self::SIMHASH_CHARS));
+        $count = count($chars);
+        if ($count === 0) {
+            return 0;
+        }
+
+        $votes = array_fill(0, 64, 0);
+        for ($i = 0, $last = max(0, $count - 3); $i <= $last; $i++) {
+            $hash = unpack('J', hash('xxh64', implode('', array_slice($chars, $i, 3)), true))[1];
+            for ($bit = 0; $bit < 64; $bit++) {
+                $votes[$bit] += (($hash >> $bit) & 1) ? 1 : -1;
+            }
+        }
+
+        $simhash = 0;
+        foreach ($votes as $bit => $vote) {
+            if ($vote > 0) {
+                $simhash |= 1 << $bit;
+            }
+        }
+
+        return $simhash;
+    }
+
+    public static function hammingDistance(int $a, int $b): int
+    {
+        return substr_count(decbin($a ^ $b), '1');
+    }
+
+    protected function addSegment(string $segment): void
+    {
+        $normalized = static::normalize($segment);
+        if ($normalized === '') {
+            return;
+        }
+
+        $counts = static::countWords($normalized);
+        $words = array_sum($counts);
+        if ($words === 0) {
+            return;
+        }
+
+        foreach ($counts as $script => $count) {
+            $this->stats['scripts'][$script] += $count;
+        }
+        $this->stats['words'] += $words;
+        $this->stats['segments']++;
+
+        $hash = hash('xxh64', $normalized, true);
+        $this->repeats->note($hash);
+
+        // Fingerabdruck je Segment (auch Wiederholungen, die Projektanalyse zählt selbst)
+        fwrite($this->fingerprints, pack(
+            'a8NJ',
+            $hash,
+            $words,
+            $words >= self::FUZZY_MIN_WORDS ? static::simhash($normalized) : 0
+        ));
+    }
+
+    protected static function countUnspaced(string $run): int
+    {
+        if (!class_exists(\IntlBreakIterator::class)) {
+            return (int) ceil(mb_strlen($run) / 4);
+        }
+
+        $iterator = \IntlBreakIterator::createWordInstance('th');
+        $iterator->setText($run);
+
+        $words = 0;
+        $iterator->first();
+        while ($iterator->next() !== \IntlBreakIterator::DONE) {
+            // Regelstatus >= 100: Segment vor der Grenze ist ein Wort (kein Leer-/Satzzeichen)
+            if ($iterator->getRuleStatus() >= \IntlBreakIterator::WORD_NONE_LIMIT) {
+                $words++;
+            }
+        }
+
+        return max(1, $words);
+    }
+}
@@ -7,6 +7,11 @@
 
 trait HasDisplayId
 {
+    /**
+     * Settings memo: "tenant:group" => [loaded_at, settings]
+     */
+    protected static array $displayIdSettingsCache = [];
+
     /**
      * Get the display ID with prefix and custom formatting.
      * 
@@ -57,11 +62,8 @@ protected function generateFormattedDisplayId()
             // unless specific prefixes are set.
         }
 
-        // 2. Fetch all relevant settings
-        $settings = TenantSetting::where('tenant_id', $tenantId)
-            ->where('key', 'like', $group . '_%')
-            ->pluck('value', 'key')
-            ->toArray();
+        // 2. Fetch all relevant settings (memoized per tenant/group, since lists call this once per row)
+        $settings = static::displayIdSettings($tenantId, $group);
 
         // Keys mapping
         $prefixKey = ($group === 'invoice' || $group === 'credit_note') ? $group . '_prefix' : $group . '_id_prefix';
@@ -101,4 +103,27 @@ protected function generateFormattedDisplayId()
 
         return implode($sep, $parts);
     }
+
+    /**
+     * Tenant settings for the display ID format, cached for 60 seconds per process
+     * so serializing a list does not query tenant_settings once per row.
+     */
+    protected static function displayIdSettings(int $tenantId, string $group): array
+    {
+        $key = "{$tenantId}:{$group}";
+        $cached = static::$displayIdSettingsCache[$key] ?? null;
+
+        if ($cached && $cached[0] > time() - 60) {
+            return $cached[1];
+        }
+
+        $settings = TenantSetting::where('tenant_id', $tenantId)
+            ->where('key', 'like', $group . '_%')
+            ->pluck('value', 'key')
+            ->toArray();
+
+        static::$displayIdSettingsCache[$key] = [time(), $settings];
+
+        return $settings;
+    }
 }
@@ -2,6 +2,7 @@
 
 namespace App\Traits;
 
+use App\Models\SequenceCounter;
 use Illuminate\Support\Str;
 
 trait HasSequentialCode
@@ -16,6 +17,9 @@ public static function bootHasSequentialCode()
 
             if (!$model->$column) {
                 $model->generateSequentialCode();
+            } elseif ($model->tenant_id && ctype_digit((string) $model->$column)) {
+                // Manually entered numeric code: keep the counter ahead of it
+                SequenceCounter::raise($model->tenant_id, $model->getSequentialCodeScope(), (int) $model->$column);
             }
         });
     }
@@ -28,18 +32,35 @@ public function generateSequentialCode()
     {
         $column = $this->getSequentialCodeColumn();
 
+        $nextNumber = $this->tenant_id
+            ? SequenceCounter::next($this->tenant_id, $this->getSequentialCodeScope(), fn() => $this->lastSequentialCode())
+            : $this->lastSequentialCode() + 1;
+
+        $this->$column = str_pad($nextNumber, 3, '0', STR_PAD_LEFT);
+        return $this->$column;
+    }
+
+    /**
+     * Highest numeric code in use (seed for the per-tenant counter, read once)
+     */
+    protected function lastSequentialCode(): int
+    {
+        $column = $this->getSequentialCodeColumn();
+
         $lastRecord = static::where('tenant_id', $this->tenant_id)
             ->where($column, 'regexp', '^[0-9]+$')
             ->orderByRaw("CAST($column AS UNSIGNED) DESC")
             ->first();
 
-        $nextNumber = 1;
-        if ($lastRecord && $lastRecord->$column) {
-            $nextNumber = (int) $lastRecord->$column + 1;
-        }
+        return $lastRecord && $lastRecord->$column ? (int) $lastRecord->$column : 0;
+    }
 
-        $this->$column = str_pad($nextNumber, 3, '0', STR_PAD_LEFT);
-        return $this->$column;
+    /**
+     * Counter scope, e.g. "languages.code"
+     */
+    protected function getSequentialCodeScope(): string
+    {
+        return $this->getTable() . '.' . $this->getSequentialCodeColumn();
     }
 
     /**
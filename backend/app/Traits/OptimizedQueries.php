@@ -7,21 +7,60 @@
 /**
  * Trait für optimierte Queries - verhindert N+1 Problem
  * Kann in Modellen verwendet werden um standard Eager-Loading zu definieren
+ *
+ * Modelle definieren in loadingProfiles() pro Ansicht (z. B. 'list', 'select'),
+ * welche Relations geladen, welche Aggregate (withCount/withSum) berechnet und
+ * welche Spalten selektiert werden. Das Profil 'default' gilt ohne Angabe.
  */
 trait OptimizedQueries
 {
     /**
      * Scope für automatisches Eager-Loading häufig verwendeter Relations
      */
-    public function scopeOptimized(Builder $query)
+    public function scopeOptimized(Builder $query, ?string $view = null)
     {
-        return $query->with($this->getDefaultWith());
+        $profile = $this->getLoadingProfile($view);
+
+        // Eine vorher gesetzte Spaltenauswahl (z. B. ?fields=) hat Vorrang
+        if (!empty($profile['columns']) && $query->getQuery()->columns === null) {
+            $query->select(array_map(fn($column) => $this->qualifyColumn($column), $profile['columns']));
+        }
+
+        $query->with($profile['with'] ?? []);
+
+        foreach ($profile['count'] ?? [] as $relation) {
+            $query->withCount($relation);
+        }
+
+        foreach ($profile['sum'] ?? [] as $relation => $column) {
+            $query->withSum($relation, $column);
+        }
+
+        return $query;
     }
 
     /**
      * Returns array von Relations die standardmäßig eager-loaded werden
      */
-    public function getDefaultWith(): array
+    public function getDefaultWith(?string $view = null): array
+    {
+        return $this->getLoadingProfile($view)['with'] ?? [];
+    }
+
+    /**
+     * Ladeprofil einer Ansicht; unbekannte Ansichten fallen auf 'default' zurück
+     */
+    public function getLoadingProfile(?string $view = null): array
+    {
+        $profiles = $this->loadingProfiles();
+
+        return $profiles[$view ?? 'default'] ?? $profiles['default'] ?? [];
+    }
+
+    /**
+     * Ladeprofile pro Ansicht: ['view' => ['with' => [], 'count' => [], 'sum' => [], 'columns' => []]]
+     */
+    protected function loadingProfiles(): array
     {
         return [];
     }
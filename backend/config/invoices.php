@@ -80,4 +80,27 @@
         'size' => 'a4',
         'orientation' => 'portrait',
     ],
+
+    /*
+    |--------------------------------------------------------------------------
+    | Rendering (PdfRenderService / RenderInvoicePdfs)
+    |--------------------------------------------------------------------------
+    |
+    | workers:    Anzahl Queue-Jobs, auf die ein Sammel-Lauf aufgeteilt wird
+    | queue:      Queue für Sammel-Läufe (eigene Worker: queue:work --queue=pdf)
+    | cache_days: Aufbewahrung gerenderter PDFs für die Wiederverwendung per Inhalts-Hash
+    */
+    'rendering' => [
+        'workers' => (int) env('PDF_RENDER_WORKERS', 4),
+        'queue' => env('PDF_RENDER_QUEUE', 'default'),
+        'cache_days' => (int) env('PDF_RENDER_CACHE_DAYS', 30),
+    ],
+
+    // Nächtliche Sammel-Läufe (Mahnwesen, Daueraufträge): Tenants je Queue-Job, Queue, Mahnungs-E-Mails
+    'batch' => [
+        'tenants_per_job' => (int) env('BILLING_BATCH_TENANTS_PER_JOB', 25),
+        'queue' => env('BILLING_BATCH_QUEUE', 'default'),
+        'lock_seconds' => (int) env('BILLING_BATCH_LOCK_SECONDS', 900),
+        'dunning_mail' => (bool) env('DUNNING_SEND_MAIL', false),
+    ],
 ];
@@ -129,4 +129,27 @@
 
     ],
 
+    /*
+    |--------------------------------------------------------------------------
+    | API Request Logging
+    |--------------------------------------------------------------------------
+    |
+    | Request- und DSGVO-Zugriffsprotokolle werden pro Prozess gepuffert und
+    | gesammelt per Multi-Row-Insert geschrieben (spätestens nach "interval"
+    | Sekunden bzw. ab "flush_bytes" Spool-Größe). Erfolgreiche, schnelle
+    | Requests landen nur mit "sample_rate" im Rohprotokoll; die Latenz-
+    | Rollups (api_request_metrics) zählen trotzdem jeden Request.
+    |
+    */
+
+    'api_requests' => [
+        'spool_path' => env('API_LOG_SPOOL_PATH', storage_path('framework/request-log')),
+        'interval' => (int) env('API_LOG_FLUSH_INTERVAL', 10),
+        'flush_bytes' => (int) env('API_LOG_FLUSH_BYTES', 1048576),
+        'batch_size' => (int) env('API_LOG_BATCH_SIZE', 500),
+        'sample_rate' => (float) env('API_LOG_SAMPLE_RATE', 0.1),
+        'sample_below_ms' => (int) env('API_LOG_SAMPLE_BELOW_MS', 1000),
+        'metrics_days' => (int) env('API_LOG_METRICS_DAYS', 30),
+    ],
+
 ];
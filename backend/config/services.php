@@ -28,6 +28,11 @@
         'region' => env('AWS_DEFAULT_REGION', 'us-east-1'),
     ],
 
+    'pdftotext' => [
+        // poppler-utils; liefert die PDF-Textschicht für die Wortzählung
+        'path' => env('PDFTOTEXT_PATH', 'pdftotext'),
+    ],
+
     'slack' => [
         'notifications' => [
             'bot_user_oauth_token' => env('SLACK_BOT_USER_OAUTH_TOKEN'),
@@ -0,0 +1,42 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    public function up(): void
+    {
+        // Pre-aggregated revenue/cost per tenant, day, target language and customer.
+        // Missing language/customer is stored as 0 so the unique key stays usable in MySQL.
+        Schema::create('project_revenue_rollups', function (Blueprint $table) {
+            $table->id();
+            $table->foreignId('tenant_id')->constrained()->cascadeOnDelete();
+            $table->date('day');
+            $table->char('month', 7); // YYYY-MM
+            $table->unsignedBigInteger('target_lang_id')->default(0);
+            $table->unsignedBigInteger('customer_id')->default(0);
+            $table->decimal('revenue', 14, 2)->default(0);
+            $table->decimal('partner_cost', 14, 2)->default(0);
+            $table->integer('job_count')->default(0);
+            $table->timestamps();
+
+            $table->unique(['tenant_id', 'day', 'target_lang_id', 'customer_id'], 'project_revenue_rollups_bucket_unique');
+            $table->index(['tenant_id', 'month']);
+        });
+
+        Schema::table('projects', function (Blueprint $table) {
+            $table->index(['tenant_id', 'created_at']);
+        });
+    }
+
+    public function down(): void
+    {
+        Schema::table('projects', function (Blueprint $table) {
+            $table->dropIndex(['tenant_id', 'created_at']);
+        });
+
+        Schema::dropIfExists('project_revenue_rollups');
+    }
+};
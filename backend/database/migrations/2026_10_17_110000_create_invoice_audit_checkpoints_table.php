@@ -0,0 +1,32 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    public function up(): void
+    {
+        // Stand der GoBD-Hash-Ketten-Prüfung pro Rechnung: bis zu diesem Log-Eintrag ist die Kette verifiziert.
+        Schema::create('invoice_audit_checkpoints', function (Blueprint $table) {
+            $table->foreignId('invoice_id')->primary()->constrained()->cascadeOnDelete();
+            $table->unsignedBigInteger('last_log_id');
+            $table->string('last_hash', 64);
+            $table->timestamp('verified_at')->nullable();
+        });
+
+        Schema::table('invoice_audit_logs', function (Blueprint $table) {
+            $table->index(['invoice_id', 'id']);
+        });
+    }
+
+    public function down(): void
+    {
+        Schema::table('invoice_audit_logs', function (Blueprint $table) {
+            $table->dropIndex(['invoice_id', 'id']);
+        });
+
+        Schema::dropIfExists('invoice_audit_checkpoints');
+    }
+};
@@ -0,0 +1,29 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    public function up(): void
+    {
+        // Keyset-Pagination der Projektliste sortiert nach (created_at, id) je Mandant.
+        // (tenant_id, created_at) existiert bereits; InnoDB hängt den Primärschlüssel an
+        // jeden Sekundärindex an, damit ist (created_at, id) abgedeckt. Hier die gefilterten Varianten:
+        Schema::table('projects', function (Blueprint $table) {
+            $table->index(['tenant_id', 'status', 'created_at']);
+            $table->index(['tenant_id', 'customer_id', 'created_at']);
+            $table->index(['tenant_id', 'partner_id', 'created_at']);
+        });
+    }
+
+    public function down(): void
+    {
+        Schema::table('projects', function (Blueprint $table) {
+            $table->dropIndex(['tenant_id', 'status', 'created_at']);
+            $table->dropIndex(['tenant_id', 'customer_id', 'created_at']);
+            $table->dropIndex(['tenant_id', 'partner_id', 'created_at']);
+        });
+    }
+};
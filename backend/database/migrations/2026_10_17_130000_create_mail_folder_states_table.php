@@ -0,0 +1,40 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    public function up(): void
+    {
+        // IMAP-Sync-Stand pro Konto und Ordner: nur UIDs > last_uid werden abgeholt,
+        // solange UIDVALIDITY unverändert ist.
+        Schema::create('mail_folder_states', function (Blueprint $table) {
+            $table->id();
+            $table->foreignId('tenant_id')->constrained()->cascadeOnDelete();
+            $table->foreignId('mail_account_id')->constrained()->cascadeOnDelete();
+            $table->string('folder');
+            $table->unsignedBigInteger('uid_validity')->nullable();
+            $table->unsignedBigInteger('last_uid')->default(0);
+            $table->timestamp('last_synced_at')->nullable();
+            $table->text('sync_error')->nullable();
+            $table->timestamps();
+
+            $table->unique(['mail_account_id', 'folder']);
+        });
+
+        Schema::table('mails', function (Blueprint $table) {
+            $table->index(['tenant_id', 'message_id']);
+        });
+    }
+
+    public function down(): void
+    {
+        Schema::table('mails', function (Blueprint $table) {
+            $table->dropIndex(['tenant_id', 'message_id']);
+        });
+
+        Schema::dropIfExists('mail_folder_states');
+    }
+};
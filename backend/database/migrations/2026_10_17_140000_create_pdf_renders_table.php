@@ -0,0 +1,31 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    public function up(): void
+    {
+        // Renderzeiten je Template (inkl. Wiederverwendungen aus dem Inhalts-Hash-Cache)
+        Schema::create('pdf_renders', function (Blueprint $table) {
+            $table->id();
+            $table->foreignId('tenant_id')->nullable()->constrained()->nullOnDelete();
+            $table->string('template', 100);
+            $table->char('source_hash', 64);
+            $table->unsignedInteger('bytes')->default(0);
+            $table->unsignedInteger('render_ms')->default(0);
+            $table->boolean('reused')->default(false);
+            $table->timestamp('created_at')->nullable();
+
+            $table->index(['template', 'created_at']);
+            $table->index('created_at');
+        });
+    }
+
+    public function down(): void
+    {
+        Schema::dropIfExists('pdf_renders');
+    }
+};
@@ -0,0 +1,49 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    public function up(): void
+    {
+        // Zählergebnisse je Dateiinhalt (SHA-256): erneute Uploads/Versionen kosten nichts.
+        // Segment-Fingerabdrücke liegen als Binärdatei je Analyse auf der lokalen Disk (FileAnalysis::fingerprintPath)
+        Schema::create('file_analyses', function (Blueprint $table) {
+            $table->id();
+            $table->char('sha256', 64);
+            $table->unsignedSmallInteger('engine_version');
+            $table->string('format', 10);
+            $table->unsignedInteger('word_count')->default(0);
+            $table->unsignedInteger('char_count')->default(0);
+            $table->unsignedInteger('char_count_no_spaces')->default(0);
+            $table->unsignedInteger('segment_count')->default(0);
+            $table->unsignedInteger('repeated_words')->default(0);
+            $table->json('scripts')->nullable();
+            $table->timestamps();
+
+            $table->unique(['sha256', 'engine_version']);
+        });
+
+        Schema::table('project_files', function (Blueprint $table) {
+            $table->char('sha256', 64)->nullable()->after('file_size');
+            $table->timestamp('analyzed_at')->nullable()->after('char_count');
+            // Zählung endgültig fehlgeschlagen (AnalyzeProjectFile): Oberfläche hört auf zu warten
+            $table->timestamp('analysis_failed_at')->nullable()->after('analyzed_at');
+            $table->string('analysis_error')->nullable()->after('analysis_failed_at');
+
+            $table->index('sha256');
+        });
+    }
+
+    public function down(): void
+    {
+        Schema::table('project_files', function (Blueprint $table) {
+            $table->dropIndex(['sha256']);
+            $table->dropColumn(['sha256', 'analyzed_at', 'analysis_failed_at', 'analysis_error']);
+        });
+
+        Schema::dropIfExists('file_analyses');
+    }
+};
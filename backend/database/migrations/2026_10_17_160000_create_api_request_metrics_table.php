@@ -0,0 +1,54 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    public function up(): void
+    {
+        // Minuten-Rollup je Route (Routen-Template) und Methode; route/method "*" = alle Requests der Minute
+        Schema::create('api_request_metrics', function (Blueprint $table) {
+            $table->id();
+            $table->dateTime('bucket');
+            $table->string('method', 10);
+            $table->string('route', 191);
+            $table->unsignedInteger('requests')->default(0);
+            $table->unsignedInteger('logged')->default(0);
+            $table->unsignedInteger('status_2xx')->default(0);
+            $table->unsignedInteger('status_3xx')->default(0);
+            $table->unsignedInteger('status_4xx')->default(0);
+            $table->unsignedInteger('status_5xx')->default(0);
+            $table->double('duration_sum_ms')->default(0);
+            $table->float('duration_max_ms')->default(0);
+            $table->float('p50_ms')->nullable();
+            $table->float('p95_ms')->nullable();
+            $table->float('p99_ms')->nullable();
+            $table->unsignedInteger('memory_max_kb')->default(0);
+            $table->unsignedInteger('memory_p50_kb')->nullable();
+            $table->unsignedInteger('memory_p95_kb')->nullable();
+            $table->unsignedInteger('memory_p99_kb')->nullable();
+            $table->json('duration_histogram')->nullable();
+            $table->json('memory_histogram')->nullable();
+            $table->timestamps();
+
+            $table->unique(['bucket', 'method', 'route']);
+            $table->index(['route', 'bucket']);
+        });
+
+        // Verbleibende Auswertungen über das Rohprotokoll (Fehlerlisten, Admin-Filter) laufen über created_at
+        Schema::table('api_request_logs', function (Blueprint $table) {
+            $table->index('created_at');
+        });
+    }
+
+    public function down(): void
+    {
+        Schema::table('api_request_logs', function (Blueprint $table) {
+            $table->dropIndex(['created_at']);
+        });
+
+        Schema::dropIfExists('api_request_metrics');
+    }
+};
@@ -0,0 +1,46 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    public function up(): void
+    {
+        // Fortlaufende Nummern je Tenant und Bereich ("invoice:2026", "languages.code", …).
+        // Zeilen entstehen beim ersten Zugriff und übernehmen dann einmalig den höchsten Bestandswert.
+        Schema::create('sequence_counters', function (Blueprint $table) {
+            $table->id();
+            $table->foreignId('tenant_id')->constrained()->cascadeOnDelete();
+            $table->string('scope', 100);
+            $table->unsignedBigInteger('value')->default(0);
+            $table->timestamps();
+
+            $table->unique(['tenant_id', 'scope']);
+        });
+
+        // Mahnlauf: letzte Mahnstufe je Rechnung ohne Tabellenscan
+        Schema::table('dunning_logs', function (Blueprint $table) {
+            $table->index(['invoice_id', 'level', 'sent_at']);
+        });
+
+        // Daueraufträge: fällige Ausführungen je Tenant
+        Schema::table('recurring_invoices', function (Blueprint $table) {
+            $table->index(['status', 'next_run_at', 'tenant_id']);
+        });
+    }
+
+    public function down(): void
+    {
+        Schema::table('recurring_invoices', function (Blueprint $table) {
+            $table->dropIndex(['status', 'next_run_at', 'tenant_id']);
+        });
+
+        Schema::table('dunning_logs', function (Blueprint $table) {
+            $table->dropIndex(['invoice_id', 'level', 'sent_at']);
+        });
+
+        Schema::dropIfExists('sequence_counters');
+    }
+};
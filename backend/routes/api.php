@@ -110,6 +110,7 @@
         Route::post('invoices/bulk-delete', [\App\Http\Controllers\Api\InvoiceController::class, 'bulkDelete']);
         Route::post('invoices/datev-export', [\App\Http\Controllers\Api\InvoiceController::class, 'datevExport']);
         Route::post('invoices/gobd-export', [\App\Http\Controllers\Api\InvoiceController::class, 'gobdExport']);
+        Route::post('invoices/bulk-pdf', [\App\Http\Controllers\Api\InvoiceController::class, 'bulkPdf']);
         Route::post('invoices/{invoice}/generate-pdf', [\App\Http\Controllers\Api\InvoiceController::class, 'generatePdf']);
         Route::post('invoices/{invoice}/issue', [\App\Http\Controllers\Api\InvoiceController::class, 'issue']);
         Route::post('invoices/{invoice}/cancel', [\App\Http\Controllers\Api\InvoiceController::class, 'cancel']);
@@ -157,6 +158,7 @@
         Route::get('mails', [\App\Http\Controllers\Api\MailController::class, 'index']);
         Route::post('mails/send', [\App\Http\Controllers\Api\MailController::class, 'send']);
         Route::post('mails/sync', [\App\Http\Controllers\Api\MailController::class, 'sync']);
+        Route::get('mails/sync/{batchId}', [\App\Http\Controllers\Api\MailController::class, 'syncStatus']);
         Route::post('mails/bulk-delete', [\App\Http\Controllers\Api\MailController::class, 'bulkDelete']);
         Route::post('mails/bulk-restore', [\App\Http\Controllers\Api\MailController::class, 'bulkRestore']);
         Route::post('mails/bulk-archive', [\App\Http\Controllers\Api\MailController::class, 'bulkArchive']);
@@ -227,6 +229,7 @@
     Route::post('projects/{project}/files/bulk-update', [\App\Http\Controllers\Api\ProjectFileController::class, 'bulkUpdate']);
     Route::post('projects/{project}/files/bulk-delete', [\App\Http\Controllers\Api\ProjectFileController::class, 'bulkDestroy']);
     Route::get('projects/{project}/files/download-zip', [\App\Http\Controllers\Api\ProjectFileController::class, 'downloadZip']);
+    Route::get('projects/{project}/files/analysis', [\App\Http\Controllers\Api\ProjectFileController::class, 'analysis']);
     Route::apiResource('projects', \App\Http\Controllers\Api\ProjectController::class);
     Route::post('projects/{project}/invite', [\App\Http\Controllers\Api\ProjectController::class, 'inviteParticipant']);
     Route::post('projects/{project}/generate-document', [\App\Http\Controllers\Api\ProjectController::class, 'generateDocument']);
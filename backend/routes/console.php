@@ -20,6 +20,38 @@
     $this->info("Processed {$count} invoices.");
 })->purpose('Check and update status for overdue invoices')->daily();
 
+Artisan::command('cache:stats', function () {
+    $rows = [];
+    foreach (\App\Services\CacheService::stats() as $family => $events) {
+        $lookups = $events['hit'] + $events['stale'] + $events['miss'];
+        $rows[] = [
+            $family,
+            $events['hit'],
+            $events['stale'],
+            $events['miss'],
+            $events['evict'],
+            $lookups > 0 ? round(($events['hit'] + $events['stale']) / $lookups * 100, 1) . ' %' : '-',
+        ];
+    }
+
+    $this->table(['Familie', 'Hit', 'Stale', 'Miss', 'Evict', 'Trefferquote'], $rows);
+})->purpose('Show cache hit/miss/evict counters per key family');
+
+Artisan::command('pdf:stats {--days=7}', function (\App\Services\PdfRenderService $renderer) {
+    $rows = [];
+    foreach ($renderer->stats((int) $this->option('days')) as $template => $stats) {
+        $rows[] = [
+            $template,
+            $stats['total'],
+            $stats['total'] > 0 ? round($stats['reused'] / $stats['total'] * 100, 1) . ' %' : '-',
+            $stats['avg_ms'] ?? '-',
+            $stats['p95_ms'] ?? '-',
+        ];
+    }
+
+    $this->table(['Template', 'PDFs', 'Wiederverwendet', 'Ø ms', 'p95 ms'], $rows);
+})->purpose('Show PDF render counts, reuse rate and render times per template');
+
 use Illuminate\Support\Facades\Schedule;
 
 // Monitor API errors every 15 minutes and send alerts
@@ -40,7 +72,42 @@
     ->withoutOverlapping()
     ->runInBackground();
 
-// GoBD: Hash-Ketten-Verifikation täglich – bei Fehler Alert per E-Mail
-Schedule::command('invoices:verify-audit-chain')
+// GoBD: Hash-Ketten-Verifikation täglich (inkrementell ab Checkpoint) – bei Fehler Alert per E-Mail
+Schedule::command('invoices:verify-audit-chain --workers=4')
     ->daily()
+    ->withoutOverlapping()
+    ->emailOutputOnFailure('admin@localhost');
+
+// GoBD: wöchentlich alle Ketten vollständig neu hashen (erkennt auch Manipulation an bereits geprüften Einträgen)
+Schedule::command('invoices:verify-audit-chain --full --workers=4')
+    ->weeklyOn(6, '02:00')
+    ->withoutOverlapping()
     ->emailOutputOnFailure('admin@localhost');
+
+// Reporting: Umsatz-Rollup wöchentlich komplett neu aufbauen (fängt Massen-Updates ohne Observer ab)
+Schedule::command('reports:rebuild-revenue-rollup')
+    ->weeklyOn(0, '03:00')
+    ->withoutOverlapping()
+    ->runInBackground();
+
+// Mail: alle aktiven Konten regelmäßig im Hintergrund synchronisieren (ein Queue-Job pro Konto)
+Schedule::call(function () {
+    \App\Models\MailAccount::where('is_active', true)
+        ->each(fn($account) => \App\Jobs\SyncMailbox::dispatch($account));
+})->name('mail-sync')->everyFiveMinutes()->withoutOverlapping();
+
+// PDF: alte Render-Messwerte (pdf_renders) und gespeicherte PDFs des Inhalts-Hash-Caches entfernen,
+// dazu alte Minuten-Rollups der API-Requests (api_request_metrics)
+Schedule::command('model:prune', ['--model' => [\App\Models\PdfRender::class, \App\Models\ApiRequestMetric::class]])
+    ->daily();
+
+Schedule::call(fn() => app(\App\Services\PdfRenderService::class)->pruneCache((int) config('invoices.rendering.cache_days', 30)))
+    ->name('pdf-cache-prune')
+    ->dailyAt('04:00')
+    ->withoutOverlapping();
+
+// API-Logging: liegen gebliebene Spool-Dateien (Request-Logs, DSGVO-Zugriffe, Rollups) übernehmen
+Schedule::call(fn() => \App\Services\RequestLogBuffer::drain())
+    ->name('request-log-drain')
+    ->everyMinute()
+    ->withoutOverlapping();
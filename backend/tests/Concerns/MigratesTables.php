@@ -0,0 +1,44 @@
+<?php
+
+namespace Tests\Concerns;
+
+use Illuminate\Support\Facades\Schema;
+
+/**
+ * Legt einzelne Tabellen aus den echten Migrationen an.
+ *
+ * Die Basismigration ist MySQL-spezifisch (virtuelle Spalten, DATE_ADD-Defaults) und läuft unter
+ * SQLite nicht als Ganzes. Alle Migrationen laufen deshalb der Reihe nach, Schema-Aufrufe wirken
+ * aber nur auf die angefragten Tabellen – Spalten, Indizes und spätere Änderungen entsprechen so
+ * dem ausgelieferten Schema. Fremdschlüssel-Prüfungen sind aus, die referenzierten Tabellen fehlen meist.
+ */
+trait MigratesTables
+{
+    protected function migrateTables(string ...$tables): void
+    {
+        $schema = Schema::getFacadeRoot();
+        $schema->disableForeignKeyConstraints();
+
+        Schema::swap(new class($schema, $tables) {
+            public function __construct(private $schema, private array $tables) {}
+
+            public function __call(string $method, array $arguments)
+            {
+                if (in_array($method, ['create', 'table', 'drop', 'dropIfExists', 'rename'], true)
+                    && !in_array($arguments[0], $this->tables, true)) {
+                    return null;
+                }
+
+                return $this->schema->{$method}(...$arguments);
+            }
+        });
+
+        try {
+            foreach (glob(database_path('migrations/*.php')) as $migration) {
+                (require $migration)->up();
+            }
+        } finally {
+            Schema::swap($schema);
+        }
+    }
+}
@@ -0,0 +1,91 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Services\CacheService;
+use Illuminate\Support\Facades\Cache;
+use Tests\Concerns\MigratesTables;
+use Tests\TestCase;
+
+class CacheServiceTest extends TestCase
+{
+    use MigratesTables;
+
+    protected function setUp(): void
+    {
+        parent::setUp();
+
+        // Prozesszähler sind statisch und überleben sonst den vorherigen Test
+        (new \ReflectionProperty(CacheService::class, 'stats'))->setValue(null, []);
+    }
+
+    public function test_invalidation_only_affects_the_given_tenant_and_family(): void
+    {
+        CacheService::cacheReportData(1, 'summary', 'q1', fn() => 'tenant-1');
+        CacheService::cacheReportData(2, 'summary', 'q1', fn() => 'tenant-2');
+        CacheService::cachePartnerList(1, fn() => 'partners-1');
+
+        CacheService::invalidateReportCaches(1);
+
+        $this->assertSame('fresh', CacheService::cacheReportData(1, 'summary', 'q1', fn() => 'fresh'));
+        $this->assertSame('tenant-2', CacheService::cacheReportData(2, 'summary', 'q1', fn() => 'fresh'));
+        $this->assertSame('partners-1', CacheService::cachePartnerList(1, fn() => 'fresh'));
+    }
+
+    public function test_expired_entry_is_served_stale_while_another_process_recomputes(): void
+    {
+        $key = CacheService::key(CacheService::FAMILY_REPORT, 7, 'summary:q1');
+        Cache::put($key, ['value' => 'stale', 'fresh_until' => time() - 1], 60);
+
+        $lock = Cache::lock("{$key}:lock", 30);
+        $this->assertTrue($lock->get());
+
+        $this->assertSame('stale', CacheService::cacheReportData(7, 'summary', 'q1', fn() => 'fresh'));
+
+        $lock->release();
+        $this->assertSame('fresh', CacheService::cacheReportData(7, 'summary', 'q1', fn() => 'fresh'));
+    }
+
+    public function test_it_counts_hits_misses_and_evictions_per_family(): void
+    {
+        CacheService::cachePriceMatrices(3, fn() => ['a']);
+        CacheService::cachePriceMatrices(3, fn() => ['a']);
+        CacheService::invalidatePriceMatrixCaches(3);
+
+        $stats = CacheService::stats()[CacheService::FAMILY_PRICE_MATRICES];
+
+        $this->assertSame(1, $stats['hit']);
+        $this->assertSame(1, $stats['miss']);
+        $this->assertSame(1, $stats['evict']);
+    }
+
+    public function test_stats_are_written_once_per_flush(): void
+    {
+        CacheService::cacheMasterData('languages', 4, fn() => ['de']);
+        CacheService::cacheMasterData('languages', 4, fn() => ['de']);
+
+        $this->assertNull(Cache::get('cache_stats:master_data:hit'));
+
+        CacheService::flushStats();
+
+        $this->assertSame(1, (int) Cache::get('cache_stats:master_data:hit'));
+        $this->assertSame(1, (int) Cache::get('cache_stats:master_data:miss'));
+        $this->assertNull(Cache::get('cache_stats:master_data:evict'));
+    }
+
+    public function test_stats_counters_are_seeded_on_the_database_store(): void
+    {
+        $this->migrateTables('cache');
+        Cache::setDefaultDriver('database');
+
+        CacheService::cachePartnerList(5, fn() => ['p']);
+        CacheService::cachePartnerList(5, fn() => ['p']);
+        CacheService::flushStats();
+
+        CacheService::cachePartnerList(5, fn() => ['p']);
+
+        $stats = CacheService::stats()[CacheService::FAMILY_PARTNERS];
+        $this->assertSame(2, $stats['hit']);
+        $this->assertSame(1, $stats['miss']);
+    }
+}
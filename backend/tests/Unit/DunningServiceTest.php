@@ -0,0 +1,233 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Models\DunningLog;
+use App\Models\Invoice;
+use App\Services\DunningService;
+use Illuminate\Support\Carbon;
+use Illuminate\Support\Facades\Cache;
+use Illuminate\Support\Facades\DB;
+use Illuminate\Support\Facades\Storage;
+use Tests\Concerns\MigratesTables;
+use Tests\TestCase;
+
+class DunningServiceTest extends TestCase
+{
+    use MigratesTables;
+
+    protected function setUp(): void
+    {
+        parent::setUp();
+
+        Carbon::setTestNow('2026-10-17 12:00:00');
+
+        $this->migrateTables('invoices', 'dunning_settings', 'dunning_logs');
+
+        DB::table('dunning_settings')->insert([
+            $this->settings(1, autoEscalate: true),
+            $this->settings(2, autoEscalate: false),
+        ]);
+    }
+
+    protected function tearDown(): void
+    {
+        Carbon::setTestNow();
+
+        parent::tearDown();
+    }
+
+    public function test_first_reminder_is_due_once_the_level_one_threshold_is_reached(): void
+    {
+        $exactly = $this->invoice(daysOverdue: 7);
+        $later = $this->invoice(daysOverdue: 10, status: 'overdue');
+        $this->invoice(daysOverdue: 6);
+        $this->invoice(daysOverdue: 10, status: 'paid');
+        $this->invoice(daysOverdue: 10, status: 'draft');
+
+        $this->assertSame([
+            $exactly => [1, 0],
+            $later => [1, 0],
+        ], $this->due());
+    }
+
+    public function test_current_level_is_the_higher_of_log_and_invoice_level(): void
+    {
+        // Stufe 1 nur im Log (reminder_level nicht nachgezogen) → Zielstufe 2 ab 14 Tagen
+        $fromLog = $this->invoice(daysOverdue: 20, level: 0);
+        $this->log($fromLog, 1, daysAgo: 10);
+
+        // Stufe 2 nur an der Rechnung → Zielstufe 3 erst ab 30 Tagen
+        $this->invoice(daysOverdue: 20, level: 2);
+        $fromInvoice = $this->invoice(daysOverdue: 40, level: 2);
+
+        // Letzte Stufe erreicht
+        $this->invoice(daysOverdue: 60, level: 3);
+
+        $this->assertSame([
+            $fromLog => [2, 500],
+            $fromInvoice => [3, 1000],
+        ], $this->due());
+    }
+
+    public function test_reminders_keep_a_minimum_gap(): void
+    {
+        $recent = $this->invoice(daysOverdue: 20, level: 1);
+        $this->log($recent, 1, daysAgo: DunningService::MIN_DAYS_BETWEEN_REMINDERS - 1);
+
+        $gapReached = $this->invoice(daysOverdue: 20, level: 1);
+        $this->log($gapReached, 1, daysAgo: DunningService::MIN_DAYS_BETWEEN_REMINDERS);
+
+        $this->assertSame([$gapReached => [2, 500]], $this->due());
+    }
+
+    public function test_only_tenants_with_auto_escalation_are_considered(): void
+    {
+        $this->invoice(daysOverdue: 40, tenantId: 2);
+        $own = $this->invoice(daysOverdue: 40);
+
+        $this->assertSame([$own => [1, 0]], $this->due());
+        $this->assertSame([], $this->due([2]));
+    }
+
+    public function test_days_since_expression_per_driver(): void
+    {
+        $this->assertSame('DATEDIFF(?, invoices.due_date)', DunningService::daysSinceSql('mysql', 'invoices.due_date'));
+        $this->assertSame('CAST(julianday(?) - julianday(invoices.due_date) AS INTEGER)', DunningService::daysSinceSql('sqlite', 'invoices.due_date'));
+    }
+
+    public function test_process_tenant_logs_reminders_and_escalates_invoices(): void
+    {
+        $first = $this->invoice(daysOverdue: 10);
+        $second = $this->invoice(daysOverdue: 20, level: 1);
+        $this->log($second, 1, daysAgo: 10);
+        $notDue = $this->invoice(daysOverdue: 3);
+        $otherTenant = $this->invoice(daysOverdue: 40, tenantId: 2);
+
+        $result = (new DunningService())->processTenant(1);
+
+        $this->assertFalse($result['skipped']);
+        $this->assertSame(2, $result['reminders']);
+        $this->assertSame([1 => 1, 2 => 1], $result['by_level']);
+
+        // Zurückgelesen werden genau die neuen Logs, nicht die ältere Mahnung derselben Rechnung
+        $logs = DB::table('dunning_logs')->where('sent_at', now())->orderBy('invoice_id')->get();
+        $this->assertEqualsCanonicalizing($logs->pluck('id')->all(), $result['log_ids']);
+        $this->assertSame(
+            [[$first, 1, 0], [$second, 2, 500]],
+            $logs->map(fn($log) => [(int) $log->invoice_id, (int) $log->level, (int) $log->fee_cents])->all()
+        );
+        $this->assertSame(3, DB::table('dunning_logs')->count());
+
+        $invoices = DB::table('invoices')->get()->keyBy('id');
+        foreach ([$first => 1, $second => 2] as $id => $level) {
+            $this->assertSame($level, (int) $invoices[$id]->reminder_level);
+            $this->assertSame(Invoice::STATUS_OVERDUE, $invoices[$id]->status);
+            $this->assertSame('2026-10-17', $invoices[$id]->last_reminder_date);
+        }
+        foreach ([$notDue, $otherTenant] as $id) {
+            $this->assertSame(0, (int) $invoices[$id]->reminder_level);
+            $this->assertSame('issued', $invoices[$id]->status);
+        }
+
+        // Zweiter Lauf am selben Tag: Mindestabstand greift, nichts Neues
+        $this->assertSame(0, (new DunningService())->processTenant(1)['reminders']);
+        $this->assertSame(3, DB::table('dunning_logs')->count());
+    }
+
+    public function test_dry_run_changes_nothing(): void
+    {
+        $this->invoice(daysOverdue: 10);
+
+        $result = (new DunningService())->processTenant(1, dryRun: true);
+
+        $this->assertSame(1, $result['reminders']);
+        $this->assertSame([], $result['log_ids']);
+        $this->assertSame(0, DB::table('dunning_logs')->count());
+        $this->assertSame(0, (int) DB::table('invoices')->value('reminder_level'));
+    }
+
+    public function test_process_tenant_is_skipped_while_another_run_holds_the_lock(): void
+    {
+        $this->invoice(daysOverdue: 10);
+
+        $lock = Cache::lock('dunning-run:1', 60);
+        $this->assertTrue($lock->get());
+
+        try {
+            $result = (new DunningService())->processTenant(1);
+        } finally {
+            $lock->release();
+        }
+
+        $this->assertTrue($result['skipped']);
+        $this->assertSame(0, $result['reminders']);
+        $this->assertSame(0, DB::table('dunning_logs')->count());
+
+        // Andere Tenants laufen unabhängig, nach Freigabe läuft auch Tenant 1
+        $this->assertFalse((new DunningService())->processTenant(2)['skipped']);
+        $this->assertSame(1, (new DunningService())->processTenant(1)['reminders']);
+    }
+
+    public function test_reminder_pdfs_are_stored_per_tenant_and_log(): void
+    {
+        Storage::fake(DunningService::PDF_DISK);
+
+        // Gleiche Rechnungsnummer in zwei Tenants darf sich nicht überschreiben
+        $first = (new DunningLog())->forceFill(['id' => 41, 'tenant_id' => 1, 'level' => 1]);
+        $second = (new DunningLog())->forceFill(['id' => 42, 'tenant_id' => 2, 'level' => 1]);
+
+        $service = new DunningService();
+        $this->assertSame('dunning/1/41_level1.pdf', $service->storeDunningPdf($first, 'tenant-1'));
+        $this->assertSame('dunning/2/42_level1.pdf', $service->storeDunningPdf($second, 'tenant-2'));
+
+        $this->assertSame('tenant-1', Storage::disk(DunningService::PDF_DISK)->get('dunning/1/41_level1.pdf'));
+        $this->assertSame('tenant-2', Storage::disk(DunningService::PDF_DISK)->get('dunning/2/42_level1.pdf'));
+    }
+
+    /**
+     * Fällige Mahnungen als [Rechnung => [Zielstufe, Gebühr]]
+     */
+    private function due(?array $tenantIds = null): array
+    {
+        return (new DunningService())->dueReminders($tenantIds)
+            ->orderBy('invoices.id')
+            ->get()
+            ->mapWithKeys(fn($row) => [$row->id => [(int) $row->target_level, (int) $row->fee_cents]])
+            ->all();
+    }
+
+    private function invoice(int $daysOverdue, int $level = 0, string $status = 'issued', int $tenantId = 1): int
+    {
+        return DB::table('invoices')->insertGetId([
+            'tenant_id' => $tenantId,
+            'status' => $status,
+            'due_date' => today()->subDays($daysOverdue)->toDateString(),
+            'reminder_level' => $level,
+        ]);
+    }
+
+    private function log(int $invoiceId, int $level, int $daysAgo): void
+    {
+        DB::table('dunning_logs')->insert([
+            'tenant_id' => 1,
+            'invoice_id' => $invoiceId,
+            'level' => $level,
+            'sent_at' => now()->subDays($daysAgo)->toDateTimeString(),
+        ]);
+    }
+
+    private function settings(int $tenantId, bool $autoEscalate): array
+    {
+        return [
+            'tenant_id' => $tenantId,
+            'level1_days_after_due' => 7,
+            'level1_fee_cents' => 0,
+            'level2_days_after_due' => 14,
+            'level2_fee_cents' => 500,
+            'level3_days_after_due' => 30,
+            'level3_fee_cents' => 1000,
+            'auto_escalate' => $autoEscalate,
+        ];
+    }
+}
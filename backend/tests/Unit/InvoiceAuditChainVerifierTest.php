@@ -0,0 +1,71 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Models\InvoiceAuditLog;
+use App\Services\InvoiceAuditChainVerifier;
+use Illuminate\Support\Carbon;
+use Tests\TestCase;
+
+class InvoiceAuditChainVerifierTest extends TestCase
+{
+    public function test_it_accepts_an_intact_chain_continuing_from_a_checkpoint(): void
+    {
+        $first = $this->makeLog(10, 'checkpoint-hash');
+        $second = $this->makeLog(11, $first->record_hash);
+
+        $result = (new InvoiceAuditChainVerifier())->verifyChain([$first, $second], 'checkpoint-hash');
+
+        $this->assertNull($result['broken']);
+        $this->assertSame(11, $result['last_valid']->id);
+    }
+
+    public function test_it_reports_first_broken_link_and_last_valid_entry(): void
+    {
+        $first = $this->makeLog(10, null);
+        $second = $this->makeLog(11, str_repeat('f', 64));
+        $third = $this->makeLog(12, $second->record_hash);
+
+        $result = (new InvoiceAuditChainVerifier())->verifyChain([$first, $second, $third]);
+
+        $this->assertSame(10, $result['last_valid']->id);
+        $this->assertSame(11, $result['broken']['log_id']);
+        $this->assertSame('CHAIN_BROKEN', $result['broken']['problem']);
+    }
+
+    public function test_it_splits_invoice_id_range_for_workers(): void
+    {
+        $verifier = new InvoiceAuditChainVerifier();
+
+        $this->assertSame([[1, 4], [5, 8], [9, 10]], $verifier->splitRange(1, 10, 3));
+        $this->assertSame([[7, 7]], $verifier->splitRange(7, 7, 4));
+    }
+
+    private function makeLog(int $id, ?string $previousHash): InvoiceAuditLog
+    {
+        $log = new InvoiceAuditLog([
+            'invoice_id' => 1,
+            'user_id' => 2,
+            'action' => InvoiceAuditLog::ACTION_ISSUED,
+            'previous_hash' => $previousHash,
+            'metadata' => ['pdf_sha256' => str_repeat('c', 64)],
+            'ip_address' => '127.0.0.1',
+        ]);
+        $log->id = $id;
+        $log->created_at = Carbon::parse('2026-04-08 10:00:00');
+
+        $log->record_hash = InvoiceAuditLog::hashPayload([
+            'invoice_id' => 1,
+            'user_id' => 2,
+            'action' => InvoiceAuditLog::ACTION_ISSUED,
+            'old_status' => null,
+            'new_status' => null,
+            'previous_hash' => $previousHash,
+            'metadata' => ['pdf_sha256' => str_repeat('c', 64)],
+            'ip_address' => '127.0.0.1',
+            'created_at' => $log->created_at->toIso8601String(),
+        ]);
+
+        return $log;
+    }
+}
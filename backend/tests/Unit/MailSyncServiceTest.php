@@ -0,0 +1,64 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Models\MailAccount;
+use App\Services\MailSyncService;
+use Tests\TestCase;
+
+class MailSyncServiceTest extends TestCase
+{
+    public function test_it_derives_default_ports_from_protocol_and_encryption(): void
+    {
+        $service = new MailSyncService();
+
+        $port = fn(array $attributes) => $service->connectionConfig((new MailAccount())->forceFill($attributes))['port'];
+
+        $this->assertSame(993, $port(['incoming_protocol' => 'imap', 'imap_encryption' => 'ssl']));
+        $this->assertSame(143, $port(['incoming_protocol' => 'imap', 'imap_encryption' => 'tls']));
+        $this->assertSame(995, $port(['incoming_protocol' => 'pop3', 'imap_encryption' => 'ssl']));
+        $this->assertSame(110, $port(['incoming_protocol' => 'pop3', 'imap_encryption' => 'none']));
+        $this->assertSame(1143, $port(['imap_port' => 1143]));
+    }
+
+    public function test_it_defaults_to_imap_over_ssl(): void
+    {
+        $config = (new MailSyncService())->connectionConfig((new MailAccount())->forceFill(['imap_host' => 'imap.example.com']));
+
+        $this->assertSame('imap', $config['protocol']);
+        $this->assertSame('ssl', $config['encryption']);
+        $this->assertSame('imap.example.com', $config['host']);
+        $this->assertFalse($config['validate_cert']);
+    }
+
+    public function test_it_detects_pop3_accounts(): void
+    {
+        $service = new MailSyncService();
+
+        $this->assertTrue($service->isPop3((new MailAccount())->forceFill(['incoming_protocol' => 'pop3'])));
+        $this->assertFalse($service->isPop3((new MailAccount())->forceFill(['incoming_protocol' => 'imap'])));
+        $this->assertFalse($service->isPop3(new MailAccount()));
+    }
+
+    public function test_fallback_message_ids_are_scoped_to_account_and_folder(): void
+    {
+        $service = new MailSyncService();
+        $fallback = new \ReflectionMethod($service, 'fallbackMessageId');
+        $message = new class {
+            public function getHeader(): object
+            {
+                return (object) ['raw' => "Subject: Test\r\nDate: Mon, 1 Jun 2026 10:00:00 +0200\r\n"];
+            }
+        };
+        $id = fn(int $account, string $folder, ?int $uidValidity, int $uid) =>
+            $fallback->invoke($service, (new MailAccount())->forceFill(['id' => $account]), $message, $folder, $uidValidity, $uid);
+
+        $this->assertNotSame($id(1, 'INBOX', 7, 12), $id(2, 'INBOX', 7, 12));
+        $this->assertNotSame($id(1, 'INBOX', 7, 12), $id(1, 'Archiv', 7, 12));
+        $this->assertNotSame($id(1, 'INBOX', 7, 12), $id(1, 'INBOX', 8, 12));
+        $this->assertSame($id(1, 'INBOX', 7, 12), $id(1, 'INBOX', 7, 12));
+
+        // POP3: Nachrichtennummern wechseln, die Kopfzeilen nicht
+        $this->assertSame($id(1, 'INBOX', null, 3), $id(1, 'INBOX', null, 5));
+    }
+}
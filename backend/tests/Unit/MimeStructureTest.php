@@ -0,0 +1,69 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Support\MimeStructure;
+use PHPUnit\Framework\TestCase;
+
+class MimeStructureTest extends TestCase
+{
+    /**
+     * multipart/mixed( multipart/alternative(text/plain, text/html), application/pdf, image/png inline )
+     */
+    protected function structure(): array
+    {
+        return [
+            [
+                ['TEXT', 'PLAIN', ['CHARSET', 'iso-8859-1'], 'NIL', 'NIL', 'QUOTED-PRINTABLE', 120, 4, 'NIL', 'NIL', 'NIL'],
+                ['TEXT', 'HTML', ['CHARSET', 'utf-8'], 'NIL', 'NIL', 'BASE64', 800, 11, 'NIL', 'NIL', 'NIL'],
+                'ALTERNATIVE', ['BOUNDARY', 'b2'], 'NIL', 'NIL',
+            ],
+            ['APPLICATION', 'PDF', ['NAME', 'x.pdf'], 'NIL', 'NIL', 'BASE64', 4000, 'NIL', ['ATTACHMENT', ['FILENAME*', "utf-8''Rechnung%20M%C3%A4rz.pdf"]], 'NIL'],
+            ['IMAGE', 'PNG', 'NIL', '<logo>', 'NIL', 'BASE64', 2000, 'NIL', ['INLINE', 'NIL'], 'NIL'],
+            'MIXED', ['BOUNDARY', 'b1'], 'NIL', 'NIL',
+        ];
+    }
+
+    public function test_it_numbers_nested_parts_and_separates_attachments(): void
+    {
+        $parts = MimeStructure::parts($this->structure());
+
+        $this->assertSame(['1.1', '1.2', '2', '3'], array_column($parts, 'section'));
+
+        $body = MimeStructure::bodyPart($parts);
+        $this->assertSame('1.2', $body['section']);
+        $this->assertSame('base64', $body['encoding']);
+        $this->assertSame('utf-8', $body['charset']);
+
+        $attachments = MimeStructure::attachments($parts);
+        $this->assertSame(['2', '3'], array_column($attachments, 'section'));
+        $this->assertSame('Rechnung März.pdf', $attachments[0]['name']);
+        $this->assertSame('application/pdf', $attachments[0]['mime']);
+        $this->assertSame(4000, $attachments[0]['size']);
+        $this->assertNull($attachments[1]['name']);
+    }
+
+    public function test_single_part_messages_use_section_one(): void
+    {
+        $parts = MimeStructure::parts(['TEXT', 'PLAIN', ['CHARSET', 'us-ascii'], 'NIL', 'NIL', '7BIT', 42, 2]);
+
+        $this->assertCount(1, $parts);
+        $this->assertSame('1', $parts[0]['section']);
+        $this->assertFalse($parts[0]['attachment']);
+        $this->assertSame([], MimeStructure::attachments($parts));
+    }
+
+    public function test_it_decodes_encoded_filenames(): void
+    {
+        $parts = MimeStructure::parts(['APPLICATION', 'OCTET-STREAM', ['NAME', '=?UTF-8?B?w5xiZXJzaWNodC5kb2N4?='], 'NIL', 'NIL', 'BASE64', 10]);
+
+        $this->assertSame('Übersicht.docx', $parts[0]['name']);
+    }
+
+    public function test_text_is_decoded_and_converted_to_utf8(): void
+    {
+        $this->assertSame('Grüße', MimeStructure::text('Gr=FC=DFe', 'quoted-printable', 'iso-8859-1'));
+        $this->assertSame('Grüße', MimeStructure::text(base64_encode('Grüße'), 'base64', 'utf-8'));
+        $this->assertSame("\x89PNG", MimeStructure::decode(base64_encode("\x89PNG"), 'base64'));
+    }
+}
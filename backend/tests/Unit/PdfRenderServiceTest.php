@@ -0,0 +1,39 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Services\PdfRenderService;
+use Tests\TestCase;
+
+class PdfRenderServiceTest extends TestCase
+{
+    public function test_content_hash_depends_on_html_paper_and_options_but_not_option_order(): void
+    {
+        $service = new PdfRenderService();
+        $hash = $service->contentHash('<p>A</p>', ['a' => 1, 'b' => 2]);
+
+        $this->assertSame($hash, $service->contentHash('<p>A</p>', ['b' => 2, 'a' => 1]));
+        $this->assertNotSame($hash, $service->contentHash('<p>B</p>', ['a' => 1, 'b' => 2]));
+        $this->assertNotSame($hash, $service->contentHash('<p>A</p>', ['a' => 1, 'b' => 2], 'a4', 'landscape'));
+        $this->assertSame(64, strlen($hash));
+    }
+
+    public function test_cache_path_is_sharded_by_hash_prefix(): void
+    {
+        $hash = str_repeat('ab', 32);
+
+        $this->assertSame("pdf_cache/ab/{$hash}.pdf", (new PdfRenderService())->cachePath($hash));
+    }
+
+    public function test_asset_data_uri_encodes_file_and_ignores_missing_files(): void
+    {
+        $path = tempnam(sys_get_temp_dir(), 'logo') . '.png';
+        file_put_contents($path, 'png-bytes');
+
+        $this->assertSame('data:image/png;base64,' . base64_encode('png-bytes'), PdfRenderService::assetDataUri($path));
+        $this->assertNull(PdfRenderService::assetDataUri($path . '.missing'));
+        $this->assertNull(PdfRenderService::assetDataUri(null));
+
+        unlink($path);
+    }
+}
@@ -0,0 +1,36 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Models\Project;
+use Tests\TestCase;
+
+class ProjectLoadingProfileTest extends TestCase
+{
+    public function test_unknown_view_falls_back_to_full_default_profile(): void
+    {
+        $project = new Project();
+
+        $this->assertSame($project->getDefaultWith(), $project->getDefaultWith('does-not-exist'));
+        $this->assertContains('files.uploader', $project->getDefaultWith());
+    }
+
+    public function test_list_profile_uses_aggregates_instead_of_nested_collections(): void
+    {
+        $profile = (new Project())->getLoadingProfile('list');
+
+        $this->assertNotContains('files.uploader', $profile['with']);
+        $this->assertNotContains('payments', $profile['with']);
+        $this->assertSame(['files'], $profile['count']);
+        $this->assertSame(['payments' => 'amount'], $profile['sum']);
+    }
+
+    public function test_select_profile_keeps_cursor_and_relation_key_columns(): void
+    {
+        $columns = (new Project())->getLoadingProfile('select')['columns'];
+
+        foreach (Project::REQUIRED_COLUMNS as $column) {
+            $this->assertContains($column, $columns);
+        }
+    }
+}
@@ -0,0 +1,122 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Models\Project;
+use App\Services\ProjectRevenueRollupService;
+use Illuminate\Support\Facades\DB;
+use Tests\Concerns\MigratesTables;
+use Tests\TestCase;
+
+class ProjectRevenueRollupServiceTest extends TestCase
+{
+    use MigratesTables;
+
+    public function test_it_builds_bucket_from_raw_project_attributes(): void
+    {
+        $bucket = (new ProjectRevenueRollupService())->bucketFor([
+            'tenant_id' => 3,
+            'created_at' => '2026-04-08 14:30:00',
+            'target_lang_id' => 7,
+            'customer_id' => null,
+            'price_total' => '120.50',
+            'partner_cost_net' => '80.00',
+        ]);
+
+        $this->assertSame([
+            'tenant_id' => 3,
+            'day' => '2026-04-08',
+            'target_lang_id' => 7,
+            'customer_id' => 0,
+        ], $bucket['keys']);
+        $this->assertSame('2026-04', $bucket['month']);
+        $this->assertSame(120.5, $bucket['revenue']);
+        $this->assertSame(80.0, $bucket['partner_cost']);
+    }
+
+    public function test_it_skips_projects_without_tenant_or_timestamp(): void
+    {
+        $service = new ProjectRevenueRollupService();
+
+        $this->assertNull($service->bucketFor(['tenant_id' => 3, 'price_total' => 10]));
+        $this->assertNull($service->bucketFor(['created_at' => '2026-04-08 14:30:00']));
+    }
+
+    public function test_rebuild_aggregates_projects_per_bucket(): void
+    {
+        $this->migrateTables('projects', 'project_revenue_rollups');
+
+        $this->project(3, '2026-04-08 09:00:00', 120.50, 80.00);
+        $this->project(3, '2026-04-08 17:00:00', 30.00, 10.00);
+        $this->project(3, '2026-04-09 10:00:00', 50.00, 20.00, customerId: 5);
+        $this->project(4, '2026-04-08 10:00:00', 999.00, 0.00);
+
+        $this->assertSame(2, (new ProjectRevenueRollupService())->rebuild(3));
+
+        $this->assertSame([
+            '2026-04-08|2026-04|0|150.5|90|2',
+            '2026-04-09|2026-04|5|50|20|1',
+        ], $this->rollup(3));
+    }
+
+    public function test_bulk_deleted_projects_are_removed_from_the_rollup(): void
+    {
+        $this->migrateTables('projects', 'project_revenue_rollups');
+
+        $service = new ProjectRevenueRollupService();
+        $first = $this->project(3, '2026-04-08 09:00:00', 120.50, 80.00);
+        $second = $this->project(3, '2026-04-08 17:00:00', 30.00, 10.00);
+        $other = $this->project(3, '2026-04-09 10:00:00', 50.00, 20.00, customerId: 5);
+        $service->rebuild(3);
+
+        // Wie ProjectController::bulkDelete: Löschen per Query, Rollup in derselben Transaktion
+        DB::transaction(function () use ($service, $first, $second, $other) {
+            $projects = Project::whereIn('id', [$first, $other])
+                ->get(array_merge(['id'], ProjectRevenueRollupService::TRACKED_FIELDS));
+
+            Project::whereIn('id', $projects->modelKeys())->delete();
+            $service->recordDeletedMany($projects);
+        });
+
+        $this->assertSame([
+            '2026-04-08|2026-04|0|30|10|1',
+            '2026-04-09|2026-04|5|0|0|0',
+        ], $this->rollup(3));
+
+        // Inkrementeller Stand entspricht einem Neuaufbau (bis auf geleerte Buckets)
+        $service->rebuild(3);
+        $this->assertSame(['2026-04-08|2026-04|0|30|10|1'], $this->rollup(3));
+    }
+
+    private function project(int $tenantId, string $createdAt, float $price, float $partnerCost, ?int $customerId = null): int
+    {
+        return DB::table('projects')->insertGetId([
+            'tenant_id' => $tenantId,
+            'customer_id' => $customerId,
+            'price_total' => $price,
+            'partner_cost_net' => $partnerCost,
+            'created_at' => $createdAt,
+            'updated_at' => $createdAt,
+        ]);
+    }
+
+    /**
+     * Rollup-Zeilen als "day|month|customer|revenue|partner_cost|jobs"
+     */
+    private function rollup(int $tenantId): array
+    {
+        return DB::table(ProjectRevenueRollupService::TABLE)
+            ->where('tenant_id', $tenantId)
+            ->orderBy('day')
+            ->get()
+            ->map(fn($row) => implode('|', [
+                $row->day,
+                $row->month,
+                $row->customer_id,
+                (float) $row->revenue,
+                (float) $row->partner_cost,
+                $row->job_count,
+            ]))
+            ->all();
+    }
+}
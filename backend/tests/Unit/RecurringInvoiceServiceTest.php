@@ -0,0 +1,116 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Services\RecurringInvoiceService;
+use Illuminate\Support\Carbon;
+use Illuminate\Support\Facades\Cache;
+use Illuminate\Support\Facades\DB;
+use Tests\Concerns\MigratesTables;
+use Tests\TestCase;
+
+class RecurringInvoiceServiceTest extends TestCase
+{
+    use MigratesTables;
+
+    protected function setUp(): void
+    {
+        parent::setUp();
+
+        Carbon::setTestNow('2026-10-17 12:00:00');
+
+        $this->migrateTables(
+            'customers', 'recurring_invoices', 'invoices', 'invoice_items',
+            'sequence_counters', 'tenant_settings', 'activity_log'
+        );
+    }
+
+    protected function tearDown(): void
+    {
+        Carbon::setTestNow();
+
+        parent::tearDown();
+    }
+
+    public function test_process_tenant_creates_due_invoices_and_advances_the_schedule(): void
+    {
+        $customer = DB::table('customers')->insertGetId(['tenant_id' => 1, 'company_name' => 'Muster GmbH', 'email' => 'rechnung@muster.de']);
+
+        $issued = $this->recurring(nextRun: '2026-10-17', autoIssue: true, customerId: $customer, limit: 1);
+        $draft = $this->recurring(nextRun: '2026-10-01');
+        $notDue = $this->recurring(nextRun: '2026-10-18');
+        $paused = $this->recurring(nextRun: '2026-10-01', status: 'paused');
+        $otherTenant = $this->recurring(nextRun: '2026-10-01', tenantId: 2);
+
+        $result = (new RecurringInvoiceService())->processTenant(1);
+
+        $this->assertFalse($result['skipped']);
+        $this->assertSame(2, $result['created']);
+        $this->assertSame(0, $result['failed']);
+
+        $invoices = DB::table('invoices')->get()->keyBy('recurring_invoice_id');
+        $this->assertSame([$issued, $draft], $invoices->keys()->map(fn($id) => (int) $id)->sort()->values()->all());
+        $this->assertSame([(int) $invoices[$issued]->id], $result['issued_ids']);
+
+        // Nur die direkt ausgestellte Rechnung erhält eine Nummer
+        $this->assertSame('issued', $invoices[$issued]->status);
+        $this->assertSame('RE-26-0001', $invoices[$issued]->invoice_number);
+        $this->assertSame('Muster GmbH', $invoices[$issued]->snapshot_customer_name);
+        $this->assertSame('2026-10-31', substr($invoices[$issued]->due_date, 0, 10));
+        $this->assertSame('draft', $invoices[$draft]->status);
+        $this->assertNull($invoices[$draft]->invoice_number);
+        $this->assertSame(2, DB::table('invoice_items')->count());
+
+        $schedule = DB::table('recurring_invoices')->get()->keyBy('id');
+        $this->assertSame('2026-11-17', substr($schedule[$issued]->next_run_at, 0, 10));
+        $this->assertSame('paused', $schedule[$issued]->status);
+        $this->assertSame(1, (int) $schedule[$draft]->occurrences_count);
+        $this->assertSame('active', $schedule[$draft]->status);
+        foreach ([$notDue, $paused, $otherTenant] as $id) {
+            $this->assertSame(0, (int) $schedule[$id]->occurrences_count);
+        }
+
+        // Zweiter Lauf am selben Tag: nichts mehr fällig
+        $this->assertSame(0, (new RecurringInvoiceService())->processTenant(1)['created']);
+        $this->assertSame(2, DB::table('invoices')->count());
+    }
+
+    public function test_process_tenant_is_skipped_while_another_run_holds_the_lock(): void
+    {
+        $this->recurring(nextRun: '2026-10-01');
+
+        $lock = Cache::lock('recurring-run:1', 60);
+        $this->assertTrue($lock->get());
+
+        try {
+            $result = (new RecurringInvoiceService())->processTenant(1);
+        } finally {
+            $lock->release();
+        }
+
+        $this->assertTrue($result['skipped']);
+        $this->assertSame(0, $result['created']);
+        $this->assertSame(0, DB::table('invoices')->count());
+
+        $this->assertSame(1, (new RecurringInvoiceService())->processTenant(1)['created']);
+    }
+
+    private function recurring(string $nextRun, bool $autoIssue = false, ?int $customerId = null, ?int $limit = null, string $status = 'active', int $tenantId = 1): int
+    {
+        return DB::table('recurring_invoices')->insertGetId([
+            'tenant_id' => $tenantId,
+            'name' => 'Wartung',
+            'interval' => 'monthly',
+            'next_run_at' => $nextRun,
+            'occurrences_limit' => $limit,
+            'status' => $status,
+            'auto_issue' => $autoIssue,
+            'due_days' => 14,
+            'template_customer_id' => $customerId,
+            'template_items' => json_encode([['description' => 'Wartungspauschale', 'quantity' => 1, 'unit' => 'Pauschal']]),
+            'template_amount_net_cents' => 10000,
+            'template_amount_tax_cents' => 1900,
+            'template_amount_gross_cents' => 11900,
+        ]);
+    }
+}
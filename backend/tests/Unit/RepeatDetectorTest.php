@@ -0,0 +1,39 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Support\RepeatDetector;
+use PHPUnit\Framework\TestCase;
+
+class RepeatDetectorTest extends TestCase
+{
+    public function test_bloom_false_positives_are_not_counted_as_repetitions(): void
+    {
+        // 8 Bit Filter: praktisch jeder Schlüssel ist ein Filtertreffer
+        $keys = array_map(fn($i) => "segment-{$i}", range(1, 200));
+        $keys[] = 'segment-7';
+        $keys[] = 'segment-7';
+        $keys[] = 'segment-42';
+
+        $detector = new RepeatDetector(1);
+        foreach ($keys as $key) {
+            $detector->note($key);
+        }
+
+        $repeated = array_values(array_filter($keys, fn($key) => $detector->repeated($key)));
+
+        $this->assertTrue($detector->hasCandidates());
+        $this->assertSame(['segment-7', 'segment-7', 'segment-42'], $repeated);
+    }
+
+    public function test_unique_keys_need_no_second_pass(): void
+    {
+        $detector = new RepeatDetector();
+        foreach (['a', 'b', 'c'] as $key) {
+            $detector->note($key);
+        }
+
+        $this->assertFalse($detector->hasCandidates());
+        $this->assertFalse($detector->repeated('a'));
+    }
+}
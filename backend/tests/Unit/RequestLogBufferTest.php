@@ -0,0 +1,175 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Http\Middleware\LogApiRequests;
+use App\Models\ApiRequestMetric;
+use App\Services\RequestLogBuffer;
+use App\Support\Histogram;
+use Illuminate\Http\Request;
+use Illuminate\Support\Facades\DB;
+use Illuminate\Support\Facades\File;
+use Illuminate\Support\Facades\Schema;
+use Symfony\Component\HttpFoundation\Response;
+use Tests\Concerns\MigratesTables;
+use Tests\TestCase;
+
+class RequestLogBufferTest extends TestCase
+{
+    use MigratesTables;
+
+    protected string $spool;
+
+    protected function setUp(): void
+    {
+        parent::setUp();
+
+        $this->spool = sys_get_temp_dir() . '/request-log-test-' . uniqid();
+        config([
+            'logging.api_requests.spool_path' => $this->spool,
+            'logging.api_requests.flush_bytes' => 1, // jede Spool-Datei sofort übernehmen
+        ]);
+    }
+
+    protected function tearDown(): void
+    {
+        File::deleteDirectory($this->spool);
+
+        parent::tearDown();
+    }
+
+    public function test_histogram_percentiles_interpolate_within_buckets(): void
+    {
+        $histogram = Histogram::latency();
+        foreach (range(1, 100) as $ms) {
+            $histogram->add($ms);
+        }
+
+        $this->assertSame(100, $histogram->total());
+        $this->assertEqualsWithDelta(50.0, $histogram->percentile(50), 0.01);
+        $this->assertEqualsWithDelta(95.0, $histogram->percentile(95), 0.01);
+        $this->assertEqualsWithDelta(99.0, $histogram->percentile(99), 0.01);
+        $this->assertNull(Histogram::latency()->percentile(95));
+    }
+
+    public function test_histograms_merge_from_stored_counts(): void
+    {
+        $first = Histogram::latency();
+        $first->add(40);
+        $first->add(2500);
+
+        // JSON-Rundreise wie in api_request_metrics (Objekt-Schlüssel werden Strings)
+        $stored = json_decode(json_encode((object) $first->counts()), true);
+
+        $merged = Histogram::latency($stored);
+        $merged->add(90000);
+
+        $this->assertSame(3, $merged->total());
+        $this->assertSame(2, $merged->countAbove(2000));
+        $this->assertSame(1, $merged->countAbove(60000));
+        $this->assertSame(60000.0, $merged->percentile(100));
+    }
+
+    public function test_errors_and_slow_requests_are_never_sampled_out(): void
+    {
+        config([
+            'logging.api_requests.sample_rate' => 0.0,
+            'logging.api_requests.sample_below_ms' => 1000,
+        ]);
+
+        $this->assertFalse(RequestLogBuffer::shouldLog(200, 35.0));
+        $this->assertTrue(RequestLogBuffer::shouldLog(404, 35.0));
+        $this->assertTrue(RequestLogBuffer::shouldLog(500, 35.0));
+        $this->assertTrue(RequestLogBuffer::shouldLog(200, 1200.0));
+
+        config(['logging.api_requests.sample_rate' => 1.0]);
+
+        $this->assertTrue(RequestLogBuffer::shouldLog(200, 35.0));
+    }
+
+    public function test_buffered_request_is_written_to_the_log_table_and_rollup(): void
+    {
+        $this->migrateTables('api_request_logs', 'api_request_metrics');
+
+        $request = Request::create('/api/projects', 'POST', ['name' => 'Test', 'password' => 'secret']);
+        (new LogApiRequests())->handle($request, fn() => new Response('{"message":"Kaputt"}', 500));
+
+        RequestLogBuffer::flush();
+
+        $log = DB::table('api_request_logs')->first();
+        $this->assertNotNull($log);
+        $this->assertSame(500, (int) $log->status_code);
+        $this->assertSame('Kaputt', $log->error_message);
+        $this->assertStringNotContainsString('secret', $log->request_body);
+        // Datenbankformat, kein ISO-8601 aus der JSON-Serialisierung (MySQL strict: Fehler 1292)
+        $this->assertMatchesRegularExpression('/^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$/', $log->created_at);
+
+        $total = ApiRequestMetric::totals()->first();
+        $this->assertSame(1, $total->requests);
+        $this->assertSame(1, $total->status_5xx);
+        $this->assertSame([], glob($this->spool . '/*'));
+    }
+
+    public function test_rejected_rows_do_not_block_the_batch_and_end_in_dead_letter(): void
+    {
+        $this->migrateTables('tenants', 'users', 'api_request_logs', 'activity_log', 'api_request_metrics');
+        Schema::enableForeignKeyConstraints();
+
+        // Benutzer zwischen Request und Übernahme gelöscht: Fremdschlüssel schlägt fehl
+        RequestLogBuffer::push('api', $this->apiRow(['user_id' => 999]));
+        RequestLogBuffer::push('api', $this->apiRow());
+        RequestLogBuffer::push('activity', $this->activityRow());
+        RequestLogBuffer::metric('GET', 'api/customers/{id}', 200, 12.5, 2048, true);
+        RequestLogBuffer::flush();
+
+        $this->assertSame(1, DB::table('api_request_logs')->count());
+        $this->assertSame(1, DB::table('activity_log')->count());
+        $this->assertSame(1, ApiRequestMetric::totals()->first()->requests);
+
+        // Nur die abgelehnte Zeile wird wiederholt, bis sie in dead-letter/ landet
+        foreach (range(2, RequestLogBuffer::MAX_ATTEMPTS) as $attempt) {
+            $this->assertCount(1, $retry = glob($this->spool . '/*.draining'));
+            touch($retry[0], time() - RequestLogBuffer::STALE_CLAIM_SECONDS - 1);
+            RequestLogBuffer::drain();
+        }
+
+        $this->assertSame([], glob($this->spool . '/*.draining'));
+        $deadLetter = glob($this->spool . '/' . RequestLogBuffer::DEAD_LETTER_DIRECTORY . '/*.ndjson');
+        $this->assertCount(1, $deadLetter);
+        $this->assertSame(['api', RequestLogBuffer::MAX_ATTEMPTS], [
+            json_decode(file_get_contents($deadLetter[0]), true)[0],
+            json_decode(file_get_contents($deadLetter[0]), true)[2],
+        ]);
+        $this->assertSame(1, DB::table('api_request_logs')->count());
+        $this->assertSame(1, DB::table('activity_log')->count());
+    }
+
+    private function apiRow(array $overrides = []): array
+    {
+        $now = now()->toDateTimeString();
+
+        return $overrides + [
+            'method' => 'GET',
+            'url' => 'http://localhost/api/customers/1',
+            'endpoint' => 'api/customers/1',
+            'status_code' => 200,
+            'duration_ms' => 12.5,
+            'user_id' => null,
+            'created_at' => $now,
+            'updated_at' => $now,
+        ];
+    }
+
+    private function activityRow(): array
+    {
+        $now = now()->toDateTimeString();
+
+        return [
+            'log_name' => 'default',
+            'description' => 'DSGVO: Zugriff auf personenbezogene Daten (customer)',
+            'properties' => json_encode(['resource' => 'customer']),
+            'created_at' => $now,
+            'updated_at' => $now,
+        ];
+    }
+}
@@ -0,0 +1,95 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Models\SequenceCounter;
+use Illuminate\Support\Facades\DB;
+use Tests\Concerns\MigratesTables;
+use Tests\TestCase;
+
+class SequenceCounterTest extends TestCase
+{
+    use MigratesTables;
+
+    protected function setUp(): void
+    {
+        parent::setUp();
+
+        $this->migrateTables('sequence_counters');
+    }
+
+    public function test_counter_is_seeded_once_from_existing_data(): void
+    {
+        $seeded = 0;
+        $seed = function () use (&$seeded) {
+            $seeded++;
+            return 41;
+        };
+
+        $this->assertSame(42, SequenceCounter::next(1, 'invoice:2026', $seed));
+        $this->assertSame(43, SequenceCounter::next(1, 'invoice:2026', $seed));
+        $this->assertSame(1, $seeded);
+
+        // Andere Tenants und Bereiche zählen getrennt
+        $this->assertSame(1, SequenceCounter::next(2, 'invoice:2026'));
+        $this->assertSame(1, SequenceCounter::next(1, 'invoice:2027'));
+    }
+
+    public function test_rolled_back_number_is_handed_out_again(): void
+    {
+        SequenceCounter::next(1, 'invoice:2026', fn() => 6);
+
+        try {
+            DB::transaction(function () {
+                $this->assertSame(8, SequenceCounter::next(1, 'invoice:2026'));
+                throw new \RuntimeException('Beleg konnte nicht gespeichert werden');
+            });
+        } catch (\RuntimeException) {
+        }
+
+        $this->assertSame(8, SequenceCounter::next(1, 'invoice:2026'));
+    }
+
+    public function test_rolled_back_first_use_seeds_again(): void
+    {
+        try {
+            DB::transaction(function () {
+                SequenceCounter::next(1, 'customers.code', fn() => 3);
+                throw new \RuntimeException('Abbruch');
+            });
+        } catch (\RuntimeException) {
+        }
+
+        $this->assertSame(0, SequenceCounter::count());
+        $this->assertSame(6, SequenceCounter::next(1, 'customers.code', fn() => 5));
+    }
+
+    public function test_peek_does_not_consume_a_number(): void
+    {
+        $this->assertSame(10, SequenceCounter::peek(1, 'invoice:2026', fn() => 9));
+        $this->assertSame(0, SequenceCounter::count());
+
+        $this->assertSame(10, SequenceCounter::next(1, 'invoice:2026', fn() => 9));
+        $this->assertSame(11, SequenceCounter::peek(1, 'invoice:2026', fn() => 9));
+    }
+
+    public function test_raise_without_counter_row_leaves_seeding_to_next(): void
+    {
+        // Noch kein Zähler: raise() legt nichts an, next() übernimmt den Bestand (inkl. manuellem Code)
+        SequenceCounter::raise(1, 'languages.code', 120);
+
+        $this->assertSame(0, SequenceCounter::count());
+        $this->assertSame(121, SequenceCounter::next(1, 'languages.code', fn() => 120));
+    }
+
+    public function test_raise_only_moves_the_counter_forward(): void
+    {
+        SequenceCounter::next(1, 'languages.code', fn() => 4);
+
+        SequenceCounter::raise(1, 'languages.code', 50);
+        $this->assertSame(51, SequenceCounter::next(1, 'languages.code'));
+
+        SequenceCounter::raise(1, 'languages.code', 10);
+        $this->assertSame(52, SequenceCounter::next(1, 'languages.code'));
+    }
+}
@@ -0,0 +1,34 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Support\StreamingZipWriter;
+use PHPUnit\Framework\TestCase;
+
+class StreamingZipWriterTest extends TestCase
+{
+    public function test_streamed_archive_can_be_read_by_zip_archive(): void
+    {
+        $path = tempnam(sys_get_temp_dir(), 'zip');
+        $out = fopen($path, 'wb');
+
+        $zip = new StreamingZipWriter($out);
+        $zip->beginFile('invoices.csv');
+        $zip->write("\xEF\xBB\xBF");
+        foreach (range(1, 500) as $i) {
+            $zip->write("RE-2026-{$i};Rechnung;issued\n");
+        }
+        $zip->addFile('index.xml', '<DataDescription/>');
+        $zip->finish();
+        fclose($out);
+
+        $archive = new \ZipArchive();
+        $this->assertTrue($archive->open($path, \ZipArchive::CHECKCONS));
+        $this->assertSame(2, $archive->numFiles);
+        $this->assertStringContainsString('RE-2026-500;Rechnung;issued', $archive->getFromName('invoices.csv'));
+        $this->assertSame('<DataDescription/>', $archive->getFromName('index.xml'));
+        $archive->close();
+
+        @unlink($path);
+    }
+}
@@ -0,0 +1,105 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Support\TextStatistics;
+use Tests\TestCase;
+
+class TextStatisticsTest extends TestCase
+{
+    public function test_it_counts_words_per_script(): void
+    {
+        $this->assertSame(
+            ['spaced' => 5, 'ideographic' => 0, 'unspaced' => 0],
+            TextStatistics::countWords("Don't re-use 3,5 % of e-mails.")
+        );
+
+        // Jedes Han-/Kana-Zeichen zählt als ein Wort
+        $this->assertSame(
+            ['spaced' => 1, 'ideographic' => 5, 'unspaced' => 0],
+            TextStatistics::countWords('翻訳会社 の PDF。')
+        );
+    }
+
+    public function test_results_do_not_depend_on_chunk_boundaries(): void
+    {
+        $text = "Erster Satz hier. Zweiter Satz folgt!\nDritter Absatz ohne Ende";
+
+        $whole = new TextStatistics();
+        $whole->feed($text);
+
+        $chunked = new TextStatistics();
+        foreach (str_split($text, 7) as $chunk) {
+            $chunked->feed($chunk);
+        }
+
+        $expected = $whole->finish();
+        $actual = $chunked->finish();
+
+        $this->assertSame(10, $expected['words']);
+        $this->assertSame(3, $expected['segments']);
+        $this->assertSame($expected['words'], $actual['words']);
+        $this->assertSame($expected['chars'], $actual['chars']);
+        $this->assertSame(stream_get_contents($expected['fingerprints']), stream_get_contents($actual['fingerprints']));
+    }
+
+    public function test_it_reports_repeated_segments(): void
+    {
+        $statistics = new TextStatistics();
+        $statistics->feed("Bitte beachten Sie die Hinweise.\nAnderer Satz.\nbitte  beachten Sie die Hinweise.\n");
+
+        $result = $statistics->finish();
+
+        $this->assertSame(3, $result['segments']);
+        $this->assertSame(1, $result['repeated_segments']);
+        $this->assertSame(5, $result['repeated_words']);
+    }
+
+    public function test_similar_segments_have_close_simhashes(): void
+    {
+        $a = TextStatistics::simhash(TextStatistics::normalize('Die Lieferung erfolgt innerhalb von zehn Werktagen nach Auftragseingang.'));
+        $b = TextStatistics::simhash(TextStatistics::normalize('Die Lieferung erfolgt innerhalb von zwölf Werktagen nach Auftragseingang.'));
+        $c = TextStatistics::simhash(TextStatistics::normalize('Completely unrelated sentence about invoices and payment terms.'));
+
+        $this->assertLessThan(
+            TextStatistics::hammingDistance($a, $c),
+            TextStatistics::hammingDistance($a, $b)
+        );
+    }
+
+    public function test_fingerprints_round_trip_through_the_stream(): void
+    {
+        $statistics = new TextStatistics();
+        $statistics->feed("Die Lieferung erfolgt in zehn Tagen.\nDanke!\n");
+
+        $fingerprints = iterator_to_array(TextStatistics::readFingerprints($statistics->finish()['fingerprints']));
+
+        $this->assertCount(2, $fingerprints);
+        $this->assertSame(hash('xxh64', 'die lieferung erfolgt in zehn tagen.', true), $fingerprints[0][0]);
+        $this->assertSame(6, $fingerprints[0][1]);
+        $this->assertSame(TextStatistics::simhash('die lieferung erfolgt in zehn tagen.'), $fingerprints[0][2]);
+        $this->assertSame(1, $fingerprints[1][1]);
+        $this->assertNull($fingerprints[1][2]);
+    }
+
+    public function test_memory_does_not_grow_with_the_number_of_segments(): void
+    {
+        $statistics = new TextStatistics();
+        $before = memory_get_usage();
+
+        for ($i = 0; $i < 200; $i++) {
+            $chunk = '';
+            for ($j = 0; $j < 500; $j++) {
+                $chunk .= "S{$i}x{$j} fertig.\n";
+            }
+            $statistics->feed($chunk);
+        }
+
+        // 100.000 verschiedene Segmente: Bloom-Filter des RepeatDetector (1 MiB) und Fingerabdruck-Puffer (1 MiB, Rest auf Platte)
+        $this->assertLessThan(4 * 1048576, memory_get_usage() - $before);
+
+        $result = $statistics->finish();
+        $this->assertSame(100000, $result['segments']);
+        $this->assertSame(0, $result['repeated_segments']);
+    }
+}
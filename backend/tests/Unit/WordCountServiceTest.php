@@ -0,0 +1,153 @@
+<?php
+
+namespace Tests\Unit;
+
+use App\Jobs\AnalyzeProjectFile;
+use App\Models\FileAnalysis;
+use App\Models\ProjectFile;
+use App\Services\WordCountService;
+use App\Support\RtfTextStream;
+use App\Support\TextStatistics;
+use Illuminate\Support\Facades\DB;
+use Illuminate\Support\Facades\Storage;
+use Tests\Concerns\MigratesTables;
+use Tests\TestCase;
+
+class WordCountServiceTest extends TestCase
+{
+    use MigratesTables;
+
+    private array $tempFiles = [];
+
+    protected function tearDown(): void
+    {
+        array_map('unlink', array_filter($this->tempFiles, 'is_file'));
+        parent::tearDown();
+    }
+
+    public function test_it_streams_docx_text_without_deleted_runs(): void
+    {
+        $path = $this->zip('docx', [
+            'word/document.xml' => '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+                . '<w:p><w:r><w:t>Hallo</w:t></w:r><w:r><w:tab/><w:t xml:space="preserve">Welt </w:t></w:r>'
+                . '<w:del><w:r><w:delText>gelöscht</w:delText></w:r></w:del><w:r><w:t>heute</w:t></w:r></w:p>'
+                . '<w:p><w:r><w:t>Zweiter Absatz</w:t></w:r></w:p></w:body></w:document>',
+            'word/styles.xml' => '<w:styles xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:t>Ignoriert</w:t></w:styles>',
+        ]);
+
+        $this->assertSame("Hallo Welt heute\nZweiter Absatz\n", $this->text($path, 'docx'));
+    }
+
+    public function test_it_streams_pptx_slides_in_natural_order(): void
+    {
+        $slide = fn($text) => '<p:sld xmlns:p="p" xmlns:a="a"><p:txBody><a:p><a:r><a:t>' . $text . '</a:t></a:r></a:p></p:txBody></p:sld>';
+
+        $path = $this->zip('pptx', [
+            'ppt/slides/slide10.xml' => $slide('Zehn'),
+            'ppt/slides/slide2.xml' => $slide('Zwei'),
+        ]);
+
+        $this->assertSame("Zwei\nZehn\n", $this->text($path, 'pptx'));
+    }
+
+    public function test_it_decodes_rtf_text_and_skips_destinations(): void
+    {
+        $path = $this->temp('rtf', '{\rtf1\ansi\ansicpg1252{\fonttbl{\f0 Arial;}}{\*\generator Writer;}'
+            . '\f0 Gr\'fc\'dfe aus \u8364?\par Zeile{\b zwei}\line Ende}');
+
+        $text = '';
+        (new RtfTextStream())->read($path, function ($chunk) use (&$text) {
+            $text .= $chunk;
+        });
+
+        $this->assertSame("Grüße aus €\nZeilezwei\nEnde", $text);
+    }
+
+    public function test_it_reads_utf16_text_files(): void
+    {
+        $path = $this->temp('txt', "\xFF\xFE" . mb_convert_encoding('Größe 大', 'UTF-16LE', 'UTF-8'));
+
+        $this->assertSame('Größe 大', $this->text($path, 'txt'));
+    }
+
+    public function test_unreadable_project_file_is_marked_as_failed(): void
+    {
+        $this->migrateTables('project_files', 'file_analyses', 'activity_log');
+        Storage::fake('public');
+        Storage::disk('public')->put('projects/1/kaputt.docx', 'kein ZIP-Paket');
+
+        $id = DB::table('project_files')->insertGetId([
+            'tenant_id' => 1,
+            'project_id' => 1,
+            'path' => 'projects/1/kaputt.docx',
+            'original_name' => 'kaputt.docx',
+            'extension' => 'docx',
+        ]);
+
+        (new AnalyzeProjectFile(ProjectFile::find($id)))->handle(new WordCountService());
+
+        $file = ProjectFile::find($id);
+        $this->assertNull($file->analyzed_at);
+        $this->assertNotNull($file->analysis_failed_at);
+        $this->assertSame('Datei konnte nicht gelesen werden.', $file->analysis_error);
+    }
+
+    public function test_repetition_stats_across_files(): void
+    {
+        Storage::fake('local');
+
+        $first = $this->analysis('first', "Bitte Termin bestätigen.\nDanke schön.");
+        $second = $this->analysis('second', "Bitte Termin bestätigen.\nViele Grüße.");
+
+        $stats = (new WordCountService())->repetitionStats([$first, $second]);
+
+        $this->assertSame(10, $stats['total_words']);
+        $this->assertSame(3, $stats['words']['repetition']);
+        $this->assertSame(7, $stats['words']['new']);
+        $this->assertSame(1, $stats['segments']['repetition']);
+    }
+
+    private function analysis(string $name, string $text): FileAnalysis
+    {
+        $statistics = new TextStatistics();
+        $statistics->feed($text);
+
+        $sha256 = hash('sha256', $name);
+        FileAnalysis::storeFingerprints($sha256, WordCountService::ENGINE_VERSION, $statistics->finish()['fingerprints']);
+
+        return new FileAnalysis(['sha256' => $sha256, 'engine_version' => WordCountService::ENGINE_VERSION]);
+    }
+
+    private function text(string $path, string $format): string
+    {
+        $text = '';
+        (new WordCountService())->streamText($path, $format, function ($chunk) use (&$text) {
+            $text .= $chunk;
+        });
+
+        return $text;
+    }
+
+    private function zip(string $extension, array $entries): string
+    {
+        $path = $this->temp($extension, '');
+        unlink($path);
+
+        $zip = new \ZipArchive();
+        $zip->open($path, \ZipArchive::CREATE);
+        foreach ($entries as $name => $content) {
+            $zip->addFromString($name, $content);
+        }
+        $zip->close();
+
+        return $path;
+    }
+
+    private function temp(string $extension, string $content): string
+    {
+        $path = tempnam(sys_get_temp_dir(), 'wc') . '.' . $extension;
+        file_put_contents($path, $content);
+
+        return $this->tempFiles[] = $path;
+    }
+}
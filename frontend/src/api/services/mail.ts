@@ -42,6 +42,22 @@ export const mailService = {
         const response = await api.post('/mails/sync');
         return response.data;
     },
+    getSyncStatus: async (batchId: string) => {
+        const response = await api.get(`/mails/sync/${batchId}`);
+        return response.data;
+    },
+    // Startet den Sync und wartet, bis alle Konten-Jobs abgeschlossen sind
+    syncAndWait: async (intervalMs: number = 2000, maxAttempts: number = 60) => {
+        const started = await mailService.sync();
+        if (!started.batch_id) return started;
+
+        for (let attempt = 0; attempt < maxAttempts; attempt++) {
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+            const status = await mailService.getSyncStatus(started.batch_id);
+            if (status.finished) return status;
+        }
+        return started;
+    },
 
     // E-Mail-Konten
     getAccounts: async () => {
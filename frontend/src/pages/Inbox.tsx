@@ -100,7 +100,7 @@ const CommunicationHub = () => {
 
     // Mutations
     const syncMutation = useMutation({
-        mutationFn: mailService.sync,
+        mutationFn: () => mailService.syncAndWait(),
         onSuccess: () => {
             queryClient.invalidateQueries({ queryKey: ['mails'] });
         },